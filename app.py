@@ -1,52 +1,404 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, make_response, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, make_response, send_file, abort, g, has_request_context
+from flask import before_render_template, template_rendered, Response
 from flask_mail import Mail, Message
 import sqlite3
 import os
 import hashlib
 import secrets
 import logging
+import random
+import threading
+import time
+import psutil
+import contextlib
 import csv
 import io
 import shutil
 import tempfile
-from datetime import datetime, timedelta
+import re
+import mimetypes
+from datetime import date, datetime, timedelta
 from functools import wraps
+from urllib.parse import quote
+from markupsafe import Markup, escape
+from werkzeug.security import safe_join
 from werkzeug.utils import secure_filename
 from config.config import Config
-
-app = Flask(__name__)
+from servicios.asignacion_stock import IndiceStock, ESTRATEGIAS, asignar, asignar_salida
+from servicios.busqueda_productos import IndiceProductos, LIMITE_RESULTADOS
+from servicios.cache_respuestas import CacheRespuestas
+from servicios import bitacora
+from servicios import cambios_stock
+from servicios import conteo_ciclico
+from servicios import carga_masiva
+from servicios import migraciones
+from servicios import assets as paquetes_assets
+from servicios import tabla_columnar
+from servicios import versiones
+from servicios import instrumentacion
+from servicios.metricas import RegistroMetricas, LIMITES_BYTES, exponer_histogramas
+from servicios.consultas_lentas import RegistroConsultasLentas
+from servicios.perfilador import Perfilador
+from servicios.archivo_logs import ArchivoLogs
+from servicios.imagenes import AlmacenImagenes, ImagenInvalida, NOMBRE_VARIANTE
+from servicios.registro import configurar_logging, LOGGER_TRAZAS
+from servicios.escritor import EscritorSerializado, EscrituraOcupada, conexion_lectura
+
+app = Flask(__name__, static_folder=None)  # /static lo sirve servir_archivo
 app.config.from_object(Config)
 
 # Inicializar Flask-Mail
 mail = Mail(app)
 
-# Configuración de logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('admin_operations.log'),
-        logging.StreamHandler()
-    ]
-)
+def _contexto_log():
+    """Campos de la petición en curso para cada registro del log"""
+    if not has_request_context():
+        return None
+    return {'endpoint': request.endpoint, 'ip': request.remote_addr, 'usuario': session.get('admin_username')}
 
 # Configuración de la base de datos
 DATABASE = 'inventario.db'
 
 def get_db_connection():
-    """Obtener conexión a la base de datos - OPTIMIZADA"""
-    conn = sqlite3.connect(DATABASE, timeout=20.0)
-    conn.row_factory = sqlite3.Row
-    
-    # Optimizaciones de rendimiento
-    conn.execute('PRAGMA journal_mode=WAL')  # Better concurrent access
-    conn.execute('PRAGMA busy_timeout=20000')  # 20 second timeout
-    conn.execute('PRAGMA synchronous=NORMAL')  # Faster writes
-    conn.execute('PRAGMA cache_size=10000')  # Larger cache
-    conn.execute('PRAGMA temp_store=MEMORY')  # Use memory for temp tables
-    
+    """Obtener conexión de solo lectura; las escrituras van por el escritor"""
+    inicio = time.perf_counter()
+    conn = conexion_lectura(DATABASE)
+    metrica_conexion.observar(time.perf_counter() - inicio)
     return conn
 
+def _ruta_actual():
+    """Endpoint de la petición en curso (etiqueta de las métricas de escritura)"""
+    return request.endpoint if has_request_context() else None
+
+def _marcar_escritura_ocupada(error):
+    """Recordar que la petición no obtuvo el candado; after_request responde 503"""
+    if has_request_context():
+        g.escritura_ocupada = error
+
+# Cambios de stock en vivo: una lectura de cambios_stock por proceso, repartida a cada cliente SSE
+difusor_cambios = cambios_stock.DifusorCambios(DATABASE, intervalo=Config.EVENTOS_INTERVALO_SEGUNDOS)
+
+# Hilo único para todas las escrituras (agrupa commits concurrentes)
+escritor = EscritorSerializado(
+    DATABASE,
+    presupuesto_espera=Config.ESCRITURA_PRESUPUESTO_SEGUNDOS,
+    presupuestos=Config.ESCRITURA_PRESUPUESTOS_RUTA,
+    obtener_etiqueta=_ruta_actual,
+    al_rechazar=_marcar_escritura_ocupada,
+    reintentar_en=Config.ESCRITURA_REINTENTAR_EN_SEGUNDOS,
+    al_confirmar=difusor_cambios.avisar
+)
+
+# Imágenes de productos: variantes reducidas con el hash del original en el nombre
+IMAGENES_DIR = os.path.join(app.root_path, Config.IMAGENES_DIR)
+
+@app.template_global()
+def url_imagen(producto, variante='completa'):
+    """URL de una variante de la imagen del producto (None si no se ha subido)"""
+    if not producto['imagen']:
+        return None
+    return url_for('imagenes', filename=almacen_imagenes.nombre(producto['imagen'], variante))
+
+# CSS y JS empaquetados con hash en el nombre (scripts/construir_assets.py)
+STATIC_DIR = os.path.join(app.root_path, 'static')
+manifiesto_assets = paquetes_assets.cargar_manifiesto(STATIC_DIR)
+if not manifiesto_assets and paquetes_assets.faltantes_vendor(STATIC_DIR):
+    logging.warning("Faltan Bootstrap y Font Awesome en static/vendor/ y no hay paquetes construidos: "
+                    "se cargan del CDN (sin internet las páginas quedan sin estilos). "
+                    "Ejecuta python scripts/construir_assets.py --descargar")
+
+@app.template_global()
+def assets(paquete):
+    """<link>/<script> de un paquete: el archivo de static/dist/ o, sin construir, sus fuentes"""
+    etiquetas = []
+    for ruta in paquetes_assets.rutas(paquete, manifiesto_assets, STATIC_DIR):
+        url = escape(ruta if '://' in ruta else url_for('static', filename=ruta))
+        if paquete.endswith('.css'):
+            etiquetas.append(f'<link href="{url}" rel="stylesheet">')
+        else:
+            etiquetas.append(f'<script src="{url}"></script>')
+    return Markup('\n'.join(etiquetas))
+
+# Código, plantillas y assets de este despliegue: entra en los ETag para que una versión
+# nueva de la aplicación no conteste 304 con HTML de la anterior
+huella_despliegue = versiones.etiqueta(
+    versiones.huella_archivos([__file__, os.path.join(app.root_path, 'templates')]), manifiesto_assets)
+
+# Índice en memoria de stock por ubicación (para sugerencias de salida)
+indice_stock = IndiceStock(DATABASE, ttl_segundos=Config.INDICE_STOCK_TTL_SEGUNDOS)
+
+# Índice en memoria de código y descripción (búsqueda de productos mientras se escribe)
+indice_productos = IndiceProductos(DATABASE, ttl_segundos=Config.INDICE_PRODUCTOS_TTL_SEGUNDOS)
+
+# Resultados de las consultas agregadas más pedidas, por versión de datos (ver obtener_cacheado)
+cache_respuestas = CacheRespuestas(max_bytes=Config.CACHE_RESPUESTAS_MAX_BYTES,
+                                   ventana_obsoleta=Config.CACHE_RESPUESTAS_VENTANA_OBSOLETA_SEGUNDOS)
+
+def archivar_logs(compactar=True):
+    """Mover a los archivos mensuales los registros viejos, un lote por tarea del escritor"""
+    corte = archivo_logs.corte()
+    total = 0
+    while True:
+        # Cada lote es su propia tarea exclusiva: entre lotes pasan las demás escrituras
+        movidos = escritor.ejecutar(archivo_logs.archivar_lote, corte, exclusiva=True)
+        total += movidos
+        if movidos < archivo_logs.lote:
+            break
+    resultado = {'movidos': total}
+    if total and compactar:
+        compactar_logs(resultado)
+    logging.info(f"Archivado de logs: {total} registros anteriores a {corte} movidos")
+    return resultado
+
+def compactar_logs(resultado=None, forzar=False):
+    """Quitar de la búsqueda de texto lo ya archivado y compactar la base principal"""
+    resultado = {} if resultado is None else resultado
+    escritor.ejecutar(bitacora.reindexar_busqueda, exclusiva=True)
+    resultado.update(escritor.ejecutar(archivo_logs.compactar, forzar, exclusiva=True))
+    return resultado
+
+def _ciclo_archivo_logs():
+    while True:
+        time.sleep(Config.LOGS_ARCHIVO_INTERVALO_HORAS * 3600)
+        try:
+            archivar_logs()
+        except Exception as e:
+            logging.error(f"Error en el archivado automático de logs: {e}")
+
+# Medición de SQL y plantillas por petición (header Server-Timing y trazas muestreadas)
+trazas = logging.getLogger(LOGGER_TRAZAS)
+
+# Lo que escribe en disco (logs, migraciones, imágenes, consultas lentas, perfiles y
+# archivos de logs) se crea en inicializar(): importar app no toca la base ni crea archivos
+registro_logs = None
+almacen_imagenes = None
+archivo_logs = None
+consultas_lentas = None
+perfilador = None
+
+def inicializar():
+    """Preparar la base de datos y los archivos de la aplicación; una vez al arrancar el proceso"""
+    global registro_logs, almacen_imagenes, archivo_logs, consultas_lentas, perfilador
+    if registro_logs is not None:
+        return
+
+    # Configuración de logging: la petición solo encola, un hilo escribe JSON y rota
+    registro_logs = configurar_logging(
+        Config.LOG_DIR,
+        max_bytes=Config.LOG_MAX_BYTES,
+        respaldos=Config.LOG_RESPALDOS,
+        rotar_cada_horas=Config.LOG_ROTAR_CADA_HORAS,
+        comprimir=Config.LOG_COMPRIMIR,
+        cola_maxima=Config.LOG_COLA_MAXIMA,
+        contexto=_contexto_log
+    )
+
+    # Aplicar migraciones de esquema pendientes (si está al día solo se lee PRAGMA user_version)
+    migraciones.migrar_base_datos(DATABASE)
+
+    almacen_imagenes = AlmacenImagenes(
+        IMAGENES_DIR,
+        tamano_maximo=Config.IMAGEN_TAMAÑO_MAXIMO,
+        variantes=Config.IMAGEN_VARIANTES,
+        extensiones=Config.IMAGEN_EXTENSIONES_PERMITIDAS
+    )
+
+    # operation_logs por capas: lo reciente en la base principal, lo viejo en archivos mensuales
+    archivo_logs = ArchivoLogs(
+        Config.LOGS_ARCHIVO_DIR,
+        dias_calientes=Config.LOGS_DIAS_CALIENTES,
+        lote=Config.LOGS_ARCHIVO_LOTE,
+        diccionarios=('tipos_operacion', 'direcciones_ip'),
+        al_archivar=bitacora.al_archivar
+    )
+    # Archivos mensuales creados antes de la bitácora compacta (migración 009) o del visor paginado (010)
+    bitacora.convertir_archivos(DATABASE, archivo_logs)
+    if Config.LOGS_ARCHIVO_INTERVALO_HORAS:
+        threading.Thread(target=_ciclo_archivo_logs, name='archivo-logs', daemon=True).start()
+
+    # Consultas que pasan del umbral, con su plan de ejecución
+    consultas_lentas = RegistroConsultasLentas(
+        Config.CONSULTAS_LENTAS_DB,
+        lambda: conexion_lectura(DATABASE, temporales=True),
+        umbral_ms=Config.CONSULTAS_LENTAS_UMBRAL_MS,
+        max_registros=Config.CONSULTAS_LENTAS_MAX_REGISTROS
+    )
+
+    # Perfiles de peticiones individuales (cProfile o muestreo de pila)
+    perfilador = Perfilador(Config.PERFILES_DIR, max_perfiles=Config.PERFILES_MAX)
+
+# Métricas en formato Prometheus (ver /metrics)
+metricas = RegistroMetricas()
+metrica_peticiones = metricas.contador(
+    'inventario_peticiones_total', 'Peticiones atendidas por endpoint, método y estado',
+    ('endpoint', 'metodo', 'estado'))
+metrica_duracion = metricas.histograma(
+    'inventario_peticion_duracion_segundos', 'Duración de las peticiones por endpoint', ('endpoint',))
+metrica_sql = metricas.histograma(
+    'inventario_peticion_sql_segundos', 'Tiempo en SQL por petición', ('endpoint',))
+metrica_conexion = metricas.histograma(
+    'inventario_db_conexion_segundos', 'Tiempo de abrir una conexión de lectura',
+    limites=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1))
+metrica_movimientos = metricas.contador(
+    'inventario_movimientos_stock_total', 'Cambios de stock aplicados por tipo', ('tipo',))
+metrica_correo = metricas.histograma(
+    'inventario_correo_envio_segundos', 'Latencia de envío de correos', ('tipo', 'resultado'))
+metrica_exportacion_duracion = metricas.histograma(
+    'inventario_exportacion_duracion_segundos', 'Duración de exportaciones y descargas de respaldo', ('endpoint',))
+metrica_exportacion_bytes = metricas.histograma(
+    'inventario_exportacion_bytes', 'Tamaño de exportaciones y descargas de respaldo', ('endpoint',),
+    limites=LIMITES_BYTES)
+
+metricas.medidor('inventario_escritor_lotes_total', 'Transacciones confirmadas por el escritor',
+                 lambda: escritor.lotes, tipo='counter')
+metricas.medidor('inventario_escritor_tareas_total', 'Tareas de escritura ejecutadas',
+                 lambda: escritor.tareas, tipo='counter')
+metricas.medidor('inventario_escritor_pendientes', 'Tareas esperando en la cola del escritor',
+                 escritor.pendientes)
+metricas.medidor('inventario_escritor_rechazadas_total', 'Escrituras rechazadas por contención',
+                 lambda: [((ruta,), cantidad) for ruta, cantidad in sorted(dict(escritor.rechazadas).items())],
+                 etiquetas=('endpoint',), tipo='counter')
+metricas.colector(lambda: exponer_histogramas(
+    escritor.histogramas, 'inventario_escritor', 'endpoint',
+    ayudas={
+        'espera_cola_ms': 'Espera en la cola del escritor',
+        'espera_candado_ms': 'Espera del candado de escritura (BEGIN IMMEDIATE)',
+        'retencion_ms': 'Tiempo con la transacción abierta',
+        'sentencias': 'Sentencias por transacción'
+    },
+    escalas={
+        'espera_cola_ms': ('espera_cola_segundos', 0.001),
+        'espera_candado_ms': ('espera_candado_segundos', 0.001),
+        'retencion_ms': ('retencion_segundos', 0.001)
+    }))
+
+metricas.medidor('inventario_log_pendientes', 'Registros de log esperando al hilo escritor',
+                 lambda: registro_logs.pendientes())
+metricas.medidor('inventario_log_descartados_total', 'Registros de log descartados con la cola llena',
+                 lambda: registro_logs.manejador.descartados, tipo='counter')
+
+metricas.medidor('inventario_consultas_lentas_descartadas_total', 'Consultas lentas sin registrar con la cola llena',
+                 lambda: consultas_lentas.descartadas, tipo='counter')
+
+# Caché de consultas agregadas: aciertos, obsoletos (recalculando), esperas (cálculo compartido) y fallos
+metricas.medidor('inventario_cache_respuestas_total', 'Peticiones a la caché de respuestas por grupo y resultado',
+                 cache_respuestas.resumen, etiquetas=('grupo', 'resultado'), tipo='counter')
+metricas.medidor('inventario_cache_respuestas_bytes', 'Bytes estimados en la caché de respuestas',
+                 lambda: cache_respuestas.bytes)
+metricas.medidor('inventario_cache_respuestas_entradas', 'Entradas en la caché de respuestas',
+                 cache_respuestas.entradas)
+metricas.medidor('inventario_cache_respuestas_desalojos_total', 'Entradas sacadas de la caché por falta de espacio',
+                 lambda: cache_respuestas.desalojos, tipo='counter')
+
+# Proceso (psutil)
+proceso = psutil.Process()
+metricas.medidor('process_resident_memory_bytes', 'Memoria residente del proceso',
+                 lambda: proceso.memory_info().rss)
+metricas.medidor('process_virtual_memory_bytes', 'Memoria virtual del proceso',
+                 lambda: proceso.memory_info().vms)
+metricas.medidor('process_cpu_seconds_total', 'CPU de usuario y sistema consumida por el proceso',
+                 lambda: proceso.cpu_times().user + proceso.cpu_times().system, tipo='counter')
+metricas.medidor('process_threads', 'Hilos del proceso', proceso.num_threads)
+metricas.medidor('process_open_fds', 'Descriptores de archivo abiertos',
+                 lambda: proceso.num_fds() if hasattr(proceso, 'num_fds') else None)
+metricas.medidor('process_start_time_seconds', 'Inicio del proceso (epoch)', proceso.create_time)
+
+@app.before_request
+def iniciar_medicion():
+    g.medicion_token = instrumentacion.iniciar()
+
+@before_render_template.connect_via(app)
+def medir_inicio_plantilla(sender, template, context, **extra):
+    medicion = instrumentacion.actual()
+    if medicion:
+        medicion.iniciar_plantilla()
+
+@template_rendered.connect_via(app)
+def medir_fin_plantilla(sender, template, context, **extra):
+    medicion = instrumentacion.actual()
+    if medicion:
+        medicion.terminar_plantilla()
+
+@app.after_request
+def agregar_server_timing(response):
+    """Agregar Server-Timing y, para una muestra de peticiones (y las lentas), dejar la traza en el log"""
+    medicion = instrumentacion.actual()
+    if medicion is None:
+        return response
+    
+    # El texto del SQL solo para administradores; los demás ven los tiempos
+    response.headers['Server-Timing'] = medicion.server_timing(detalle=is_admin_logged_in())
+    
+    if medicion.total() * 1000 >= app.config['TRAZA_LENTA_MS'] or random.random() < app.config['TRAZA_MUESTREO']:
+        traza = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'endpoint': request.endpoint,
+            'estado': response.status_code
+        }
+        traza.update(medicion.traza())
+        trazas.info('TRACE', extra={'traza': traza})
+    
+    consultas_lentas.revisar(medicion.sentencias, request.endpoint)
+    registrar_metricas_peticion(medicion, response.status_code, response)
+    return response
+
+def registrar_metricas_peticion(medicion, estado, response=None):
+    """Conteo, duración y SQL por endpoint; tamaño y duración de exportaciones"""
+    g.metricas_registradas = True
+    endpoint = request.endpoint or 'ninguno'
+    duracion = medicion.total()
+    metrica_peticiones.incrementar(endpoint, request.method, str(estado))
+    metrica_duracion.observar(duracion, endpoint)
+    metrica_sql.observar(medicion.tiempo_sql, endpoint)
+    
+    if response is not None and (endpoint.startswith('exportar_') or endpoint == 'descargar_backup') and estado == 200:
+        metrica_exportacion_duracion.observar(duracion, endpoint)
+        if response.content_length is not None:
+            metrica_exportacion_bytes.observar(response.content_length, endpoint)
+
+@app.before_request
+def iniciar_perfil():
+    """Perfilar la petición si un administrador lo pide o si toca por una regla uno-de-N"""
+    bandera = request.args.get('_perfil') or request.headers.get('X-Perfil')
+    if bandera:
+        # Misma validación que require_admin; a los demás se les ignora la bandera
+        if is_admin_logged_in():
+            g.perfil = perfilador.iniciar('muestreo' if bandera == 'muestreo' else 'cprofile', 'manual')
+    elif perfilador.toca_muestreo(request.endpoint):
+        g.perfil = perfilador.iniciar('muestreo', 'regla')
+
+def guardar_perfil(estado):
+    perfil = g.pop('perfil', None)
+    if perfil is None:
+        return None
+    return perfilador.guardar(perfil, {
+        'endpoint': request.endpoint,
+        'ruta': request.full_path.rstrip('?'),
+        'metodo': request.method,
+        'estado': estado,
+        'usuario': session.get('admin_username')
+    })
+
+@app.after_request
+def agregar_perfil(response):
+    perfil_id = guardar_perfil(response.status_code)
+    if perfil_id:
+        response.headers['X-Perfil-Id'] = perfil_id
+    return response
+
+@app.teardown_request
+def terminar_medicion(exc):
+    if exc is not None:
+        guardar_perfil(500)
+    medicion = instrumentacion.actual()
+    if medicion is not None and exc is not None and not g.get('metricas_registradas'):
+        # Excepción no manejada: after_request no corrió
+        registrar_metricas_peticion(medicion, 500)
+    token = g.pop('medicion_token', None)
+    if token is not None:
+        instrumentacion.terminar(token)
+
 def hash_password(password):
     """Hash de contraseña usando SHA-256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -89,38 +441,99 @@ def require_admin(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def log_admin_operation(operation_type, description, producto_id=None, ubicacion_id=None, old_quantity=None, new_quantity=None, conn=None):
-    """Registrar operación de administrador en logs"""
+def condicional(*tablas):
+    """
+    GET condicional para vistas que solo dependen de `tablas`: el ETag se arma
+    con la ruta, los parámetros, el usuario y las versiones de esas tablas
+    (servicios/versiones.py); si el navegador ya lo tiene se responde 304 sin
+    correr la vista.
+    """
+    def decorador(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Los mensajes flash se muestran una sola vez: esa página no se repite
+            if '_flashes' in session:
+                return f(*args, **kwargs)
+            
+            conn = get_db_connection()
+            try:
+                version = versiones.leer(conn, tablas)
+            except sqlite3.OperationalError:
+                return f(*args, **kwargs)  # Base sin migrar (p. ej. a media restauración)
+            finally:
+                conn.close()
+            
+            etag = versiones.etiqueta(
+                request.endpoint, sorted((request.view_args or {}).items()),
+                sorted(request.args.items(multi=True)), session.get('admin_username'),
+                huella_despliegue, sorted(version.items()))
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            # Siempre revalidar; el contenido depende de la sesión
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.vary.add('Cookie')
+            return response
+        return decorated_function
+    return decorador
+
+def obtener_cacheado(clave, tablas, calcular, tamano=len):
+    """
+    Resultado de calcular() compartido por las peticiones con la misma clave
+    mientras no cambien `tablas` (cache_respuestas: una sola consulta aunque
+    lleguen muchas a la vez, y lo anterior mientras se recalcula).
+    """
+    conn = get_db_connection()
+    try:
+        version = tuple(sorted(versiones.leer(conn, tablas).items()))
+    finally:
+        conn.close()
+    return cache_respuestas.obtener(clave, version, calcular, tamano)
+
+def datos_operador():
+    """Administrador e IP de la petición actual (None si no hay sesión de administrador)"""
     if not is_admin_logged_in():
+        return None
+    return {
+        'admin_user_id': session.get('admin_user_id'),
+        'admin_username': session.get('admin_username'),
+        'ip_address': request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
+    }
+
+def registrar_operacion(conn, operador, operation_type, producto_id=None, ubicacion_id=None, old_quantity=None, new_quantity=None, **params):
+    """
+    Registrar operación de administrador dentro de una tarea del escritor.
+    params son los campos de la plantilla del tipo (ver bitacora.PLANTILLAS).
+    """
+    if operador is None:
         return
     
-    # Use existing connection if provided, otherwise create new one
-    should_close_conn = False
-    if conn is None:
-        conn = get_db_connection()
-        should_close_conn = True
+    bitacora.registrar(conn, operador['admin_user_id'], operador['ip_address'], operation_type,
+                       producto_id, ubicacion_id, old_quantity, new_quantity, **params)
+    
+    # Log también en archivo, con la descripción ya armada
+    descripcion = bitacora.describir_ids(conn, operation_type, params, producto_id, ubicacion_id, old_quantity, new_quantity)
+    logging.info(f"ADMIN_OP: {operador['admin_username']} - {operation_type} - {descripcion}")
+
+def log_admin_operation(operation_type, producto_id=None, ubicacion_id=None, old_quantity=None, new_quantity=None, **params):
+    """Registrar operación de administrador en logs"""
+    operador = datos_operador()
+    if operador is None:
+        return
     
     try:
-        ip_address = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-        
-        conn.execute('''
-            INSERT INTO operation_logs (admin_user_id, operation_type, producto_id, ubicacion_id, 
-                                      old_quantity, new_quantity, description, ip_address)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (session.get('admin_user_id'), operation_type, producto_id, ubicacion_id, 
-              old_quantity, new_quantity, description, ip_address))
-        
-        if should_close_conn:
-            conn.commit()
-        
-        # Log también en archivo
-        logging.info(f"ADMIN_OP: {session.get('admin_username')} - {operation_type} - {description}")
-        
+        escritor.ejecutar(registrar_operacion, operador, operation_type,
+                          producto_id, ubicacion_id, old_quantity, new_quantity, **params)
+    except EscrituraOcupada as e:
+        # La operación principal ya se hizo: no convertir la respuesta en 503
+        g.pop('escritura_ocupada', None)
+        logging.error(f"Error logging admin operation: {e}")
     except Exception as e:
         logging.error(f"Error logging admin operation: {e}")
-    finally:
-        if should_close_conn:
-            conn.close()
 
 def get_productos_stock_bajo():
     """Obtener productos con stock por debajo del mínimo"""
@@ -199,14 +612,11 @@ def enviar_alerta_stock_bajo(productos_stock_bajo, destinatarios=None):
                     html=html_content
                 )
                 
-                mail.send(msg)
+                enviar_correo(msg, 'alerta_stock')
                 logging.info(f"Alerta de stock enviada a: {destinatario}")
         
         # Registrar en logs de administrador
-        log_admin_operation(
-            'STOCK_ALERT', 
-            f'Alerta de stock bajo enviada - {len(productos_stock_bajo)} productos afectados'
-        )
+        log_admin_operation('STOCK_ALERT', productos=len(productos_stock_bajo))
         
         return True
         
@@ -214,6 +624,16 @@ def enviar_alerta_stock_bajo(productos_stock_bajo, destinatarios=None):
         logging.error(f"Error enviando alerta de stock: {e}")
         return False
 
+def enviar_correo(msg, tipo):
+    """mail.send midiendo la latencia (métrica inventario_correo_envio_segundos)"""
+    inicio = time.perf_counter()
+    resultado = 'error'
+    try:
+        mail.send(msg)
+        resultado = 'ok'
+    finally:
+        metrica_correo.observar(time.perf_counter() - inicio, tipo, resultado)
+
 def generar_html_alerta_stock(productos_stock_bajo):
     """Generar contenido HTML para la alerta de stock"""
     fecha_actual = datetime.now().strftime('%d/%m/%Y %H:%M')
@@ -380,18 +800,18 @@ def verificar_y_enviar_alertas_stock():
         # Verificar si han pasado suficientes horas desde la última alerta
         conn = get_db_connection()
         
-        # Buscar la última alerta enviada
-        ultima_alerta = conn.execute('''
-            SELECT timestamp as fecha_creacion 
-            FROM operation_logs 
-            WHERE operation_type = 'STOCK_ALERT' 
-            ORDER BY timestamp DESC 
-            LIMIT 1
-        ''').fetchone()
+        # Buscar la última alerta enviada (en la capa caliente o en los archivos)
+        alertas = archivo_logs.consultar(conn, f'''
+            SELECT ol.ts
+            FROM {{logs}} ol
+            WHERE {bitacora.POR_TIPO}
+            ORDER BY ol.ts DESC
+            LIMIT ?
+        ''', ['STOCK_ALERT'], limite=1)
+        ultima_alerta = alertas[0] if alertas else None
         
         if ultima_alerta:
-            tiempo_ultima_alerta = datetime.fromisoformat(ultima_alerta['fecha_creacion'])
-            horas_transcurridas = (datetime.now() - tiempo_ultima_alerta).total_seconds() / 3600
+            horas_transcurridas = (time.time() - ultima_alerta['ts']) / 3600
             frecuencia_horas = app.config.get('STOCK_ALERT_FREQUENCY_HOURS', 24)
             
             if horas_transcurridas < frecuencia_horas:
@@ -427,24 +847,25 @@ def admin_login():
             SELECT id, username FROM admin_users 
             WHERE username = ? AND password_hash = ? AND is_active = 1
         ''', (username, password_hash)).fetchone()
+        conn.close()
         
         if admin_user:
             # Crear sesión
             session_token = generate_session_token()
             expires_at = datetime.now() + timedelta(hours=8)  # 8 horas de sesión
             
-            conn.execute('''
-                INSERT INTO admin_sessions (admin_user_id, session_token, expires_at)
-                VALUES (?, ?, ?)
-            ''', (admin_user['id'], session_token, expires_at))
-            
-            # Actualizar último login
-            conn.execute('''
-                UPDATE admin_users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
-            ''', (admin_user['id'],))
+            def crear_sesion(conn):
+                conn.execute('''
+                    INSERT INTO admin_sessions (admin_user_id, session_token, expires_at)
+                    VALUES (?, ?, ?)
+                ''', (admin_user['id'], session_token, expires_at))
+                
+                # Actualizar último login
+                conn.execute('''
+                    UPDATE admin_users SET last_login = CURRENT_TIMESTAMP WHERE id = ?
+                ''', (admin_user['id'],))
             
-            conn.commit()
-            conn.close()
+            escritor.ejecutar(crear_sesion)
             
             session['admin_token'] = session_token
             session['admin_user_id'] = admin_user['id']
@@ -453,7 +874,6 @@ def admin_login():
             flash(f'Bienvenido, {admin_user["username"]}', 'success')
             return redirect(url_for('inventario'))
         else:
-            conn.close()
             flash('Credenciales incorrectas', 'error')
     
     return render_template('admin_login.html')
@@ -461,32 +881,110 @@ def admin_login():
 @app.route('/admin/logs')
 @require_admin
 def admin_logs():
-    """Ver logs de operaciones de administrador"""
+    """Ver logs de operaciones de administrador (filtros y paginación por cursor)"""
     conn = get_db_connection()
     
-    # Obtener logs recientes (últimos 100)
-    logs = conn.execute('''
-        SELECT ol.*, au.username, p.descripcion as producto_nombre, u.codigo as ubicacion_codigo
-        FROM operation_logs ol
-        JOIN admin_users au ON ol.admin_user_id = au.id
-        LEFT JOIN productos p ON ol.producto_id = p.id
-        LEFT JOIN ubicaciones u ON ol.ubicacion_id = u.id
-        ORDER BY ol.timestamp DESC
-        LIMIT 100
-    ''').fetchall()
+    filtros = {clave: request.args.get(clave, '').strip()
+               for clave in ('tipo', 'usuario', 'producto', 'ubicacion', 'desde', 'hasta', 'q')}
     
+    def _fecha_local(texto, dias=0):
+        try:
+            return int(time.mktime((datetime.strptime(texto, '%Y-%m-%d') + timedelta(days=dias)).timetuple()))
+        except ValueError:
+            return None
+    
+    tipo_id = producto_id = ubicacion_id = None
+    sin_resultados = False
+    if filtros['tipo']:
+        fila = conn.execute('SELECT id FROM tipos_operacion WHERE nombre = ?', (filtros['tipo'],)).fetchone()
+        if fila:
+            tipo_id = fila['id']
+        else:
+            sin_resultados = True
+    if filtros['producto']:
+        fila = conn.execute('SELECT id FROM productos WHERE codigo = ?', (filtros['producto'],)).fetchone()
+        if fila:
+            producto_id = fila['id']
+        elif filtros['producto'].isdigit():
+            producto_id = int(filtros['producto'])
+        else:
+            sin_resultados = True
+    if filtros['ubicacion']:
+        fila = conn.execute('SELECT id FROM ubicaciones WHERE codigo = ?', (filtros['ubicacion'],)).fetchone()
+        if fila:
+            ubicacion_id = fila['id']
+        else:
+            sin_resultados = True
+    
+    # hasta incluye el día completo
+    desde = _fecha_local(filtros['desde']) if filtros['desde'] else None
+    hasta = _fecha_local(filtros['hasta'], dias=1) if filtros['hasta'] else None
+    
+    # Cursor: "ts-id" del último registro de la página anterior
+    antes = None
+    cursor = request.args.get('antes', '')
+    if re.fullmatch(r'\d+-\d+', cursor):
+        antes = tuple(int(parte) for parte in cursor.split('-'))
+    
+    logs = []
+    siguiente = None
+    if not sin_resultados:
+        sql, params = bitacora.consulta(
+            tipo_id=tipo_id,
+            admin_user_id=int(filtros['usuario']) if filtros['usuario'].isdigit() else None,
+            producto_id=producto_id, ubicacion_id=ubicacion_id,
+            desde=desde, hasta=hasta, busqueda=filtros['q'], antes=antes)
+        # Meses (UTC, como los archivos) que pueden tener resultados; el cursor también acota
+        tope = hasta
+        if antes and (tope is None or antes[0] < tope):
+            tope = antes[0] + 1
+        dia_utc = lambda epoch: time.strftime('%Y-%m-%d', time.gmtime(epoch)) if epoch is not None else None
+        logs = bitacora.leer(archivo_logs.consultar(
+            conn, sql, params, limite=bitacora.POR_PAGINA + 1,
+            desde=dia_utc(desde), hasta=dia_utc(tope - 1 if tope is not None else None)))
+        if len(logs) > bitacora.POR_PAGINA:
+            logs = logs[:bitacora.POR_PAGINA]
+            siguiente = f"{logs[-1]['ts']}-{logs[-1]['id']}"
+    
+    tipos = [fila['nombre'] for fila in conn.execute('SELECT nombre FROM tipos_operacion ORDER BY nombre')]
+    usuarios = conn.execute('SELECT id, username FROM admin_users ORDER BY username').fetchall()
+    estado_archivo = archivo_logs.estado(conn)
     conn.close()
     
-    return render_template('admin_logs.html', logs=logs)
+    for archivo in estado_archivo['archivos']:
+        anio, numero = int(archivo['mes'][:4]), int(archivo['mes'][5:])
+        archivo['desde'] = f"{archivo['mes']}-01"
+        archivo['hasta'] = (date(anio + numero // 12, numero % 12 + 1, 1) - timedelta(days=1)).isoformat()
+    
+    filtrado = {clave: valor for clave, valor in filtros.items() if valor}
+    return render_template('admin_logs.html', logs=logs, filtros=filtros, filtrado=filtrado,
+                           siguiente=siguiente, primera_pagina=antes is None, tipos=tipos, usuarios=usuarios,
+                           estado_archivo=estado_archivo, por_pagina=bitacora.POR_PAGINA)
+
+@app.route('/admin/logs/archivo', methods=['POST'])
+@require_admin
+def admin_logs_archivo():
+    """Archivar ahora los registros viejos o compactar la base principal"""
+    try:
+        if request.form.get('accion') == 'compactar':
+            resultado = compactar_logs(forzar=True)
+            log_admin_operation('LOG_COMPACT', libres=resultado['paginas_libres'], paginas=resultado['paginas'])
+            flash('Base de datos compactada', 'success')
+        else:
+            resultado = archivar_logs()
+            log_admin_operation('LOG_ARCHIVE', movidos=resultado['movidos'])
+            flash(f"{resultado['movidos']} registro(s) archivado(s)", 'success')
+    except Exception as e:
+        logging.error(f"Error archivando logs: {e}")
+        flash(f'Error al archivar logs: {str(e)}', 'error')
+    return redirect(url_for('admin_logs'))
 
 @app.route('/admin/logout')
 def admin_logout():
     """Logout de administrador"""
     if 'admin_token' in session:
-        conn = get_db_connection()
-        conn.execute('DELETE FROM admin_sessions WHERE session_token = ?', (session['admin_token'],))
-        conn.commit()
-        conn.close()
+        session_token = session['admin_token']
+        escritor.ejecutar(lambda conn: conn.execute('DELETE FROM admin_sessions WHERE session_token = ?', (session_token,)))
     
     session.pop('admin_token', None)
     session.pop('admin_user_id', None)
@@ -498,8 +996,11 @@ def admin_logout():
 @require_admin
 def admin_stock_alerts():
     """Panel de administración de alertas de stock"""
-    # Obtener productos con stock bajo
-    productos_stock_bajo = get_productos_stock_bajo()
+    # Obtener productos con stock bajo (la misma consulta para todos mientras no cambie el stock)
+    productos_stock_bajo = obtener_cacheado(
+        ('stock_bajo',),
+        ('productos', 'inventario', 'categorias', 'subcategorias', 'proveedores', 'ubicaciones'),
+        get_productos_stock_bajo, tamano=lambda filas: len(repr(filas)))
     
     # Obtener configuración actual
     config_alertas = {
@@ -511,14 +1012,12 @@ def admin_stock_alerts():
     
     # Obtener historial de alertas recientes
     conn = get_db_connection()
-    historial_alertas = conn.execute('''
-        SELECT ol.*, au.username
-        FROM operation_logs ol
-        JOIN admin_users au ON ol.admin_user_id = au.id
-        WHERE ol.operation_type = 'STOCK_ALERT'
-        ORDER BY ol.timestamp DESC
-        LIMIT 10
-    ''').fetchall()
+    historial_alertas = bitacora.leer(archivo_logs.consultar(conn, f'''
+        {bitacora.SELECT}
+        WHERE {bitacora.POR_TIPO}
+        ORDER BY ol.ts DESC
+        LIMIT ?
+    ''', ['STOCK_ALERT'], limite=10))
     conn.close()
     
     return render_template('admin_stock_alerts.html', 
@@ -606,10 +1105,10 @@ Sistema de Inventario PPG
             """
         )
         
-        mail.send(msg)
+        enviar_correo(msg, 'prueba')
         
         # Registrar en logs
-        log_admin_operation('EMAIL_TEST', f'Correo de prueba enviado a: {destinatario}')
+        log_admin_operation('EMAIL_TEST', destinatario=destinatario)
         
         flash(f'Correo de prueba enviado exitosamente a: {destinatario}', 'success')
         
@@ -630,34 +1129,37 @@ def update_stock_minimo(producto_id):
         if nuevo_stock_minimo < 0:
             return jsonify({'error': 'El stock mínimo no puede ser negativo'}), 400
         
-        conn = get_db_connection()
+        operador = datos_operador()
         
-        # Obtener stock mínimo actual
-        producto_actual = conn.execute(
-            'SELECT stock_minimo, descripcion FROM productos WHERE id = ?', 
-            (producto_id,)
-        ).fetchone()
+        def actualizar(conn):
+            # Obtener stock mínimo actual
+            producto_actual = conn.execute(
+                'SELECT stock_minimo, descripcion FROM productos WHERE id = ?',
+                (producto_id,)
+            ).fetchone()
+            
+            if not producto_actual:
+                return False
+            
+            # Actualizar stock mínimo
+            conn.execute(
+                'UPDATE productos SET stock_minimo = ? WHERE id = ?',
+                (nuevo_stock_minimo, producto_id)
+            )
+            
+            # Registrar operación
+            registrar_operacion(
+                conn, operador,
+                'STOCK_MINIMO_UPDATE',
+                producto_id=producto_id,
+                old_quantity=producto_actual['stock_minimo'],
+                new_quantity=nuevo_stock_minimo
+            )
+            return True
         
-        if not producto_actual:
+        if not escritor.ejecutar(actualizar):
             return jsonify({'error': 'Producto no encontrado'}), 404
         
-        # Actualizar stock mínimo
-        conn.execute(
-            'UPDATE productos SET stock_minimo = ? WHERE id = ?',
-            (nuevo_stock_minimo, producto_id)
-        )
-        conn.commit()
-        
-        # Registrar operación
-        log_admin_operation(
-            'STOCK_MINIMO_UPDATE',
-            f'Stock mínimo actualizado: {producto_actual["descripcion"]} - {producto_actual["stock_minimo"]} → {nuevo_stock_minimo}',
-            producto_id=producto_id,
-            conn=conn
-        )
-        
-        conn.close()
-        
         return jsonify({
             'success': True,
             'message': 'Stock mínimo actualizado correctamente',
@@ -666,6 +1168,8 @@ def update_stock_minimo(producto_id):
         
     except ValueError:
         return jsonify({'error': 'Valor de stock mínimo inválido'}), 400
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
         logging.error(f"Error actualizando stock mínimo: {e}")
         return jsonify({'error': 'Error interno del servidor'}), 500
@@ -675,21 +1179,20 @@ def index():
     """Redirigir a productos como página principal"""
     return redirect(url_for('productos'))
 
-@app.route('/productos')
-def productos():
-    """Lista de productos con filtros avanzados"""
-    conn = get_db_connection()
-    
-    # Obtener todos los filtros posibles
-    search = request.args.get('search', '').strip()
-    categoria_filter = request.args.get('categoria', '')
-    subcategoria_filter = request.args.get('subcategoria', '')
-    marca_filter = request.args.get('marca', '')
-    maquina_filter = request.args.get('maquina', '')
-    codigo_filter = request.args.get('codigo', '').strip()
-    stock_filter = request.args.get('stock', '')  # Nuevo filtro de stock
-    
-    # Construir query con filtros
+def filtros_productos():
+    """Filtros de /productos tomados de la URL"""
+    return {
+        'search': request.args.get('search', '').strip(),
+        'categoria': request.args.get('categoria', ''),
+        'subcategoria': request.args.get('subcategoria', ''),
+        'marca': request.args.get('marca', ''),
+        'maquina': request.args.get('maquina', ''),
+        'codigo': request.args.get('codigo', '').strip(),
+        'stock': request.args.get('stock', '')  # Nuevo filtro de stock
+    }
+
+def consultar_productos(conn, filtros):
+    """Productos con su stock total según los filtros de /productos"""
     query = '''
         SELECT p.*, c.nombre as categoria, sc.nombre as subcategoria, 
                m.nombre as marca, mq.nombre as maquina,
@@ -705,44 +1208,56 @@ def productos():
     
     params = []
     
-    if search:
+    if filtros['search']:
         query += ' AND (p.descripcion LIKE ? OR p.codigo LIKE ? OR p.notas LIKE ?)'
-        search_param = f'%{search}%'
+        search_param = f"%{filtros['search']}%"
         params.extend([search_param, search_param, search_param])
     
-    if categoria_filter:
+    if filtros['categoria']:
         query += ' AND c.nombre = ?'
-        params.append(categoria_filter)
+        params.append(filtros['categoria'])
     
-    if subcategoria_filter:
+    if filtros['subcategoria']:
         query += ' AND sc.nombre = ?'
-        params.append(subcategoria_filter)
+        params.append(filtros['subcategoria'])
     
-    if marca_filter:
+    if filtros['marca']:
         query += ' AND m.nombre = ?'
-        params.append(marca_filter)
+        params.append(filtros['marca'])
     
-    if maquina_filter:
+    if filtros['maquina']:
         query += ' AND mq.nombre = ?'
-        params.append(maquina_filter)
+        params.append(filtros['maquina'])
     
-    if codigo_filter:
+    if filtros['codigo']:
         query += ' AND p.codigo LIKE ?'
-        params.append(f'%{codigo_filter}%')
+        params.append(f"%{filtros['codigo']}%")
     
     query += ' GROUP BY p.id'
     
     # Aplicar filtro de stock después del GROUP BY
-    if stock_filter == 'sin_stock':
+    if filtros['stock'] == 'sin_stock':
         query += ' HAVING stock_total = 0'
-    elif stock_filter == 'con_stock':
+    elif filtros['stock'] == 'con_stock':
         query += ' HAVING stock_total > 0'
-    elif stock_filter == 'stock_bajo':
+    elif filtros['stock'] == 'stock_bajo':
         query += ' HAVING stock_total > 0 AND stock_total < p.cantidad_requerida'
     
     query += ' ORDER BY p.descripcion'
     
-    productos = conn.execute(query, params).fetchall()
+    return conn.execute(query, params).fetchall()
+
+def recortar(texto, largo):
+    """Texto recortado a `largo` caracteres con ... si sobraba"""
+    if not texto or len(texto) <= largo:
+        return texto
+    return texto[:largo] + '...'
+
+@app.route('/productos')
+@condicional('categorias', 'subcategorias', 'marcas', 'maquinas')
+def productos():
+    """Lista de productos con filtros avanzados (las filas las pide la tabla a /api/productos/tabla)"""
+    conn = get_db_connection()
     
     # Obtener listas para filtros
     categorias = conn.execute('SELECT DISTINCT nombre FROM categorias WHERE nombre IS NOT NULL ORDER BY nombre').fetchall()
@@ -753,43 +1268,57 @@ def productos():
     conn.close()
     
     return render_template('productos.html', 
-                         productos=productos, 
                          categorias=categorias,
                          subcategorias=subcategorias,
                          marcas=marcas, 
                          maquinas=maquinas,
-                         filters={
-                             'search': search,
-                             'categoria': categoria_filter,
-                             'subcategoria': subcategoria_filter,
-                             'marca': marca_filter,
-                             'maquina': maquina_filter,
-                             'codigo': codigo_filter,
-                             'stock': stock_filter
-                         })
+                         filters=filtros_productos())
 
-@app.route('/inventario')
-def inventario():
-    """Vista del inventario - lista simple de productos con stock > 0"""
+@app.route('/api/productos/tabla')
+@condicional('productos', 'categorias', 'subcategorias', 'marcas', 'maquinas', 'inventario')
+def api_tabla_productos():
+    """Filas de /productos en formato columnar para la tabla virtual"""
     conn = get_db_connection()
+    productos = consultar_productos(conn, filtros_productos())
+    conn.close()
     
-    # Obtener filtros
-    search = request.args.get('search', '').strip()
-    categoria_filter = request.args.get('categoria', '')
-    
-    # Query para obtener solo productos con stock > 0 (para la tabla)
+    filas = [{
+        'id': producto['id'],
+        'descripcion': producto['descripcion'],
+        'notas': recortar(producto['notas'], 80),
+        'codigo': producto['codigo'],
+        'categoria': producto['categoria'],
+        'subcategoria': producto['subcategoria'],
+        'marca': producto['marca'],
+        'maquina': producto['maquina'],
+        'stock_total': producto['stock_total'],
+        'stock_minimo': producto['stock_minimo'],
+        'cantidad_requerida': producto['cantidad_requerida'],
+        'miniatura': url_imagen(producto, 'lista')
+    } for producto in productos]
+    return jsonify(tabla_columnar.codificar(
+        filas,
+        ['id', 'descripcion', 'notas', 'codigo', 'categoria', 'subcategoria', 'marca', 'maquina',
+         'stock_total', 'stock_minimo', 'cantidad_requerida', 'miniatura'],
+        diccionarios=['categoria', 'subcategoria', 'marca', 'maquina']))
+
+def filtros_inventario():
+    """Filtros de /inventario tomados de la URL"""
+    return {
+        'search': request.args.get('search', '').strip(),
+        'categoria': request.args.get('categoria', '')
+    }
+
+def consultar_inventario(conn, filtros):
+    """Productos con stock > 0 y el detalle por ubicación, según los filtros de /inventario"""
     query = '''
-        SELECT p.*, c.nombre as categoria, sc.nombre as subcategoria, 
-               m.nombre as marca,
-               GROUP_CONCAT(mq.nombre, ', ') as maquinas,
+        SELECT p.id, p.descripcion, p.notas, p.codigo, p.cantidad_requerida,
+               c.nombre as categoria, sc.nombre as subcategoria,
                COALESCE(SUM(i.cantidad), 0) as stock_total,
                GROUP_CONCAT(u.codigo || ':' || i.cantidad, ', ') as ubicaciones_detalle
         FROM productos p
         LEFT JOIN categorias c ON p.categoria_id = c.id
         LEFT JOIN subcategorias sc ON p.subcategoria_id = sc.id
-        LEFT JOIN marcas m ON p.marca_id = m.id
-        LEFT JOIN producto_maquinas pm ON p.id = pm.producto_id
-        LEFT JOIN maquinas mq ON pm.maquina_id = mq.id
         LEFT JOIN inventario i ON p.id = i.producto_id
         LEFT JOIN ubicaciones u ON i.ubicacion_id = u.id
         WHERE 1=1
@@ -797,25 +1326,23 @@ def inventario():
     
     params = []
     
-    if search:
+    if filtros['search']:
         query += ' AND (p.descripcion LIKE ? OR p.codigo LIKE ? OR c.nombre LIKE ?)'
-        search_param = f'%{search}%'
+        search_param = f"%{filtros['search']}%"
         params.extend([search_param, search_param, search_param])
     
-    if categoria_filter:
+    if filtros['categoria']:
         query += ' AND c.nombre = ?'
-        params.append(categoria_filter)
+        params.append(filtros['categoria'])
     
     query += ' GROUP BY p.id HAVING stock_total > 0 ORDER BY p.descripcion'
     
-    productos_con_stock = conn.execute(query, params).fetchall()
-    
-    # Obtener TODOS los productos para el modal de entrada de material
-    todos_productos = conn.execute('''
-        SELECT p.id, p.descripcion, p.codigo
-        FROM productos p
-        ORDER BY p.descripcion
-    ''').fetchall()
+    return conn.execute(query, params).fetchall()
+
+@app.route('/inventario')
+def inventario():
+    """Vista del inventario - lista simple de productos con stock > 0 (filas desde /api/inventario/tabla)"""
+    conn = get_db_connection()
     
     # Obtener listas para filtros
     categorias = conn.execute('SELECT DISTINCT nombre FROM categorias WHERE nombre IS NOT NULL ORDER BY nombre').fetchall()
@@ -826,14 +1353,75 @@ def inventario():
     conn.close()
     
     return render_template('inventario.html', 
-                         productos=productos_con_stock,  # Para la tabla (solo con stock)
-                         todos_productos=todos_productos,  # Para el modal de entrada (todos)
                          categorias=categorias,
                          ubicaciones=ubicaciones,
-                         filters={
-                             'search': search,
-                             'categoria': categoria_filter
-                         })
+                         filters=filtros_inventario())
+
+@app.route('/api/inventario/tabla')
+def api_tabla_inventario():
+    """Filas de /inventario en formato columnar: la tabla y las listas de salida y cambio de ubicación"""
+    filtros = filtros_inventario()
+    # Una tabla algo vieja no es problema: la página pide los eventos en vivo desde su ultimo_cambio
+    datos = obtener_cacheado(
+        ('inventario_tabla', filtros['search'], filtros['categoria']),
+        ('productos', 'categorias', 'subcategorias', 'inventario', 'ubicaciones'),
+        lambda: tabla_inventario_json(filtros))
+    return app.response_class(datos, mimetype='application/json')
+
+def tabla_inventario_json(filtros):
+    """JSON de la tabla columnar de inventario (lo que guarda cache_respuestas)"""
+    conn = get_db_connection()
+    # Antes de la consulta: los eventos en vivo se piden desde aquí (repetir alguno no cambia nada)
+    ultimo_cambio = cambios_stock.ultimo_cambio(conn)
+    productos = consultar_inventario(conn, filtros)
+    conn.close()
+    
+    filas = []
+    for producto in productos:
+        ubicaciones, cantidades = tabla_columnar.separar_detalle(producto['ubicaciones_detalle'])
+        filas.append({
+            'id': producto['id'],
+            'descripcion': producto['descripcion'],
+            'notas': recortar(producto['notas'], 60),
+            'codigo': producto['codigo'],
+            'categoria': producto['categoria'],
+            'subcategoria': producto['subcategoria'],
+            'stock_total': producto['stock_total'],
+            'cantidad_requerida': producto['cantidad_requerida'],
+            'ubicaciones': ubicaciones,
+            'cantidades': cantidades
+        })
+    tabla = tabla_columnar.codificar(
+        filas,
+        ['id', 'descripcion', 'notas', 'codigo', 'categoria', 'subcategoria',
+         'stock_total', 'cantidad_requerida', 'ubicaciones', 'cantidades'],
+        diccionarios=['categoria', 'subcategoria', 'ubicaciones'])
+    tabla['ultimo_cambio'] = ultimo_cambio
+    return app.json.dumps(tabla).encode('utf-8')
+
+@app.route('/api/inventario/eventos')
+def eventos_inventario():
+    """Cambios de stock en vivo (Server-Sent Events) desde Last-Event-ID o ?desde=ultimo_cambio de la tabla"""
+    desde = request.headers.get('Last-Event-ID') or request.args.get('desde')
+    try:
+        desde = int(desde) if desde else None
+    except ValueError:
+        return jsonify({'error': 'desde debe ser un número'}), 400
+    
+    suscripcion = difusor_cambios.suscribir(desde)
+    
+    def generar():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                eventos = suscripcion.esperar(Config.EVENTOS_PING_SEGUNDOS)
+                # El comentario sin eventos mantiene viva la conexión y detecta clientes que se fueron
+                yield ''.join(cambios_stock.formato_sse(evento) for evento in eventos) or ': ping\n\n'
+        finally:
+            difusor_cambios.cancelar(suscripcion)
+    
+    return Response(generar(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/producto/nuevo')
 def nuevo_producto():
@@ -883,8 +1471,6 @@ def editar_producto(id):
 @app.route('/producto/guardar', methods=['POST'])
 def guardar_producto():
     """Guardar producto nuevo o editado"""
-    conn = get_db_connection()
-    
     try:
         descripcion = request.form['descripcion']
         codigo = request.form['codigo'] if request.form['codigo'] else None
@@ -900,31 +1486,90 @@ def guardar_producto():
         producto_id = request.form.get('producto_id')
         
         if producto_id:  # Editar producto existente
-            conn.execute('''
-                UPDATE productos 
-                SET descripcion=?, codigo=?, categoria_id=?, subcategoria_id=?, marca_id=?, 
+            escritor.ejecutar(lambda conn: conn.execute('''
+                UPDATE productos
+                SET descripcion=?, codigo=?, categoria_id=?, subcategoria_id=?, marca_id=?,
                     proveedor_id=?, notas=?, cantidad_requerida=?, stock_minimo=?, maquina_id=?, fecha_actualizacion=CURRENT_TIMESTAMP
                 WHERE id=?
-            ''', (descripcion, codigo, categoria_id, subcategoria_id, marca_id, 
-                  proveedor_id, notas, cantidad_requerida, stock_minimo, maquina_id, producto_id))
+            ''', (descripcion, codigo, categoria_id, subcategoria_id, marca_id,
+                  proveedor_id, notas, cantidad_requerida, stock_minimo, maquina_id, producto_id)))
+            indice_productos.invalidar(producto_id)
             flash('Producto actualizado exitosamente', 'success')
         else:  # Crear nuevo producto
-            conn.execute('''
-                INSERT INTO productos (descripcion, codigo, categoria_id, subcategoria_id, marca_id, 
+            nuevo_id = escritor.ejecutar(lambda conn: conn.execute('''
+                INSERT INTO productos (descripcion, codigo, categoria_id, subcategoria_id, marca_id,
                                      proveedor_id, notas, cantidad_requerida, stock_minimo, maquina_id)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (descripcion, codigo, categoria_id, subcategoria_id, marca_id, 
-                  proveedor_id, notas, cantidad_requerida, stock_minimo, maquina_id))
+            ''', (descripcion, codigo, categoria_id, subcategoria_id, marca_id,
+                  proveedor_id, notas, cantidad_requerida, stock_minimo, maquina_id)).lastrowid)
+            indice_productos.invalidar(nuevo_id)
             flash('Producto creado exitosamente', 'success')
-        
-        conn.commit()
-        
+    
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
         flash(f'Error al guardar producto: {str(e)}', 'error')
     
-    conn.close()
     return redirect(url_for('productos'))
 
+@app.route('/producto/<int:id>/imagen', methods=['POST'])
+def subir_imagen_producto(id):
+    """Subir la imagen de un producto: se valida, se reduce y se guardan sus variantes"""
+    archivo = request.files.get('imagen')
+    if not archivo or not archivo.filename:
+        flash('Selecciona una imagen', 'error')
+        return redirect(url_for('editar_producto', id=id))
+    
+    datos = archivo.read()
+    try:
+        imagen = almacen_imagenes.guardar(datos, archivo.filename)
+    except ImagenInvalida as e:
+        flash(f'Imagen no válida: {e}', 'error')
+        return redirect(url_for('editar_producto', id=id))
+    
+    operador = datos_operador()
+    nombre_archivo = secure_filename(archivo.filename)
+    
+    def asignar_imagen(conn):
+        fila = conn.execute('SELECT imagen FROM productos WHERE id = ?', (id,)).fetchone()
+        if fila is None:
+            return False, None
+        # La misma foto pudo quedar huérfana y borrarse (otra subida) después de guardar()
+        if not almacen_imagenes.existe(imagen['clave']):
+            almacen_imagenes.guardar(datos)
+        conn.execute('UPDATE productos SET imagen = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?',
+                     (imagen['clave'], id))
+        registrar_operacion(conn, operador, 'PRODUCT_IMAGE', id, archivo=nombre_archivo,
+                            ancho=imagen['ancho'], alto=imagen['alto'])
+        anterior = fila[0]
+        return True, anterior if anterior != imagen['clave'] else None
+    
+    def borrar_si_huerfana(conn, clave):
+        # En el escritor: ninguna otra tarea puede asignar la clave entre la consulta y el borrado
+        if not conn.execute('SELECT 1 FROM productos WHERE imagen = ?', (clave,)).fetchone():
+            almacen_imagenes.eliminar(clave)
+    
+    try:
+        existe, anterior = escritor.ejecutar(asignar_imagen)
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
+    except Exception as e:
+        logging.error(f"Error guardando imagen del producto {id}: {e}")
+        flash(f'Error al guardar la imagen: {str(e)}', 'error')
+        return redirect(url_for('editar_producto', id=id))
+    
+    if not existe:
+        flash('Producto no encontrado', 'error')
+        return redirect(url_for('productos'))
+    if anterior:
+        # La anterior se borra si ningún otro producto la usa; si falla solo queda un archivo de más
+        try:
+            escritor.ejecutar(borrar_si_huerfana, anterior)
+        except Exception as e:
+            logging.warning(f"No se pudo borrar la imagen anterior {anterior}: {e}")
+    flash(f"Imagen guardada ({imagen['ancho']}x{imagen['alto']})", 'success')
+    return redirect(url_for('editar_producto', id=id))
+
 @app.route('/admin/actualizar-stock-rapido', methods=['POST'])
 @require_admin
 def actualizar_stock_rapido():
@@ -936,12 +1581,11 @@ def actualizar_stock_rapido():
         if not cambios:
             return jsonify({'success': False, 'error': 'No hay cambios para aplicar'})
         
-        conn = get_db_connection()
-        cambios_aplicados = 0
+        ip_address = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
+        admin_user_id = session.get('admin_user_id')
         
-        try:
-            # Iniciar transacción
-            conn.execute('BEGIN TRANSACTION')
+        def aplicar_cambios(conn):
+            cambios_aplicados = 0
             
             # Preparar consultas para optimizar
             update_query = '''UPDATE inventario SET cantidad = ?, fecha_actualizacion = CURRENT_TIMESTAMP 
@@ -949,27 +1593,7 @@ def actualizar_stock_rapido():
             insert_query = '''INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)'''
             delete_query = '''DELETE FROM inventario WHERE producto_id = ? AND ubicacion_id = ?'''
             
-            # Obtener información de productos y ubicaciones en lotes
-            producto_ids = [cambio['producto_id'] for cambio in cambios.values()]
-            ubicacion_ids = [cambio['ubicacion_id'] for cambio in cambios.values()]
-            
-            # Consulta optimizada para obtener info de productos
-            productos_info = {}
-            if producto_ids:
-                placeholders = ','.join('?' * len(set(producto_ids)))
-                productos_result = conn.execute(f'SELECT id, descripcion FROM productos WHERE id IN ({placeholders})', 
-                                              list(set(producto_ids))).fetchall()
-                productos_info = {p['id']: p['descripcion'] for p in productos_result}
-            
-            # Consulta optimizada para obtener info de ubicaciones
-            ubicaciones_info = {}
-            if ubicacion_ids:
-                placeholders = ','.join('?' * len(set(ubicacion_ids)))
-                ubicaciones_result = conn.execute(f'SELECT id, codigo FROM ubicaciones WHERE id IN ({placeholders})', 
-                                                list(set(ubicacion_ids))).fetchall()
-                ubicaciones_info = {u['id']: u['codigo'] for u in ubicaciones_result}
-            
-            # Procesar cambios
+            # Procesar cambios (la descripción del log se arma al leerlo)
             log_entries = []
             
             for key, cambio in cambios.items():
@@ -978,13 +1602,9 @@ def actualizar_stock_rapido():
                 stock_actual = cambio['stock_actual']
                 nuevo_stock = cambio['nuevo_stock']
                 
-                producto_desc = productos_info.get(producto_id, f'ID:{producto_id}')
-                ubicacion_codigo = ubicaciones_info.get(ubicacion_id, f'ID:{ubicacion_id}')
-                
                 if nuevo_stock == 0:
                     # Eliminar registro si el stock es 0
                     conn.execute(delete_query, (producto_id, ubicacion_id))
-                    descripcion = f"Eliminado stock de {producto_desc} en {ubicacion_codigo}"
                 else:
                     # Verificar si existe el registro
                     existing = conn.execute('SELECT 1 FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
@@ -994,51 +1614,25 @@ def actualizar_stock_rapido():
                         conn.execute(update_query, (nuevo_stock, producto_id, ubicacion_id))
                     else:
                         conn.execute(insert_query, (producto_id, ubicacion_id, nuevo_stock))
-                    
-                    descripcion = f"Actualizado stock de {producto_desc} en {ubicacion_codigo}: {stock_actual} → {nuevo_stock}"
                 
                 # Preparar entrada de log (se insertará en lote)
-                log_entries.append({
-                    'operation_type': 'STOCK_EDIT',
-                    'description': descripcion,
-                    'producto_id': producto_id,
-                    'ubicacion_id': ubicacion_id,
-                    'old_quantity': stock_actual,
-                    'new_quantity': nuevo_stock
-                })
+                log_entries.append(('STOCK_EDIT', producto_id, ubicacion_id, stock_actual, nuevo_stock, None))
                 
                 cambios_aplicados += 1
             
             # Insertar logs en lote
-            if log_entries:
-                ip_address = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
-                admin_user_id = session.get('admin_user_id')
-                
-                log_values = []
-                for entry in log_entries:
-                    log_values.append((
-                        admin_user_id, entry['operation_type'], entry['producto_id'], 
-                        entry['ubicacion_id'], entry['old_quantity'], entry['new_quantity'], 
-                        entry['description'], ip_address
-                    ))
-                
-                conn.executemany('''
-                    INSERT INTO operation_logs (admin_user_id, operation_type, producto_id, ubicacion_id, 
-                                              old_quantity, new_quantity, description, ip_address)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', log_values)
-            
-            # Confirmar transacción
-            conn.commit()
+            bitacora.registrar_varios(conn, admin_user_id, ip_address, log_entries)
             
-            # Log consolidado en archivo
-            logging.info(f"ADMIN_OP: {session.get('admin_username')} - BULK_STOCK_EDIT - {cambios_aplicados} cambios aplicados")
-            
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+            return cambios_aplicados
+        
+        # Todos los cambios en una sola transacción del escritor
+        cambios_aplicados = escritor.ejecutar(aplicar_cambios)
+        metrica_movimientos.incrementar('edicion_rapida', cantidad=cambios_aplicados)
+        for cambio in cambios.values():
+            indice_stock.invalidar(cambio['producto_id'])
+        
+        # Log consolidado en archivo
+        logging.info(f"ADMIN_OP: {session.get('admin_username')} - BULK_STOCK_EDIT - {cambios_aplicados} cambios aplicados")
         
         return jsonify({
             'success': True, 
@@ -1046,68 +1640,108 @@ def actualizar_stock_rapido():
             'message': f'{cambios_aplicados} cambio(s) aplicado(s) correctamente'
         })
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
         logging.error(f"Error en actualización rápida de stock: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+def quiere_json():
+    """La petición viene de fetch y pide JSON (Accept: application/json) en lugar de la página"""
+    return request.accept_mimetypes.best == 'application/json'
+
+def stock_producto(conn, producto_id):
+    """Stock de un producto por ubicación, leído en la transacción del movimiento que lo cambió"""
+    ubicaciones = conn.execute('''
+        SELECT i.ubicacion_id, u.codigo, i.cantidad
+        FROM inventario i
+        JOIN ubicaciones u ON i.ubicacion_id = u.id
+        WHERE i.producto_id = ? AND i.cantidad > 0
+        ORDER BY u.codigo
+    ''', (producto_id,)).fetchall()
+    return {
+        'id': int(producto_id),
+        'stock_total': sum(u['cantidad'] for u in ubicaciones),
+        'ubicaciones': [dict(u) for u in ubicaciones]
+    }
+
+def responder_movimiento(mensaje=None, error=None, producto=None):
+    """
+    Fin de un movimiento de stock: flash y vuelta a /inventario, o con
+    quiere_json() solo el stock nuevo del producto (stock_producto) para
+    que la página se actualice sin recargar.
+    """
+    if not quiere_json():
+        flash(error or mensaje, 'error' if error else 'success')
+        return redirect(url_for('inventario'))
+    
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    
+    return jsonify({
+        'success': True,
+        'message': mensaje,
+        'producto': producto
+    })
+
 @app.route('/inventario/agregar', methods=['POST'])
 def agregar_stock():
     """Agregar producto a una ubicación"""
-    conn = get_db_connection()
-    
     try:
         producto_id = request.form['producto_id']
         ubicacion_codigo = request.form['ubicacion_codigo']
         cantidad = int(request.form['cantidad'])
         
-        # Obtener o crear ubicación
-        ubicacion = conn.execute('SELECT id FROM ubicaciones WHERE codigo = ?', (ubicacion_codigo,)).fetchone()
-        if not ubicacion:
-            cursor = conn.execute('INSERT INTO ubicaciones (codigo, nombre) VALUES (?, ?)', 
-                        (ubicacion_codigo, ubicacion_codigo))
-            ubicacion_id = cursor.lastrowid
-        else:
-            ubicacion_id = ubicacion['id']
-        
-        # Insertar o actualizar inventario
-        existing = conn.execute('SELECT * FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
-                               (producto_id, ubicacion_id)).fetchone()
-        
-        if existing:
-            nueva_cantidad = existing['cantidad'] + cantidad
-            conn.execute('UPDATE inventario SET cantidad = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE producto_id = ? AND ubicacion_id = ?', 
-                        (nueva_cantidad, producto_id, ubicacion_id))
-        else:
-            conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)', 
-                        (producto_id, ubicacion_id, cantidad))
+        def agregar(conn):
+            # Obtener o crear ubicación
+            ubicacion = conn.execute('SELECT id FROM ubicaciones WHERE codigo = ?', (ubicacion_codigo,)).fetchone()
+            if not ubicacion:
+                cursor = conn.execute('INSERT INTO ubicaciones (codigo, nombre) VALUES (?, ?)', 
+                            (ubicacion_codigo, ubicacion_codigo))
+                ubicacion_id = cursor.lastrowid
+            else:
+                ubicacion_id = ubicacion['id']
+            
+            # Insertar o actualizar inventario
+            existing = conn.execute('SELECT * FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
+                                   (producto_id, ubicacion_id)).fetchone()
+            
+            if existing:
+                nueva_cantidad = existing['cantidad'] + cantidad
+                conn.execute('UPDATE inventario SET cantidad = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE producto_id = ? AND ubicacion_id = ?', 
+                            (nueva_cantidad, producto_id, ubicacion_id))
+            else:
+                conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)', 
+                            (producto_id, ubicacion_id, cantidad))
+            return stock_producto(conn, producto_id)
         
-        conn.commit()
-        flash('Stock agregado exitosamente', 'success')
+        producto = escritor.ejecutar(agregar)
+        metrica_movimientos.incrementar('entrada')
+        indice_stock.invalidar(producto_id)
+        return responder_movimiento('Stock agregado exitosamente', producto=producto)
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        flash(f'Error al agregar stock: {str(e)}', 'error')
-    
-    conn.close()
-    return redirect(url_for('inventario'))
+        return responder_movimiento(error=f'Error al agregar stock: {str(e)}')
 
 @app.route('/inventario/salida', methods=['POST'])
 def salida_stock():
     """Registrar salida de material del inventario"""
-    conn = get_db_connection()
-    
     try:
         producto_id = request.form['producto_id']
         ubicacion_id = request.form['ubicacion_id']
         cantidad_salida = int(request.form['cantidad'])
         motivo = request.form['motivo']
         
-        # Verificar stock disponible
-        stock_actual = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
-                                   (producto_id, ubicacion_id)).fetchone()
-        
-        if not stock_actual or stock_actual['cantidad'] < cantidad_salida:
-            flash('Error: No hay suficiente stock disponible', 'error')
-        else:
+        def registrar_salida(conn):
+            # Verificar stock disponible (dentro de la transacción del escritor)
+            stock_actual = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
+                                       (producto_id, ubicacion_id)).fetchone()
+            
+            if not stock_actual or stock_actual['cantidad'] < cantidad_salida:
+                return None
+            
             nueva_cantidad = stock_actual['cantidad'] - cantidad_salida
             
             if nueva_cantidad == 0:
@@ -1118,103 +1752,127 @@ def salida_stock():
                 # Actualizar cantidad
                 conn.execute('UPDATE inventario SET cantidad = ?, fecha_actualizacion = CURRENT_TIMESTAMP WHERE producto_id = ? AND ubicacion_id = ?', 
                             (nueva_cantidad, producto_id, ubicacion_id))
-            
-            conn.commit()
-            flash(f'Salida de material registrada exitosamente. Motivo: {motivo}', 'success')
+            return stock_producto(conn, producto_id)
+        
+        producto = escritor.ejecutar(registrar_salida)
+        if producto is None:
+            return responder_movimiento(error='Error: No hay suficiente stock disponible')
+        
+        metrica_movimientos.incrementar('salida')
+        indice_stock.invalidar(producto_id)
+        return responder_movimiento(f'Salida de material registrada exitosamente. Motivo: {motivo}',
+                                    producto=producto)
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        flash(f'Error al registrar salida: {str(e)}', 'error')
-    
-    conn.close()
-    return redirect(url_for('inventario'))
+        return responder_movimiento(error=f'Error al registrar salida: {str(e)}')
 
 @app.route('/inventario/cambio-ubicacion', methods=['POST'])
 def cambio_ubicacion():
     """Cambiar producto de una ubicación a otra"""
-    conn = get_db_connection()
-    
     try:
         producto_id = request.form['producto_id']
         ubicacion_origen_id = request.form['ubicacion_origen_id']
         ubicacion_destino_codigo = request.form['ubicacion_destino_id']
         cantidad_mover = int(request.form['cantidad'])
         motivo = request.form['motivo']
+        operador = datos_operador()
         
-        # Obtener información del producto
-        producto = conn.execute('SELECT descripcion FROM productos WHERE id = ?', (producto_id,)).fetchone()
-        if not producto:
-            flash('Producto no encontrado', 'error')
-            return redirect(url_for('inventario'))
-        
-        # Verificar stock disponible en ubicación origen
-        stock_origen = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
-                                   (producto_id, ubicacion_origen_id)).fetchone()
-        
-        if not stock_origen or stock_origen['cantidad'] < cantidad_mover:
-            flash('Error: No hay suficiente stock disponible en la ubicación origen', 'error')
-            return redirect(url_for('inventario'))
-        
-        # Obtener información de ubicación origen
-        ubicacion_origen = conn.execute('SELECT codigo FROM ubicaciones WHERE id = ?', (ubicacion_origen_id,)).fetchone()
+        def mover(conn):
+            # Obtener información del producto
+            producto = conn.execute('SELECT descripcion FROM productos WHERE id = ?', (producto_id,)).fetchone()
+            if not producto:
+                return None, 'Producto no encontrado'
+            
+            # Verificar stock disponible en ubicación origen
+            stock_origen = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
+                                       (producto_id, ubicacion_origen_id)).fetchone()
+            
+            if not stock_origen or stock_origen['cantidad'] < cantidad_mover:
+                return None, 'Error: No hay suficiente stock disponible en la ubicación origen'
+            
+            # Obtener información de ubicación origen
+            ubicacion_origen = conn.execute('SELECT codigo FROM ubicaciones WHERE id = ?', (ubicacion_origen_id,)).fetchone()
+            
+            # Obtener o crear ubicación destino
+            ubicacion_destino = conn.execute('SELECT id FROM ubicaciones WHERE codigo = ?', (ubicacion_destino_codigo,)).fetchone()
+            if not ubicacion_destino:
+                cursor = conn.execute('INSERT INTO ubicaciones (codigo, nombre) VALUES (?, ?)', 
+                            (ubicacion_destino_codigo, ubicacion_destino_codigo))
+                ubicacion_destino_id = cursor.lastrowid
+            else:
+                ubicacion_destino_id = ubicacion_destino['id']
+            
+            # Actualizar stock en ubicación origen
+            nueva_cantidad_origen = stock_origen['cantidad'] - cantidad_mover
+            if nueva_cantidad_origen == 0:
+                # Si queda en 0, eliminar el registro
+                conn.execute('DELETE FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
+                            (producto_id, ubicacion_origen_id))
+            else:
+                # Actualizar cantidad
+                conn.execute('UPDATE inventario SET cantidad = ? WHERE producto_id = ? AND ubicacion_id = ?', 
+                            (nueva_cantidad_origen, producto_id, ubicacion_origen_id))
+            
+            # Actualizar o insertar stock en ubicación destino
+            stock_destino = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
+                                       (producto_id, ubicacion_destino_id)).fetchone()
+            
+            if stock_destino:
+                # Si ya existe stock en destino, sumar
+                nueva_cantidad_destino = stock_destino['cantidad'] + cantidad_mover
+                conn.execute('UPDATE inventario SET cantidad = ? WHERE producto_id = ? AND ubicacion_id = ?', 
+                            (nueva_cantidad_destino, producto_id, ubicacion_destino_id))
+            else:
+                # Crear nuevo registro en destino
+                conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)', 
+                            (producto_id, ubicacion_destino_id, cantidad_mover))
+            
+            # Log de administrador si está logueado (en la misma transacción)
+            if operador:
+                registrar_operacion(
+                    conn, operador,
+                    operation_type='LOCATION_CHANGE',
+                    producto_id=producto_id,
+                    ubicacion_id=ubicacion_origen_id,
+                    old_quantity=stock_origen['cantidad'],
+                    new_quantity=nueva_cantidad_origen,
+                    cantidad=cantidad_mover,
+                    destino=ubicacion_destino_codigo
+                )
+            
+            return (producto['descripcion'], ubicacion_origen['codigo'], stock_producto(conn, producto_id)), None
         
-        # Obtener o crear ubicación destino
-        ubicacion_destino = conn.execute('SELECT id FROM ubicaciones WHERE codigo = ?', (ubicacion_destino_codigo,)).fetchone()
-        if not ubicacion_destino:
-            cursor = conn.execute('INSERT INTO ubicaciones (codigo, nombre) VALUES (?, ?)', 
-                        (ubicacion_destino_codigo, ubicacion_destino_codigo))
-            ubicacion_destino_id = cursor.lastrowid
-        else:
-            ubicacion_destino_id = ubicacion_destino['id']
-        
-        # Actualizar stock en ubicación origen
-        nueva_cantidad_origen = stock_origen['cantidad'] - cantidad_mover
-        if nueva_cantidad_origen == 0:
-            # Si queda en 0, eliminar el registro
-            conn.execute('DELETE FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
-                        (producto_id, ubicacion_origen_id))
-        else:
-            # Actualizar cantidad
-            conn.execute('UPDATE inventario SET cantidad = ? WHERE producto_id = ? AND ubicacion_id = ?', 
-                        (nueva_cantidad_origen, producto_id, ubicacion_origen_id))
-        
-        # Actualizar o insertar stock en ubicación destino
-        stock_destino = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', 
-                                   (producto_id, ubicacion_destino_id)).fetchone()
-        
-        if stock_destino:
-            # Si ya existe stock en destino, sumar
-            nueva_cantidad_destino = stock_destino['cantidad'] + cantidad_mover
-            conn.execute('UPDATE inventario SET cantidad = ? WHERE producto_id = ? AND ubicacion_id = ?', 
-                        (nueva_cantidad_destino, producto_id, ubicacion_destino_id))
-        else:
-            # Crear nuevo registro en destino
-            conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)', 
-                        (producto_id, ubicacion_destino_id, cantidad_mover))
+        resultado, error = escritor.ejecutar(mover)
+        if error:
+            return responder_movimiento(error=error)
         
-        conn.commit()
+        metrica_movimientos.incrementar('cambio_ubicacion')
+        indice_stock.invalidar(producto_id)
+        descripcion, codigo_origen, producto = resultado
         
         # Mensaje de éxito
-        flash(f'Cambio de ubicación exitoso: {cantidad_mover} unidades de "{producto["descripcion"]}" movidas de {ubicacion_origen["codigo"]} a {ubicacion_destino_codigo}. Motivo: {motivo}', 'success')
-        
-        # Log de administrador si está logueado
-        if is_admin_logged_in():
-            log_admin_operation(
-                operation_type='LOCATION_CHANGE',
-                description=f'Cambio de ubicación: {producto["descripcion"]} - {cantidad_mover} unidades de {ubicacion_origen["codigo"]} a {ubicacion_destino_codigo}',
-                producto_id=producto_id,
-                ubicacion_id=ubicacion_origen_id,
-                old_quantity=stock_origen['cantidad'],
-                new_quantity=nueva_cantidad_origen,
-                conn=conn
-            )
+        return responder_movimiento(
+            f'Cambio de ubicación exitoso: {cantidad_mover} unidades de "{descripcion}" movidas de {codigo_origen} a {ubicacion_destino_codigo}. Motivo: {motivo}',
+            producto=producto)
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
-        flash(f'Error al realizar cambio de ubicación: {str(e)}', 'error')
-    finally:
-        conn.close()
+        return responder_movimiento(error=f'Error al realizar cambio de ubicación: {str(e)}')
+
+@app.route('/api/productos/buscar')
+def api_buscar_productos():
+    """API para buscar productos por código o descripción mientras se escribe"""
+    try:
+        limite = min(max(int(request.args.get('limite', LIMITE_RESULTADOS)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limite debe ser un número'}), 400
     
-    return redirect(url_for('inventario'))
+    return jsonify({
+        'productos': indice_productos.buscar(request.args.get('q', ''), limite)
+    })
 
 @app.route('/api/producto/<int:id>/ubicaciones-stock')
 def api_ubicaciones_stock(id):
@@ -1235,6 +1893,44 @@ def api_ubicaciones_stock(id):
         'ubicaciones': [dict(ub) for ub in ubicaciones]
     })
 
+@app.route('/api/producto/<int:id>/sugerir-salida')
+def api_sugerir_salida(id):
+    """API para sugerir de qué ubicaciones retirar una cantidad de un producto"""
+    try:
+        cantidad = int(request.args.get('cantidad', 0))
+        estrategia = request.args.get('estrategia') or app.config.get('ASIGNACION_ESTRATEGIA_DEFAULT', 'menos_ubicaciones')
+        
+        asignacion = asignar(indice_stock.ubicaciones(id), cantidad, estrategia)
+        asignacion['producto_id'] = id
+        return jsonify(asignacion)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/salida/sugerir', methods=['POST'])
+def api_sugerir_salida_multiple():
+    """API para sugerir ubicaciones para una salida con varios productos"""
+    try:
+        data = request.get_json() or {}
+        lineas = data.get('lineas', [])
+        estrategia = data.get('estrategia') or app.config.get('ASIGNACION_ESTRATEGIA_DEFAULT', 'menos_ubicaciones')
+        
+        if not lineas:
+            return jsonify({'error': 'No hay líneas para asignar'}), 400
+        
+        return jsonify(asignar_salida(indice_stock, lineas, estrategia))
+        
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f'Solicitud inválida: {e}'}), 400
+
+@app.route('/api/salida/estrategias')
+def api_estrategias_salida():
+    """API para listar las estrategias de asignación disponibles"""
+    return jsonify({
+        'estrategias': ESTRATEGIAS,
+        'default': app.config.get('ASIGNACION_ESTRATEGIA_DEFAULT', 'menos_ubicaciones')
+    })
+
 # APIs para AJAX
 @app.route('/api/subcategorias/<int:categoria_id>')
 def api_subcategorias(categoria_id):
@@ -1411,6 +2107,8 @@ def exportar_categorias():
     return response
 
 @app.route('/api/producto/<int:id>')
+@condicional('productos', 'categorias', 'subcategorias', 'marcas', 'maquinas', 'proveedores',
+             'inventario', 'ubicaciones')
 def api_producto(id):
     """API para obtener detalles de un producto con ubicaciones de stock"""
     conn = get_db_connection()
@@ -1455,11 +2153,14 @@ def api_producto(id):
     # Preparar respuesta
     resultado = dict(producto)
     resultado['stock_total'] = stock_total
+    resultado['imagen_url'] = url_imagen(producto, 'modal') or f'/imagenes/{id}.jpg'
+    resultado['imagen_completa_url'] = url_imagen(producto, 'completa') or f'/imagenes/{id}.jpg'
     resultado['ubicaciones'] = [dict(ub) for ub in ubicaciones_stock]
     
     return jsonify(resultado)
 
 @app.route('/ubicaciones')
+@condicional('ubicaciones', 'inventario')
 def ubicaciones():
     """Vista de gestión de ubicaciones"""
     conn = get_db_connection()
@@ -1494,6 +2195,7 @@ def ubicaciones():
                          filters={'search': search})
 
 @app.route('/categorias')
+@condicional('categorias', 'subcategorias', 'productos')
 def categorias():
     """Vista de gestión de categorías y subcategorías"""
     conn = get_db_connection()
@@ -1533,13 +2235,14 @@ def categorias():
         WHERE 1=1
     '''
     
+    params_subcategorias = []
     if search:
         subcategorias_query += ' AND (sc.nombre LIKE ? OR c.nombre LIKE ?)'
-        params.extend([search_param, search_param])
+        params_subcategorias.extend([search_param, search_param])
     
     subcategorias_query += ' GROUP BY sc.id ORDER BY c.nombre, sc.nombre'
     
-    subcategorias = conn.execute(subcategorias_query, params).fetchall()
+    subcategorias = conn.execute(subcategorias_query, params_subcategorias).fetchall()
     
     conn.close()
     
@@ -1549,6 +2252,7 @@ def categorias():
                          filters={'search': search})
 
 @app.route('/maquinas')
+@condicional('maquinas', 'producto_maquinas')
 def maquinas():
     """Vista de gestión de máquinas"""
     conn = get_db_connection()
@@ -1582,6 +2286,7 @@ def maquinas():
                          filters={'search': search})
 
 @app.route('/proveedores')
+@condicional('proveedores', 'productos')
 def proveedores():
     """Vista de gestión de proveedores"""
     conn = get_db_connection()
@@ -1669,44 +2374,46 @@ def guardar_proveedor():
             flash(f'El nombre "{nombre}" ya está en uso por otro proveedor', 'error')
             return redirect(url_for('proveedores'))
         
-        if proveedor_id:  # Editar proveedor existente
-            conn.execute('''
-                UPDATE proveedores 
-                SET nombre=?, contacto=?, telefono=?, email=?, pagina_web=?, 
-                    direccion=?, notas=?, fecha_actualizacion=CURRENT_TIMESTAMP
-                WHERE id=?
-            ''', (nombre, contacto or None, telefono or None, email or None, 
-                  pagina_web or None, direccion or None, notas or None, proveedor_id))
-            flash('Proveedor actualizado exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='SUPPLIER_EDIT',
-                    description=f'Proveedor editado: {nombre}',
-                    conn=conn
-                )
-        else:  # Crear nuevo proveedor
-            cursor = conn.execute('''
-                INSERT INTO proveedores (nombre, contacto, telefono, email, pagina_web, direccion, notas)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (nombre, contacto or None, telefono or None, email or None, 
-                  pagina_web or None, direccion or None, notas or None))
-            nuevo_proveedor_id = cursor.lastrowid
-            flash('Proveedor creado exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='SUPPLIER_CREATE',
-                    description=f'Nuevo proveedor creado: {nombre}',
-                    conn=conn
-                )
+        operador = datos_operador()
+        
+        def guardar(conn):
+            if proveedor_id:  # Editar proveedor existente
+                conn.execute('''
+                    UPDATE proveedores 
+                    SET nombre=?, contacto=?, telefono=?, email=?, pagina_web=?, 
+                        direccion=?, notas=?, fecha_actualizacion=CURRENT_TIMESTAMP
+                    WHERE id=?
+                ''', (nombre, contacto or None, telefono or None, email or None, 
+                      pagina_web or None, direccion or None, notas or None, proveedor_id))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='SUPPLIER_EDIT',
+                        nombre=nombre
+                    )
+            else:  # Crear nuevo proveedor
+                conn.execute('''
+                    INSERT INTO proveedores (nombre, contacto, telefono, email, pagina_web, direccion, notas)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (nombre, contacto or None, telefono or None, email or None, 
+                      pagina_web or None, direccion or None, notas or None))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='SUPPLIER_CREATE',
+                        nombre=nombre
+                    )
         
-        conn.commit()
+        escritor.ejecutar(guardar)
+        flash('Proveedor actualizado exitosamente' if proveedor_id else 'Proveedor creado exitosamente', 'success')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al guardar proveedor: {str(e)}', 'error')
     finally:
         conn.close()
@@ -1728,23 +2435,27 @@ def eliminar_proveedor(id):
             proveedor = conn.execute('SELECT nombre FROM proveedores WHERE id = ?', (id,)).fetchone()
             
             if proveedor:
-                conn.execute('DELETE FROM proveedores WHERE id = ?', (id,))
-                conn.commit()
+                operador = datos_operador()
                 
-                flash(f'Proveedor "{proveedor["nombre"]}" eliminado exitosamente', 'success')
+                def eliminar(conn):
+                    conn.execute('DELETE FROM proveedores WHERE id = ?', (id,))
+                    
+                    # Log de administrador si está logueado
+                    if operador:
+                        registrar_operacion(
+                            conn, operador,
+                            operation_type='SUPPLIER_DELETE',
+                            nombre=proveedor['nombre']
+                        )
                 
-                # Log de administrador si está logueado
-                if is_admin_logged_in():
-                    log_admin_operation(
-                        operation_type='SUPPLIER_DELETE',
-                        description=f'Proveedor eliminado: {proveedor["nombre"]}',
-                        conn=conn
-                    )
+                escritor.ejecutar(eliminar)
+                flash(f'Proveedor "{proveedor["nombre"]}" eliminado exitosamente', 'success')
             else:
                 flash('Proveedor no encontrado', 'error')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al eliminar proveedor: {str(e)}', 'error')
     finally:
         conn.close()
@@ -1905,42 +2616,44 @@ def guardar_maquina():
             flash(f'El nombre "{nombre}" ya está en uso por otra máquina', 'error')
             return redirect(url_for('maquinas'))
         
-        if maquina_id:  # Editar máquina existente
-            if descripcion:
-                conn.execute('UPDATE maquinas SET nombre=?, descripcion=? WHERE id=?', 
-                           (nombre, descripcion, maquina_id))
-            else:
-                conn.execute('UPDATE maquinas SET nombre=? WHERE id=?', (nombre, maquina_id))
-            flash('Máquina actualizada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='MACHINE_EDIT',
-                    description=f'Máquina editada: {nombre}',
-                    conn=conn
-                )
-        else:  # Crear nueva máquina
-            if descripcion:
-                cursor = conn.execute('INSERT INTO maquinas (nombre, descripcion) VALUES (?, ?)', 
-                                    (nombre, descripcion))
-            else:
-                cursor = conn.execute('INSERT INTO maquinas (nombre) VALUES (?)', (nombre,))
-            nueva_maquina_id = cursor.lastrowid
-            flash('Máquina creada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='MACHINE_CREATE',
-                    description=f'Nueva máquina creada: {nombre}',
-                    conn=conn
-                )
+        operador = datos_operador()
         
-        conn.commit()
+        def guardar(conn):
+            if maquina_id:  # Editar máquina existente
+                if descripcion:
+                    conn.execute('UPDATE maquinas SET nombre=?, descripcion=? WHERE id=?', 
+                               (nombre, descripcion, maquina_id))
+                else:
+                    conn.execute('UPDATE maquinas SET nombre=? WHERE id=?', (nombre, maquina_id))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='MACHINE_EDIT',
+                        nombre=nombre
+                    )
+            else:  # Crear nueva máquina
+                if descripcion:
+                    conn.execute('INSERT INTO maquinas (nombre, descripcion) VALUES (?, ?)', 
+                                (nombre, descripcion))
+                else:
+                    conn.execute('INSERT INTO maquinas (nombre) VALUES (?)', (nombre,))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='MACHINE_CREATE',
+                        nombre=nombre
+                    )
         
+        escritor.ejecutar(guardar)
+        flash('Máquina actualizada exitosamente' if maquina_id else 'Máquina creada exitosamente', 'success')
+        
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al guardar máquina: {str(e)}', 'error')
     finally:
         conn.close()
@@ -1962,23 +2675,27 @@ def eliminar_maquina(id):
             maquina = conn.execute('SELECT nombre FROM maquinas WHERE id = ?', (id,)).fetchone()
             
             if maquina:
-                conn.execute('DELETE FROM maquinas WHERE id = ?', (id,))
-                conn.commit()
+                operador = datos_operador()
                 
-                flash(f'Máquina "{maquina["nombre"]}" eliminada exitosamente', 'success')
+                def eliminar(conn):
+                    conn.execute('DELETE FROM maquinas WHERE id = ?', (id,))
+                    
+                    # Log de administrador si está logueado
+                    if operador:
+                        registrar_operacion(
+                            conn, operador,
+                            operation_type='MACHINE_DELETE',
+                            nombre=maquina['nombre']
+                        )
                 
-                # Log de administrador si está logueado
-                if is_admin_logged_in():
-                    log_admin_operation(
-                        operation_type='MACHINE_DELETE',
-                        description=f'Máquina eliminada: {maquina["nombre"]}',
-                        conn=conn
-                    )
+                escritor.ejecutar(eliminar)
+                flash(f'Máquina "{maquina["nombre"]}" eliminada exitosamente', 'success')
             else:
                 flash('Máquina no encontrada', 'error')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al eliminar máquina: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2035,34 +2752,36 @@ def guardar_categoria():
             flash(f'El nombre "{nombre}" ya está en uso por otra categoría', 'error')
             return redirect(url_for('categorias'))
         
-        if categoria_id:  # Editar categoría existente
-            conn.execute('UPDATE categorias SET nombre=? WHERE id=?', (nombre, categoria_id))
-            flash('Categoría actualizada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='CATEGORY_EDIT',
-                    description=f'Categoría editada: {nombre}',
-                    conn=conn
-                )
-        else:  # Crear nueva categoría
-            cursor = conn.execute('INSERT INTO categorias (nombre) VALUES (?)', (nombre,))
-            nueva_categoria_id = cursor.lastrowid
-            flash('Categoría creada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='CATEGORY_CREATE',
-                    description=f'Nueva categoría creada: {nombre}',
-                    conn=conn
-                )
+        operador = datos_operador()
+        
+        def guardar(conn):
+            if categoria_id:  # Editar categoría existente
+                conn.execute('UPDATE categorias SET nombre=? WHERE id=?', (nombre, categoria_id))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='CATEGORY_EDIT',
+                        nombre=nombre
+                    )
+            else:  # Crear nueva categoría
+                conn.execute('INSERT INTO categorias (nombre) VALUES (?)', (nombre,))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='CATEGORY_CREATE',
+                        nombre=nombre
+                    )
         
-        conn.commit()
+        escritor.ejecutar(guardar)
+        flash('Categoría actualizada exitosamente' if categoria_id else 'Categoría creada exitosamente', 'success')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al guardar categoría: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2089,23 +2808,27 @@ def eliminar_categoria(id):
             categoria = conn.execute('SELECT nombre FROM categorias WHERE id = ?', (id,)).fetchone()
             
             if categoria:
-                conn.execute('DELETE FROM categorias WHERE id = ?', (id,))
-                conn.commit()
+                operador = datos_operador()
                 
-                flash(f'Categoría "{categoria["nombre"]}" eliminada exitosamente', 'success')
+                def eliminar(conn):
+                    conn.execute('DELETE FROM categorias WHERE id = ?', (id,))
+                    
+                    # Log de administrador si está logueado
+                    if operador:
+                        registrar_operacion(
+                            conn, operador,
+                            operation_type='CATEGORY_DELETE',
+                            nombre=categoria['nombre']
+                        )
                 
-                # Log de administrador si está logueado
-                if is_admin_logged_in():
-                    log_admin_operation(
-                        operation_type='CATEGORY_DELETE',
-                        description=f'Categoría eliminada: {categoria["nombre"]}',
-                        conn=conn
-                    )
+                escritor.ejecutar(eliminar)
+                flash(f'Categoría "{categoria["nombre"]}" eliminada exitosamente', 'success')
             else:
                 flash('Categoría no encontrada', 'error')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al eliminar categoría: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2173,38 +2896,42 @@ def guardar_subcategoria():
         categoria_info = conn.execute('SELECT nombre FROM categorias WHERE id = ?', (categoria_id,)).fetchone()
         categoria_nombre = categoria_info['nombre'] if categoria_info else 'Desconocida'
         
-        if subcategoria_id:  # Editar subcategoría existente
-            conn.execute('''
-                UPDATE subcategorias SET nombre=?, categoria_id=? WHERE id=?
-            ''', (nombre, categoria_id, subcategoria_id))
-            flash('Subcategoría actualizada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='SUBCATEGORY_EDIT',
-                    description=f'Subcategoría editada: {nombre} (Categoría: {categoria_nombre})',
-                    conn=conn
-                )
-        else:  # Crear nueva subcategoría
-            cursor = conn.execute('''
-                INSERT INTO subcategorias (nombre, categoria_id) VALUES (?, ?)
-            ''', (nombre, categoria_id))
-            nueva_subcategoria_id = cursor.lastrowid
-            flash('Subcategoría creada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='SUBCATEGORY_CREATE',
-                    description=f'Nueva subcategoría creada: {nombre} (Categoría: {categoria_nombre})',
-                    conn=conn
-                )
+        operador = datos_operador()
+        
+        def guardar(conn):
+            if subcategoria_id:  # Editar subcategoría existente
+                conn.execute('''
+                    UPDATE subcategorias SET nombre=?, categoria_id=? WHERE id=?
+                ''', (nombre, categoria_id, subcategoria_id))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='SUBCATEGORY_EDIT',
+                        nombre=nombre,
+                        categoria=categoria_nombre
+                    )
+            else:  # Crear nueva subcategoría
+                conn.execute('''
+                    INSERT INTO subcategorias (nombre, categoria_id) VALUES (?, ?)
+                ''', (nombre, categoria_id))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='SUBCATEGORY_CREATE',
+                        nombre=nombre,
+                        categoria=categoria_nombre
+                    )
         
-        conn.commit()
+        escritor.ejecutar(guardar)
+        flash('Subcategoría actualizada exitosamente' if subcategoria_id else 'Subcategoría creada exitosamente', 'success')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al guardar subcategoría: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2231,23 +2958,28 @@ def eliminar_subcategoria(id):
             ''', (id,)).fetchone()
             
             if subcategoria:
-                conn.execute('DELETE FROM subcategorias WHERE id = ?', (id,))
-                conn.commit()
+                operador = datos_operador()
                 
-                flash(f'Subcategoría "{subcategoria["nombre"]}" eliminada exitosamente', 'success')
+                def eliminar(conn):
+                    conn.execute('DELETE FROM subcategorias WHERE id = ?', (id,))
+                    
+                    # Log de administrador si está logueado
+                    if operador:
+                        registrar_operacion(
+                            conn, operador,
+                            operation_type='SUBCATEGORY_DELETE',
+                            nombre=subcategoria['nombre'],
+                            categoria=subcategoria['categoria_nombre']
+                        )
                 
-                # Log de administrador si está logueado
-                if is_admin_logged_in():
-                    log_admin_operation(
-                        operation_type='SUBCATEGORY_DELETE',
-                        description=f'Subcategoría eliminada: {subcategoria["nombre"]} (Categoría: {subcategoria["categoria_nombre"]})',
-                        conn=conn
-                    )
+                escritor.ejecutar(eliminar)
+                flash(f'Subcategoría "{subcategoria["nombre"]}" eliminada exitosamente', 'success')
             else:
                 flash('Subcategoría no encontrada', 'error')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al eliminar subcategoría: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2304,43 +3036,48 @@ def guardar_ubicacion():
             flash(f'El código "{codigo}" ya está en uso por otra ubicación', 'error')
             return redirect(url_for('ubicaciones'))
         
-        if ubicacion_id:  # Editar ubicación existente
-            conn.execute('''
-                UPDATE ubicaciones 
-                SET codigo=?, nombre=?
-                WHERE id=?
-            ''', (codigo, nombre, ubicacion_id))
-            flash('Ubicación actualizada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='LOCATION_EDIT',
-                    description=f'Ubicación editada: {codigo} - {nombre}',
-                    ubicacion_id=ubicacion_id,
-                    conn=conn
-                )
-        else:  # Crear nueva ubicación
-            cursor = conn.execute('''
-                INSERT INTO ubicaciones (codigo, nombre)
-                VALUES (?, ?)
-            ''', (codigo, nombre))
-            nueva_ubicacion_id = cursor.lastrowid
-            flash('Ubicación creada exitosamente', 'success')
-            
-            # Log de administrador si está logueado
-            if is_admin_logged_in():
-                log_admin_operation(
-                    operation_type='LOCATION_CREATE',
-                    description=f'Nueva ubicación creada: {codigo} - {nombre}',
-                    ubicacion_id=nueva_ubicacion_id,
-                    conn=conn
-                )
+        operador = datos_operador()
+        
+        def guardar(conn):
+            if ubicacion_id:  # Editar ubicación existente
+                conn.execute('''
+                    UPDATE ubicaciones 
+                    SET codigo=?, nombre=?
+                    WHERE id=?
+                ''', (codigo, nombre, ubicacion_id))
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='LOCATION_EDIT',
+                        codigo=codigo,
+                        nombre=nombre,
+                        ubicacion_id=ubicacion_id
+                    )
+            else:  # Crear nueva ubicación
+                cursor = conn.execute('''
+                    INSERT INTO ubicaciones (codigo, nombre)
+                    VALUES (?, ?)
+                ''', (codigo, nombre))
+                nueva_ubicacion_id = cursor.lastrowid
+                
+                # Log de administrador si está logueado
+                if operador:
+                    registrar_operacion(
+                        conn, operador,
+                        operation_type='LOCATION_CREATE',
+                        codigo=codigo,
+                        nombre=nombre,
+                        ubicacion_id=nueva_ubicacion_id
+                    )
         
-        conn.commit()
+        escritor.ejecutar(guardar)
+        flash('Ubicación actualizada exitosamente' if ubicacion_id else 'Ubicación creada exitosamente', 'success')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al guardar ubicación: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2362,24 +3099,29 @@ def eliminar_ubicacion(id):
             ubicacion = conn.execute('SELECT codigo, nombre FROM ubicaciones WHERE id = ?', (id,)).fetchone()
             
             if ubicacion:
-                conn.execute('DELETE FROM ubicaciones WHERE id = ?', (id,))
-                conn.commit()
+                operador = datos_operador()
                 
-                flash(f'Ubicación "{ubicacion["codigo"]}" eliminada exitosamente', 'success')
+                def eliminar(conn):
+                    conn.execute('DELETE FROM ubicaciones WHERE id = ?', (id,))
+                    
+                    # Log de administrador si está logueado
+                    if operador:
+                        registrar_operacion(
+                            conn, operador,
+                            operation_type='LOCATION_DELETE',
+                            codigo=ubicacion['codigo'],
+                            nombre=ubicacion['nombre'],
+                            ubicacion_id=id
+                        )
                 
-                # Log de administrador si está logueado
-                if is_admin_logged_in():
-                    log_admin_operation(
-                        operation_type='LOCATION_DELETE',
-                        description=f'Ubicación eliminada: {ubicacion["codigo"]} - {ubicacion["nombre"]}',
-                        ubicacion_id=id,
-                        conn=conn
-                    )
+                escritor.ejecutar(eliminar)
+                flash(f'Ubicación "{ubicacion["codigo"]}" eliminada exitosamente', 'success')
             else:
                 flash('Ubicación no encontrada', 'error')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
-        conn.rollback()
         flash(f'Error al eliminar ubicación: {str(e)}', 'error')
     finally:
         conn.close()
@@ -2405,7 +3147,7 @@ def descargar_backup():
         # Log de la operación
         log_admin_operation(
             operation_type='BACKUP_DOWNLOAD',
-            description=f'Backup descargado: {backup_filename}'
+            archivo=backup_filename
         )
         
         # Enviar archivo y eliminar temporal después
@@ -2450,10 +3192,16 @@ def restaurar_backup():
             flash('El archivo debe tener extensión .db', 'error')
             return redirect(url_for('inventario'))
         
-        # Crear backup de seguridad antes de restaurar
+        # Crear backup de seguridad antes de restaurar (API de backup: incluye lo pendiente en el WAL)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         backup_before_restore = f'inventario_before_restore_{timestamp}.db'
-        shutil.copy2(DATABASE, backup_before_restore)
+        conn = get_db_connection()
+        destino = sqlite3.connect(backup_before_restore)
+        try:
+            conn.backup(destino)
+        finally:
+            destino.close()
+            conn.close()
         
         # Guardar archivo temporal
         temp_dir = tempfile.gettempdir()
@@ -2475,29 +3223,376 @@ def restaurar_backup():
             flash(f'El archivo no es un backup válido: {str(e)}', 'error')
             return redirect(url_for('inventario'))
         
-        # Cerrar todas las conexiones existentes (importante para evitar locks)
-        # Esto se hace reemplazando el archivo directamente
+        def restaurar(conn):
+            # Copiar página por página sobre la conexión del escritor: las lecturas
+            # en curso no ven un archivo a medio reemplazar
+            origen = sqlite3.connect(temp_path)
+            try:
+                origen.backup(conn)
+            finally:
+                origen.close()
+            # Un backup antiguo puede venir con un esquema anterior
+            migraciones.migrar_base_datos(DATABASE)
         
         # Reemplazar la base de datos actual
-        shutil.copy2(temp_path, DATABASE)
-        
-        # Limpiar archivo temporal
-        os.remove(temp_path)
+        try:
+            escritor.ejecutar(restaurar, exclusiva=True)
+        finally:
+            # Limpiar archivo temporal
+            os.remove(temp_path)
+        indice_stock.invalidar()
+        indice_productos.invalidar()
+        cache_respuestas.invalidar()
         
         # Log de la operación (usando nueva base de datos)
         log_admin_operation(
             operation_type='BACKUP_RESTORE',
-            description=f'Base de datos restaurada desde {file.filename}. Motivo: {motivo}. Backup previo guardado como: {backup_before_restore}'
+            archivo=file.filename,
+            motivo=motivo,
+            previo=backup_before_restore
         )
         
         flash(f'Base de datos restaurada exitosamente desde {file.filename}. Se creó un backup de seguridad: {backup_before_restore}', 'success')
         
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
     except Exception as e:
         flash(f'Error al restaurar backup: {str(e)}', 'error')
         logging.error(f"Error restoring backup: {str(e)}")
     
     return redirect(url_for('inventario'))
 
+def _ruta_conteo_temporal(token):
+    """Ruta del archivo temporal de un conteo cíclico pendiente de confirmar"""
+    return os.path.join(tempfile.gettempdir(), f'conteo_{secure_filename(token)}.csv')
+
+def _preparar_conteo(conn, token, poner_en_cero_faltantes):
+    """Leer el conteo guardado y calcular sus diferencias contra el inventario"""
+    lineas, errores, total_errores = _cargar_conteo(conn, token)
+    conteo_ciclico.calcular_diferencias(conn, poner_en_cero_faltantes)
+    return lineas, errores, total_errores
+
+def _cargar_conteo(conn, token):
+    with open(_ruta_conteo_temporal(token), 'r', encoding='utf-8-sig', errors='replace', newline='') as archivo:
+        return conteo_ciclico.cargar_conteo(conn, archivo)
+
+def _borrar_conteo_temporal(token):
+    # Un doble envío puede llegar cuando el otro ya lo borró
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(_ruta_conteo_temporal(token))
+
+def _vista_previa_conteo(token, archivo, poner_en_cero_faltantes):
+    """Calcular la diferencia del conteo guardado y mostrarla; su huella queda en la sesión"""
+    # Solo lectura, pero con permiso para las tablas temporales del conteo
+    conn = conexion_lectura(DATABASE, temporales=True)
+    try:
+        lineas, errores, total_errores = _preparar_conteo(conn, token, poner_en_cero_faltantes)
+        resumen, filas = conteo_ciclico.resumen_diferencias(conn)
+        huella = conteo_ciclico.huella_diferencias(conn)
+    finally:
+        conn.close()
+    
+    session['conteo_token'] = token
+    session['conteo_archivo'] = archivo
+    session['conteo_poner_en_cero'] = poner_en_cero_faltantes
+    session['conteo_huella'] = huella
+    
+    return render_template('admin_conteo.html',
+                         vista_previa=True,
+                         archivo=archivo,
+                         lineas=lineas,
+                         errores=errores,
+                         total_errores=total_errores,
+                         resumen=resumen,
+                         filas=filas,
+                         poner_en_cero_faltantes=poner_en_cero_faltantes)
+
+def _olvidar_conteo():
+    for clave in ('conteo_token', 'conteo_archivo', 'conteo_poner_en_cero', 'conteo_huella'):
+        session.pop(clave, None)
+
+@app.route('/admin/conteo')
+@require_admin
+def admin_conteo():
+    """Formulario para importar un conteo cíclico"""
+    return render_template('admin_conteo.html')
+
+@app.route('/admin/conteo/vista-previa', methods=['POST'])
+@require_admin
+def admin_conteo_vista_previa():
+    """Subir un conteo cíclico y mostrar las diferencias contra el inventario"""
+    file = request.files.get('conteo_file')
+    if not file or file.filename == '':
+        flash('No se seleccionó ningún archivo', 'error')
+        return redirect(url_for('admin_conteo'))
+    
+    if not file.filename.lower().endswith(('.csv', '.txt')):
+        flash('El archivo debe tener extensión .csv', 'error')
+        return redirect(url_for('admin_conteo'))
+    
+    # Descartar un conteo anterior sin confirmar
+    token_anterior = session.pop('conteo_token', None)
+    if token_anterior:
+        _borrar_conteo_temporal(token_anterior)
+    
+    token = generate_session_token()
+    file.save(_ruta_conteo_temporal(token))
+    poner_en_cero_faltantes = request.form.get('poner_en_cero_faltantes') == '1'
+    
+    try:
+        return _vista_previa_conteo(token, file.filename, poner_en_cero_faltantes)
+    except Exception as e:
+        _borrar_conteo_temporal(token)
+        _olvidar_conteo()
+        logging.error(f"Error procesando conteo cíclico: {e}")
+        flash(f'Error al procesar el conteo: {str(e)}', 'error')
+        return redirect(url_for('admin_conteo'))
+
+@app.route('/admin/conteo/aplicar', methods=['POST'])
+@require_admin
+def admin_conteo_aplicar():
+    """Aplicar un conteo cíclico previamente revisado"""
+    token = session.get('conteo_token')
+    if not token or request.form.get('token') != token or not os.path.exists(_ruta_conteo_temporal(token)):
+        flash('El conteo expiró o ya fue aplicado. Vuelve a subir el archivo.', 'error')
+        return redirect(url_for('admin_conteo'))
+    
+    archivo = session.get('conteo_archivo', 'conteo.csv')
+    poner_en_cero_faltantes = session.get('conteo_poner_en_cero', True)
+    huella_revisada = session.get('conteo_huella')
+    operador = datos_operador()
+    
+    def aplicar(conn):
+        try:
+            # El CSV va a tablas temporales, que no necesitan el candado de escritura
+            _cargar_conteo(conn, token)
+            # Desde aquí hasta el COMMIT nadie más escribe: la diferencia que se compara
+            # con la vista previa es la misma que se aplica, y se aplica completa o nada
+            conn.execute('BEGIN IMMEDIATE')
+            conteo_ciclico.calcular_diferencias(conn, poner_en_cero_faltantes)
+            if conteo_ciclico.huella_diferencias(conn) != huella_revisada:
+                conn.execute('ROLLBACK')
+                return None
+            productos_afectados = conteo_ciclico.productos_afectados(conn)
+            aplicados, segundos = conteo_ciclico.aplicar_diferencias(conn, operador['admin_user_id'], operador['ip_address'])
+            
+            registrar_operacion(
+                conn, operador,
+                'CYCLE_COUNT_IMPORT',
+                archivo=archivo,
+                cambios=aplicados,
+                segundos=round(segundos, 1)
+            )
+            conn.execute('COMMIT')
+            return productos_afectados, aplicados, segundos
+        finally:
+            # La conexión del escritor es compartida: no dejar tablas temporales
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            conn.execute('DROP TABLE IF EXISTS temp.conteo')
+            conn.execute('DROP TABLE IF EXISTS temp.conteo_diff')
+    
+    try:
+        # Tarea exclusiva: una sola transacción con todos los lotes del conteo
+        resultado = escritor.ejecutar(aplicar, exclusiva=True)
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
+    except Exception as e:
+        # Nada quedó aplicado: el archivo se conserva para volver a intentarlo
+        logging.error(f"Error aplicando conteo cíclico: {e}")
+        flash(f'Error al aplicar el conteo, no se modificó el inventario: {str(e)}', 'error')
+        return redirect(url_for('admin_conteo'))
+    
+    if resultado is None:
+        # El stock contado cambió desde la vista previa: mostrar la diferencia nueva para revisarla
+        flash('El inventario cambió desde la vista previa; no se aplicó nada. Revisa las diferencias actualizadas.', 'error')
+        try:
+            return _vista_previa_conteo(token, archivo, poner_en_cero_faltantes)
+        except Exception as e:
+            logging.error(f"Error procesando conteo cíclico: {e}")
+            flash(f'Error al procesar el conteo: {str(e)}', 'error')
+            return redirect(url_for('admin_conteo'))
+    
+    productos_afectados, aplicados, segundos = resultado
+    _borrar_conteo_temporal(token)
+    _olvidar_conteo()
+    metrica_movimientos.incrementar('conteo', cantidad=aplicados)
+    for producto_id in productos_afectados:
+        indice_stock.invalidar(producto_id)
+    
+    flash(f'Conteo aplicado: {aplicados} cambio(s) en {segundos:.1f} segundos', 'success')
+    return redirect(url_for('inventario'))
+
+@app.route('/admin/catalogo', methods=['GET', 'POST'])
+@require_admin
+def admin_catalogo():
+    """Carga masiva de productos e inventario desde CSV"""
+    if request.method == 'GET':
+        return render_template('admin_catalogo.html')
+    
+    archivo_productos = request.files.get('productos_file')
+    archivo_inventario = request.files.get('inventario_file')
+    if not (archivo_productos and archivo_productos.filename) and not (archivo_inventario and archivo_inventario.filename):
+        flash('No se seleccionó ningún archivo', 'error')
+        return redirect(url_for('admin_catalogo'))
+    
+    operador = datos_operador()
+    
+    def cargar_catalogo(conn, archivos):
+        resultados = []
+        # Primero productos, para que el inventario pueda referenciarlos
+        for nombre_archivo, cargar, filas in archivos:
+            resultado = cargar(conn, filas)
+            resultados.append(resultado)
+            registrar_operacion(conn, operador, 'CATALOG_IMPORT', archivo=nombre_archivo, resumen=resultado.resumen())
+        return resultados
+    
+    try:
+        # Leer los archivos aquí: el escritor no tiene acceso a la petición
+        archivos = []
+        for archivo, cargar in ((archivo_productos, carga_masiva.cargar_productos),
+                                (archivo_inventario, carga_masiva.cargar_inventario)):
+            if not archivo or not archivo.filename:
+                continue
+            texto = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', errors='replace', newline='')
+            archivos.append((archivo.filename, cargar, carga_masiva.leer_csv(texto)))
+        
+        # Tarea exclusiva: la carga masiva maneja sus propias transacciones
+        resultados = escritor.ejecutar(cargar_catalogo, archivos, exclusiva=True)
+        indice_stock.invalidar()
+        indice_productos.invalidar()
+        
+    except EscrituraOcupada:
+        raise  # 503 con Retry-After (responder_escritura_ocupada)
+    except Exception as e:
+        logging.error(f"Error en carga masiva de catálogo: {e}")
+        flash(f'Error en la carga masiva: {str(e)}', 'error')
+        return redirect(url_for('admin_catalogo'))
+    
+    return render_template('admin_catalogo.html', resultados=resultados)
+
+@app.errorhandler(EscrituraOcupada)
+def manejar_escritura_ocupada(error):
+    """Las rutas dejan pasar EscrituraOcupada: responder 503 + Retry-After"""
+    g.pop('escritura_ocupada', None)
+    return respuesta_ocupada(error)
+
+@app.after_request
+def responder_escritura_ocupada(response):
+    """Convertir en 503 + Retry-After las peticiones cuya escritura se rechazó por contención"""
+    error = g.pop('escritura_ocupada', None)
+    if error is None:
+        return response
+    return respuesta_ocupada(error)
+
+def respuesta_ocupada(error):
+    """503 en JSON o con la página de reintento, según quién pidió"""
+    if request.is_json or request.path.startswith('/api/') or quiere_json():
+        response = jsonify({'success': False, 'error': str(error), 'reintentar_en': error.reintentar_en,
+                            'en_curso': error.en_curso})
+    else:
+        response = make_response(render_template('ocupado.html', reintentar_en=error.reintentar_en,
+                                                 en_curso=error.en_curso))
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.reintentar_en)
+    return response
+
+@app.route('/admin/contencion')
+@require_admin
+def admin_contencion():
+    """Histogramas por ruta de espera y retención del candado de escritura"""
+    return jsonify(escritor.estadisticas())
+
+@app.route('/admin/consultas-lentas')
+@require_admin
+def admin_consultas_lentas():
+    """Huellas de consultas lentas ordenadas por tiempo total"""
+    orden = request.args.get('orden', 'total')
+    huellas = consultas_lentas.top(limite=100, orden=orden)
+    return render_template('admin_consultas_lentas.html',
+                         huellas=huellas,
+                         orden=orden,
+                         umbral_ms=consultas_lentas.umbral_ms)
+
+@app.route('/admin/consultas-lentas/limpiar', methods=['POST'])
+@require_admin
+def admin_consultas_lentas_limpiar():
+    """Vaciar el registro de consultas lentas"""
+    consultas_lentas.limpiar()
+    log_admin_operation('SLOW_QUERY_LOG_CLEAR')
+    flash('Registro de consultas lentas vaciado', 'success')
+    return redirect(url_for('admin_consultas_lentas'))
+
+@app.route('/admin/perfiles')
+@require_admin
+def admin_perfiles():
+    """Perfiles guardados y reglas de muestreo activas"""
+    endpoints = sorted({regla.endpoint for regla in app.url_map.iter_rules() if regla.endpoint != 'static'})
+    return render_template('admin_perfiles.html',
+                         perfiles=perfilador.listar(),
+                         reglas=perfilador.reglas(),
+                         endpoints=endpoints)
+
+@app.route('/admin/perfiles/reglas', methods=['POST'])
+@require_admin
+def admin_perfiles_regla():
+    """Activar o quitar una regla de muestreo uno de cada N"""
+    endpoint = request.form.get('endpoint', '')
+    if request.form.get('accion') == 'quitar':
+        perfilador.quitar_regla(endpoint)
+        flash(f'Muestreo de {endpoint} desactivado', 'success')
+        return redirect(url_for('admin_perfiles'))
+    
+    if endpoint not in app.view_functions:
+        flash('Endpoint no válido', 'error')
+        return redirect(url_for('admin_perfiles'))
+    try:
+        cada_n = max(1, int(request.form.get('cada_n', 10)))
+        minutos = min(max(1, int(request.form.get('minutos', 15))), 24 * 60)
+    except ValueError:
+        flash('N y la duración deben ser números enteros', 'error')
+        return redirect(url_for('admin_perfiles'))
+    
+    perfilador.agregar_regla(endpoint, cada_n, minutos)
+    log_admin_operation('PROFILE_SAMPLING', cada_n=cada_n, endpoint=endpoint, minutos=minutos)
+    flash(f'Se perfilará 1 de cada {cada_n} peticiones a {endpoint} durante {minutos} minutos', 'success')
+    return redirect(url_for('admin_perfiles'))
+
+@app.route('/admin/perfiles/<perfil_id>')
+@require_admin
+def admin_perfil_detalle(perfil_id):
+    """Reporte de un perfil (pstats o pilas muestreadas)"""
+    meta = perfilador.obtener(perfil_id)
+    if not meta:
+        flash('Perfil no encontrado', 'error')
+        return redirect(url_for('admin_perfiles'))
+    
+    orden = request.args.get('orden', 'cumulative')
+    resumen = perfilador.resumen_muestreo(meta) if meta['modo'] == 'muestreo' else None
+    return render_template('admin_perfil_detalle.html',
+                         perfil=meta,
+                         orden=orden,
+                         reporte=perfilador.reporte(meta, orden=orden),
+                         resumen=resumen)
+
+@app.route('/admin/perfiles/<perfil_id>/descargar')
+@require_admin
+def admin_perfil_descargar(perfil_id):
+    """Descargar el .prof (pstats) o el .collapsed (flamegraph/speedscope)"""
+    meta = perfilador.obtener(perfil_id)
+    if not meta:
+        flash('Perfil no encontrado', 'error')
+        return redirect(url_for('admin_perfiles'))
+    ruta = perfilador.archivo(meta)
+    return send_file(os.path.abspath(ruta), as_attachment=True, download_name=os.path.basename(ruta))
+
+@app.route('/admin/perfiles/<perfil_id>/eliminar', methods=['POST'])
+@require_admin
+def admin_perfil_eliminar(perfil_id):
+    perfilador.eliminar(perfil_id)
+    flash('Perfil eliminado', 'success')
+    return redirect(url_for('admin_perfiles'))
+
 @app.errorhandler(413)
 def too_large(e):
     """Handle file too large error"""
@@ -2703,6 +3798,7 @@ def exportar_inventario():
     return response
 
 @app.route('/api/ubicacion/<int:id>')
+@condicional('ubicaciones', 'inventario', 'productos')
 def api_ubicacion(id):
     """API para obtener detalles de una ubicación"""
     conn = get_db_connection()
@@ -2800,18 +3896,71 @@ def exportar_ubicaciones():
     
     return response
 
-# Servir imágenes estáticas
+# Servir archivos del disco (imágenes y estáticos)
+def servir_archivo(directorio, nombre, ubicacion_interna=None, inmutable=False):
+    """
+    Servir un archivo con ETag fuerte, Last-Modified y Range (304 y 206 los
+    resuelve make_conditional). El ETag tiene el mismo formato que el de
+    nginx ("<mtime hex>-<tamaño hex>"), así que una copia cacheada vale
+    la sirva quien la sirva. Detrás de config/nginx.conf (que manda
+    X-Sendfile-Type: X-Accel-Redirect) la aplicación solo pone las
+    cabeceras y nginx manda el cuerpo con sendfile desde su location
+    interna bajo X_ACCEL_PREFIJO. Solo las rutas con `ubicacion_interna`
+    (una location internal en nginx) hacen caso de esa cabecera.
+    """
+    ruta = safe_join(directorio, nombre)
+    if ruta is None or not os.path.isfile(ruta):
+        abort(404)
+    estado = os.stat(ruta)
+    max_age = Config.ARCHIVOS_INMUTABLES_MAX_AGE if inmutable else None
+    
+    if (ubicacion_interna and Config.X_ACCEL_PREFIJO and
+            request.headers.get('X-Sendfile-Type') == 'X-Accel-Redirect'):
+        respuesta = make_response('')
+        respuesta.mimetype = mimetypes.guess_type(nombre)[0] or 'application/octet-stream'
+        respuesta.headers['X-Accel-Redirect'] = f"{Config.X_ACCEL_PREFIJO}/{ubicacion_interna}/{quote(nombre)}"
+    else:
+        respuesta = send_file(ruta, etag=f'{int(estado.st_mtime):x}-{estado.st_size:x}',
+                              last_modified=estado.st_mtime, max_age=max_age, conditional=True)
+    
+    if inmutable:
+        respuesta.cache_control.public = True
+        respuesta.cache_control.max_age = max_age
+        respuesta.cache_control.immutable = True
+    else:
+        # Siempre se revalida: la respuesta es un 304 mientras el archivo no cambie
+        respuesta.cache_control.no_cache = True
+    return respuesta
+
+@app.route('/static/<path:filename>', endpoint='static')
+def archivos_estaticos(filename):
+    """CSS, JS y demás archivos de static/; lo empaquetado en dist/ no cambia nunca"""
+    # Sin X-Accel: nginx ya sirve static/ del disco y solo pasa aquí lo que no tiene
+    return servir_archivo(STATIC_DIR, filename,
+                          inmutable=bool(paquetes_assets.NOMBRE_EMPAQUETADO.match(filename)))
+
 @app.route('/imagenes/<filename>')
 def imagenes(filename):
-    """Servir imágenes de productos"""
-    from flask import send_from_directory
-    return send_from_directory('imagenes', filename)
+    """Servir imágenes de productos; las variantes con hash no cambian nunca"""
+    return servir_archivo(IMAGENES_DIR, filename, 'imagenes', inmutable=bool(NOMBRE_VARIANTE.match(filename)))
 
 @app.route('/health')
 def health_check():
     """Health check endpoint for Docker"""
     return {'status': 'healthy', 'timestamp': datetime.now().isoformat()}, 200
 
+@app.route('/metrics')
+def metrics():
+    """Métricas en formato de texto de Prometheus"""
+    token = app.config.get('METRICAS_TOKEN')
+    if token and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return 'No autorizado\n', 401, {'WWW-Authenticate': 'Bearer'}
+    
+    response = make_response(metricas.exposicion())
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 @app.route('/exportar/maquinas')
 def exportar_maquinas():
     """Exportar máquinas a CSV"""
@@ -2893,4 +4042,5 @@ def exportar_maquinas():
     return response
 
 if __name__ == '__main__':
+    inicializar()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
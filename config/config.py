@@ -26,9 +26,65 @@ class Config:
     # Configuración de alertas
     STOCK_MINIMO_ALERTA = 1  # Alertar cuando el stock sea menor o igual a este valor
     
+    # Configuración de asignación de ubicaciones en salidas
+    ASIGNACION_ESTRATEGIA_DEFAULT = 'menos_ubicaciones'  # menos_ubicaciones, vaciar_remanentes, mas_antiguo
+    INDICE_STOCK_TTL_SEGUNDOS = 60  # Recargar el índice completo de stock cada N segundos
+    INDICE_PRODUCTOS_TTL_SEGUNDOS = 60  # Revisar cada N segundos si otro proceso cambió productos
+    EVENTOS_INTERVALO_SEGUNDOS = 1.0  # Cada cuánto se leen los cambios de stock de otros workers (SSE)
+    EVENTOS_PING_SEGUNDOS = 15  # Comentario keep-alive en /api/inventario/eventos si no hay cambios
+    CACHE_RESPUESTAS_MAX_BYTES = int(os.environ.get('CACHE_RESPUESTAS_MAX_BYTES') or 64 * 1024 * 1024)
+    CACHE_RESPUESTAS_VENTANA_OBSOLETA_SEGUNDOS = 30  # Servir lo anterior mientras se recalcula si no es más viejo que esto
+    
+    # Configuración de escrituras a la base de datos
+    ESCRITURA_PRESUPUESTO_SEGUNDOS = 5  # Espera máxima por el candado de escritura antes de responder 503
+    ESCRITURA_PRESUPUESTOS_RUTA = {  # Rutas que pueden esperar más (por endpoint)
+        'actualizar_stock_rapido': 15,
+        'admin_conteo_aplicar': 60,
+        'admin_catalogo': 120,
+        'restaurar_backup': 120,
+    }
+    ESCRITURA_REINTENTAR_EN_SEGUNDOS = 2  # Valor de Retry-After en las respuestas 503
+    
+    # Instrumentación de peticiones (SQL y plantillas)
+    TRAZA_MUESTREO = float(os.environ.get('TRAZA_MUESTREO') or 0.01)  # Fracción de peticiones con traza en el log
+    TRAZA_LENTA_MS = 1000  # Las peticiones más lentas que esto siempre dejan traza
+    
+    # Registro de consultas lentas (base SQLite aparte, rota sola)
+    CONSULTAS_LENTAS_DB = os.environ.get('CONSULTAS_LENTAS_DB') or 'consultas_lentas.db'
+    CONSULTAS_LENTAS_UMBRAL_MS = int(os.environ.get('CONSULTAS_LENTAS_UMBRAL_MS') or 100)
+    CONSULTAS_LENTAS_MAX_REGISTROS = 10000
+    
+    # Perfilado bajo demanda (?_perfil=1 o header X-Perfil, solo administradores)
+    PERFILES_DIR = os.environ.get('PERFILES_DIR') or 'perfiles'
+    PERFILES_MAX = 100  # Se conservan los más recientes
+    
+    # Endpoint /metrics (Prometheus); con token se exige "Authorization: Bearer <token>"
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN') or ''
+    
+    # Logging (cola en memoria; un hilo escribe JSON por línea y rota)
+    LOG_DIR = os.environ.get('LOG_DIR') or 'logs'
+    LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES') or 50 * 1024 * 1024)
+    LOG_RESPALDOS = 10
+    LOG_ROTAR_CADA_HORAS = 24  # Rotar también por tiempo (0 = solo por tamaño)
+    LOG_COMPRIMIR = os.environ.get('LOG_COMPRIMIR', 'true').lower() in ['true', 'on', '1']
+    LOG_COLA_MAXIMA = 10000  # Con la cola llena se descartan registros en vez de bloquear
+    
+    # Bitácora por capas: operation_logs reciente en la base, lo viejo en archivos mensuales
+    LOGS_ARCHIVO_DIR = os.environ.get('LOGS_ARCHIVO_DIR') or 'archivo_logs'
+    LOGS_DIAS_CALIENTES = int(os.environ.get('LOGS_DIAS_CALIENTES') or 90)
+    LOGS_ARCHIVO_LOTE = 5000  # Registros movidos por transacción
+    LOGS_ARCHIVO_INTERVALO_HORAS = 24  # Archivado automático (0 = solo manual)
+    
     # Configuración de imágenes
+    IMAGENES_DIR = os.environ.get('IMAGENES_DIR') or 'imagenes'
     IMAGEN_EXTENSIONES_PERMITIDAS = {'jpg', 'jpeg', 'png', 'gif'}
     IMAGEN_TAMAÑO_MAXIMO = (800, 800)  # Redimensionar imágenes grandes
+    IMAGEN_VARIANTES = {'lista': (96, 96), 'modal': (400, 400)}  # Además de la completa (IMAGEN_TAMAÑO_MAXIMO)
+    
+    # Archivos servidos desde disco (imágenes y static/)
+    ARCHIVOS_INMUTABLES_MAX_AGE = 365 * 24 * 3600  # Nombres con hash: el contenido no cambia nunca
+    # Locations internas de config/nginx.conf; se usan solo si nginx manda X-Sendfile-Type: X-Accel-Redirect
+    X_ACCEL_PREFIJO = (os.environ.get('X_ACCEL_PREFIJO') or '/_archivos').rstrip('/')
     
     # Configuración de respaldos
     RESPALDO_AUTOMATICO = True
@@ -61,23 +117,7 @@ class Config:
         # Crear carpetas necesarias
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
         
-        # Configurar logging
-        if not app.debug:
-            import logging
-            from logging.handlers import RotatingFileHandler
-            
-            if not os.path.exists('logs'):
-                os.mkdir('logs')
-            
-            file_handler = RotatingFileHandler('logs/inventario.log', maxBytes=10240, backupCount=10)
-            file_handler.setFormatter(logging.Formatter(
-                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-            ))
-            file_handler.setLevel(logging.INFO)
-            app.logger.addHandler(file_handler)
-            
-            app.logger.setLevel(logging.INFO)
-            app.logger.info('Sistema de inventario iniciado')
+        # El logging se configura en app.inicializar() (servicios/registro.py)
 
 class DevelopmentConfig(Config):
     """Configuración para desarrollo"""
@@ -1,6 +1,9 @@
 import sqlite3
-import csv
-from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import carga_masiva
 
 # Inicializar base de datos
 def init_db():
@@ -92,161 +95,55 @@ def init_db():
         )
     ''')
     
+    # Tabla de relación productos-máquinas (muchos a muchos)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS producto_maquinas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            maquina_id INTEGER NOT NULL,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (producto_id) REFERENCES productos (id) ON DELETE CASCADE,
+            FOREIGN KEY (maquina_id) REFERENCES maquinas (id) ON DELETE CASCADE,
+            UNIQUE(producto_id, maquina_id)
+        )
+    ''')
+    
     conn.commit()
     return conn
 
-def importar_productos():
+def _mostrar_resultado(resultado):
+    """Mostrar resumen y errores de una carga"""
+    for error in resultado.errores[:20]:
+        print(f"⚠️  Línea {error['linea']}: {error['error']}")
+    if resultado.total_errores > 20:
+        print(f"⚠️  ... y {resultado.total_errores - 20} errores más")
+    print(f"\n✅ {resultado.resumen()}")
+
+def importar_productos(ruta_csv='Productos.csv'):
     """Importar productos desde el CSV"""
     conn = init_db()
-    cursor = conn.cursor()
     
     print("=== IMPORTANDO PRODUCTOS ===\n")
     
-    # Leer productos del CSV
-    with open('Productos.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        productos_importados = 0
-        
-        for row in reader:
-            try:
-                # Obtener o crear categoría
-                categoria_id = None
-                if row['Categoria'].strip():
-                    cursor.execute('INSERT OR IGNORE INTO categorias (nombre) VALUES (?)', 
-                                 (row['Categoria'].strip(),))
-                    cursor.execute('SELECT id FROM categorias WHERE nombre = ?', 
-                                 (row['Categoria'].strip(),))
-                    categoria_id = cursor.fetchone()[0]
-                
-                # Obtener o crear subcategoría
-                subcategoria_id = None
-                if row['SubCategoria'].strip() and categoria_id:
-                    cursor.execute('INSERT OR IGNORE INTO subcategorias (nombre, categoria_id) VALUES (?, ?)', 
-                                 (row['SubCategoria'].strip(), categoria_id))
-                    cursor.execute('SELECT id FROM subcategorias WHERE nombre = ? AND categoria_id = ?', 
-                                 (row['SubCategoria'].strip(), categoria_id))
-                    result = cursor.fetchone()
-                    if result:
-                        subcategoria_id = result[0]
-                
-                # Obtener o crear marca
-                marca_id = None
-                if row['Marca'].strip():
-                    cursor.execute('INSERT OR IGNORE INTO marcas (nombre) VALUES (?)', 
-                                 (row['Marca'].strip(),))
-                    cursor.execute('SELECT id FROM marcas WHERE nombre = ?', 
-                                 (row['Marca'].strip(),))
-                    marca_id = cursor.fetchone()[0]
-                
-                # Obtener o crear máquina
-                maquina_id = None
-                if row['Maquina'].strip():
-                    cursor.execute('INSERT OR IGNORE INTO maquinas (nombre) VALUES (?)', 
-                                 (row['Maquina'].strip(),))
-                    cursor.execute('SELECT id FROM maquinas WHERE nombre = ?', 
-                                 (row['Maquina'].strip(),))
-                    maquina_id = cursor.fetchone()[0]
-                
-                # Insertar producto
-                producto_id = int(row['ID']) if row['ID'].strip() else None
-                if producto_id:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO productos 
-                        (id, descripcion, codigo, categoria_id, subcategoria_id, marca_id, 
-                         notas, cantidad_requerida, maquina_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        producto_id,
-                        row['Descripcion'].strip(),
-                        row['Codigo'].strip() if row['Codigo'].strip() else None,
-                        categoria_id,
-                        subcategoria_id,
-                        marca_id,
-                        row['Notas Adicionales'].strip() if row['Notas Adicionales'].strip() else None,
-                        int(row['Cantidad Requerida por Maquina']) if row['Cantidad Requerida por Maquina'].strip() else 1,
-                        maquina_id
-                    ))
-                    productos_importados += 1
-                    
-                    if productos_importados % 10 == 0:
-                        print(f"Importados {productos_importados} productos...")
-                
-            except Exception as e:
-                print(f"Error importando producto {row.get('ID', 'N/A')}: {e}")
+    with open(ruta_csv, 'r', encoding='utf-8-sig', newline='') as file:
+        filas = carga_masiva.leer_csv(file)
     
-    conn.commit()
-    print(f"\n✅ Productos importados: {productos_importados}")
+    resultado = carga_masiva.cargar_productos(conn, filas)
+    _mostrar_resultado(resultado)
     return conn
 
-def importar_inventario():
+def importar_inventario(ruta_csv='Inventario.csv'):
     """Importar inventario desde el CSV"""
     conn = sqlite3.connect('inventario.db')
-    cursor = conn.cursor()
     
     print("\n=== IMPORTANDO INVENTARIO ===\n")
     
-    # Leer inventario del CSV
-    with open('Inventario.csv', 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        inventario_importado = 0
-        
-        for row in reader:
-            try:
-                # Buscar producto por nombre o ProductoID
-                producto_id = None
-                if row['ProductoID'].strip():
-                    producto_id = int(row['ProductoID'])
-                else:
-                    # Buscar por nombre del producto
-                    cursor.execute('SELECT id FROM productos WHERE descripcion LIKE ?', 
-                                 (f"%{row['Producto'].strip()}%",))
-                    result = cursor.fetchone()
-                    if result:
-                        producto_id = result[0]
-                
-                if not producto_id:
-                    print(f"⚠️  Producto no encontrado: {row['Producto']}")
-                    continue
-                
-                # Obtener o crear ubicación
-                ubicacion_codigo = row['UbicacionPrincipal'].strip()
-                if ubicacion_codigo:
-                    cursor.execute('INSERT OR IGNORE INTO ubicaciones (codigo, nombre, empresa, area, nivel, seccion) VALUES (?, ?, ?, ?, ?, ?)', 
-                                 (ubicacion_codigo, 
-                                  ubicacion_codigo,
-                                  row['Empresa'].strip() if row['Empresa'].strip() else 'PPG',
-                                  row['Area'].strip() if row['Area'].strip() else 'Oficinas',
-                                  row['Nivel'].strip() if row['Nivel'].strip() else 'Planta Alta',
-                                  row['Seccion'].strip() if row['Seccion'].strip() else 'Anaquel Refacciones Maq Cepillo'))
-                    
-                    cursor.execute('SELECT id FROM ubicaciones WHERE codigo = ?', (ubicacion_codigo,))
-                    ubicacion_id = cursor.fetchone()[0]
-                    
-                    # Insertar en inventario
-                    cantidad = row['Cantidad'].strip()
-                    if cantidad.isdigit():
-                        cantidad_num = int(cantidad)
-                    elif cantidad.lower() == 'varios':
-                        cantidad_num = 1  # Asignar 1 para "varios"
-                    else:
-                        cantidad_num = 0
-                    
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO inventario (producto_id, ubicacion_id, cantidad)
-                        VALUES (?, ?, ?)
-                    ''', (producto_id, ubicacion_id, cantidad_num))
-                    
-                    inventario_importado += 1
-                    
-                    if inventario_importado % 10 == 0:
-                        print(f"Importados {inventario_importado} registros de inventario...")
-                
-            except Exception as e:
-                print(f"Error importando inventario para {row.get('Producto', 'N/A')}: {e}")
+    with open(ruta_csv, 'r', encoding='utf-8-sig', newline='') as file:
+        filas = carga_masiva.leer_csv(file)
     
-    conn.commit()
+    resultado = carga_masiva.cargar_inventario(conn, filas)
     conn.close()
-    print(f"\n✅ Registros de inventario importados: {inventario_importado}")
+    _mostrar_resultado(resultado)
 
 def mostrar_estadisticas():
     """Mostrar estadísticas de la importación"""
@@ -270,14 +167,22 @@ def mostrar_estadisticas():
     
     conn.close()
 
+def _ruta_por_defecto(nombre):
+    """Buscar el CSV en el directorio actual o en data/"""
+    return nombre if os.path.exists(nombre) else os.path.join('data', nombre)
+
 if __name__ == '__main__':
     print("🚀 INICIANDO IMPORTACIÓN DE DATOS\n")
     
+    # Uso: python migrations/importar_datos.py [Productos.csv] [Inventario.csv]
+    ruta_productos = sys.argv[1] if len(sys.argv) > 1 else _ruta_por_defecto('Productos.csv')
+    ruta_inventario = sys.argv[2] if len(sys.argv) > 2 else _ruta_por_defecto('Inventario.csv')
+    
     # Importar productos
-    importar_productos()
+    importar_productos(ruta_productos)
     
     # Importar inventario
-    importar_inventario()
+    importar_inventario(ruta_inventario)
     
     # Mostrar estadísticas
     mostrar_estadisticas()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Importar en lote las imágenes de productos referidas en el CSV
+Uso: python migrations/importar_imagenes.py <directorio> [Productos.csv] [inventario.db]
+         [--procesos=N] [--manifiesto=ruta.json] [--reemplazar]
+
+Cada foto se busca por nombre en <directorio>, se reduce a las variantes
+de la aplicación en IMAGENES_DIR usando todos los núcleos y se asigna a
+sus productos. El manifiesto (por defecto junto al CSV) guarda el avance:
+si se interrumpe, volver a ejecutar continúa con lo que falta. Sin
+--reemplazar no se tocan los productos que ya tienen imagen.
+"""
+
+import sqlite3
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from servicios import carga_masiva, migraciones
+from servicios.imagenes import AlmacenImagenes
+from servicios.importacion_imagenes import importar
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _opcion(nombre, por_defecto=None):
+    prefijo = f'--{nombre}='
+    return next((a[len(prefijo):] for a in sys.argv[1:] if a.startswith(prefijo)), por_defecto)
+
+def _mostrar_avance(hechas, total):
+    if hechas == total or hechas % 100 == 0:
+        print(f"   ⏳ {hechas}/{total}", flush=True)
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if not argumentos:
+        print(__doc__)
+        sys.exit(1)
+    directorio = argumentos[0]
+    ruta_csv = argumentos[1] if len(argumentos) > 1 else (
+        'Productos.csv' if os.path.exists('Productos.csv') else os.path.join('data', 'Productos.csv'))
+    ruta_db = argumentos[2] if len(argumentos) > 2 else 'inventario.db'
+    procesos = int(_opcion('procesos', 0)) or None
+    manifiesto = _opcion('manifiesto') or os.path.join(os.path.dirname(os.path.abspath(ruta_csv)),
+                                                       'manifiesto_imagenes.json')
+
+    print("🚀 IMPORTACIÓN DE IMÁGENES")
+    print("=" * 50)
+    print(f"📂 Origen: {directorio}")
+    print(f"📋 Mapeo: {ruta_csv}")
+    print(f"🗒️  Manifiesto: {manifiesto}")
+
+    if not os.path.isdir(directorio):
+        print(f"❌ No existe el directorio {directorio}")
+        sys.exit(1)
+
+    with open(ruta_csv, 'r', encoding='utf-8-sig', newline='') as archivo:
+        filas = carga_masiva.leer_csv(archivo)
+
+    almacen = AlmacenImagenes(
+        os.path.join(RAIZ, Config.IMAGENES_DIR),
+        tamano_maximo=Config.IMAGEN_TAMAÑO_MAXIMO,
+        variantes=Config.IMAGEN_VARIANTES,
+        extensiones=Config.IMAGEN_EXTENSIONES_PERMITIDAS
+    )
+    conn = sqlite3.connect(ruta_db, timeout=20.0)
+    migraciones.aplicar_migraciones(conn)  # productos.imagen
+    try:
+        resultado = importar(conn, directorio, filas, almacen, manifiesto, procesos=procesos,
+                             reemplazar='--reemplazar' in sys.argv, al_avanzar=_mostrar_avance)
+    finally:
+        conn.close()
+
+    for nombre in resultado.faltantes[:20]:
+        print(f"⚠️  No encontrada: {nombre}")
+    if len(resultado.faltantes) > 20:
+        print(f"⚠️  ... y {len(resultado.faltantes) - 20} más")
+    for nombre, error in resultado.errores[:20]:
+        print(f"⚠️  {nombre}: {error}")
+    if len(resultado.errores) > 20:
+        print(f"⚠️  ... y {len(resultado.errores) - 20} errores más")
+    print(f"\n✅ {resultado.resumen()}")
+
+if __name__ == '__main__':
+    main()
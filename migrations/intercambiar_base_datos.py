@@ -16,7 +16,7 @@ def intercambiar_bases_datos():
     # Verificar que existen ambas bases de datos
     if not os.path.exists('bkpinventario.db'):
         print("❌ No se encontró bkpinventario.db")
-        print("💡 Ejecuta primero: python migrar_produccion_completa.py")
+        print("💡 Ejecuta primero: python migrations/migrar.py bkpinventario.db")
         return False
     
     if not os.path.exists('inventario.db'):
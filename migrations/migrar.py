@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Aplicar las migraciones de esquema pendientes (servicios/migraciones.py)
+Uso: python migrations/migrar.py [inventario.db] [--sin-backup]
+
+La aplicación también las aplica al iniciar; este script sirve para
+migrar una base copiada de producción antes de ponerla en servicio.
+"""
+
+import sqlite3
+import sys
+import os
+import shutil
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import migraciones
+
+def backup_database(ruta):
+    """Crear backup de seguridad de la base de datos"""
+    backup_name = f"{os.path.splitext(ruta)[0]}_backup_before_migration_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    shutil.copy2(ruta, backup_name)
+    print(f"✅ Backup creado: {backup_name}")
+    return backup_name
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    ruta = argumentos[0] if argumentos else 'inventario.db'
+
+    print("🚀 MIGRACIONES DE ESQUEMA")
+    print("=" * 50)
+
+    conn = sqlite3.connect(ruta, timeout=20.0)
+    version = migraciones.version_esquema(conn)
+    print(f"📋 {ruta}: versión {version} de {migraciones.VERSION_ACTUAL}")
+
+    if version >= migraciones.VERSION_ACTUAL:
+        print("✅ El esquema está al día")
+        conn.close()
+        return
+
+    if os.path.getsize(ruta) > 0 and '--sin-backup' not in sys.argv:
+        backup_database(ruta)
+
+    try:
+        aplicadas = migraciones.aplicar_migraciones(conn)
+    except Exception as e:
+        print(f"❌ Error en la migración: {e}")
+        print("💡 Las migraciones son idempotentes: corrige el problema y vuelve a ejecutar")
+        conn.close()
+        sys.exit(1)
+
+    for version, nombre, segundos in aplicadas:
+        print(f"   ✅ {version:03d}_{nombre} ({segundos * 1000:.1f} ms)")
+
+    print(f"\n🎉 Esquema en la versión {migraciones.version_esquema(conn)}")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
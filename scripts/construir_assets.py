@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Construir los paquetes de CSS y JS del front-end en static/dist/
+Uso: python scripts/construir_assets.py [--descargar]
+
+--descargar baja primero a static/vendor/ las versiones fijadas de
+Bootstrap y Font Awesome que falten (servicios/assets.py, VENDOR). No
+están en el repositorio: la primera construcción necesita internet, y
+sin ellas termina con error (las páginas siguen cargando del CDN).
+Volver a ejecutar después de cambiar algo en static/css/ o static/js/.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import assets
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
+def main():
+    print("🚀 CONSTRUCCIÓN DE ASSETS")
+    print("=" * 50)
+
+    if '--descargar' in sys.argv:
+        try:
+            for ruta in assets.descargar_vendor(STATIC_DIR):
+                print(f"   ⬇️  {ruta}")
+        except OSError as e:
+            print(f"❌ No se pudieron descargar los archivos de static/vendor/: {e}")
+            sys.exit(1)
+
+    faltantes = assets.faltantes_vendor(STATIC_DIR)
+    if faltantes:
+        print(f"❌ Faltan {len(faltantes)} archivos de static/vendor/ (p. ej. {faltantes[0]})")
+        print("💡 Ejecuta con --descargar para bajarlos")
+        sys.exit(1)
+
+    for paquete, (nombre, tamano) in assets.construir(STATIC_DIR).items():
+        print(f"   ✅ {paquete:24} → dist/{nombre} ({tamano / 1024:.1f} KB)")
+    print("\n🎉 Manifiesto escrito en static/dist/manifiesto.json; reinicia la aplicación para usarlo")
+
+if __name__ == '__main__':
+    main()
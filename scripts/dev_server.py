@@ -4,7 +4,7 @@ Development server with auto-reload and debug mode
 """
 
 import os
-from app import app
+from app import app, inicializar
 
 if __name__ == '__main__':
     # Configurar modo desarrollo
@@ -18,6 +18,8 @@ if __name__ == '__main__':
     print("🐛 Debug mode enabled")
     print("\n" + "="*50)
     
+    inicializar()
+    
     # Iniciar servidor con auto-reload
     app.run(
         debug=True,
@@ -0,0 +1,208 @@
+"""
+Almacenamiento por capas de operation_logs.
+
+Los registros recientes (capa caliente) se quedan en la base principal; los
+más antiguos que dias_calientes se mueven por lotes a una base SQLite por
+mes (archivo_logs/operation_logs_AAAA_MM.db). Así la base principal se
+mantiene chica: checkpoints rápidos y respaldos baratos.
+
+Las consultas que cruzan capas recorren primero la base principal y luego
+los meses archivados del más reciente al más antiguo (con ATTACH, uno a la
+vez), hasta juntar las filas pedidas. Como se archiva por fecha, el orden
+"más reciente primero" se conserva entre capas.
+
+La columna de tiempo guarda segundos desde epoch (UTC). Las tablas de
+`diccionarios` (tipos de operación, IPs) se copian a cada archivo para que
+se pueda leer por sí solo. `al_archivar(conn, ids)` se llama con el
+archivo adjunto como "archivo" después de copiar cada lote (índices y
+búsqueda de texto del archivo).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import calendar
+import urllib.parse
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+DIAS_CALIENTES = 90
+LOTE = 5000
+FRACCION_LIBRE_COMPACTAR = 0.25  # VACUUM si más de esta fracción de páginas quedó libre
+
+_NOMBRE_ARCHIVO = re.compile(r'^(?P<tabla>\w+)_(?P<anio>\d{4})_(?P<mes>\d{2})\.db$')
+
+
+def _fecha(epoch):
+    """Epoch (UTC) a texto en hora local, para mostrar"""
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ArchivoLogs:
+    """Mueve registros viejos a bases mensuales y consulta a través de las capas"""
+
+    def __init__(self, directorio, tabla='operation_logs', columna_tiempo='ts',
+                 dias_calientes=DIAS_CALIENTES, lote=LOTE, diccionarios=(), al_archivar=None):
+        self.directorio = directorio
+        self.tabla = tabla
+        self.columna_tiempo = columna_tiempo
+        self.diccionarios = tuple(diccionarios)
+        self.al_archivar = al_archivar
+        self.dias_calientes = dias_calientes
+        self.lote = lote
+        os.makedirs(directorio, exist_ok=True)
+
+    # --- Nombres y fechas ---
+
+    def ruta_mes(self, mes):
+        """mes: 'AAAA-MM'"""
+        return os.path.join(self.directorio, f"{self.tabla}_{mes.replace('-', '_')}.db")
+
+    def meses(self):
+        """[(mes, ruta)] de los archivos existentes, el más reciente primero"""
+        resultado = []
+        for nombre in os.listdir(self.directorio):
+            coincidencia = _NOMBRE_ARCHIVO.match(nombre)
+            if coincidencia and coincidencia.group('tabla') == self.tabla:
+                mes = f"{coincidencia.group('anio')}-{coincidencia.group('mes')}"
+                resultado.append((mes, os.path.join(self.directorio, nombre)))
+        return sorted(resultado, reverse=True)
+
+    def corte(self, ahora=None):
+        """Valor de la columna de tiempo (epoch) antes del cual un registro se archiva"""
+        limite = (ahora or datetime.utcnow()) - timedelta(days=self.dias_calientes)
+        return calendar.timegm(limite.timetuple())
+
+    def expresion_mes(self):
+        return f"strftime('%Y-%m', {self.columna_tiempo}, 'unixepoch')"
+
+    # --- Archivado (corre en el escritor como tarea exclusiva) ---
+
+    def _preparar_archivo(self, conn, ruta):
+        """Crear las tablas en el archivo del mes con el mismo esquema que la principal"""
+        archivo = sqlite3.connect(ruta)
+        try:
+            existentes = {fila[0] for fila in archivo.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for tabla in (self.tabla, *self.diccionarios):
+                if tabla in existentes:
+                    continue
+                sql = conn.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                                   (tabla,)).fetchone()[0]
+                archivo.execute(sql.replace('CREATE TABLE', 'CREATE TABLE IF NOT EXISTS', 1))
+            archivo.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.tabla}_{self.columna_tiempo} '
+                            f'ON {self.tabla}({self.columna_tiempo})')
+            archivo.commit()
+        finally:
+            archivo.close()
+
+    def archivar_lote(self, conn, corte):
+        """
+        Mover a su archivo mensual hasta `lote` registros anteriores al corte.
+        conn es la conexión del escritor (autocommit); regresa cuántos se movieron.
+        Primero se copia con INSERT OR IGNORE y luego se borra, así que si se
+        interrumpe a la mitad basta con volver a correrlo.
+        """
+        filas = conn.execute(f'''
+            SELECT id, {self.expresion_mes()} AS mes FROM main.{self.tabla}
+            WHERE {self.columna_tiempo} < ?
+            ORDER BY {self.columna_tiempo}
+            LIMIT ?
+        ''', (corte, self.lote)).fetchall()
+
+        por_mes = OrderedDict()
+        for fila in filas:
+            por_mes.setdefault(fila['mes'] or '0000-00', []).append(fila['id'])
+
+        for mes, ids in por_mes.items():
+            ruta = self.ruta_mes(mes)
+            self._preparar_archivo(conn, ruta)
+            conn.execute('ATTACH DATABASE ? AS archivo', (ruta,))
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    lista = json.dumps(ids)
+                    conn.execute(f'''
+                        INSERT OR IGNORE INTO archivo.{self.tabla}
+                        SELECT * FROM main.{self.tabla} WHERE id IN (SELECT value FROM json_each(?))
+                    ''', (lista,))
+                    if self.al_archivar:
+                        self.al_archivar(conn, ids)
+                    conn.execute(f'DELETE FROM main.{self.tabla} WHERE id IN (SELECT value FROM json_each(?))', (lista,))
+                    for tabla in self.diccionarios:
+                        conn.execute(f'INSERT OR REPLACE INTO archivo.{tabla} SELECT * FROM main.{tabla}')
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            finally:
+                conn.execute('DETACH DATABASE archivo')
+        return len(filas)
+
+    def compactar(self, conn, forzar=False):
+        """
+        Checkpoint del WAL y, si quedó mucho espacio libre (o forzar=True),
+        VACUUM para que el archivo principal vuelva a encoger.
+        """
+        libres = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        paginas = conn.execute('PRAGMA page_count').fetchone()[0]
+        vacuum = forzar or (paginas and libres / paginas > FRACCION_LIBRE_COMPACTAR)
+        if vacuum:
+            conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return {'paginas_libres': libres, 'paginas': paginas, 'vacuum': bool(vacuum)}
+
+    # --- Consultas entre capas ---
+
+    def _uri(self, ruta):
+        return 'file:' + urllib.parse.quote(os.path.abspath(ruta)) + '?mode=ro'
+
+    def consultar(self, conn, sql, parametros=(), limite=100, desde=None, hasta=None):
+        """
+        Ejecutar `sql` sobre la capa caliente y, si faltan filas, sobre los
+        archivos mensuales. El SQL usa {logs} en lugar de la tabla ({esquema}
+        para otras tablas de la misma capa), ordena del más reciente al más
+        antiguo y termina en LIMIT ? (lo completa esta función). desde/hasta
+        ('AAAA-MM-DD', UTC) descartan meses fuera del rango.
+        Las tablas sin prefijo (diccionarios, productos...) se leen de la
+        base principal.
+        conn debe abrirse con uri=True (conexion_lectura lo hace).
+        """
+        filas = conn.execute(sql.format(logs=f'main.{self.tabla}', esquema='main'),
+                             (*parametros, limite)).fetchall()
+        for mes, ruta in self.meses():
+            if len(filas) >= limite:
+                break
+            if desde and mes < desde[:7]:
+                break
+            if hasta and mes > hasta[:7]:
+                continue
+            conn.execute('ATTACH DATABASE ? AS archivo', (self._uri(ruta),))
+            try:
+                filas.extend(conn.execute(sql.format(logs=f'archivo.{self.tabla}', esquema='archivo'),
+                                          (*parametros, limite - len(filas))).fetchall())
+            finally:
+                conn.execute('DETACH DATABASE archivo')
+        return filas
+
+    def estado(self, conn):
+        """Filas en la capa caliente y por archivo mensual, con tamaños"""
+        calientes = conn.execute(f'SELECT COUNT(*), MIN({self.columna_tiempo}) FROM main.{self.tabla}').fetchone()
+        archivos = []
+        for mes, ruta in self.meses():
+            archivo = sqlite3.connect(self._uri(ruta), uri=True)
+            try:
+                filas = archivo.execute(f'SELECT COUNT(*) FROM {self.tabla}').fetchone()[0]
+            except sqlite3.Error:
+                filas = None
+            finally:
+                archivo.close()
+            archivos.append({'mes': mes, 'filas': filas, 'bytes': os.path.getsize(ruta)})
+        return {
+            'filas_calientes': calientes[0],
+            'mas_antiguo': _fecha(calientes[1]),
+            'corte': _fecha(self.corte()),
+            'archivos': archivos,
+        }
@@ -0,0 +1,259 @@
+"""
+Motor de asignación de ubicaciones para salidas de material.
+
+Mantiene un índice en memoria del stock por ubicación y, dado un producto y
+una cantidad (o una lista completa de salida), propone de qué ubicaciones
+retirar el material según la estrategia elegida.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+from servicios.escritor import conexion_lectura
+
+# Estrategias disponibles (clave -> descripción para la interfaz)
+ESTRATEGIAS = {
+    'menos_ubicaciones': 'Visitar el menor número de ubicaciones',
+    'vaciar_remanentes': 'Vaciar primero los remanentes pequeños',
+    'mas_antiguo': 'Retirar primero el stock más antiguo',
+}
+
+ESTRATEGIA_DEFAULT = 'menos_ubicaciones'
+
+
+class IndiceStock:
+    """Índice en memoria de stock por producto y ubicación"""
+
+    def __init__(self, database, ttl_segundos=60):
+        self.database = database
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._stock = {}  # producto_id -> {ubicacion_id: (codigo, cantidad, fecha_actualizacion)}
+        self._cargado_en = None
+        # Cada invalidar() sube _generacion; se guarda con qué generación se invalidó
+        # cada producto (o todo) para no perder una invalidación que llega mientras
+        # se está leyendo la base
+        self._generacion = 0
+        self._productos_invalidos = {}  # producto_id -> generación de la invalidación
+        self._todo_invalido_en = 0
+        self._recarga = None  # Future de la recarga completa en curso (una sola a la vez)
+
+    def _conectar(self):
+        return conexion_lectura(self.database)
+
+    def _consultar(self, conn, producto_id=None):
+        query = '''
+            SELECT i.producto_id, i.ubicacion_id, u.codigo, i.cantidad, i.fecha_actualizacion
+            FROM inventario i
+            JOIN ubicaciones u ON i.ubicacion_id = u.id
+            WHERE i.cantidad > 0
+        '''
+        params = []
+        if producto_id is not None:
+            query += ' AND i.producto_id = ?'
+            params.append(producto_id)
+        return conn.execute(query, params).fetchall()
+
+    def _leer(self, producto_id=None):
+        """(generación al empezar, filas) leídas fuera del candado"""
+        with self._lock:
+            generacion = self._generacion
+        conn = self._conectar()
+        try:
+            return generacion, self._consultar(conn, producto_id)
+        finally:
+            conn.close()
+
+    def cargar(self):
+        """Cargar todo el stock en memoria con una sola consulta"""
+        generacion, filas = self._leer()
+
+        stock = {}
+        for fila in filas:
+            stock.setdefault(fila['producto_id'], {})[fila['ubicacion_id']] = (
+                fila['codigo'], fila['cantidad'], fila['fecha_actualizacion'] or ''
+            )
+
+        with self._lock:
+            self._stock = stock
+            # Lo invalidado después de empezar la lectura sigue pendiente
+            self._productos_invalidos = {
+                producto_id: invalidado_en
+                for producto_id, invalidado_en in self._productos_invalidos.items()
+                if invalidado_en > generacion
+            }
+            self._cargado_en = None if self._todo_invalido_en > generacion else time.monotonic()
+
+    def _recargar_todo(self):
+        """cargar() una sola vez aunque el TTL venza para varias peticiones a la vez"""
+        with self._lock:
+            futuro = self._recarga
+            propio = futuro is None
+            if propio:
+                futuro = self._recarga = Future()
+        if not propio:
+            # Otra petición ya está leyendo la base: esperar su resultado
+            futuro.result()
+            return
+
+        try:
+            self.cargar()
+        except Exception as e:
+            with self._lock:
+                self._recarga = None
+            futuro.set_exception(e)
+            raise
+        with self._lock:
+            self._recarga = None
+        futuro.set_result(None)
+
+    def invalidar(self, producto_id=None):
+        """Marcar un producto (o todo el índice) para recargar en la próxima consulta"""
+        with self._lock:
+            self._generacion += 1
+            if producto_id is None:
+                self._cargado_en = None
+                self._todo_invalido_en = self._generacion
+            else:
+                self._productos_invalidos[int(producto_id)] = self._generacion
+
+    def _recargar_producto(self, producto_id, intentos=3):
+        for _ in range(intentos):
+            generacion, filas = self._leer(producto_id)
+            ubicaciones = {
+                fila['ubicacion_id']: (fila['codigo'], fila['cantidad'], fila['fecha_actualizacion'] or '')
+                for fila in filas
+            }
+            with self._lock:
+                if ubicaciones:
+                    self._stock[producto_id] = ubicaciones
+                else:
+                    self._stock.pop(producto_id, None)
+                # Si se invalidó otra vez durante la lectura, lo leído puede ser anterior: repetir
+                if self._productos_invalidos.get(producto_id, 0) <= generacion:
+                    self._productos_invalidos.pop(producto_id, None)
+                    return
+        # Con escrituras continuas se sirve lo más reciente leído y queda marcado para la próxima
+
+    def ubicaciones(self, producto_id):
+        """Obtener las ubicaciones con stock de un producto"""
+        producto_id = int(producto_id)
+        with self._lock:
+            expirado = (
+                self._cargado_en is None or
+                time.monotonic() - self._cargado_en > self.ttl_segundos
+            )
+            invalido = producto_id in self._productos_invalidos
+        if expirado:
+            self._recargar_todo()
+            with self._lock:
+                invalido = producto_id in self._productos_invalidos
+        if invalido:
+            self._recargar_producto(producto_id)
+
+        with self._lock:
+            return [
+                {
+                    'ubicacion_id': ubicacion_id,
+                    'codigo': codigo,
+                    'cantidad': cantidad,
+                    'fecha_actualizacion': fecha,
+                }
+                for ubicacion_id, (codigo, cantidad, fecha) in self._stock.get(producto_id, {}).items()
+            ]
+
+
+def _ordenar_candidatos(candidatos, cantidad, estrategia):
+    """Ordenar ubicaciones candidatas según la estrategia"""
+    if estrategia == 'vaciar_remanentes':
+        return sorted(candidatos, key=lambda u: (u['cantidad'], u['codigo']))
+
+    if estrategia == 'mas_antiguo':
+        return sorted(candidatos, key=lambda u: (u['fecha_actualizacion'], u['codigo']))
+
+    # menos_ubicaciones: tomar primero las ubicaciones más grandes minimiza las visitas;
+    # si una sola ubicación alcanza, usar la más pequeña que cubra la cantidad
+    # para no fragmentar las ubicaciones grandes.
+    que_alcanzan = [u for u in candidatos if u['cantidad'] >= cantidad]
+    if que_alcanzan:
+        mejor = min(que_alcanzan, key=lambda u: (u['cantidad'], u['codigo']))
+        return [mejor]
+
+    return sorted(candidatos, key=lambda u: (-u['cantidad'], u['codigo']))
+
+
+def asignar(ubicaciones, cantidad, estrategia=ESTRATEGIA_DEFAULT):
+    """
+    Proponer de qué ubicaciones retirar una cantidad.
+
+    Retorna un diccionario con las líneas sugeridas (ubicación y cantidad a
+    retirar), la cantidad asignada y el faltante si el stock no alcanza.
+    """
+    if estrategia not in ESTRATEGIAS:
+        raise ValueError(f'Estrategia no válida: {estrategia}')
+    if cantidad <= 0:
+        raise ValueError('La cantidad debe ser mayor a cero')
+
+    candidatos = [u for u in ubicaciones if u['cantidad'] > 0]
+    pendiente = cantidad
+    lineas = []
+
+    for ubicacion in _ordenar_candidatos(candidatos, cantidad, estrategia):
+        if pendiente <= 0:
+            break
+        tomar = min(ubicacion['cantidad'], pendiente)
+        lineas.append({
+            'ubicacion_id': ubicacion['ubicacion_id'],
+            'codigo': ubicacion['codigo'],
+            'cantidad': tomar,
+            'stock_ubicacion': ubicacion['cantidad'],
+        })
+        pendiente -= tomar
+
+    return {
+        'estrategia': estrategia,
+        'cantidad_solicitada': cantidad,
+        'cantidad_asignada': cantidad - pendiente,
+        'faltante': pendiente,
+        'completa': pendiente == 0,
+        'lineas': lineas,
+    }
+
+
+def asignar_salida(indice, lineas_salida, estrategia=ESTRATEGIA_DEFAULT):
+    """
+    Proponer asignaciones para una salida con varias líneas.
+
+    Cada línea es un diccionario con producto_id y cantidad. Si un producto se
+    repite, las líneas posteriores sólo ven el stock que no se reservó antes.
+    """
+    reservado = {}  # (producto_id, ubicacion_id) -> cantidad ya asignada
+    resultado = []
+
+    for linea in lineas_salida:
+        producto_id = int(linea['producto_id'])
+        cantidad = int(linea['cantidad'])
+
+        disponibles = []
+        for ubicacion in indice.ubicaciones(producto_id):
+            libre = ubicacion['cantidad'] - reservado.get((producto_id, ubicacion['ubicacion_id']), 0)
+            if libre > 0:
+                disponibles.append(dict(ubicacion, cantidad=libre))
+
+        asignacion = asignar(disponibles, cantidad, estrategia)
+        for sugerida in asignacion['lineas']:
+            clave = (producto_id, sugerida['ubicacion_id'])
+            reservado[clave] = reservado.get(clave, 0) + sugerida['cantidad']
+
+        asignacion['producto_id'] = producto_id
+        resultado.append(asignacion)
+
+    return {
+        'estrategia': estrategia,
+        'completa': all(a['completa'] for a in resultado),
+        'ubicaciones_visitadas': len({
+            s['ubicacion_id'] for a in resultado for s in a['lineas']
+        }),
+        'productos': resultado,
+    }
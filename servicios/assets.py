@@ -0,0 +1,282 @@
+"""
+Paquetes de CSS y JS del front-end con nombre por contenido.
+
+Cada paquete (PAQUETES) junta archivos de static/ — Bootstrap y Font
+Awesome en static/vendor/, los estilos y scripts propios en static/css/ y
+static/js/ — y se escribe minificado como static/dist/<nombre>.<hash>.<ext>.
+Las fuentes e imágenes que el CSS referencia con url() se copian a dist/
+con su propio hash. Como el nombre cambia cuando cambia el contenido, todo
+lo de dist/ se sirve con caché inmutable de un año.
+
+dist/manifiesto.json dice qué archivo corresponde a cada paquete. Sin
+manifiesto (no se ha corrido scripts/construir_assets.py) las páginas
+cargan los archivos sueltos y, si falta lo de vendor/, el CDN original.
+static/vendor/ todavía no está en el repositorio: se baja de las URLs
+fijadas en VENDOR (--descargar); hasta entonces las páginas necesitan el
+CDN y la aplicación lo advierte al iniciar.
+"""
+
+import hashlib
+import json
+import os
+import re
+import urllib.request
+
+DIRECTORIO_SALIDA = 'dist'
+MANIFIESTO = 'manifiesto.json'
+
+# Archivo en static/ → URL de la versión fijada
+VENDOR = {
+    'vendor/bootstrap/bootstrap.min.css': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css',
+    'vendor/bootstrap/bootstrap.bundle.min.js': 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js',
+    'vendor/fontawesome/css/all.min.css': 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+    **{f'vendor/fontawesome/webfonts/{fuente}': f'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/webfonts/{fuente}'
+       for nombre in ('fa-brands-400', 'fa-regular-400', 'fa-solid-900', 'fa-v4compatibility')
+       for fuente in (f'{nombre}.woff2', f'{nombre}.ttf')},
+}
+
+# Paquete → archivos de static/ en orden
+PAQUETES = {
+    'app.css': ['vendor/bootstrap/bootstrap.min.css', 'vendor/fontawesome/css/all.min.css', 'css/app.css'],
+    'login.css': ['css/login.css'],
+    'app.js': ['vendor/bootstrap/bootstrap.bundle.min.js', 'js/base.js'],
+    'admin_stock_alerts.js': ['js/admin_stock_alerts.js'],
+    'categorias.js': ['js/categorias.js'],
+    'inventario.js': ['js/tabla_virtual.js', 'js/inventario.js'],
+    'inventario_admin.js': ['js/inventario_admin.js'],
+    'maquinas.js': ['js/maquinas.js'],
+    'productos.js': ['js/tabla_virtual.js', 'js/productos.js'],
+    'proveedor_form.js': ['js/proveedor_form.js'],
+    'proveedores.js': ['js/proveedores.js'],
+    'ubicacion_form.js': ['js/ubicacion_form.js'],
+    'ubicaciones.js': ['js/ubicaciones.js'],
+}
+
+NOMBRE_EMPAQUETADO = re.compile(r'^dist/[\w.-]+\.[0-9a-f]{12}\.\w+$')
+
+# Cadenas y /*! licencias */ se conservan (grupo 1); los demás comentarios se quitan
+_CADENA_O_COMENTARIO_CSS = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*!.*?\*/)|/\*.*?\*/''', re.S)
+_URL_CSS = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+_MAPA_FUENTE = re.compile(r'^[ \t]*(//|/\*)# sourceMappingURL=.*$', re.M)
+
+
+def clave(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:12]
+
+
+# ---------------------------------------------------------------------------
+# Minificación (conservadora: nunca cambia lo que hay dentro de cadenas)
+# ---------------------------------------------------------------------------
+
+def minificar_css(texto):
+    """Quitar comentarios (menos /*! licencias */) y espacios sobrantes"""
+    conservados = []
+    def apartar(coincidencia):
+        if coincidencia.group(1) is None:
+            return ' '
+        conservados.append(coincidencia.group(1))
+        if coincidencia.group(1).startswith('/*'):
+            return f'\0{len(conservados) - 1}\0\n'  # la licencia termina la línea; el salto se quita
+        return f'\0{len(conservados) - 1}\0'
+    texto = _espacios_css(_CADENA_O_COMENTARIO_CSS.sub(apartar, texto)).strip()
+    return re.sub(r'\0(\d+)\0', lambda coincidencia: conservados[int(coincidencia.group(1))], texto)
+
+
+def _espacios_css(texto):
+    texto = re.sub(r'(?<=\0)\n\s*', '', texto)
+    texto = re.sub(r'\s+', ' ', texto)
+    texto = re.sub(r'\s*([{};,>])\s*', r'\1', texto)
+    # Solo en propiedad: valor (termina en ; o }), nunca en selectores como "a :hover{"
+    texto = re.sub(r'(?<=[{;])\s*([\w-]+)\s*:\s*(?=[^{};]*[;}])', r'\1:', texto)
+    return texto.replace(';}', '}')
+
+
+def minificar_js(texto):
+    """
+    Quitar comentarios (menos /*! licencias */), sangrías y líneas vacías.
+    Se conservan los saltos de línea (la inserción automática de ; sigue
+    igual) y no se toca nada dentro de cadenas, plantillas ni regex.
+    """
+    salida = []
+    i, n = 0, len(texto)
+    anterior = ''  # último carácter significativo, para distinguir regex de división
+    while i < n:
+        c = texto[i]
+        if c in '\'"`':
+            fin = _fin_cadena(texto, i)
+            salida.append(texto[i:fin])
+            anterior, i = c, fin
+        elif texto.startswith('/*', i) and not texto.startswith('/*!', i):
+            i = texto.find('*/', i + 2)
+            i = n if i < 0 else i + 2
+        elif texto.startswith('//', i):
+            i = texto.find('\n', i)
+            i = n if i < 0 else i
+        elif c == '/' and (not anterior or anterior in '(,=:[!&|?{};+-*%<>~^\n'):
+            fin = _fin_regex(texto, i)
+            salida.append(texto[i:fin])
+            anterior, i = '/', fin
+        elif c == '\n':
+            salida.append('\n')
+            i += 1
+            while i < n and texto[i] in ' \t':
+                i += 1
+        else:
+            salida.append(c)
+            if not c.isspace():
+                anterior = c
+            i += 1
+    lineas = (linea.rstrip() for linea in ''.join(salida).split('\n'))
+    return '\n'.join(linea for linea in lineas if linea)
+
+
+def _fin_cadena(texto, i):
+    comilla = texto[i]
+    i += 1
+    while i < len(texto) and texto[i] != comilla:
+        i += 2 if texto[i] == '\\' else 1
+    return i + 1
+
+
+def _fin_regex(texto, i):
+    i += 1
+    en_clase = False
+    while i < len(texto) and texto[i] != '\n':
+        c = texto[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            en_clase = True
+        elif c == ']':
+            en_clase = False
+        elif c == '/' and not en_clase:
+            i += 1
+            while i < len(texto) and texto[i].isalpha():  # banderas
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+# ---------------------------------------------------------------------------
+# Construcción
+# ---------------------------------------------------------------------------
+
+def descargar_vendor(static_dir, forzar=False):
+    """Bajar los archivos de VENDOR que falten; regresa los descargados"""
+    descargados = []
+    for ruta, url in VENDOR.items():
+        destino = os.path.join(static_dir, ruta)
+        if os.path.exists(destino) and not forzar:
+            continue
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with urllib.request.urlopen(url, timeout=30) as respuesta:
+            _escribir(destino, respuesta.read())
+        descargados.append(ruta)
+    return descargados
+
+
+def construir(static_dir, paquetes=None):
+    """
+    Escribir los paquetes en static/dist/ y su manifiesto. Se conservan
+    los archivos de la construcción anterior (páginas ya abiertas o
+    workers que aún no reinician los piden); lo más viejo se borra.
+    Regresa {paquete: (nombre en dist, bytes)}.
+    """
+    paquetes = PAQUETES if paquetes is None else paquetes
+    salida_dir = os.path.join(static_dir, DIRECTORIO_SALIDA)
+    os.makedirs(salida_dir, exist_ok=True)
+    anterior = _leer_manifiesto(salida_dir)
+
+    escritos = set()
+    resultado = {}
+    for paquete, fuentes in paquetes.items():
+        base, extension = os.path.splitext(paquete)
+        partes = []
+        for fuente in fuentes:
+            ruta = os.path.join(static_dir, fuente)
+            with open(ruta, encoding='utf-8') as archivo:
+                texto = _MAPA_FUENTE.sub('', archivo.read())
+            if extension == '.css':
+                texto = _copiar_referencias(minificar_css(texto), ruta, salida_dir, escritos)
+            elif not fuente.endswith('.min.js'):
+                texto = minificar_js(texto)
+            partes.append(texto.strip())
+        contenido = ('\n' if extension == '.css' else '\n;\n').join(partes).encode('utf-8') + b'\n'
+        nombre = f'{base}.{clave(contenido)}{extension}'
+        _escribir(os.path.join(salida_dir, nombre), contenido)
+        escritos.add(nombre)
+        resultado[paquete] = (nombre, len(contenido))
+
+    manifiesto = {'paquetes': {paquete: nombre for paquete, (nombre, _) in resultado.items()},
+                  'archivos': sorted(escritos)}
+    conservar = escritos | set(anterior.get('archivos', [])) | {MANIFIESTO}
+    for nombre in os.listdir(salida_dir):
+        if nombre not in conservar:
+            os.remove(os.path.join(salida_dir, nombre))
+    _escribir(os.path.join(salida_dir, MANIFIESTO),
+              json.dumps(manifiesto, indent=1, sort_keys=True).encode('utf-8'))
+    return resultado
+
+
+def _copiar_referencias(css, ruta_css, salida_dir, escritos):
+    """Copiar a dist/ con hash lo que el CSS pide con url() y reescribir la referencia"""
+    def reemplazar(coincidencia):
+        referencia = coincidencia.group(2).strip()
+        if re.match(r'^(data:|[a-z]+:|//|#)', referencia):
+            return coincidencia.group(0)
+        limpia = re.split(r'[?#]', referencia)[0]
+        ruta = os.path.normpath(os.path.join(os.path.dirname(ruta_css), limpia))
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(f'{referencia} (referido desde {ruta_css}) no existe')
+        with open(ruta, 'rb') as archivo:
+            contenido = archivo.read()
+        base, extension = os.path.splitext(os.path.basename(ruta))
+        nombre = f'{base}.{clave(contenido)}{extension}'
+        if nombre not in escritos:
+            _escribir(os.path.join(salida_dir, nombre), contenido)
+            escritos.add(nombre)
+        return f'url({nombre})'
+    return _URL_CSS.sub(reemplazar, css)
+
+
+def _escribir(ruta, contenido):
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'wb') as archivo:
+        archivo.write(contenido)
+    os.replace(temporal, ruta)
+
+
+# ---------------------------------------------------------------------------
+# Uso desde la aplicación
+# ---------------------------------------------------------------------------
+
+def _leer_manifiesto(salida_dir):
+    try:
+        with open(os.path.join(salida_dir, MANIFIESTO), encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {}
+
+
+def cargar_manifiesto(static_dir):
+    """{paquete: nombre con hash} de la última construcción ({} si no hay)"""
+    return _leer_manifiesto(os.path.join(static_dir, DIRECTORIO_SALIDA)).get('paquetes', {})
+
+
+def faltantes_vendor(static_dir):
+    """Archivos de VENDOR que no están en static/"""
+    return [ruta for ruta in VENDOR if not os.path.exists(os.path.join(static_dir, ruta))]
+
+
+def rutas(paquete, manifiesto, static_dir):
+    """
+    Lo que una página debe cargar para un paquete: el archivo de dist/ si
+    está construido; si no, cada fuente suelta (o su CDN si falta en vendor/).
+    Regresa rutas relativas a static/ o URLs absolutas.
+    """
+    if paquete in manifiesto:
+        return [f'{DIRECTORIO_SALIDA}/{manifiesto[paquete]}']
+    faltantes = set(faltantes_vendor(static_dir))
+    return [VENDOR[fuente] if fuente in faltantes else fuente for fuente in PAQUETES[paquete]]
@@ -0,0 +1,615 @@
+"""
+Bitácora compacta de operaciones de administrador (tabla operation_logs).
+
+Cada registro guarda enteros y, solo si hace falta, un JSON corto:
+- ts: segundos desde epoch (UTC) en lugar del texto 'AAAA-MM-DD HH:MM:SS'
+- tipo_id / ip_id: el tipo de operación y la IP se guardan una sola vez en
+  los diccionarios tipos_operacion y direcciones_ip
+- producto_id, ubicacion_id, old_quantity, new_quantity: como antes
+- params: los datos propios de la operación, p. ej. {"cantidad":5,"destino":"B2"}
+
+La descripción ya no se guarda: se arma al leer con PLANTILLAS, usando el
+nombre actual del producto y el código actual de la ubicación. La migración
+009 convierte los registros antiguos separando su descripción en params;
+si una descripción no coincide con su plantilla se conserva tal cual en
+params["texto"].
+
+Para buscar por texto, la descripción armada al escribir se indexa en
+operation_logs_fts (FTS5 sin contenido: solo el índice, rowid = id del
+registro). La columna `claves` lleva los filtros del visor como palabras
+(t<tipo_id> a<admin> p<producto> u<ubicacion> m<AAAAMM>), así una búsqueda
+con filtros se resuelve cruzando listas dentro del índice en lugar de
+revisar cada coincidencia. Como FTS5 sin contenido no permite borrar filas
+sueltas, las entradas de registros ya archivados se quedan hasta
+reindexar_busqueda() (al compactar); las consultas las descartan porque el
+id ya no existe.
+"""
+
+import calendar
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+TAMANO_LOTE = 2000
+
+# Una o varias plantillas por tipo (la primera es la normal)
+PLANTILLAS = {
+    'STOCK_EDIT': ('Actualizado stock de {producto} en {ubicacion}: {old} → {new}',
+                   'Eliminado stock de {producto} en {ubicacion}'),
+    'CYCLE_COUNT': ('Conteo cíclico de {producto} en {ubicacion}: {old} → {new}',),
+    'LOCATION_CHANGE': ('Cambio de ubicación: {producto} - {cantidad} unidades de {ubicacion} a {destino}',),
+    'STOCK_MINIMO_UPDATE': ('Stock mínimo actualizado: {producto} - {old} → {new}',),
+    'STOCK_ALERT': ('Alerta de stock bajo enviada - {productos} productos afectados',),
+    'EMAIL_TEST': ('Correo de prueba enviado a: {destinatario}',),
+    'SUPPLIER_CREATE': ('Nuevo proveedor creado: {nombre}',),
+    'SUPPLIER_EDIT': ('Proveedor editado: {nombre}',),
+    'SUPPLIER_DELETE': ('Proveedor eliminado: {nombre}',),
+    'MACHINE_CREATE': ('Nueva máquina creada: {nombre}',),
+    'MACHINE_EDIT': ('Máquina editada: {nombre}',),
+    'MACHINE_DELETE': ('Máquina eliminada: {nombre}',),
+    'CATEGORY_CREATE': ('Nueva categoría creada: {nombre}',),
+    'CATEGORY_EDIT': ('Categoría editada: {nombre}',),
+    'CATEGORY_DELETE': ('Categoría eliminada: {nombre}',),
+    'SUBCATEGORY_CREATE': ('Nueva subcategoría creada: {nombre} (Categoría: {categoria})',),
+    'SUBCATEGORY_EDIT': ('Subcategoría editada: {nombre} (Categoría: {categoria})',),
+    'SUBCATEGORY_DELETE': ('Subcategoría eliminada: {nombre} (Categoría: {categoria})',),
+    'LOCATION_CREATE': ('Nueva ubicación creada: {codigo} - {nombre}',),
+    'LOCATION_EDIT': ('Ubicación editada: {codigo} - {nombre}',),
+    'LOCATION_DELETE': ('Ubicación eliminada: {codigo} - {nombre}',),
+    'BACKUP_DOWNLOAD': ('Backup descargado: {archivo}',),
+    'BACKUP_RESTORE': ('Base de datos restaurada desde {archivo}. Motivo: {motivo}. '
+                       'Backup previo guardado como: {previo}',),
+    'CYCLE_COUNT_IMPORT': ('Conteo cíclico importado desde {archivo}: {cambios} cambios en {segundos}s',),
+    'CATALOG_IMPORT': ('Carga masiva desde {archivo}: {resumen}',),
+    'SLOW_QUERY_LOG_CLEAR': ('Registro de consultas lentas vaciado',),
+    'PROFILE_SAMPLING': ('Muestreo de perfiles: 1 de cada {cada_n} peticiones a {endpoint} durante {minutos} min',),
+    'LOG_ARCHIVE': ('{movidos} registros de logs movidos a los archivos mensuales',),
+    'LOG_COMPACT': ('Base compactada ({libres} páginas libres de {paginas})',),
+    'PRODUCT_IMAGE': ('Imagen de {producto} actualizada: {archivo} ({ancho}x{alto})',),
+}
+
+# Campos de las plantillas que salen de columnas (o de sus joins) y no de params
+_CAMPOS_COLUMNA = ('producto', 'ubicacion', 'old', 'new')
+
+SQL_TABLA = '''
+    CREATE TABLE IF NOT EXISTS {nombre} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts INTEGER NOT NULL,
+        tipo_id INTEGER NOT NULL,
+        admin_user_id INTEGER,
+        producto_id INTEGER,
+        ubicacion_id INTEGER,
+        old_quantity INTEGER,
+        new_quantity INTEGER,
+        ip_id INTEGER,
+        params TEXT
+    )
+'''
+
+# Cada filtro del visor tiene su índice (filtro, ts); el rowid implícito al
+# final del índice resuelve el desempate por id sin ordenar
+INDICES = (
+    'CREATE INDEX IF NOT EXISTS {esquema}.idx_operation_logs_ts ON operation_logs(ts)',
+    'CREATE INDEX IF NOT EXISTS {esquema}.idx_operation_logs_tipo_ts ON operation_logs(tipo_id, ts)',
+    'CREATE INDEX IF NOT EXISTS {esquema}.idx_operation_logs_admin_ts ON operation_logs(admin_user_id, ts)',
+    'CREATE INDEX IF NOT EXISTS {esquema}.idx_operation_logs_producto_ts ON operation_logs(producto_id, ts)',
+    'CREATE INDEX IF NOT EXISTS {esquema}.idx_operation_logs_ubicacion_ts ON operation_logs(ubicacion_id, ts)',
+)
+
+POR_PAGINA = 100
+MAXIMO_MESES_BUSQUEDA = 120  # rangos más largos se filtran solo por ts
+
+COLUMNAS = '''
+    ol.id, ol.ts, ol.admin_user_id, ol.producto_id, ol.ubicacion_id,
+    ol.old_quantity, ol.new_quantity, ol.params,
+    t.nombre AS operation_type, ip.ip AS ip_address, au.username,
+    p.descripcion AS producto_nombre, p.codigo AS producto_codigo, u.codigo AS ubicacion_codigo
+'''
+
+JOINS = '''
+    JOIN tipos_operacion t ON t.id = ol.tipo_id
+    LEFT JOIN direcciones_ip ip ON ip.id = ol.ip_id
+    LEFT JOIN admin_users au ON au.id = ol.admin_user_id
+    LEFT JOIN productos p ON p.id = ol.producto_id
+    LEFT JOIN ubicaciones u ON u.id = ol.ubicacion_id
+'''
+
+# Lectura: las consultas agregan WHERE / ORDER BY ol.ts DESC / LIMIT ?
+# ({logs} lo reemplaza ArchivoLogs.consultar por la capa que corresponda)
+SELECT = f'SELECT {COLUMNAS} FROM {{logs}} ol {JOINS}'
+
+# Condición por tipo que aprovecha idx_operation_logs_tipo_ts
+POR_TIPO = 'ol.tipo_id = (SELECT id FROM tipos_operacion WHERE nombre = ?)'
+
+_INSERTAR = '''
+    INSERT INTO operation_logs (ts, tipo_id, admin_user_id, producto_id, ubicacion_id,
+                                old_quantity, new_quantity, ip_id, params)
+    VALUES (?, (SELECT id FROM tipos_operacion WHERE nombre = ?), ?, ?, ?, ?, ?,
+            (SELECT id FROM direcciones_ip WHERE ip = ?), ?)
+'''
+
+
+# ---------------------------------------------------------------------------
+# Esquema
+# ---------------------------------------------------------------------------
+
+def crear_diccionarios(conn, esquema='main'):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {esquema}.tipos_operacion (
+            id INTEGER PRIMARY KEY,
+            nombre TEXT UNIQUE NOT NULL
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {esquema}.direcciones_ip (
+            id INTEGER PRIMARY KEY,
+            ip TEXT UNIQUE NOT NULL
+        )
+    ''')
+
+
+def crear_indices(conn, esquema='main'):
+    for sql in INDICES:
+        conn.execute(sql.format(esquema=esquema))
+
+
+def crear_busqueda(conn, esquema='main'):
+    """Índice de texto de las descripciones; regresa True si se creó"""
+    if conn.execute(f"SELECT 1 FROM {esquema}.sqlite_master WHERE name = 'operation_logs_fts'").fetchone():
+        return False
+    conn.execute(f'''
+        CREATE VIRTUAL TABLE {esquema}.operation_logs_fts
+        USING fts5(texto, claves, content='', tokenize='unicode61 remove_diacritics 2')
+    ''')
+    return True
+
+
+def crear_tablas(conn, esquema='main'):
+    """Diccionarios, operation_logs compacta, índices y búsqueda (si no existen)"""
+    crear_diccionarios(conn, esquema)
+    conn.execute(SQL_TABLA.format(nombre=f'{esquema}.operation_logs'))
+    crear_indices(conn, esquema)
+    crear_busqueda(conn, esquema)
+
+
+# ---------------------------------------------------------------------------
+# Escritura
+# ---------------------------------------------------------------------------
+
+def _json(params):
+    limpios = {clave: valor for clave, valor in (params or {}).items() if valor is not None}
+    if not limpios:
+        return None
+    return json.dumps(limpios, ensure_ascii=False, separators=(',', ':'))
+
+
+def registrar_varios(conn, admin_user_id, ip, filas, ts=None):
+    """
+    Insertar varios registros del mismo administrador e IP.
+    filas: (tipo, producto_id, ubicacion_id, old_quantity, new_quantity, params)
+    Los tipos e IPs nuevos se agregan a sus diccionarios en la misma transacción.
+    """
+    if not filas:
+        return 0
+    ts = int(time.time()) if ts is None else ts
+    conn.executemany('INSERT OR IGNORE INTO tipos_operacion (nombre) VALUES (?)',
+                     [(tipo,) for tipo in {fila[0] for fila in filas}])
+    if ip:
+        conn.execute('INSERT OR IGNORE INTO direcciones_ip (ip) VALUES (?)', (ip,))
+    ids = [
+        conn.execute(_INSERTAR, (ts, tipo, admin_user_id, producto_id, ubicacion_id, old, new, ip, _json(params))).lastrowid
+        for tipo, producto_id, ubicacion_id, old, new, params in filas
+    ]
+    indexar(conn, ids)
+    return len(filas)
+
+
+def registrar(conn, admin_user_id, ip, tipo, producto_id=None, ubicacion_id=None,
+              old_quantity=None, new_quantity=None, **params):
+    """Insertar un registro; los params son los campos de la plantilla del tipo"""
+    registrar_varios(conn, admin_user_id, ip,
+                     [(tipo, producto_id, ubicacion_id, old_quantity, new_quantity, params)])
+
+
+# ---------------------------------------------------------------------------
+# Lectura
+# ---------------------------------------------------------------------------
+
+class _Valores(dict):
+    def __missing__(self, clave):
+        return '?'
+
+
+def _plantilla(tipo, valores):
+    opciones = PLANTILLAS.get(tipo)
+    if not opciones:
+        return None
+    if tipo == 'STOCK_EDIT' and valores.get('new') == 0:
+        return opciones[1]
+    return opciones[0]
+
+
+def describir(tipo, params=None, producto=None, ubicacion=None, old=None, new=None):
+    """Armar la descripción de un registro; params puede venir como texto JSON"""
+    datos = json.loads(params) if isinstance(params, str) else dict(params or {})
+    if 'texto' in datos:
+        return datos['texto']
+
+    valores = _Valores((clave, valor) for clave, valor in
+                       zip(_CAMPOS_COLUMNA, (producto, ubicacion, old, new)) if valor is not None)
+    valores.update(datos)
+    plantilla = _plantilla(tipo, valores)
+    if plantilla is None:
+        return ', '.join(f'{clave}: {valor}' for clave, valor in datos.items())
+    return plantilla.format_map(valores)
+
+
+def describir_ids(conn, tipo, params=None, producto_id=None, ubicacion_id=None, old=None, new=None):
+    """describir() buscando el nombre del producto y el código de la ubicación"""
+    producto = ubicacion = None
+    if producto_id is not None:
+        fila = conn.execute('SELECT descripcion FROM productos WHERE id = ?', (producto_id,)).fetchone()
+        producto = fila[0] if fila else f'#{producto_id}'
+    if ubicacion_id is not None:
+        fila = conn.execute('SELECT codigo FROM ubicaciones WHERE id = ?', (ubicacion_id,)).fetchone()
+        ubicacion = fila[0] if fila else f'#{ubicacion_id}'
+    return describir(tipo, params, producto, ubicacion, old, new)
+
+
+def _describir_fila(tipo, params, producto, ubicacion, old, new, producto_id, ubicacion_id):
+    """describir() con '#id' para productos o ubicaciones que ya no existen"""
+    if producto is None and producto_id is not None:
+        producto = f'#{producto_id}'
+    if ubicacion is None and ubicacion_id is not None:
+        ubicacion = f'#{ubicacion_id}'
+    return describir(tipo, params, producto, ubicacion, old, new)
+
+
+def leer(filas):
+    """Filas de SELECT a dicts con 'fecha' (datetime local) y 'description'"""
+    registros = []
+    for fila in filas:
+        registro = dict(fila)
+        registro['fecha'] = datetime.fromtimestamp(registro['ts'])
+        registro['description'] = _describir_fila(
+            registro['operation_type'], registro['params'], registro.get('producto_nombre'),
+            registro.get('ubicacion_codigo'), registro['old_quantity'], registro['new_quantity'],
+            registro['producto_id'], registro['ubicacion_id'])
+        registros.append(registro)
+    return registros
+
+
+def consulta_busqueda(texto):
+    """
+    Texto libre a consulta FTS5: palabras completas (sin acentos ni
+    mayúsculas), todas requeridas; lo que va junto como "A-01-02" debe
+    aparecer seguido
+    """
+    frases = []
+    for trozo in (texto or '').split():
+        palabras = re.findall(r'\w+', trozo)
+        if palabras:
+            frases.append('"' + ' '.join(palabras) + '"')
+    return ' '.join(frases) or None
+
+
+def _meses(desde, hasta):
+    """Claves m<AAAAMM> (UTC) de los meses entre dos epoch, hasta excluido"""
+    anio, mes = time.gmtime(desde)[:2]
+    ultimo = time.gmtime(hasta - 1)[:2]
+    meses = []
+    while (anio, mes) <= ultimo and len(meses) <= MAXIMO_MESES_BUSQUEDA:
+        meses.append(f'm{anio}{mes:02d}')
+        anio, mes = (anio + 1, 1) if mes == 12 else (anio, mes + 1)
+    return meses
+
+
+def consulta(tipo_id=None, admin_user_id=None, producto_id=None, ubicacion_id=None,
+             desde=None, hasta=None, busqueda=None, antes=None):
+    """
+    SQL y parámetros de una página del visor, para ArchivoLogs.consultar.
+
+    Orden: más reciente primero por (ts, id). antes = (ts, id) del último
+    registro de la página anterior (paginación por cursor: cada página
+    cuesta lo mismo sin importar qué tan atrás esté). desde/hasta en epoch
+    (hasta excluido).
+
+    Sin búsqueda, cada filtro usa su índice (filtro, ts). Con búsqueda, los
+    filtros van también en la consulta FTS (columna claves) y el índice
+    entrega los ids de mayor a menor; como el id crece con el tiempo, el
+    orden es el mismo.
+    """
+    texto = consulta_busqueda(busqueda)
+    if antes and not texto and hasta is not None and antes[0] < hasta:
+        hasta = None  # el cursor ya acota ts por arriba (una sola cota para el índice)
+    condiciones = []
+    params = []
+
+    if texto:
+        claves = [f'{letra}{valor}' for letra, valor in
+                  (('t', tipo_id), ('a', admin_user_id), ('p', producto_id), ('u', ubicacion_id))
+                  if valor is not None]
+        expresion = f'texto:({texto})'
+        if claves:
+            expresion += ' AND claves:(' + ' AND '.join(claves) + ')'
+        if desde is not None:
+            meses = _meses(desde, hasta if hasta is not None else int(time.time()) + 1)
+            if len(meses) <= MAXIMO_MESES_BUSQUEDA:
+                expresion += ' AND claves:(' + ' OR '.join(meses) + ')'
+        origen = '{esquema}.operation_logs_fts f JOIN {logs} ol ON ol.id = f.rowid'
+        orden = 'f.rowid DESC'
+        condiciones.append('f.operation_logs_fts MATCH ?')
+        params.append(expresion)
+    else:
+        origen = '{logs} ol'
+        orden = 'ol.ts DESC, ol.id DESC'
+        for columna, valor in (('tipo_id', tipo_id), ('admin_user_id', admin_user_id),
+                               ('producto_id', producto_id), ('ubicacion_id', ubicacion_id)):
+            if valor is not None:
+                condiciones.append(f'ol.{columna} = ?')
+                params.append(valor)
+
+    if desde is not None:
+        condiciones.append('ol.ts >= ?')
+        params.append(desde)
+    if hasta is not None:
+        condiciones.append('ol.ts < ?')
+        params.append(hasta)
+    if antes:
+        ts, id_ = antes
+        if texto:
+            condiciones.append('f.rowid < ?')
+            params.append(id_)
+        else:
+            condiciones.append('ol.ts <= ? AND (ol.ts < ? OR ol.id < ?)')
+            params.extend([ts, ts, id_])
+
+    donde = ('WHERE ' + ' AND '.join(condiciones)) if condiciones else ''
+    return f'SELECT {COLUMNAS} FROM {origen} {JOINS} {donde} ORDER BY {orden} LIMIT ?', params
+
+
+# ---------------------------------------------------------------------------
+# Índice de texto
+# ---------------------------------------------------------------------------
+
+def _claves(tipo_id, admin_user_id, producto_id, ubicacion_id, ts):
+    """Columna claves del índice de texto (ver consulta())"""
+    claves = [f'{letra}{valor}' for letra, valor in
+              (('t', tipo_id), ('a', admin_user_id), ('p', producto_id), ('u', ubicacion_id))
+              if valor is not None]
+    claves.append(time.strftime('m%Y%m', time.gmtime(ts)))
+    return ' '.join(claves)
+
+
+def indexar(conn, ids, esquema='main'):
+    """Agregar al índice de texto de `esquema` la descripción de estos registros"""
+    if not ids:
+        return 0
+    filas = conn.execute(f'''
+        SELECT ol.id, t.nombre, ol.params, p.descripcion, u.codigo, ol.old_quantity, ol.new_quantity,
+               ol.producto_id, ol.ubicacion_id, ol.tipo_id, ol.admin_user_id, ol.ts
+        FROM {esquema}.operation_logs ol
+        JOIN main.tipos_operacion t ON t.id = ol.tipo_id
+        LEFT JOIN main.productos p ON p.id = ol.producto_id
+        LEFT JOIN main.ubicaciones u ON u.id = ol.ubicacion_id
+        WHERE ol.id IN (SELECT value FROM json_each(?))
+    ''', (json.dumps(list(ids)),)).fetchall()
+    conn.executemany(f'INSERT INTO {esquema}.operation_logs_fts (rowid, texto, claves) VALUES (?, ?, ?)', [
+        (id_, _describir_fila(tipo, params, producto, ubicacion, old, new, producto_id, ubicacion_id),
+         _claves(tipo_id, admin_user_id, producto_id, ubicacion_id, ts))
+        for (id_, tipo, params, producto, ubicacion, old, new, producto_id, ubicacion_id,
+             tipo_id, admin_user_id, ts) in filas
+    ])
+    return len(filas)
+
+
+def reindexar_busqueda(conn, esquema='main', lote=TAMANO_LOTE):
+    """
+    Rehacer el índice de texto con los registros que siguen en `esquema`
+    (quita las entradas de los ya archivados). Una sola transacción: desde
+    fuera nunca se ve el índice a medias.
+    """
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        crear_busqueda(conn, esquema)
+        conn.execute(f"INSERT INTO {esquema}.operation_logs_fts (operation_logs_fts) VALUES ('delete-all')")
+        desde = 0
+        total = 0
+        while True:
+            ids = [fila[0] for fila in conn.execute(
+                f'SELECT id FROM {esquema}.operation_logs WHERE id > ? ORDER BY id LIMIT ?', (desde, lote))]
+            if not ids:
+                break
+            total += indexar(conn, ids, esquema)
+            desde = ids[-1]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return total
+
+
+def al_archivar(conn, ids):
+    """ArchivoLogs(al_archivar=...): índices del visor y búsqueda en el archivo del mes"""
+    crear_indices(conn, 'archivo')
+    crear_busqueda(conn, 'archivo')
+    indexar(conn, ids, 'archivo')
+
+
+# ---------------------------------------------------------------------------
+# Conversión del formato anterior (descripción en texto)
+# ---------------------------------------------------------------------------
+
+def _patron(plantilla):
+    partes = re.split(r'\{(\w+)\}', plantilla)
+    cuerpo = ''.join(re.escape(parte) if i % 2 == 0 else f'(?P<{parte}>.*?)' for i, parte in enumerate(partes))
+    return re.compile(f'^{cuerpo}$', re.S)
+
+
+_PATRONES = {tipo: [_patron(plantilla) for plantilla in plantillas] for tipo, plantillas in PLANTILLAS.items()}
+
+
+def _valor(texto):
+    """Los números capturados se guardan como números (si se escriben igual)"""
+    for tipo in (int, float):
+        try:
+            valor = tipo(texto)
+        except ValueError:
+            continue
+        if str(valor) == texto:
+            return valor
+    return texto
+
+
+def convertir_legado(tipo, descripcion, producto=None, ubicacion=None, old=None, new=None):
+    """
+    Separar una descripción antigua en params. Regresa (old, new, params_json).
+
+    Lo que ya está en las columnas (o coincide con el nombre actual del
+    producto o la ubicación) no se repite en params. Solo se acepta una
+    plantilla si la descripción que se arma con ella es idéntica a la
+    original; si ninguna sirve se guarda {"texto": descripcion}.
+    """
+    if not descripcion:
+        return old, new, None
+    for patron in _PATRONES.get(tipo, ()):
+        coincidencia = patron.match(descripcion)
+        if not coincidencia:
+            continue
+        columnas = {'producto': producto, 'ubicacion': ubicacion, 'old': old, 'new': new}
+        params = {}
+        for campo, texto in coincidencia.groupdict().items():
+            if campo in ('old', 'new') and columnas[campo] is None and texto.lstrip('-').isdigit():
+                columnas[campo] = int(texto)
+            elif campo in _CAMPOS_COLUMNA and columnas[campo] is not None and str(columnas[campo]) == texto:
+                continue
+            else:
+                params[campo] = _valor(texto)
+        if describir(tipo, params, producto, ubicacion, columnas['old'], columnas['new']) == descripcion:
+            return columnas['old'], columnas['new'], _json(params)
+    return old, new, _json({'texto': descripcion})
+
+
+def _epoch(timestamp):
+    """'AAAA-MM-DD HH:MM:SS' (UTC, como CURRENT_TIMESTAMP) a segundos"""
+    if not timestamp:
+        return 0
+    try:
+        return calendar.timegm(datetime.fromisoformat(str(timestamp)).timetuple())
+    except ValueError:
+        return 0
+
+
+def convertir_tabla(conn, esquema='main', lote=TAMANO_LOTE):
+    """
+    Pasar operation_logs de `esquema` (la base principal o un archivo
+    mensual adjunto) al formato compacto. Los tipos e IPs se agregan a los
+    diccionarios de la base principal; si el esquema es otro, se copian
+    también a él. Se copia por lotes (una transacción cada uno) a
+    operation_logs__nueva y al final se intercambian las tablas.
+    Regresa cuántos registros se convirtieron.
+    """
+    tabla = f'{esquema}.operation_logs'
+    nueva = f'{esquema}.operation_logs__nueva'
+    conn.commit()
+
+    crear_diccionarios(conn)
+    conn.execute(f'DROP TABLE IF EXISTS {nueva}')
+    conn.execute(SQL_TABLA.format(nombre=nueva))
+    conn.commit()
+
+    desde = 0
+    total = 0
+    while True:
+        filas = conn.execute(f'''
+            SELECT ol.id, ol.timestamp, ol.operation_type, ol.admin_user_id, ol.producto_id, ol.ubicacion_id,
+                   ol.old_quantity, ol.new_quantity, ol.description, ol.ip_address, p.descripcion, u.codigo
+            FROM {tabla} ol
+            LEFT JOIN main.productos p ON p.id = ol.producto_id
+            LEFT JOIN main.ubicaciones u ON u.id = ol.ubicacion_id
+            WHERE ol.id > ?
+            ORDER BY ol.id
+            LIMIT ?
+        ''', (desde, lote)).fetchall()
+        if not filas:
+            break
+        desde = filas[-1][0]
+
+        convertidas = []
+        for (id_, timestamp, tipo, admin_user_id, producto_id, ubicacion_id,
+             old, new, descripcion, ip, producto, ubicacion) in filas:
+            old, new, params = convertir_legado(tipo, descripcion, producto, ubicacion, old, new)
+            convertidas.append((id_, _epoch(timestamp), tipo, admin_user_id, producto_id, ubicacion_id,
+                                old, new, ip, params))
+
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR IGNORE INTO main.tipos_operacion (nombre) VALUES (?)',
+                             {(fila[2],) for fila in convertidas})
+            conn.executemany('INSERT OR IGNORE INTO main.direcciones_ip (ip) VALUES (?)',
+                             {(fila[8],) for fila in convertidas if fila[8]})
+            conn.executemany(f'''
+                INSERT INTO {nueva} (id, ts, tipo_id, admin_user_id, producto_id, ubicacion_id,
+                                     old_quantity, new_quantity, ip_id, params)
+                VALUES (?, ?, (SELECT id FROM main.tipos_operacion WHERE nombre = ?), ?, ?, ?, ?, ?,
+                        (SELECT id FROM main.direcciones_ip WHERE ip = ?), ?)
+            ''', convertidas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        total += len(filas)
+
+    # Conservar el contador de AUTOINCREMENT: los ids ya archivados no se reutilizan
+    secuencia = conn.execute(f'SELECT MAX(id) FROM {tabla}').fetchone()[0] or 0
+    fila = conn.execute(f"SELECT seq FROM {esquema}.sqlite_sequence WHERE name = 'operation_logs'").fetchone()
+    secuencia = max(secuencia, fila[0] if fila else 0)
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(f'DROP TABLE {tabla}')
+        conn.execute(f'ALTER TABLE {nueva} RENAME TO operation_logs')
+        crear_indices(conn, esquema)
+        if secuencia and not conn.execute(f'''
+            UPDATE {esquema}.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'operation_logs'
+        ''', (secuencia,)).rowcount:
+            conn.execute(f"INSERT INTO {esquema}.sqlite_sequence (name, seq) VALUES ('operation_logs', ?)",
+                         (secuencia,))
+        if esquema != 'main':
+            crear_diccionarios(conn, esquema)
+            for diccionario in ('tipos_operacion', 'direcciones_ip'):
+                conn.execute(f'INSERT OR REPLACE INTO {esquema}.{diccionario} SELECT * FROM main.{diccionario}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return total
+
+
+def convertir_archivos(database, archivo_logs):
+    """
+    Convertir los archivos mensuales que sigan en el formato anterior y
+    agregar los índices del visor y la búsqueda a los que no los tengan
+    """
+    convertidos = 0
+    for _, ruta in archivo_logs.meses():
+        conn = sqlite3.connect(database, timeout=20.0)
+        try:
+            conn.execute('ATTACH DATABASE ? AS archivo', (ruta,))
+            columnas = [fila[1] for fila in conn.execute('PRAGMA archivo.table_info(operation_logs)')]
+            if columnas and 'ts' not in columnas:
+                convertir_tabla(conn, 'archivo')
+                convertidos += 1
+            if columnas:
+                crear_indices(conn, 'archivo')
+                if crear_busqueda(conn, 'archivo'):
+                    conn.commit()
+                    reindexar_busqueda(conn, 'archivo')
+            conn.commit()
+            conn.execute('DETACH DATABASE archivo')
+        finally:
+            conn.close()
+    return convertidos
@@ -0,0 +1,178 @@
+"""
+Búsqueda de productos mientras se escribe (typeahead).
+
+Índice en memoria ordenado de (clave, producto_id): las claves son las
+palabras normalizadas (minúsculas, sin acentos ni signos) de la
+descripción y del código, más el código compacto sin separadores. Una
+búsqueda toma cada palabra escrita como prefijo: con bisect se mide el
+rango de cada una en la lista ordenada, se recorre el más corto y las
+demás palabras se comprueban contra las claves de cada candidato.
+
+Al guardar un producto basta invalidarlo: en la próxima búsqueda se
+vuelve a leer solo ese producto y se reemplazan sus claves. Cada
+ttl_segundos se compara una firma barata de la tabla (para ver cambios de
+otros workers o cargas masivas) y solo si cambió se reconstruye todo.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+from servicios.escritor import conexion_lectura
+
+LIMITE_RESULTADOS = 20
+
+
+def normalizar(texto):
+    """Minúsculas sin acentos; todo lo que no es letra o dígito se vuelve espacio"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    return re.sub(r'[^a-z0-9]+', ' ', texto).strip()
+
+
+def claves(descripcion, codigo):
+    """Claves de un producto en el índice"""
+    palabras = set(normalizar(descripcion).split())
+    codigo = normalizar(codigo)
+    if codigo:
+        palabras.update(codigo.split())
+        palabras.add(codigo.replace(' ', ''))
+    return sorted(palabras)
+
+
+class IndiceProductos:
+    """Índice de prefijos sobre código y descripción de todos los productos"""
+
+    def __init__(self, database, ttl_segundos=60):
+        self.database = database
+        self.ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._entradas = []   # [(clave, producto_id)] ordenada
+        self._productos = {}  # producto_id -> (descripcion, codigo, claves, descripcion normalizada, código compacto)
+        self._firma = None
+        self._revisado_en = None
+        self._productos_invalidos = set()
+
+    def _conectar(self):
+        return conexion_lectura(self.database)
+
+    @staticmethod
+    def _leer_firma(conn):
+        return tuple(conn.execute(
+            'SELECT COUNT(*), MAX(id), MAX(fecha_actualizacion) FROM productos').fetchone())
+
+    @staticmethod
+    def _datos(descripcion, codigo):
+        return (descripcion, codigo, claves(descripcion, codigo),
+                normalizar(descripcion), normalizar(codigo).replace(' ', ''))
+
+    def cargar(self):
+        """Leer todos los productos y armar el índice desde cero"""
+        conn = self._conectar()
+        try:
+            firma = self._leer_firma(conn)
+            filas = conn.execute('SELECT id, descripcion, codigo FROM productos').fetchall()
+        finally:
+            conn.close()
+
+        productos = {fila['id']: self._datos(fila['descripcion'], fila['codigo']) for fila in filas}
+        entradas = sorted((clave, producto_id)
+                          for producto_id, datos in productos.items() for clave in datos[2])
+        with self._lock:
+            self._entradas = entradas
+            self._productos = productos
+            self._firma = firma
+            self._productos_invalidos.clear()
+            self._revisado_en = time.monotonic()
+
+    def invalidar(self, producto_id=None):
+        """Marcar un producto (o todo el índice) para releer en la próxima búsqueda"""
+        with self._lock:
+            if producto_id is None:
+                self._revisado_en = None
+                self._firma = None
+            else:
+                self._productos_invalidos.add(int(producto_id))
+
+    def _quitar(self, producto_id):
+        datos = self._productos.pop(producto_id, None)
+        for clave in datos[2] if datos else ():
+            posicion = bisect.bisect_left(self._entradas, (clave, producto_id))
+            del self._entradas[posicion]
+
+    def _recargar_productos(self, ids):
+        conn = self._conectar()
+        try:
+            marcas = ','.join('?' * len(ids))
+            filas = conn.execute(f'SELECT id, descripcion, codigo FROM productos WHERE id IN ({marcas})',
+                                 list(ids)).fetchall()
+            firma = self._leer_firma(conn)
+        finally:
+            conn.close()
+
+        with self._lock:
+            for producto_id in ids:
+                self._quitar(producto_id)
+            for fila in filas:
+                datos = self._datos(fila['descripcion'], fila['codigo'])
+                self._productos[fila['id']] = datos
+                for clave in datos[2]:
+                    bisect.insort(self._entradas, (clave, fila['id']))
+            self._productos_invalidos.difference_update(ids)
+            # Si nadie más cambió la tabla, la firma nueva evita reconstruir todo al vencer el ttl
+            self._firma = firma
+
+    def _actualizar(self):
+        ahora = time.monotonic()
+        if self._revisado_en is None:
+            self.cargar()
+        elif ahora - self._revisado_en > self.ttl_segundos:
+            conn = self._conectar()
+            try:
+                firma = self._leer_firma(conn)
+            finally:
+                conn.close()
+            if firma != self._firma:
+                self.cargar()
+            else:
+                self._revisado_en = ahora
+        if self._productos_invalidos:
+            self._recargar_productos(set(self._productos_invalidos))
+
+    def _rango(self, prefijo):
+        """Posiciones [inicio, fin) de las claves que empiezan con prefijo"""
+        return (bisect.bisect_left(self._entradas, (prefijo,)),
+                bisect.bisect_left(self._entradas, (prefijo + '\uffff',)))
+
+    def buscar(self, texto, limite=LIMITE_RESULTADOS):
+        """
+        Productos cuyo código o descripción tienen palabras que empiezan con
+        cada palabra de `texto`. Primero el código exacto, luego los códigos
+        que empiezan con lo escrito y después por descripción.
+        """
+        palabras = normalizar(texto).split()
+        if not palabras:
+            return []
+        self._actualizar()
+        compacto = ''.join(palabras)
+
+        with self._lock:
+            # Se recorre el rango de la palabra con menos claves; las demás se comprueban por producto
+            rangos = {palabra: self._rango(palabra) for palabra in palabras}
+            primera = min(rangos, key=lambda palabra: rangos[palabra][1] - rangos[palabra][0])
+            inicio, fin = rangos.pop(primera)
+            otras = list(rangos)
+            candidatos = {producto_id for _, producto_id in self._entradas[inicio:fin]}
+
+            encontrados = []
+            for producto_id in candidatos:
+                descripcion, codigo, claves_producto, orden, codigo_compacto = self._productos[producto_id]
+                if all(any(clave.startswith(palabra) for clave in claves_producto) for palabra in otras):
+                    rango = 0 if codigo_compacto == compacto else 1 if codigo_compacto.startswith(compacto) else 2
+                    encontrados.append((rango, orden, producto_id, descripcion, codigo))
+
+        return [{'id': producto_id, 'descripcion': descripcion, 'codigo': codigo}
+                for _, _, producto_id, descripcion, codigo in heapq.nsmallest(limite, encontrados)]
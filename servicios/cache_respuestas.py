@@ -0,0 +1,137 @@
+"""
+Caché de respuestas pesadas con cálculo único por clave (single-flight).
+
+Cada entrada guarda el valor calculado y la versión de datos con la que
+se calculó (p. ej. servicios/versiones.py). Al pedir una clave:
+
+- misma versión: se regresa lo guardado (acierto);
+- versión distinta pero calculado hace menos de `ventana_obsoleta`
+  segundos: se regresa lo guardado y un hilo lo recalcula en segundo
+  plano, uno solo por clave y versión (obsoleto; stale-while-revalidate);
+- sin entrada, o demasiado vieja: se calcula en el momento. Las peticiones
+  que llegan mientras tanto con la misma versión esperan ese mismo
+  cálculo en lugar de repetir la consulta (espera), aunque siga en curso
+  el de una versión anterior.
+
+Si el cálculo de una versión anterior termina después del de una más
+nueva, no reemplaza al más nuevo.
+
+La memoria se limita a `max_bytes` (tamaño estimado por quien llama);
+al pasarse se sacan las entradas usadas hace más tiempo. Los contadores
+van por grupo (el primer elemento de la clave) y resultado.
+"""
+
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+RESULTADOS = ('acierto', 'obsoleto', 'espera', 'fallo')
+
+
+class _Entrada:
+    __slots__ = ('version', 'valor', 'tamano', 'calculada_en')
+
+    def __init__(self, version, valor, tamano, calculada_en):
+        self.version = version
+        self.valor = valor
+        self.tamano = tamano
+        self.calculada_en = calculada_en  # Cuándo empezó el cálculo
+
+
+class CacheRespuestas:
+    """Valores por (grupo, ...) y versión de datos, con cálculo único y memoria acotada"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ventana_obsoleta=30):
+        self.max_bytes = max_bytes
+        self.ventana_obsoleta = ventana_obsoleta
+        self._lock = threading.Lock()
+        self._entradas = collections.OrderedDict()  # Orden de uso: la primera es la más vieja
+        self._en_vuelo = {}                          # (clave, version) -> Future
+        self.bytes = 0
+        self.desalojos = 0
+        self.contadores = collections.Counter()      # (grupo, resultado) -> peticiones
+
+    def obtener(self, clave, version, calcular, tamano=len):
+        """Valor de `clave` para `version`; calcular() solo corre si hace falta"""
+        grupo = clave[0]
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and (entrada.version == version or
+                                        time.monotonic() - entrada.calculada_en <= self.ventana_obsoleta):
+                self._entradas.move_to_end(clave)
+                if entrada.version == version:
+                    self.contadores[grupo, 'acierto'] += 1
+                    return entrada.valor
+                self.contadores[grupo, 'obsoleto'] += 1
+                if (clave, version) not in self._en_vuelo:
+                    futuro = Future()
+                    self._en_vuelo[clave, version] = futuro
+                    threading.Thread(target=self._calcular, args=(clave, version, calcular, tamano, futuro, True),
+                                     name='cache-respuestas', daemon=True).start()
+                return entrada.valor
+
+            futuro = self._en_vuelo.get((clave, version))
+            propio = futuro is None
+            if propio:
+                self.contadores[grupo, 'fallo'] += 1
+                futuro = Future()
+                self._en_vuelo[clave, version] = futuro
+            else:
+                self.contadores[grupo, 'espera'] += 1
+
+        if propio:
+            self._calcular(clave, version, calcular, tamano, futuro, False)
+        return futuro.result()
+
+    def _calcular(self, clave, version, calcular, tamano, futuro, en_segundo_plano):
+        inicio = time.monotonic()
+        try:
+            valor = calcular()
+            bytes_valor = tamano(valor)
+        except BaseException as e:
+            with self._lock:
+                if self._en_vuelo.get((clave, version)) is futuro:
+                    del self._en_vuelo[clave, version]
+            if en_segundo_plano:
+                logging.warning(f"Error recalculando {clave[0]} en segundo plano: {e}")
+            futuro.set_exception(e)
+            return
+
+        with self._lock:
+            if self._en_vuelo.get((clave, version)) is futuro:
+                del self._en_vuelo[clave, version]
+            self._guardar(clave, _Entrada(version, valor, bytes_valor, inicio))
+        futuro.set_result(valor)
+
+    def _guardar(self, clave, entrada):
+        anterior = self._entradas.get(clave)
+        if anterior is not None and anterior.calculada_en > entrada.calculada_en:
+            return  # Ya hay un cálculo que empezó después (versión más nueva)
+        anterior = self._entradas.pop(clave, None)
+        if anterior is not None:
+            self.bytes -= anterior.tamano
+        if entrada.tamano > self.max_bytes:
+            return  # No cabe: se calcula cada vez (pero las peticiones simultáneas siguen compartiendo)
+        self._entradas[clave] = entrada
+        self.bytes += entrada.tamano
+        while self.bytes > self.max_bytes:
+            _, vieja = self._entradas.popitem(last=False)
+            self.bytes -= vieja.tamano
+            self.desalojos += 1
+
+    def invalidar(self, grupo=None):
+        """Olvidar las entradas de un grupo (o todas), p. ej. tras restaurar un respaldo"""
+        with self._lock:
+            for clave in [clave for clave in self._entradas if grupo is None or clave[0] == grupo]:
+                self.bytes -= self._entradas.pop(clave).tamano
+
+    def entradas(self):
+        with self._lock:
+            return len(self._entradas)
+
+    def resumen(self):
+        """[((grupo, resultado), peticiones)] para /metrics"""
+        with self._lock:
+            return sorted(self.contadores.items())
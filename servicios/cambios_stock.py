@@ -0,0 +1,205 @@
+"""
+Cambios de stock en vivo para las páginas abiertas (Server-Sent Events).
+
+Unos triggers sobre inventario escriben cada cambio en cambios_stock
+dentro de la misma transacción: solo aparecen cambios confirmados, de
+cualquier ruta (entradas, salidas, edición rápida, conteos, cargas
+masivas) y de cualquier proceso. La tabla guarda los últimos
+MAXIMO_CAMBIOS; otro trigger borra los más viejos al insertar.
+
+En cada proceso un DifusorCambios lee la tabla desde el último id visto y
+reparte los eventos entre las suscripciones (una cola por cliente
+conectado): una sola lectura por proceso sin importar cuántos clientes
+haya. Lee cada `intervalo` segundos para ver lo de otros workers, y de
+inmediato cuando avisar() indica que este proceso confirmó una escritura.
+Si un cliente se atrasa demasiado (o se restauró otra base) recibe un
+evento `recargar` y vuelve a pedir la tabla completa.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+
+from servicios.escritor import conexion_lectura
+
+MAXIMO_CAMBIOS = 10000
+LIMITE_LECTURA = 500      # Más cambios pendientes que esto: mejor recargar la tabla
+COLA_SUSCRIPCION = 100    # Lotes sin leer por cliente antes de darlo por atrasado
+
+RECARGAR = {'tipo': 'recargar'}
+
+SQL_CREAR = [
+    '''CREATE TABLE IF NOT EXISTS cambios_stock (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        producto_id INTEGER NOT NULL,
+        ubicacion_id INTEGER NOT NULL,
+        cantidad INTEGER NOT NULL
+    )''',
+    '''CREATE TRIGGER IF NOT EXISTS cambios_stock_ins AFTER INSERT ON inventario BEGIN
+        INSERT INTO cambios_stock (producto_id, ubicacion_id, cantidad)
+        VALUES (NEW.producto_id, NEW.ubicacion_id, NEW.cantidad);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS cambios_stock_upd AFTER UPDATE OF producto_id, ubicacion_id, cantidad ON inventario
+    WHEN OLD.cantidad IS NOT NEW.cantidad OR OLD.producto_id IS NOT NEW.producto_id
+         OR OLD.ubicacion_id IS NOT NEW.ubicacion_id
+    BEGIN
+        INSERT INTO cambios_stock (producto_id, ubicacion_id, cantidad)
+        SELECT OLD.producto_id, OLD.ubicacion_id, 0
+        WHERE OLD.producto_id IS NOT NEW.producto_id OR OLD.ubicacion_id IS NOT NEW.ubicacion_id;
+        INSERT INTO cambios_stock (producto_id, ubicacion_id, cantidad)
+        VALUES (NEW.producto_id, NEW.ubicacion_id, NEW.cantidad);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS cambios_stock_del AFTER DELETE ON inventario BEGIN
+        INSERT INTO cambios_stock (producto_id, ubicacion_id, cantidad)
+        VALUES (OLD.producto_id, OLD.ubicacion_id, 0);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS cambios_stock_podar AFTER INSERT ON cambios_stock BEGIN
+        DELETE FROM cambios_stock WHERE id <= NEW.id - {MAXIMO_CAMBIOS};
+    END''',
+]
+
+
+def crear_tablas(conn):
+    """Tabla cambios_stock y sus triggers (si no existen)"""
+    for sql in SQL_CREAR:
+        conn.execute(sql)
+
+
+def leer(conn, desde, hasta):
+    """Eventos de stock con id en (desde, hasta], con el código de ubicación y el total actual"""
+    filas = conn.execute('''
+        SELECT c.id, c.producto_id, c.ubicacion_id, u.codigo, c.cantidad,
+               (SELECT COALESCE(SUM(i.cantidad), 0) FROM inventario i
+                WHERE i.producto_id = c.producto_id) AS stock_total
+        FROM cambios_stock c
+        LEFT JOIN ubicaciones u ON u.id = c.ubicacion_id
+        WHERE c.id > ? AND c.id <= ?
+        ORDER BY c.id
+    ''', (desde, hasta)).fetchall()
+    return [dict(fila, tipo='stock') for fila in filas]
+
+
+def ultimo_cambio(conn):
+    """Id del último cambio registrado (0 si no hay)"""
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM cambios_stock').fetchone()[0]
+
+
+def formato_sse(evento):
+    """Texto de un evento para text/event-stream"""
+    if evento['tipo'] == 'recargar':
+        return 'event: recargar\ndata: {}\n\n'
+    datos = {clave: valor for clave, valor in evento.items() if clave != 'tipo'}
+    return f"id: {evento['id']}\nevent: stock\ndata: {json.dumps(datos, separators=(',', ':'))}\n\n"
+
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado"""
+
+    def __init__(self, desde=None):
+        self.desde = desde  # Pendiente de ponerse al día desde este id (Last-Event-ID)
+        self._cola = queue.Queue(maxsize=COLA_SUSCRIPCION)
+        self._atrasada = False
+
+    def entregar(self, eventos):
+        try:
+            self._cola.put_nowait(eventos)
+        except queue.Full:
+            self._atrasada = True
+
+    def esperar(self, timeout):
+        """Siguiente lote de eventos ([] si no hubo nada en `timeout` segundos)"""
+        if self._atrasada:
+            # El cliente no alcanzó a leer: se descarta lo pendiente y recarga todo
+            while not self._cola.empty():
+                self._cola.get_nowait()
+            self._atrasada = False
+            return [RECARGAR]
+        try:
+            return self._cola.get(timeout=timeout)
+        except queue.Empty:
+            return []
+
+
+class DifusorCambios:
+    """Lee cambios_stock una vez por proceso y reparte los eventos a las suscripciones"""
+
+    def __init__(self, database, intervalo=1.0):
+        self.database = database
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._aviso = threading.Event()
+        self._suscripciones = set()
+        self._hilo = None
+        self._ultimo = None
+        self.lecturas = 0
+
+    def suscribir(self, desde=None):
+        """Nueva suscripción; con `desde` primero recibe los cambios posteriores a ese id"""
+        suscripcion = Suscripcion(desde)
+        with self._lock:
+            self._suscripciones.add(suscripcion)
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._ciclo, name='difusor-cambios', daemon=True)
+                self._hilo.start()
+        self._aviso.set()
+        return suscripcion
+
+    def cancelar(self, suscripcion):
+        with self._lock:
+            self._suscripciones.discard(suscripcion)
+
+    def suscritos(self):
+        with self._lock:
+            return len(self._suscripciones)
+
+    def avisar(self):
+        """Este proceso confirmó una escritura: leer sin esperar al intervalo"""
+        self._aviso.set()
+
+    def _ciclo(self):
+        while True:
+            with self._lock:
+                if not self._suscripciones:
+                    # Sin clientes no se lee; la próxima suscripción arranca otro hilo
+                    self._hilo = None
+                    self._ultimo = None
+                    return
+            try:
+                self._leer_y_repartir()
+            except sqlite3.Error as e:
+                logging.warning(f"Error leyendo cambios de stock: {e}")
+            self._aviso.wait(self.intervalo)
+            self._aviso.clear()
+
+    def _leer_y_repartir(self):
+        conn = conexion_lectura(self.database)
+        try:
+            minimo, maximo = conn.execute('SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM cambios_stock').fetchone()
+            self.lecturas += 1
+            reinicio = self._ultimo is not None and maximo < self._ultimo  # Se restauró otra base
+            if self._ultimo is None or reinicio:
+                self._ultimo = maximo
+
+            with self._lock:
+                suscripciones = list(self._suscripciones)
+            for suscripcion in suscripciones:
+                if suscripcion.desde is not None:
+                    desde, suscripcion.desde = suscripcion.desde, None
+                    if reinicio or desde > self._ultimo or desde < minimo - 1 or self._ultimo - desde > LIMITE_LECTURA:
+                        suscripcion.entregar([RECARGAR])
+                    elif desde < self._ultimo:
+                        suscripcion.entregar(leer(conn, desde, self._ultimo))
+
+            eventos = []
+            if reinicio:
+                eventos = [RECARGAR]
+            elif maximo > self._ultimo:
+                eventos = [RECARGAR] if maximo - self._ultimo > LIMITE_LECTURA else leer(conn, self._ultimo, maximo)
+                self._ultimo = maximo
+            if eventos:
+                for suscripcion in suscripciones:
+                    suscripcion.entregar(eventos)
+        finally:
+            conn.close()
@@ -0,0 +1,294 @@
+"""
+Carga masiva del catálogo (productos e inventario) desde CSV.
+
+Todos los valores de búsqueda (categorías, subcategorías, marcas, máquinas,
+ubicaciones) se resuelven en memoria antes de insertar; los registros se
+insertan con executemany en lotes grandes dentro de una sola transacción y,
+en cargas grandes, los índices secundarios se reconstruyen al final.
+
+Se usa desde migrations/importar_datos.py y desde /admin/catalogo.
+"""
+
+import csv
+import time
+
+TAMANO_LOTE = 10000
+UMBRAL_DIFERIR_INDICES = 10000  # Filas a partir de las cuales conviene reconstruir índices al final
+MAX_ERRORES_REPORTADOS = 100
+
+TABLAS_CATALOGO = ('productos', 'inventario', 'producto_maquinas')
+
+
+class ResultadoCarga:
+    """Estadísticas de una carga masiva"""
+
+    def __init__(self, tipo):
+        self.tipo = tipo
+        self.filas = 0
+        self.insertados = 0
+        self.actualizados = 0
+        self.errores = []
+        self.total_errores = 0
+        self.segundos = 0.0
+
+    def error(self, linea, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append({'linea': linea, 'error': mensaje})
+
+    @property
+    def filas_por_segundo(self):
+        return self.filas / self.segundos if self.segundos > 0 else 0.0
+
+    def resumen(self):
+        return (f'{self.tipo}: {self.filas} filas ({self.insertados} nuevos, '
+                f'{self.actualizados} actualizados, {self.total_errores} errores) '
+                f'en {self.segundos:.2f}s - {self.filas_por_segundo:,.0f} filas/s')
+
+
+def _texto(row, columna):
+    return (row.get(columna) or '').strip()
+
+
+def _en_lotes(conn, sql, valores, tamano_lote):
+    for inicio in range(0, len(valores), tamano_lote):
+        conn.executemany(sql, valores[inicio:inicio + tamano_lote])
+
+
+def _resolver_nombres(conn, tabla, nombres):
+    """Insertar los nombres que falten y regresar el mapa nombre -> id"""
+    existentes = {fila[1]: fila[0] for fila in conn.execute(f'SELECT id, nombre FROM {tabla}')}
+    nuevos = sorted(nombres - existentes.keys())
+    if nuevos:
+        conn.executemany(f'INSERT OR IGNORE INTO {tabla} (nombre) VALUES (?)', [(n,) for n in nuevos])
+        existentes = {fila[1]: fila[0] for fila in conn.execute(f'SELECT id, nombre FROM {tabla}')}
+    return existentes
+
+
+def _diferir_indices(conn, tablas):
+    """Eliminar los índices secundarios de las tablas y regresar su SQL para recrearlos"""
+    marcadores = ','.join('?' * len(tablas))
+    indices = conn.execute(f'''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({marcadores})
+    ''', tablas).fetchall()
+    for nombre, _ in indices:
+        conn.execute(f'DROP INDEX IF EXISTS "{nombre}"')
+    return [sql for _, sql in indices]
+
+
+def _recrear_indices(conn, sentencias):
+    for sql in sentencias:
+        conn.execute(sql)
+
+
+def _ejecutar_carga(conn, resultado, filas_estimadas, diferir_indices, cargar):
+    """Ejecutar una carga en una sola transacción, difiriendo índices si conviene"""
+    if diferir_indices is None:
+        diferir_indices = filas_estimadas >= UMBRAL_DIFERIR_INDICES
+
+    inicio = time.perf_counter()
+    conn.commit()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        indices = _diferir_indices(conn, TABLAS_CATALOGO) if diferir_indices else []
+        cargar()
+        _recrear_indices(conn, indices)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def leer_csv(archivo):
+    """Leer un CSV completo como lista de (numero_linea, diccionario)"""
+    return [(numero, row) for numero, row in enumerate(csv.DictReader(archivo), start=2)]
+
+
+def cargar_productos(conn, filas, tamano_lote=TAMANO_LOTE, diferir_indices=None):
+    """
+    Cargar productos desde filas con el formato de Productos.csv.
+
+    Los productos se identifican por la columna ID; si ya existen se
+    actualizan los campos del CSV sin tocar stock mínimo ni proveedor.
+    """
+    resultado = ResultadoCarga('Productos')
+    resultado.filas = len(filas)
+
+    def cargar():
+        # 1. Resolver valores de búsqueda en memoria
+        categorias = _resolver_nombres(conn, 'categorias', {
+            _texto(row, 'Categoria') for _, row in filas if _texto(row, 'Categoria')})
+        marcas = _resolver_nombres(conn, 'marcas', {
+            _texto(row, 'Marca') for _, row in filas if _texto(row, 'Marca')})
+        maquinas = _resolver_nombres(conn, 'maquinas', {
+            _texto(row, 'Maquina') for _, row in filas if _texto(row, 'Maquina')})
+
+        subcategorias = {
+            (fila[2], fila[1]): fila[0]
+            for fila in conn.execute('SELECT id, nombre, categoria_id FROM subcategorias')
+        }
+        faltantes = {
+            (categorias[_texto(row, 'Categoria')], _texto(row, 'SubCategoria'))
+            for _, row in filas
+            if _texto(row, 'SubCategoria') and _texto(row, 'Categoria')
+        } - subcategorias.keys()
+        if faltantes:
+            conn.executemany('INSERT INTO subcategorias (categoria_id, nombre) VALUES (?, ?)', sorted(faltantes))
+            subcategorias = {
+                (fila[2], fila[1]): fila[0]
+                for fila in conn.execute('SELECT id, nombre, categoria_id FROM subcategorias')
+            }
+
+        ids_existentes = {fila[0] for fila in conn.execute('SELECT id FROM productos')}
+        codigos = {fila[0]: fila[1] for fila in conn.execute('SELECT codigo, id FROM productos WHERE codigo IS NOT NULL')}
+
+        # 2. Preparar registros
+        productos = []
+        relaciones_maquina = []
+        for numero, row in filas:
+            id_texto = _texto(row, 'ID')
+            if not id_texto.isdigit():
+                resultado.error(numero, f'ID inválido: {id_texto or "(vacío)"}')
+                continue
+            producto_id = int(id_texto)
+
+            descripcion = _texto(row, 'Descripcion')
+            if not descripcion:
+                resultado.error(numero, 'Descripción vacía')
+                continue
+
+            codigo = _texto(row, 'Codigo') or None
+            if codigo and codigos.get(codigo, producto_id) != producto_id:
+                resultado.error(numero, f'Código {codigo} ya pertenece al producto {codigos[codigo]}')
+                continue
+            if codigo:
+                codigos[codigo] = producto_id
+
+            cantidad_texto = _texto(row, 'Cantidad Requerida por Maquina')
+            categoria_id = categorias.get(_texto(row, 'Categoria'))
+            subcategoria_id = subcategorias.get((categoria_id, _texto(row, 'SubCategoria')))
+            maquina_id = maquinas.get(_texto(row, 'Maquina'))
+
+            productos.append((
+                producto_id,
+                descripcion,
+                codigo,
+                categoria_id,
+                subcategoria_id,
+                marcas.get(_texto(row, 'Marca')),
+                _texto(row, 'Notas Adicionales') or None,
+                int(cantidad_texto) if cantidad_texto.isdigit() else 1,
+                maquina_id,
+            ))
+            if maquina_id:
+                relaciones_maquina.append((producto_id, maquina_id))
+
+            if producto_id in ids_existentes:
+                resultado.actualizados += 1
+            else:
+                resultado.insertados += 1
+                ids_existentes.add(producto_id)
+
+        # 3. Insertar en lotes
+        _en_lotes(conn, '''
+            INSERT INTO productos (id, descripcion, codigo, categoria_id, subcategoria_id, marca_id,
+                                   notas, cantidad_requerida, maquina_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                descripcion = excluded.descripcion,
+                codigo = excluded.codigo,
+                categoria_id = excluded.categoria_id,
+                subcategoria_id = excluded.subcategoria_id,
+                marca_id = excluded.marca_id,
+                notas = excluded.notas,
+                cantidad_requerida = excluded.cantidad_requerida,
+                maquina_id = excluded.maquina_id,
+                fecha_actualizacion = CURRENT_TIMESTAMP
+        ''', productos, tamano_lote)
+        _en_lotes(conn, '''
+            INSERT OR IGNORE INTO producto_maquinas (producto_id, maquina_id) VALUES (?, ?)
+        ''', relaciones_maquina, tamano_lote)
+
+    return _ejecutar_carga(conn, resultado, len(filas), diferir_indices, cargar)
+
+
+def _cantidad_inventario(texto):
+    """Interpretar la cantidad del CSV de inventario ('varios' cuenta como 1)"""
+    if texto.isdigit():
+        return int(texto)
+    if texto.lower() == 'varios':
+        return 1
+    return 0
+
+
+def cargar_inventario(conn, filas, tamano_lote=TAMANO_LOTE, diferir_indices=None):
+    """
+    Cargar inventario desde filas con el formato de Inventario.csv.
+
+    El producto se busca por ProductoID o, si está vacío, por descripción
+    exacta. Las ubicaciones que no existan se crean.
+    """
+    resultado = ResultadoCarga('Inventario')
+    resultado.filas = len(filas)
+
+    def cargar():
+        ids_productos = {fila[0] for fila in conn.execute('SELECT id FROM productos')}
+        por_descripcion = {}
+        for fila in conn.execute('SELECT id, descripcion FROM productos ORDER BY id'):
+            por_descripcion.setdefault(fila[1].strip().lower(), fila[0])
+
+        ubicaciones = {fila[1]: fila[0] for fila in conn.execute('SELECT id, codigo FROM ubicaciones')}
+        nuevas_ubicaciones = {}
+        for _, row in filas:
+            codigo = _texto(row, 'UbicacionPrincipal')
+            if codigo and codigo not in ubicaciones and codigo not in nuevas_ubicaciones:
+                nuevas_ubicaciones[codigo] = (
+                    codigo, codigo,
+                    _texto(row, 'Empresa') or 'PPG',
+                    _texto(row, 'Area') or 'Oficinas',
+                    _texto(row, 'Nivel') or 'Planta Alta',
+                    _texto(row, 'Seccion') or 'Anaquel Refacciones Maq Cepillo',
+                )
+        if nuevas_ubicaciones:
+            conn.executemany('''
+                INSERT OR IGNORE INTO ubicaciones (codigo, nombre, empresa, area, nivel, seccion)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', list(nuevas_ubicaciones.values()))
+            ubicaciones = {fila[1]: fila[0] for fila in conn.execute('SELECT id, codigo FROM ubicaciones')}
+
+        existentes = {(fila[0], fila[1]) for fila in conn.execute('SELECT producto_id, ubicacion_id FROM inventario')}
+
+        registros = []
+        for numero, row in filas:
+            id_texto = _texto(row, 'ProductoID')
+            if id_texto:
+                producto_id = int(id_texto) if id_texto.isdigit() and int(id_texto) in ids_productos else None
+            else:
+                producto_id = por_descripcion.get(_texto(row, 'Producto').lower())
+            if producto_id is None:
+                resultado.error(numero, f'Producto no encontrado: {id_texto or _texto(row, "Producto")}')
+                continue
+
+            codigo = _texto(row, 'UbicacionPrincipal')
+            if not codigo:
+                resultado.error(numero, 'Ubicación vacía')
+                continue
+            ubicacion_id = ubicaciones[codigo]
+
+            registros.append((producto_id, ubicacion_id, _cantidad_inventario(_texto(row, 'Cantidad'))))
+            if (producto_id, ubicacion_id) in existentes:
+                resultado.actualizados += 1
+            else:
+                resultado.insertados += 1
+                existentes.add((producto_id, ubicacion_id))
+
+        _en_lotes(conn, '''
+            INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)
+            ON CONFLICT (producto_id, ubicacion_id)
+            DO UPDATE SET cantidad = excluded.cantidad, fecha_actualizacion = CURRENT_TIMESTAMP
+        ''', registros, tamano_lote)
+
+    return _ejecutar_carga(conn, resultado, len(filas), diferir_indices, cargar)
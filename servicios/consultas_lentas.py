@@ -0,0 +1,273 @@
+"""
+Registro de consultas lentas.
+
+Al terminar cada petición se revisan sus sentencias (ver instrumentacion.py);
+las que pasan del umbral se guardan en una base SQLite aparte con su huella
+normalizada (literales, listas IN y VALUES colapsados), la forma de los
+parámetros (tipos, nunca valores), duración, filas y el resultado de
+EXPLAIN QUERY PLAN. El registro rota solo: se conservan los últimos
+max_registros.
+
+revisar() corre al final de la petición y solo filtra y encola; el plan y
+el INSERT los hace un hilo aparte (como el logging de registro.py), para
+no sumarle tiempo justo a las peticiones que ya fueron lentas. Con la
+cola llena las sentencias se descartan y se cuentan.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+UMBRAL_MS = 100
+MAX_REGISTROS = 10000
+COLA_MAXIMA = 1000        # Peticiones con sentencias lentas esperando al hilo
+PLAN_TTL_SEGUNDOS = 600  # Reusar el plan de una huella durante este tiempo
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])')
+_LISTAS_IN = re.compile(r'\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_VALUES = re.compile(r'\bvalues\s*(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*')
+_ESPACIOS = re.compile(r'\s+')
+
+
+def huella(sql):
+    """Normalizar una sentencia para agrupar las que solo cambian en valores"""
+    texto = _CADENAS.sub('?', sql)
+    texto = _NUMEROS.sub('?', texto)
+    texto = _ESPACIOS.sub(' ', texto).strip().lower()
+    texto = _LISTAS_IN.sub('in (...)', texto)
+    texto = _VALUES.sub(r'values \1', texto)
+    return texto
+
+
+def id_huella(texto):
+    return hashlib.md5(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def _tipo(valor):
+    return 'null' if valor is None else type(valor).__name__
+
+
+def forma_parametros(parametros):
+    """Describir los parámetros sin sus valores: '(int, str)', '{id: int}', '250 x (int, str)'"""
+    if parametros is None:
+        return ''
+    if isinstance(parametros, dict):
+        return '{' + ', '.join(f'{clave}: {_tipo(valor)}' for clave, valor in parametros.items()) + '}'
+    if isinstance(parametros, (list, tuple)) and parametros and isinstance(parametros[0], (list, tuple, dict)):
+        # executemany
+        return f'{len(parametros)} x {forma_parametros(parametros[0])}'
+    try:
+        return '(' + ', '.join(_tipo(valor) for valor in parametros) + ')'
+    except TypeError:
+        return _tipo(parametros)
+
+
+def _parametros_plan(parametros):
+    """Parámetros para EXPLAIN (de executemany basta el primero)"""
+    if isinstance(parametros, (list, tuple)) and parametros and isinstance(parametros[0], (list, tuple, dict)):
+        return parametros[0]
+    if isinstance(parametros, (list, tuple, dict)):
+        return parametros
+    return ()
+
+
+class RegistroConsultasLentas:
+    """Guarda consultas lentas en su propia base y agrega por huella"""
+
+    def __init__(self, ruta, conectar_explicacion, umbral_ms=UMBRAL_MS, max_registros=MAX_REGISTROS,
+                 cola_maxima=COLA_MAXIMA):
+        """
+        ruta: archivo SQLite del registro.
+        conectar_explicacion(): conexión (de solo lectura) donde correr EXPLAIN QUERY PLAN.
+        """
+        self.ruta = ruta
+        self.conectar_explicacion = conectar_explicacion
+        self.umbral_ms = umbral_ms
+        self.max_registros = max_registros
+        self._planes = {}  # id_huella -> (momento, plan)
+        self._candado = threading.Lock()
+        self._insertados = 0
+        self._cola = queue.Queue(cola_maxima)
+        self._hilo = None
+        self.descartadas = 0
+        self._crear_tabla()
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.ruta, timeout=5.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _crear_tabla(self):
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS consultas_lentas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    fecha TEXT DEFAULT CURRENT_TIMESTAMP,
+                    huella_id TEXT NOT NULL,
+                    huella TEXT NOT NULL,
+                    sql_ejemplo TEXT,
+                    parametros TEXT,
+                    duracion_ms REAL NOT NULL,
+                    filas INTEGER,
+                    plan TEXT,
+                    endpoint TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_consultas_lentas_huella ON consultas_lentas(huella_id);
+            ''')
+            conn.commit()
+        finally:
+            conn.close()
+
+    def explicar(self, sql, parametros):
+        """EXPLAIN QUERY PLAN en texto (una línea por paso, con sangría por nivel)"""
+        conn = self.conectar_explicacion()
+        try:
+            filas = conn.execute('EXPLAIN QUERY PLAN ' + sql, _parametros_plan(parametros)).fetchall()
+        except sqlite3.Error as e:
+            # Tablas temporales de otra conexión, scripts, etc.
+            return f'(sin plan: {e})'
+        finally:
+            conn.close()
+
+        niveles = {0: -1}
+        lineas = []
+        for id_paso, padre, _, detalle in filas:
+            niveles[id_paso] = niveles.get(padre, -1) + 1
+            lineas.append('  ' * niveles[id_paso] + detalle)
+        return '\n'.join(lineas)
+
+    def _plan(self, clave, sql, parametros):
+        ahora = time.monotonic()
+        with self._candado:
+            guardado = self._planes.get(clave)
+        if guardado and ahora - guardado[0] < PLAN_TTL_SEGUNDOS:
+            return guardado[1]
+        plan = self.explicar(sql, parametros)
+        with self._candado:
+            self._planes[clave] = (ahora, plan)
+        return plan
+
+    def revisar(self, sentencias, endpoint=None):
+        """Encolar las sentencias ([sql, segundos, parámetros, filas]) que pasan del umbral; regresa cuántas"""
+        lentas = [tuple(entrada) for entrada in sentencias if entrada[1] * 1000 >= self.umbral_ms]
+        if not lentas:
+            return 0
+
+        with self._candado:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._ciclo, name='consultas-lentas', daemon=True)
+                self._hilo.start()
+        try:
+            self._cola.put_nowait((lentas, endpoint))
+        except queue.Full:
+            self.descartadas += len(lentas)
+            return 0
+        return len(lentas)
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def vaciar(self, timeout=5.0):
+        """Esperar a que el hilo guarde lo encolado (pruebas y cierre)"""
+        limite = time.monotonic() + timeout
+        while self._cola.unfinished_tasks and time.monotonic() < limite:
+            time.sleep(0.01)
+        return not self._cola.unfinished_tasks
+
+    def _ciclo(self):
+        while True:
+            lentas, endpoint = self._cola.get()
+            try:
+                self._guardar(lentas, endpoint)
+            except Exception as e:
+                logging.error(f"Error guardando consultas lentas: {e}")
+            finally:
+                self._cola.task_done()
+
+    def _guardar(self, lentas, endpoint):
+        """Plan e INSERT de un lote de sentencias lentas (en el hilo del registro)"""
+        registros = []
+        for sql, segundos, parametros, filas in lentas:
+            texto = huella(sql)
+            clave = id_huella(texto)
+            registros.append((clave, texto, sql[:4000], forma_parametros(parametros),
+                              round(segundos * 1000, 3), filas, self._plan(clave, sql, parametros), endpoint))
+
+        try:
+            conn = self._conectar()
+            try:
+                conn.executemany('''
+                    INSERT INTO consultas_lentas (huella_id, huella, sql_ejemplo, parametros, duracion_ms, filas, plan, endpoint)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', registros)
+                self._insertados += len(registros)
+                if self._insertados >= 100:
+                    self._rotar(conn)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Error guardando consultas lentas: {e}")
+            return 0
+        return len(registros)
+
+    def _rotar(self, conn):
+        """Conservar solo los últimos max_registros"""
+        self._insertados = 0
+        conn.execute('''
+            DELETE FROM consultas_lentas
+            WHERE id <= (SELECT MAX(id) FROM consultas_lentas) - ?
+        ''', (self.max_registros,))
+
+    def top(self, limite=50, orden='total'):
+        """Huellas ordenadas por tiempo total (o 'maximo', 'veces', 'promedio')"""
+        columna = {'total': 'total_ms', 'maximo': 'maximo_ms', 'veces': 'veces', 'promedio': 'promedio_ms'}.get(orden, 'total_ms')
+        conn = self._conectar()
+        try:
+            filas = conn.execute(f'''
+                SELECT huella_id, huella,
+                       COUNT(*) AS veces,
+                       SUM(duracion_ms) AS total_ms,
+                       AVG(duracion_ms) AS promedio_ms,
+                       MAX(duracion_ms) AS maximo_ms,
+                       AVG(filas) AS filas_promedio,
+                       MAX(fecha) AS ultima,
+                       GROUP_CONCAT(DISTINCT endpoint) AS endpoints
+                FROM consultas_lentas
+                GROUP BY huella_id
+                ORDER BY {columna} DESC
+                LIMIT ?
+            ''', (limite,)).fetchall()
+            resultado = []
+            for fila in filas:
+                ultima = conn.execute('''
+                    SELECT sql_ejemplo, parametros, plan FROM consultas_lentas
+                    WHERE huella_id = ? ORDER BY id DESC LIMIT 1
+                ''', (fila['huella_id'],)).fetchone()
+                datos = dict(fila)
+                datos.update(dict(ultima))
+                resultado.append(datos)
+            return resultado
+        finally:
+            conn.close()
+
+    def limpiar(self):
+        conn = self._conectar()
+        try:
+            conn.execute('DELETE FROM consultas_lentas')
+            conn.commit()
+        finally:
+            conn.close()
+        with self._candado:
+            self._planes.clear()
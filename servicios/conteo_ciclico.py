@@ -0,0 +1,278 @@
+"""
+Importación de conteos cíclicos desde CSV.
+
+El archivo se lee en streaming (fila por fila), los códigos se resuelven con
+mapas en memoria y las cantidades se cargan por lotes en una tabla temporal.
+La diferencia contra `inventario` se calcula con SQL (por conjuntos) y se
+aplica por lotes en una sola transacción, registrando cada cambio en
+operation_logs: o queda aplicado todo el conteo o nada. La huella de la
+diferencia permite comprobar, al aplicar, que es la misma que se revisó en
+la vista previa.
+"""
+
+import csv
+import hashlib
+import time
+
+from servicios import bitacora
+
+TAMANO_LOTE = 5000
+MAX_ERRORES_REPORTADOS = 100
+
+
+def _detectar_delimitador(primera_linea):
+    """Detectar si el CSV usa ',' o ';' (Excel en español usa ';')"""
+    return ';' if primera_linea.count(';') > primera_linea.count(',') else ','
+
+
+def _normalizar_fila(numero, fila):
+    """Convertir una fila CSV en (numero_linea, producto, ubicacion, cantidad_texto)"""
+    campos = [campo.strip() for campo in fila] + ['', '', '']
+    return numero, campos[0], campos[1], campos[2]
+
+
+def _es_encabezado(fila):
+    """Una primera fila cuya cantidad no es numérica se considera encabezado"""
+    return len(fila) >= 3 and not fila[2].strip().lstrip('-').isdigit()
+
+
+def leer_conteo(archivo):
+    """
+    Leer un CSV de conteo fila por fila.
+
+    Genera tuplas (numero_linea, producto, ubicacion, cantidad_texto). Una
+    primera fila con encabezados se omite automáticamente.
+    """
+    primera_linea = archivo.readline()
+    if not primera_linea:
+        return
+
+    delimitador = _detectar_delimitador(primera_linea)
+    primera = next(csv.reader([primera_linea], delimiter=delimitador), [])
+    if primera and any(primera) and not _es_encabezado(primera):
+        yield _normalizar_fila(1, primera)
+
+    for numero, fila in enumerate(csv.reader(archivo, delimiter=delimitador), start=2):
+        if not any(campo.strip() for campo in fila):
+            continue
+        yield _normalizar_fila(numero, fila)
+
+
+def cargar_mapas(conn):
+    """Cargar en memoria los mapas código -> id de productos y ubicaciones"""
+    productos_por_codigo = {}
+    productos_ids = set()
+    for fila in conn.execute('SELECT id, codigo FROM productos'):
+        productos_ids.add(fila[0])
+        if fila[1]:
+            productos_por_codigo[fila[1].strip().upper()] = fila[0]
+
+    ubicaciones_por_codigo = {
+        fila[1].strip().upper(): fila[0]
+        for fila in conn.execute('SELECT id, codigo FROM ubicaciones')
+    }
+    return productos_por_codigo, productos_ids, ubicaciones_por_codigo
+
+
+def _crear_tablas_temporales(conn):
+    conn.execute('DROP TABLE IF EXISTS temp.conteo')
+    conn.execute('DROP TABLE IF EXISTS temp.conteo_diff')
+    conn.execute('''
+        CREATE TEMP TABLE conteo (
+            producto_id INTEGER NOT NULL,
+            ubicacion_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            PRIMARY KEY (producto_id, ubicacion_id)
+        )
+    ''')
+
+
+def cargar_conteo(conn, archivo):
+    """
+    Cargar el CSV en la tabla temporal `conteo`.
+
+    Las filas repetidas (mismo producto y ubicación) se suman. Retorna
+    (lineas_leidas, errores, total_errores).
+    """
+    productos_por_codigo, productos_ids, ubicaciones_por_codigo = cargar_mapas(conn)
+    _crear_tablas_temporales(conn)
+
+    insertar = '''
+        INSERT INTO conteo (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)
+        ON CONFLICT (producto_id, ubicacion_id) DO UPDATE SET cantidad = cantidad + excluded.cantidad
+    '''
+
+    lote = []
+    errores = []
+    total_errores = 0
+    lineas = 0
+
+    def registrar_error(numero, mensaje):
+        nonlocal total_errores
+        total_errores += 1
+        if len(errores) < MAX_ERRORES_REPORTADOS:
+            errores.append({'linea': numero, 'error': mensaje})
+
+    for numero, producto, ubicacion, cantidad_texto in leer_conteo(archivo):
+        lineas += 1
+
+        producto_id = productos_por_codigo.get(producto.upper())
+        if producto_id is None and producto.isdigit() and int(producto) in productos_ids:
+            producto_id = int(producto)
+        if producto_id is None:
+            registrar_error(numero, f'Producto no encontrado: {producto}')
+            continue
+
+        ubicacion_id = ubicaciones_por_codigo.get(ubicacion.upper())
+        if ubicacion_id is None:
+            registrar_error(numero, f'Ubicación no encontrada: {ubicacion}')
+            continue
+
+        try:
+            cantidad = int(cantidad_texto)
+        except ValueError:
+            registrar_error(numero, f'Cantidad inválida: {cantidad_texto}')
+            continue
+        if cantidad < 0:
+            registrar_error(numero, f'Cantidad negativa: {cantidad}')
+            continue
+
+        lote.append((producto_id, ubicacion_id, cantidad))
+        if len(lote) >= TAMANO_LOTE:
+            conn.executemany(insertar, lote)
+            lote = []
+
+    if lote:
+        conn.executemany(insertar, lote)
+    conn.commit()
+
+    return lineas, errores, total_errores
+
+
+def calcular_diferencias(conn, poner_en_cero_faltantes=True):
+    """
+    Calcular las diferencias entre `conteo` e `inventario` en la tabla `conteo_diff`.
+
+    Si poner_en_cero_faltantes es verdadero, los productos que existen en una
+    ubicación contada pero no aparecen en el conteo se llevan a cero.
+    """
+    conn.execute('DROP TABLE IF EXISTS temp.conteo_diff')
+    conn.execute('''
+        CREATE TEMP TABLE conteo_diff (
+            producto_id INTEGER NOT NULL,
+            ubicacion_id INTEGER NOT NULL,
+            cantidad_anterior INTEGER NOT NULL,
+            cantidad_nueva INTEGER NOT NULL,
+            existe INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        INSERT INTO conteo_diff (producto_id, ubicacion_id, cantidad_anterior, cantidad_nueva, existe)
+        SELECT c.producto_id, c.ubicacion_id, COALESCE(i.cantidad, 0), c.cantidad, i.id IS NOT NULL
+        FROM conteo c
+        LEFT JOIN inventario i ON i.producto_id = c.producto_id AND i.ubicacion_id = c.ubicacion_id
+        WHERE COALESCE(i.cantidad, 0) <> c.cantidad
+    ''')
+    if poner_en_cero_faltantes:
+        conn.execute('''
+            INSERT INTO conteo_diff (producto_id, ubicacion_id, cantidad_anterior, cantidad_nueva, existe)
+            SELECT i.producto_id, i.ubicacion_id, i.cantidad, 0, 1
+            FROM inventario i
+            WHERE i.ubicacion_id IN (SELECT DISTINCT ubicacion_id FROM conteo)
+              AND i.cantidad <> 0
+              AND NOT EXISTS (
+                  SELECT 1 FROM conteo c
+                  WHERE c.producto_id = i.producto_id AND c.ubicacion_id = i.ubicacion_id
+              )
+        ''')
+
+
+def huella_diferencias(conn):
+    """Hash de `conteo_diff` (cantidades anteriores incluidas): cambia si el stock contado cambió"""
+    huella = hashlib.sha1()
+    for fila in conn.execute('''
+        SELECT producto_id, ubicacion_id, cantidad_anterior, cantidad_nueva
+        FROM conteo_diff ORDER BY producto_id, ubicacion_id
+    '''):
+        huella.update(repr(tuple(fila)).encode())
+    return huella.hexdigest()
+
+
+def resumen_diferencias(conn, limite=200):
+    """Obtener el resumen y las primeras filas de la diferencia para la vista previa"""
+    resumen = conn.execute('''
+        SELECT
+            (SELECT COUNT(*) FROM conteo) as registros_contados,
+            COUNT(*) as cambios,
+            COALESCE(SUM(existe = 0), 0) as nuevos,
+            COALESCE(SUM(cantidad_nueva = 0), 0) as en_cero,
+            COALESCE(SUM(cantidad_nueva > cantidad_anterior), 0) as aumentos,
+            COALESCE(SUM(cantidad_nueva < cantidad_anterior), 0) as disminuciones,
+            COALESCE(SUM(cantidad_nueva - cantidad_anterior), 0) as diferencia_neta
+        FROM conteo_diff
+    ''').fetchone()
+
+    filas = conn.execute('''
+        SELECT d.producto_id, p.descripcion, p.codigo, u.codigo as ubicacion_codigo,
+               d.cantidad_anterior, d.cantidad_nueva,
+               d.cantidad_nueva - d.cantidad_anterior as diferencia
+        FROM conteo_diff d
+        JOIN productos p ON p.id = d.producto_id
+        JOIN ubicaciones u ON u.id = d.ubicacion_id
+        ORDER BY ABS(d.cantidad_nueva - d.cantidad_anterior) DESC, p.descripcion
+        LIMIT ?
+    ''', (limite,)).fetchall()
+
+    return dict(resumen), [dict(fila) for fila in filas]
+
+
+def aplicar_diferencias(conn, admin_user_id, ip_address, tamano_lote=1000):
+    """
+    Aplicar `conteo_diff` sobre `inventario` por lotes.
+
+    No confirma: todos los lotes quedan en la transacción de quien llama,
+    que hace commit o rollback del conteo completo. Cada cambio genera un
+    registro CYCLE_COUNT en operation_logs. Retorna (cambios_aplicados, segundos).
+    """
+    inicio = time.perf_counter()
+    aplicados = 0
+    ultimo_rowid = 0
+
+    while True:
+        lote = conn.execute('''
+            SELECT d.rowid, d.producto_id, d.ubicacion_id, d.cantidad_anterior, d.cantidad_nueva
+            FROM conteo_diff d
+            WHERE d.rowid > ?
+            ORDER BY d.rowid
+            LIMIT ?
+        ''', (ultimo_rowid, tamano_lote)).fetchall()
+        if not lote:
+            break
+        ultimo_rowid = lote[-1][0]
+
+        eliminar = []
+        actualizar = []
+        logs = []
+        for _, producto_id, ubicacion_id, anterior, nueva in lote:
+            if nueva == 0:
+                eliminar.append((producto_id, ubicacion_id))
+            else:
+                actualizar.append((producto_id, ubicacion_id, nueva))
+            logs.append(('CYCLE_COUNT', producto_id, ubicacion_id, anterior, nueva, None))
+
+        conn.executemany('DELETE FROM inventario WHERE producto_id = ? AND ubicacion_id = ?', eliminar)
+        conn.executemany('''
+            INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)
+            ON CONFLICT (producto_id, ubicacion_id)
+            DO UPDATE SET cantidad = excluded.cantidad, fecha_actualizacion = CURRENT_TIMESTAMP
+        ''', actualizar)
+        bitacora.registrar_varios(conn, admin_user_id, ip_address, logs)
+
+        aplicados += len(lote)
+
+    return aplicados, time.perf_counter() - inicio
+
+
+def productos_afectados(conn):
+    """Obtener los ids de productos con cambios en `conteo_diff`"""
+    return [fila[0] for fila in conn.execute('SELECT DISTINCT producto_id FROM conteo_diff')]
@@ -0,0 +1,236 @@
+"""
+Comparación de dos bases de datos SQLite por hashes de rangos de llave.
+
+Cada tabla se lee una sola vez por base, en bloques de rowid consecutivos
+(2^BITS_BLOQUE llaves por bloque) repartidos entre varios procesos, y de
+cada bloque se calcula un hash. Con las hojas se arma un árbol tipo Merkle;
+comparando los árboles de arriba hacia abajo se encuentran los bloques
+distintos y solo esos rangos se vuelven a leer para obtener las filas
+exactas que cambiaron.
+
+Se usa desde migrations/comparar_bases_datos.py.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+
+BITS_BLOQUE = 10   # 1024 llaves por hoja
+BITS_RAMA = 4      # 16 hijos por nodo
+MAX_FILAS_REPORTADAS = 1000
+
+
+def _hash(texto):
+    return hashlib.blake2b(texto.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+def _conectar_lectura(ruta):
+    """Abrir la base en modo solo lectura"""
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(ruta)
+    uri = 'file:' + urllib.parse.quote(os.path.abspath(ruta)) + '?mode=ro'
+    return sqlite3.connect(uri, uri=True, timeout=20.0)
+
+
+def _esquema(conn):
+    """Mapa tabla -> lista de columnas (solo tablas con rowid)"""
+    tablas = {}
+    for nombre, sql in conn.execute('''
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        ORDER BY name
+    '''):
+        if 'WITHOUT ROWID' in (sql or '').upper():
+            continue
+        tablas[nombre] = [fila[1] for fila in conn.execute(f'PRAGMA table_info("{nombre}")')]
+    return tablas
+
+
+def _lista_columnas(columnas):
+    return ', '.join(['rowid'] + [f'"{c}"' for c in columnas])
+
+
+def _hojas_rango(ruta, tabla, columnas, primer_bloque, ultimo_bloque):
+    """Leer un rango de bloques de una tabla y regresar {bloque: (filas, hash)}"""
+    conn = _conectar_lectura(ruta)
+    try:
+        sql_filas = f'SELECT {_lista_columnas(columnas)} FROM "{tabla}" WHERE rowid BETWEEN ? AND ?'
+        sql_siguiente = f'SELECT MIN(rowid) FROM "{tabla}" WHERE rowid > ?'
+        hojas = {}
+        bloque = primer_bloque
+        while bloque <= ultimo_bloque:
+            hasta = ((bloque + 1) << BITS_BLOQUE) - 1
+            filas = conn.execute(sql_filas, (bloque << BITS_BLOQUE, hasta)).fetchall()
+            if filas:
+                hojas[bloque] = (len(filas), _hash(repr(filas)))
+            # Saltar los rangos vacíos
+            siguiente = conn.execute(sql_siguiente, (hasta,)).fetchone()[0]
+            if siguiente is None:
+                break
+            bloque = siguiente >> BITS_BLOQUE
+        return hojas
+    finally:
+        conn.close()
+
+
+def _nivel_superior(nivel):
+    padres = {}
+    for clave in sorted(nivel):
+        padres.setdefault(clave >> BITS_RAMA, []).append(f'{clave}:{nivel[clave]}')
+    return {clave: _hash(';'.join(hijos)) for clave, hijos in padres.items()}
+
+
+def _arbol(hojas):
+    """Construir los niveles del árbol: [hojas, ..., raíz]"""
+    niveles = [{bloque: valor[1] for bloque, valor in hojas.items()}]
+    while len(niveles[-1]) > 1:
+        superior = _nivel_superior(niveles[-1])
+        if len(superior) == len(niveles[-1]):
+            break  # Solo pasa con rowid negativos: la raíz se calcula sobre este nivel
+        niveles.append(superior)
+    return niveles
+
+
+def raiz(niveles):
+    """Hash de toda la tabla"""
+    superior = niveles[-1]
+    if len(superior) <= 1:
+        return next(iter(superior.values()), None)
+    return _hash(';'.join(f'{k}:{v}' for k, v in sorted(superior.items())))
+
+
+def _bloques_distintos(arbol_a, arbol_b):
+    """Bajar por los dos árboles solo por los nodos que difieren"""
+    # Igualar alturas para comparar nivel por nivel desde arriba
+    profundidad = max(len(arbol_a), len(arbol_b))
+    arbol_a, arbol_b = list(arbol_a), list(arbol_b)
+    for arbol in (arbol_a, arbol_b):
+        while len(arbol) < profundidad:
+            arbol.append(_nivel_superior(arbol[-1]))
+
+    nivel = profundidad - 1
+    candidatos = set(arbol_a[nivel]) | set(arbol_b[nivel])
+    while True:
+        distintos = {c for c in candidatos if arbol_a[nivel].get(c) != arbol_b[nivel].get(c)}
+        if nivel == 0:
+            return sorted(distintos)
+        nivel -= 1
+        candidatos = {
+            c for c in set(arbol_a[nivel]) | set(arbol_b[nivel])
+            if c >> BITS_RAMA in distintos
+        }
+
+
+def _filas_bloque(conn, tabla, columnas, bloque):
+    filas = conn.execute(f'''
+        SELECT {_lista_columnas(columnas)} FROM "{tabla}" WHERE rowid BETWEEN ? AND ?
+    ''', (bloque << BITS_BLOQUE, ((bloque + 1) << BITS_BLOQUE) - 1))
+    return {fila[0]: fila for fila in filas}
+
+
+def _segmentos(conn, tabla, partes):
+    """Dividir el rango de bloques de una tabla en segmentos para leer en paralelo"""
+    minimo, maximo = conn.execute(f'SELECT MIN(rowid), MAX(rowid) FROM "{tabla}"').fetchone()
+    if minimo is None:
+        return []
+    primero, ultimo = minimo >> BITS_BLOQUE, maximo >> BITS_BLOQUE
+    paso = max(1, (ultimo - primero + 1) // partes + 1)
+    return [(inicio, min(inicio + paso - 1, ultimo)) for inicio in range(primero, ultimo + 1, paso)]
+
+
+def _leer_hojas(rutas, columnas, procesos):
+    """Leer cada tabla de cada base una sola vez, repartiendo rangos entre procesos"""
+    tareas = []
+    for lado, ruta in rutas.items():
+        conn = _conectar_lectura(ruta)
+        try:
+            for tabla in columnas:
+                for primero, ultimo in _segmentos(conn, tabla, procesos):
+                    tareas.append((lado, tabla, (ruta, tabla, columnas[tabla], primero, ultimo)))
+        finally:
+            conn.close()
+
+    hojas = {lado: {tabla: {} for tabla in columnas} for lado in rutas}
+    if procesos > 1 and len(tareas) > 1:
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            futuros = [(lado, tabla, ejecutor.submit(_hojas_rango, *args)) for lado, tabla, args in tareas]
+            for lado, tabla, futuro in futuros:
+                hojas[lado][tabla].update(futuro.result())
+    else:
+        for lado, tabla, args in tareas:
+            hojas[lado][tabla].update(_hojas_rango(*args))
+    return hojas
+
+
+def comparar(ruta_a, ruta_b, max_filas=MAX_FILAS_REPORTADAS, procesos=None):
+    """
+    Comparar dos bases y regresar un reporte serializable a JSON.
+
+    Para cada tabla común se reportan las llaves (rowid) que solo existen
+    en una de las bases y las que tienen contenido distinto.
+    """
+    inicio = time.perf_counter()
+    conn_a = _conectar_lectura(ruta_a)
+    conn_b = _conectar_lectura(ruta_b)
+    try:
+        esquema_a = _esquema(conn_a)
+        esquema_b = _esquema(conn_b)
+        comunes = sorted(esquema_a.keys() & esquema_b.keys())
+        columnas = {t: [c for c in esquema_a[t] if c in esquema_b[t]] for t in comunes}
+
+        # Una sola lectura completa de cada base
+        hojas = _leer_hojas({'a': ruta_a, 'b': ruta_b}, columnas, procesos or os.cpu_count() or 1)
+        hojas_a, hojas_b = hojas['a'], hojas['b']
+
+        reporte_tablas = {}
+        for tabla in comunes:
+            arbol_a, arbol_b = _arbol(hojas_a[tabla]), _arbol(hojas_b[tabla])
+            resultado = {
+                'filas_a': sum(v[0] for v in hojas_a[tabla].values()),
+                'filas_b': sum(v[0] for v in hojas_b[tabla].values()),
+                'hash_a': raiz(arbol_a),
+                'hash_b': raiz(arbol_b),
+                'columnas_solo_a': [c for c in esquema_a[tabla] if c not in esquema_b[tabla]],
+                'columnas_solo_b': [c for c in esquema_b[tabla] if c not in esquema_a[tabla]],
+                'bloques_distintos': 0,
+                'solo_en_a': [], 'solo_en_b': [], 'distintas': [],
+                'total_solo_en_a': 0, 'total_solo_en_b': 0, 'total_distintas': 0,
+            }
+
+            if resultado['hash_a'] != resultado['hash_b']:
+                bloques = _bloques_distintos(arbol_a, arbol_b)
+                resultado['bloques_distintos'] = len(bloques)
+                for bloque in bloques:
+                    filas_a = _filas_bloque(conn_a, tabla, columnas[tabla], bloque) if bloque in hojas_a[tabla] else {}
+                    filas_b = _filas_bloque(conn_b, tabla, columnas[tabla], bloque) if bloque in hojas_b[tabla] else {}
+                    for clave, lista in (
+                        ('solo_en_a', sorted(filas_a.keys() - filas_b.keys())),
+                        ('solo_en_b', sorted(filas_b.keys() - filas_a.keys())),
+                        ('distintas', sorted(k for k in filas_a.keys() & filas_b.keys() if filas_a[k] != filas_b[k])),
+                    ):
+                        resultado['total_' + clave] += len(lista)
+                        espacio = max_filas - len(resultado[clave])
+                        resultado[clave].extend(lista[:espacio])
+
+            resultado['iguales'] = (resultado['hash_a'] == resultado['hash_b']
+                                    and not resultado['columnas_solo_a']
+                                    and not resultado['columnas_solo_b'])
+            reporte_tablas[tabla] = resultado
+    finally:
+        conn_a.close()
+        conn_b.close()
+
+    tablas_solo_a = sorted(esquema_a.keys() - esquema_b.keys())
+    tablas_solo_b = sorted(esquema_b.keys() - esquema_a.keys())
+    return {
+        'base_a': {'ruta': ruta_a, 'tamano': os.path.getsize(ruta_a)},
+        'base_b': {'ruta': ruta_b, 'tamano': os.path.getsize(ruta_b)},
+        'tablas_solo_a': tablas_solo_a,
+        'tablas_solo_b': tablas_solo_b,
+        'tablas': reporte_tablas,
+        'iguales': not tablas_solo_a and not tablas_solo_b and all(t['iguales'] for t in reporte_tablas.values()),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,386 @@
+"""
+Conexiones de lectura y escritor único de la base de datos.
+
+Las lecturas usan conexiones de solo lectura (mode=ro y PRAGMA
+query_only); en modo WAL nunca esperan al candado de escritura. Todas las
+modificaciones se envían a un solo hilo escritor con su propia conexión:
+las peticiones pendientes se agrupan en una transacción (group commit),
+cada una dentro de su SAVEPOINT para que un error solo deshaga la suya.
+
+Cada tarea tiene un presupuesto de espera según su etiqueta (la ruta que
+la envió). El candado de escritura se pide con reintentos y espera
+aleatoria creciente; si el presupuesto se agota la tarea se rechaza con
+EscrituraOcupada en lugar de quedarse bloqueada. Por etiqueta se guardan
+histogramas de espera en cola, espera del candado, tiempo que se retuvo
+y sentencias ejecutadas.
+"""
+
+import contextvars
+import logging
+import math
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+import urllib.parse
+from concurrent.futures import Future, TimeoutError as FuturoSinResultado
+
+from servicios.instrumentacion import ConexionMedida
+from servicios.metricas import Histogramas, LIMITES_CONTEO
+
+MAX_TAREAS_POR_LOTE = 64
+PRESUPUESTO_ESPERA_SEGUNDOS = 5.0
+ESPERA_BASE_SEGUNDOS = 0.005    # Primer reintento del candado
+ESPERA_MAXIMA_SEGUNDOS = 0.25   # Tope de cada espera entre reintentos
+REINTENTAR_EN_SEGUNDOS = 2
+ETIQUETA_DEFAULT = 'sin_etiqueta'
+
+
+def conexion_lectura(database, temporales=False):
+    """
+    Abrir una conexión de solo lectura.
+
+    Con temporales=True no se activa query_only, para poder crear tablas
+    TEMP (la base principal sigue abierta en modo ro).
+    """
+    uri = 'file:' + urllib.parse.quote(os.path.abspath(database)) + '?mode=ro'
+    conn = sqlite3.connect(uri, uri=True, timeout=20.0, factory=ConexionMedida)
+    conn.row_factory = sqlite3.Row
+    conn.medir = False  # La configuración no cuenta como SQL de la petición
+    if not temporales:
+        conn.execute('PRAGMA query_only=ON')
+    conn.execute('PRAGMA cache_size=10000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.medir = True
+    return conn
+
+
+def _terminada_tarde(tarea, futuro):
+    """Dejar en el log cómo terminó una tarea a cuyo autor ya se le respondió ocupada"""
+    if futuro.cancelled() or futuro.exception() is None:
+        logging.warning(f"Escritura {tarea.etiqueta} terminó después de responder ocupada "
+                        f"({time.monotonic() - tarea.enviada:.1f}s)")
+    else:
+        logging.error(f"Escritura {tarea.etiqueta} falló después de responder ocupada: {futuro.exception()}")
+
+
+def _es_bloqueo(error):
+    texto = str(error).lower()
+    return 'locked' in texto or 'busy' in texto
+
+
+class EscrituraOcupada(Exception):
+    """La escritura no obtuvo el candado dentro de su presupuesto de espera"""
+
+    def __init__(self, etiqueta, espera, reintentar_en, en_curso=False):
+        if en_curso:
+            mensaje = (f'Base de datos ocupada: {etiqueta} lleva {espera:.1f}s escribiendo; '
+                       'sigue en curso y puede quedar aplicada')
+        else:
+            mensaje = f'Base de datos ocupada: {etiqueta} esperó {espera:.1f}s sin obtener el candado de escritura'
+        super().__init__(mensaje)
+        self.etiqueta = etiqueta
+        self.espera = espera
+        self.reintentar_en = reintentar_en
+        self.en_curso = en_curso
+
+
+class _Tarea:
+    def __init__(self, funcion, args, kwargs, exclusiva, etiqueta, presupuesto):
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.exclusiva = exclusiva
+        self.etiqueta = etiqueta
+        self.enviada = time.monotonic()
+        self.limite = self.enviada + presupuesto
+        self.futuro = Future()
+        # Para que las mediciones de la petición incluyan las sentencias de la tarea
+        self.contexto = contextvars.copy_context()
+
+    def correr(self, conn):
+        return self.contexto.run(self.funcion, conn, *self.args, **self.kwargs)
+
+
+class EscritorSerializado:
+    """Hilo único que ejecuta todas las escrituras sobre una conexión propia"""
+
+    def __init__(self, database, max_tareas_por_lote=MAX_TAREAS_POR_LOTE,
+                 presupuesto_espera=PRESUPUESTO_ESPERA_SEGUNDOS, presupuestos=None,
+                 obtener_etiqueta=None, al_rechazar=None, reintentar_en=REINTENTAR_EN_SEGUNDOS,
+                 al_confirmar=None):
+        """
+        presupuestos: {etiqueta: segundos} para rutas que pueden esperar más
+        (o menos) que presupuesto_espera. obtener_etiqueta() se llama en el
+        hilo de quien envía la tarea; al_rechazar(error) también, justo
+        antes de propagar EscrituraOcupada. al_confirmar() se llama en el
+        hilo escritor después de cada commit; debe ser rápida.
+        """
+        self.database = database
+        self.max_tareas_por_lote = max_tareas_por_lote
+        self.presupuesto_espera = presupuesto_espera
+        self.presupuestos = presupuestos or {}
+        self.obtener_etiqueta = obtener_etiqueta
+        self.al_rechazar = al_rechazar
+        self.reintentar_en = reintentar_en
+        self.al_confirmar = al_confirmar
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._candado = threading.Lock()
+        self._sentencias = 0
+        self.lotes = 0
+        self.tareas = 0
+        self.rechazadas = {}
+        self.histogramas = Histogramas({'sentencias': LIMITES_CONTEO})
+
+    def _contar_sentencia(self, sql):
+        self._sentencias += 1
+
+    def _conectar(self):
+        conn = sqlite3.connect(self.database, timeout=0, isolation_level=None, factory=ConexionMedida)
+        conn.row_factory = sqlite3.Row
+        conn.medir = False
+        # Sin espera interna de SQLite: los reintentos los controla el escritor
+        conn.execute('PRAGMA busy_timeout=0')
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA cache_size=10000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.medir = True
+        conn.set_trace_callback(self._contar_sentencia)
+        return conn
+
+    def _iniciar(self):
+        with self._candado:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._ciclo, name='escritor-sqlite', daemon=True)
+                self._hilo.start()
+
+    def ejecutar(self, funcion, *args, exclusiva=False, **kwargs):
+        """
+        Ejecutar funcion(conn, *args, **kwargs) en el hilo escritor y regresar su resultado.
+
+        La función no debe hacer commit: el escritor confirma el lote
+        completo. Las tareas exclusivas (cargas masivas, restauraciones)
+        corren fuera de lote y manejan sus propias transacciones.
+        Las excepciones de la función se propagan a quien llama; si no se
+        obtiene el candado a tiempo se lanza EscrituraOcupada. Una tarea
+        que ya empezó se espera a lo más otro presupuesto: después sigue en
+        el escritor y a quien llama se le lanza EscrituraOcupada(en_curso=True).
+        """
+        if threading.current_thread() is self._hilo:
+            raise RuntimeError('ejecutar() no puede llamarse desde una tarea del escritor')
+        etiqueta = (self.obtener_etiqueta() if self.obtener_etiqueta else None) or ETIQUETA_DEFAULT
+        presupuesto = self.presupuestos.get(etiqueta, self.presupuesto_espera)
+        tarea = _Tarea(funcion, args, kwargs, exclusiva, etiqueta, presupuesto)
+        self._iniciar()
+        self._cola.put(tarea)
+
+        try:
+            try:
+                return tarea.futuro.result(timeout=presupuesto)
+            except FuturoSinResultado:
+                # Sigue en la cola detrás de otras escrituras: retirarla
+                if tarea.futuro.cancel():
+                    raise self._rechazo(tarea)
+            # Ya empezó: el escritor respeta el límite al pedir el candado, pero una
+            # tarea que ya lo tiene puede tardar; se espera a lo más otro presupuesto
+            try:
+                return tarea.futuro.result(timeout=presupuesto)
+            except FuturoSinResultado:
+                tarea.futuro.add_done_callback(lambda futuro: _terminada_tarde(tarea, futuro))
+                raise self._rechazo(tarea, en_curso=True)
+        except EscrituraOcupada as error:
+            if self.al_rechazar:
+                self.al_rechazar(error)
+            raise
+
+    def _rechazo(self, tarea, en_curso=False):
+        with self._candado:
+            self.rechazadas[tarea.etiqueta] = self.rechazadas.get(tarea.etiqueta, 0) + 1
+        logging.warning(f"Escritura rechazada por contención: {tarea.etiqueta} "
+                        f"({time.monotonic() - tarea.enviada:.1f}s de espera{', sigue en curso' if en_curso else ''})")
+        return EscrituraOcupada(tarea.etiqueta, time.monotonic() - tarea.enviada, self.reintentar_en, en_curso)
+
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def estadisticas(self):
+        """Histogramas por etiqueta y contadores generales"""
+        with self._candado:
+            rechazadas = dict(self.rechazadas)
+        return {
+            'lotes': self.lotes,
+            'tareas': self.tareas,
+            'pendientes': self.pendientes(),
+            'rechazadas': rechazadas,
+            'rutas': self.histogramas.resumen(),
+        }
+
+    def _ciclo(self):
+        conn = None
+        pendiente = None
+        while True:
+            tarea = pendiente or self._cola.get()
+            pendiente = None
+            if not tarea.futuro.set_running_or_notify_cancel():
+                continue  # Quien la envió ya se rindió
+
+            # Juntar las tareas que ya estén esperando en un solo commit
+            lote = [tarea]
+            while not tarea.exclusiva and len(lote) < self.max_tareas_por_lote:
+                try:
+                    siguiente = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if siguiente.exclusiva:
+                    pendiente = siguiente
+                    break
+                if siguiente.futuro.set_running_or_notify_cancel():
+                    lote.append(siguiente)
+
+            try:
+                if conn is None:
+                    conn = self._conectar()
+                if tarea.exclusiva:
+                    self._ejecutar_exclusiva(conn, tarea)
+                else:
+                    self._ejecutar_lote(conn, lote)
+            except Exception as e:
+                # Error de la propia conexión (también un ROLLBACK o PRAGMA que falla):
+                # responder a las tareas sin respuesta y reconectar con la siguiente
+                logging.error(f"Error en el escritor de base de datos: {e}")
+                for tarea_lote in lote:
+                    if not tarea_lote.futuro.done():
+                        tarea_lote.futuro.set_exception(e)
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+                conn = None
+
+    def _rechazar_vencidas(self, lote, ahora):
+        """Responder EscrituraOcupada a las tareas cuyo límite ya pasó"""
+        vigentes = []
+        for tarea in lote:
+            if tarea.limite > ahora:
+                vigentes.append(tarea)
+            else:
+                tarea.futuro.set_exception(self._rechazo(tarea))
+        return vigentes
+
+    def _adquirir(self, conn, lote):
+        """
+        BEGIN IMMEDIATE con reintentos y espera aleatoria (full jitter).
+
+        Regresa las tareas que siguen vigentes; las que agotan su
+        presupuesto mientras se espera se rechazan.
+        """
+        intento = 0
+        while True:
+            lote = self._rechazar_vencidas(lote, time.monotonic())
+            if not lote:
+                return lote
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                return lote
+            except sqlite3.OperationalError as e:
+                if not _es_bloqueo(e):
+                    raise
+            espera = random.uniform(0, min(ESPERA_MAXIMA_SEGUNDOS, ESPERA_BASE_SEGUNDOS * 2 ** intento))
+            restante = min(tarea.limite for tarea in lote) - time.monotonic()
+            time.sleep(max(0, min(espera, restante)))
+            intento += 1
+
+    def _observar(self, tarea, espera_cola, espera_candado, retencion, sentencias):
+        self.histogramas.observar('espera_cola_ms', tarea.etiqueta, espera_cola * 1000)
+        if espera_candado is not None:
+            self.histogramas.observar('espera_candado_ms', tarea.etiqueta, espera_candado * 1000)
+        self.histogramas.observar('retencion_ms', tarea.etiqueta, retencion * 1000)
+        self.histogramas.observar('sentencias', tarea.etiqueta, sentencias)
+
+    def _confirmado(self):
+        if self.al_confirmar:
+            try:
+                self.al_confirmar()
+            except Exception as e:
+                logging.error(f"Error en al_confirmar del escritor: {e}")
+
+    def _ejecutar_exclusiva(self, conn, tarea):
+        inicio = time.monotonic()
+        if tarea.limite <= inicio:
+            tarea.futuro.set_exception(self._rechazo(tarea))
+            return
+
+        # Las tareas exclusivas piden el candado por su cuenta: SQLite espera
+        # hasta el límite de la tarea
+        conn.execute(f'PRAGMA busy_timeout={max(1, math.ceil((tarea.limite - inicio) * 1000))}')
+        sentencias = self._sentencias
+        try:
+            resultado = tarea.correr(conn)
+            if conn.in_transaction:
+                conn.execute('COMMIT')
+            self._confirmado()
+            tarea.futuro.set_result(resultado)
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            if isinstance(e, sqlite3.OperationalError) and _es_bloqueo(e):
+                e = self._rechazo(tarea)
+            tarea.futuro.set_exception(e)
+        finally:
+            conn.execute('PRAGMA busy_timeout=0')
+        self.lotes += 1
+        self.tareas += 1
+        self._observar(tarea, inicio - tarea.enviada, None, time.monotonic() - inicio, self._sentencias - sentencias)
+
+    def _ejecutar_lote(self, conn, lote):
+        resultados = []
+        inicio = time.monotonic()
+        try:
+            lote = self._adquirir(conn, lote)
+        except Exception as e:
+            for tarea in lote:
+                if not tarea.futuro.done():
+                    tarea.futuro.set_exception(e)
+            return
+        if not lote:
+            return
+        adquirido = time.monotonic()
+
+        for tarea in lote:
+            conn.execute('SAVEPOINT tarea')
+            sentencias = self._sentencias
+            try:
+                valor = tarea.correr(conn)
+                resultados.append((tarea, True, valor, self._sentencias - sentencias))
+                conn.execute('RELEASE tarea')
+            except BaseException as e:
+                resultados.append((tarea, False, e, self._sentencias - sentencias))
+                conn.execute('ROLLBACK TO tarea')
+                conn.execute('RELEASE tarea')
+
+        try:
+            conn.execute('COMMIT')
+        except Exception as e:
+            logging.error(f"Error confirmando lote de escritura: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for tarea in lote:
+                tarea.futuro.set_exception(e)
+            return
+
+        retencion = time.monotonic() - adquirido
+        self._confirmado()
+        self.lotes += 1
+        self.tareas += len(lote)
+        # Responder hasta que el lote es durable
+        for tarea, exito, valor, sentencias in resultados:
+            self._observar(tarea, inicio - tarea.enviada, adquirido - inicio, retencion, sentencias)
+            if exito:
+                tarea.futuro.set_result(valor)
+            else:
+                tarea.futuro.set_exception(valor)
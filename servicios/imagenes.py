@@ -0,0 +1,166 @@
+"""
+Imágenes de productos: validación, reducción y variantes con nombre por
+contenido.
+
+Cada imagen se abre con Pillow (se rechaza lo que no sea una imagen de un
+formato permitido o tenga demasiados pixeles), se endereza según su EXIF y
+se guarda como JPEG en varias variantes: 'lista' (miniatura de la tabla),
+'modal' (detalle) y 'completa' (acotada a IMAGEN_TAMAÑO_MAXIMO).
+
+El nombre de cada archivo lleva el hash del original y el lado de la
+variante — <clave>-<variante><lado>.jpg — así que una URL nunca cambia de
+contenido y se puede cachear para siempre; la misma foto subida dos veces
+o para dos productos se guarda una sola vez. productos.imagen guarda la
+clave.
+"""
+
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+CALIDAD_JPEG = 85
+MAXIMO_PIXELES = 50_000_000  # Más que cualquier cámara; evita "bombas" de descompresión
+
+# Formato que detecta Pillow para cada extensión permitida
+FORMATOS = {'jpg': 'JPEG', 'jpeg': 'JPEG', 'png': 'PNG', 'gif': 'GIF', 'webp': 'WEBP', 'bmp': 'BMP'}
+
+NOMBRE_VARIANTE = re.compile(r'^[0-9a-f]{16}-[a-z]+\d+\.jpg$')
+
+
+class ImagenInvalida(Exception):
+    """El archivo no es una imagen aceptable (formato, extensión o tamaño)"""
+
+
+def clave_contenido(datos):
+    """Hash corto (16 hex) de los bytes originales"""
+    return hashlib.sha256(datos).hexdigest()[:16]
+
+
+class AlmacenImagenes:
+    """Genera y guarda las variantes de cada imagen en un directorio plano"""
+
+    def __init__(self, directorio, tamano_maximo=(800, 800), variantes=None, extensiones=None,
+                 calidad=CALIDAD_JPEG, maximo_pixeles=MAXIMO_PIXELES):
+        self.directorio = directorio
+        # De la más grande a la más chica: cada una se reduce desde la anterior
+        self.variantes = sorted({'completa': tuple(tamano_maximo), **(variantes or {})}.items(),
+                                key=lambda variante: -max(variante[1]))
+        self.extensiones = {extension.lower() for extension in (extensiones or FORMATOS)}
+        self.formatos = {FORMATOS[extension] for extension in self.extensiones if extension in FORMATOS}
+        self.calidad = calidad
+        self.maximo_pixeles = maximo_pixeles
+        os.makedirs(directorio, exist_ok=True)
+
+    # --- Nombres ---
+
+    def nombre(self, clave, variante):
+        tamano = dict(self.variantes)[variante]
+        return f'{clave}-{variante}{max(tamano)}.jpg'
+
+    def nombres(self, clave):
+        return {variante: self.nombre(clave, variante) for variante, _ in self.variantes}
+
+    def existe(self, clave):
+        return all(os.path.exists(os.path.join(self.directorio, nombre)) for nombre in self.nombres(clave).values())
+
+    # --- Validación y procesamiento ---
+
+    def validar_extension(self, nombre_archivo):
+        extension = os.path.splitext(nombre_archivo or '')[1].lower().lstrip('.')
+        if extension not in self.extensiones:
+            permitidas = ', '.join(sorted(self.extensiones))
+            raise ImagenInvalida(f'Extensión no permitida: .{extension or "?"} (se aceptan {permitidas})')
+
+    def abrir(self, datos):
+        """Abrir y validar sin decodificar todavía los pixeles"""
+        try:
+            imagen = Image.open(io.BytesIO(datos))
+        except (UnidentifiedImageError, OSError):
+            raise ImagenInvalida('El archivo no es una imagen válida')
+        if imagen.format not in self.formatos:
+            raise ImagenInvalida(f'Formato no permitido: {imagen.format}')
+        ancho, alto = imagen.size
+        if ancho * alto > self.maximo_pixeles:
+            raise ImagenInvalida(f'Imagen demasiado grande: {ancho}x{alto} pixeles')
+        return imagen
+
+    def variantes_jpeg(self, datos):
+        """{variante: (bytes JPEG, (ancho, alto))} de una imagen original"""
+        imagen = self.abrir(datos)
+        lado = max(self.variantes[0][1])
+        # JPEG: decodificar directo a 1/2, 1/4 u 1/8 si alcanza para la variante más grande
+        if imagen.format == 'JPEG':
+            imagen.draft('RGB', (lado, lado))
+        try:
+            imagen = ImageOps.exif_transpose(imagen)
+            imagen = _a_rgb(imagen)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            raise ImagenInvalida(f'No se pudo leer la imagen: {e}')
+
+        resultado = {}
+        for variante, tamano in self.variantes:
+            imagen.thumbnail(tamano, Image.LANCZOS)  # nunca agranda
+            salida = io.BytesIO()
+            imagen.save(salida, 'JPEG', quality=self.calidad, optimize=True, progressive=max(tamano) > 200)
+            resultado[variante] = (salida.getvalue(), imagen.size)
+        return resultado
+
+    def guardar(self, datos, nombre_archivo=None):
+        """
+        Validar y guardar las variantes de `datos`; regresa
+        {'clave', 'ancho', 'alto', 'nombres'}. Si ya existían (misma foto)
+        no se vuelven a generar.
+        """
+        if nombre_archivo is not None:
+            self.validar_extension(nombre_archivo)
+        clave = clave_contenido(datos)
+        nombres = self.nombres(clave)
+        ancho, alto = _dimensiones(self.abrir(datos))
+        if not self.existe(clave):
+            for variante, (contenido, _) in self.variantes_jpeg(datos).items():
+                _escribir(os.path.join(self.directorio, nombres[variante]), contenido)
+        return {'clave': clave, 'ancho': ancho, 'alto': alto, 'nombres': nombres}
+
+    def eliminar(self, clave):
+        """Borrar las variantes de una clave (las que existan)"""
+        for nombre in self.nombres(clave).values():
+            try:
+                os.remove(os.path.join(self.directorio, nombre))
+            except FileNotFoundError:
+                pass
+
+
+def _dimensiones(imagen):
+    """(ancho, alto) ya enderezada según la orientación EXIF"""
+    ancho, alto = imagen.size
+    if imagen.getexif().get(0x0112, 1) in (5, 6, 7, 8):  # orientaciones giradas 90°
+        return alto, ancho
+    return ancho, alto
+
+
+def _a_rgb(imagen):
+    """RGB para JPEG; la transparencia queda sobre fondo blanco"""
+    if imagen.mode == 'P':
+        imagen = imagen.convert('RGBA')
+    if imagen.mode in ('RGBA', 'LA'):
+        fondo = Image.new('RGB', imagen.size, (255, 255, 255))
+        fondo.paste(imagen, mask=imagen.getchannel('A'))
+        return fondo
+    return imagen.convert('RGB')
+
+
+def _escribir(ruta, contenido):
+    """Escribir completo o nada: archivo temporal en el mismo directorio y rename"""
+    descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
@@ -0,0 +1,244 @@
+"""
+Importación masiva de imágenes de productos desde un directorio.
+
+El CSV de productos (data/Productos.csv) trae por producto la ruta de su
+foto tal como estaba en la PC de origen (c:/Users/.../media/image1.jpg);
+de esa ruta solo importa el nombre del archivo, que se busca en el
+directorio indicado sin distinguir mayúsculas.
+
+Cada archivo se procesa en un pool de procesos (uno por núcleo) con el
+mismo AlmacenImagenes de la aplicación: mismas variantes y mismo nombre
+por contenido, así que dos archivos idénticos quedan guardados una sola
+vez. El manifiesto JSON registra por archivo su tamaño, fecha, clave y
+productos; se reescribe cada pocos segundos y al volver a correr se
+saltan los archivos que no cambiaron y cuyas variantes ya existen, de
+modo que una importación interrumpida continúa donde quedó.
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from servicios.imagenes import ImagenInvalida
+
+VERSION_MANIFIESTO = 1
+GUARDAR_CADA_SEGUNDOS = 5
+MAXIMO_PENDIENTES_POR_PROCESO = 8  # Trabajos encolados por proceso; acota la memoria con miles de archivos
+
+
+class ResultadoImportacion:
+    """Conteos y problemas de una importación"""
+
+    def __init__(self):
+        self.procesadas = 0
+        self.duplicadas = 0
+        self.omitidas = 0
+        self.productos = 0
+        self.faltantes = []
+        self.errores = []
+        self.segundos = 0.0
+
+    def resumen(self):
+        return (f'{self.procesadas} imágenes procesadas ({self.duplicadas} duplicadas), '
+                f'{self.omitidas} ya importadas, {self.productos} productos actualizados, '
+                f'{len(self.faltantes)} no encontradas, {len(self.errores)} con error '
+                f'en {self.segundos:.1f} s')
+
+
+# ---------------------------------------------------------------------------
+# Mapeo CSV → archivos
+# ---------------------------------------------------------------------------
+
+def nombre_archivo(ruta):
+    """Nombre del archivo de una ruta Windows o POSIX"""
+    return re.split(r'[\\/]', ruta.strip())[-1]
+
+
+def leer_mapeo(filas, extensiones):
+    """
+    {nombre de archivo en minúsculas: [producto_id, ...]} a partir de las
+    filas de leer_csv. La ruta se toma de la celda que termine en una
+    extensión de imagen, esté en la columna que esté.
+    """
+    mapeo = {}
+    for _, row in filas:
+        try:
+            producto_id = int((row.get('ID') or '').strip())
+        except ValueError:
+            continue
+        for valor in row.values():
+            if not isinstance(valor, str):
+                continue
+            nombre = nombre_archivo(valor).lower()
+            if os.path.splitext(nombre)[1].lstrip('.') in extensiones:
+                productos = mapeo.setdefault(nombre, [])
+                if producto_id not in productos:
+                    productos.append(producto_id)
+                break
+    return mapeo
+
+
+def buscar_archivos(directorio, nombres):
+    """{nombre en minúsculas: ruta} de los `nombres` que estén en el directorio (o subdirectorios)"""
+    encontrados = {}
+    for raiz, subdirectorios, archivos in os.walk(directorio):
+        subdirectorios.sort()
+        for archivo in sorted(archivos):
+            nombre = archivo.lower()
+            if nombre in nombres and nombre not in encontrados:
+                encontrados[nombre] = os.path.join(raiz, archivo)
+    return encontrados
+
+
+# ---------------------------------------------------------------------------
+# Manifiesto
+# ---------------------------------------------------------------------------
+
+def leer_manifiesto(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            manifiesto = json.load(archivo)
+    except FileNotFoundError:
+        return {}
+    if manifiesto.get('version') != VERSION_MANIFIESTO:
+        return {}
+    return manifiesto.get('archivos', {})
+
+
+def guardar_manifiesto(ruta, archivos):
+    """Escribir completo o nada, para que una interrupción no lo deje a medias"""
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as archivo:
+        json.dump({'version': VERSION_MANIFIESTO, 'archivos': archivos}, archivo,
+                  ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temporal, ruta)
+
+
+def _firma(ruta):
+    estado = os.stat(ruta)
+    return estado.st_size, int(estado.st_mtime)
+
+
+def _vigente(entrada, firma, almacen):
+    """Ya importado: mismo tamaño y fecha, y sus variantes siguen en disco"""
+    return (entrada is not None and 'clave' in entrada
+            and (entrada.get('tamano'), entrada.get('modificado')) == firma
+            and almacen.existe(entrada['clave']))
+
+
+# ---------------------------------------------------------------------------
+# Procesos
+# ---------------------------------------------------------------------------
+
+_almacen = None
+
+
+def _iniciar_proceso(almacen):
+    global _almacen
+    _almacen = almacen
+
+
+def _procesar(ruta):
+    """En el proceso hijo: guardar las variantes de un archivo"""
+    try:
+        with open(ruta, 'rb') as archivo:
+            datos = archivo.read()
+        imagen = _almacen.guardar(datos, ruta)
+    except (ImagenInvalida, OSError) as e:
+        return {'error': str(e)}
+    return {'clave': imagen['clave'], 'ancho': imagen['ancho'], 'alto': imagen['alto']}
+
+
+def _en_paralelo(rutas, almacen, procesos):
+    """(ruta, resultado) a medida que terminan, sin encolar más de lo necesario"""
+    pendientes = iter(rutas)
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_proceso,
+                             initargs=(almacen,)) as pool:
+        en_curso = {}
+        def encolar():
+            for ruta in pendientes:
+                en_curso[pool.submit(_procesar, ruta)] = ruta
+                if len(en_curso) >= procesos * MAXIMO_PENDIENTES_POR_PROCESO:
+                    return
+        encolar()
+        while en_curso:
+            listo = next(as_completed(en_curso))
+            yield en_curso.pop(listo), listo.result()
+            encolar()
+
+
+# ---------------------------------------------------------------------------
+# Importación
+# ---------------------------------------------------------------------------
+
+def importar(conn, directorio, filas, almacen, ruta_manifiesto, procesos=None,
+             reemplazar=False, al_avanzar=None):
+    """
+    Procesar las imágenes del CSV (`filas` de carga_masiva.leer_csv) que
+    estén en `directorio` y asignarlas a sus productos. Sin `reemplazar`
+    solo se llenan los productos que no tienen imagen. `al_avanzar(hechas,
+    total)` se llama con cada archivo procesado.
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacion()
+    procesos = procesos or os.cpu_count() or 1
+
+    mapeo = leer_mapeo(filas, almacen.extensiones)
+    encontrados = buscar_archivos(directorio, mapeo)
+    resultado.faltantes = sorted(set(mapeo) - set(encontrados))
+    manifiesto = leer_manifiesto(ruta_manifiesto)
+
+    firmas = {}
+    pendientes = []
+    claves = set()
+    for nombre, ruta in sorted(encontrados.items()):
+        firmas[nombre] = _firma(ruta)
+        entrada = manifiesto.get(nombre)
+        if _vigente(entrada, firmas[nombre], almacen):
+            entrada['productos'] = mapeo[nombre]
+            claves.add(entrada['clave'])
+            resultado.omitidas += 1
+        else:
+            pendientes.append(ruta)
+
+    guardado = time.monotonic()
+    for hechas, (ruta, procesada) in enumerate(_en_paralelo(pendientes, almacen, procesos), start=1):
+        nombre = os.path.basename(ruta).lower()
+        tamano, modificado = firmas[nombre]
+        manifiesto[nombre] = {'tamano': tamano, 'modificado': modificado,
+                              'productos': mapeo[nombre], **procesada}
+        if 'error' in procesada:
+            resultado.errores.append((nombre, procesada['error']))
+        else:
+            resultado.procesadas += 1
+            if procesada['clave'] in claves:
+                resultado.duplicadas += 1
+            claves.add(procesada['clave'])
+        if time.monotonic() - guardado >= GUARDAR_CADA_SEGUNDOS:
+            guardar_manifiesto(ruta_manifiesto, manifiesto)
+            guardado = time.monotonic()
+        if al_avanzar:
+            al_avanzar(hechas, len(pendientes))
+    guardar_manifiesto(ruta_manifiesto, manifiesto)
+
+    # Solo lo que el CSV sigue mapeando; el manifiesto puede tener archivos de otras corridas
+    resultado.productos = asignar(conn, [manifiesto[nombre] for nombre in encontrados], reemplazar)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def asignar(conn, entradas, reemplazar=False):
+    """Poner la clave de cada entrada del manifiesto en sus productos; regresa cuántos cambiaron"""
+    valores = [(entrada['clave'], producto_id)
+               for entrada in entradas if 'clave' in entrada
+               for producto_id in entrada.get('productos', [])]
+    condicion = 'imagen IS NOT ?1' if reemplazar else 'imagen IS NULL'
+    cambios = conn.total_changes
+    with conn:
+        conn.executemany(f'''
+            UPDATE productos SET imagen = ?1, fecha_actualizacion = CURRENT_TIMESTAMP
+            WHERE id = ?2 AND {condicion}
+        ''', valores)
+    return conn.total_changes - cambios
@@ -0,0 +1,191 @@
+"""
+Medición de SQL y plantillas por petición.
+
+Las conexiones creadas con factory=ConexionMedida (las de lectura y la del
+escritor) registran cada sentencia en la medición activa: cantidad de
+consultas, tiempo total (ejecución más lectura de filas) y la sentencia
+más lenta. La medición vive en una ContextVar, así que el escritor puede
+atribuir a la petición las sentencias que ejecuta por ella. Sin medición
+activa las conexiones se comportan como sqlite3.Connection normales. Los
+PRAGMA de configuración al abrir la conexión se ejecutan con medir=False
+y no cuentan como consultas de la petición.
+"""
+
+import contextvars
+import re
+import sqlite3
+import time
+
+MAX_SENTENCIAS_TRAZA = 20
+LARGO_DESCRIPCION = 80
+
+_medicion = contextvars.ContextVar('medicion_peticion', default=None)
+
+
+def _compactar(sql, largo=LARGO_DESCRIPCION):
+    texto = re.sub(r'\s+', ' ', sql).strip()
+    return texto if len(texto) <= largo else texto[:largo - 3] + '...'
+
+
+def _descripcion_header(texto):
+    """Texto seguro para un quoted-string de Server-Timing"""
+    texto = texto.replace('\\', '').replace('"', "'")
+    return texto.encode('ascii', 'replace').decode('ascii')
+
+
+class MedicionPeticion:
+    """Acumulado de SQL y plantillas de una petición"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.tiempo_plantillas = 0.0
+        self.plantillas = 0
+        self._plantilla_inicio = None
+        self.sentencias = []  # [sql, segundos, parámetros, filas] en orden de ejecución
+
+    def nueva_sentencia(self, sql, parametros=None):
+        entrada = [sql, 0.0, parametros, 0]
+        self.sentencias.append(entrada)
+        self.consultas += 1
+        return entrada
+
+    def sumar(self, entrada, segundos):
+        entrada[1] += segundos
+        self.tiempo_sql += segundos
+
+    def iniciar_plantilla(self):
+        self._plantilla_inicio = time.perf_counter()
+
+    def terminar_plantilla(self):
+        if self._plantilla_inicio is not None:
+            self.tiempo_plantillas += time.perf_counter() - self._plantilla_inicio
+            self.plantillas += 1
+            self._plantilla_inicio = None
+
+    def mas_lenta(self):
+        return max(self.sentencias, key=lambda entrada: entrada[1], default=None)
+
+    def total(self):
+        return time.perf_counter() - self.inicio
+
+    def server_timing(self, detalle=False):
+        """Valor del header Server-Timing; el texto de la sentencia más lenta solo con detalle (administradores)"""
+        partes = [
+            f'sql;dur={self.tiempo_sql * 1000:.2f};desc="{self.consultas} consultas"',
+            f'plantillas;dur={self.tiempo_plantillas * 1000:.2f}',
+        ]
+        lenta = self.mas_lenta()
+        if lenta and detalle:
+            partes.append(f'sql-lenta;dur={lenta[1] * 1000:.2f};desc="{_descripcion_header(_compactar(lenta[0]))}"')
+        elif lenta:
+            partes.append(f'sql-lenta;dur={lenta[1] * 1000:.2f}')
+        partes.append(f'total;dur={self.total() * 1000:.2f}')
+        return ', '.join(partes)
+
+    def traza(self):
+        """Resumen serializable a JSON con las sentencias más lentas"""
+        lentas = sorted(self.sentencias, key=lambda entrada: entrada[1], reverse=True)[:MAX_SENTENCIAS_TRAZA]
+        return {
+            'total_ms': round(self.total() * 1000, 2),
+            'sql_ms': round(self.tiempo_sql * 1000, 2),
+            'consultas': self.consultas,
+            'plantillas_ms': round(self.tiempo_plantillas * 1000, 2),
+            'sentencias': [{'sql': _compactar(entrada[0], 300), 'ms': round(entrada[1] * 1000, 3), 'filas': entrada[3]}
+                           for entrada in lentas],
+        }
+
+
+def iniciar():
+    """Activar una medición nueva; regresa el token para terminar()"""
+    return _medicion.set(MedicionPeticion())
+
+
+def actual():
+    return _medicion.get()
+
+
+def terminar(token):
+    _medicion.reset(token)
+
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor que suma a la medición activa el tiempo de ejecutar y leer filas"""
+
+    _entrada = None
+
+    def _medir(self, funcion, *args):
+        medicion = _medicion.get()
+        if medicion is None or self._entrada is None:
+            return funcion(*args)
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            medicion.sumar(self._entrada, time.perf_counter() - inicio)
+
+    def _activa(self):
+        return _medicion.get() if self.connection.medir else None
+
+    def _ejecutar(self, funcion, sql, parametros):
+        medicion = self._activa()
+        self._entrada = medicion.nueva_sentencia(sql, parametros) if medicion is not None else None
+        resultado = self._medir(funcion, sql, parametros)
+        if self._entrada is not None and self.rowcount > 0:
+            self._entrada[3] += self.rowcount  # Filas afectadas (INSERT/UPDATE/DELETE)
+        return resultado
+
+    def _filas(self, cantidad):
+        if self._entrada is not None:
+            self._entrada[3] += cantidad
+
+    def execute(self, sql, parameters=()):
+        return self._ejecutar(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._ejecutar(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        medicion = self._activa()
+        self._entrada = medicion.nueva_sentencia(sql_script) if medicion is not None else None
+        return self._medir(super().executescript, sql_script)
+
+    def fetchone(self):
+        fila = self._medir(super().fetchone)
+        if fila is not None:
+            self._filas(1)
+        return fila
+
+    def fetchmany(self, size=None):
+        filas = self._medir(super().fetchmany, self.arraysize if size is None else size)
+        self._filas(len(filas))
+        return filas
+
+    def fetchall(self):
+        filas = self._medir(super().fetchall)
+        self._filas(len(filas))
+        return filas
+
+    def __next__(self):
+        fila = self._medir(super().__next__)
+        self._filas(1)
+        return fila
+
+
+class ConexionMedida(sqlite3.Connection):
+    """Conexión cuyos cursores (incluidos los de execute) son CursorMedido"""
+
+    medir = True  # False mientras se configura la conexión
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
@@ -0,0 +1,272 @@
+"""
+Histogramas de cubetas fijas agrupados por etiqueta (por ejemplo, la ruta).
+
+Cada observación solo incrementa una cubeta, así que registrar es barato
+y la memoria no crece con el tráfico. Los percentiles son aproximados: se
+reporta el límite superior de la cubeta donde caen.
+
+RegistroMetricas agrupa contadores, histogramas y medidores con etiquetas
+y los expone en el formato de texto de Prometheus (ver /metrics).
+"""
+
+import bisect
+import threading
+
+# Límites superiores de las cubetas (milisegundos)
+LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+# Límites para conteos (sentencias por transacción, filas, etc.)
+LIMITES_CONTEO = (1, 2, 3, 5, 10, 20, 50, 100, 500, 1000, 10000)
+
+
+class Histograma:
+    """Histograma acumulativo con cubetas fijas"""
+
+    def __init__(self, limites=LIMITES_MS):
+        self.limites = tuple(limites)
+        self.cubetas = [0] * (len(self.limites) + 1)  # La última es +Inf
+        self.cuenta = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.cubetas[bisect.bisect_left(self.limites, valor)] += 1
+        self.cuenta += 1
+        self.suma += valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def percentil(self, p):
+        """Límite superior de la cubeta que contiene el percentil p (0-100)"""
+        if not self.cuenta:
+            return 0
+        objetivo = self.cuenta * p / 100.0
+        acumulado = 0
+        for indice, cantidad in enumerate(self.cubetas):
+            acumulado += cantidad
+            if acumulado >= objetivo:
+                return self.limites[indice] if indice < len(self.limites) else self.maximo
+        return self.maximo
+
+    def resumen(self):
+        return {
+            'cuenta': self.cuenta,
+            'promedio': round(self.suma / self.cuenta, 3) if self.cuenta else 0,
+            'p50': self.percentil(50),
+            'p90': self.percentil(90),
+            'p99': self.percentil(99),
+            'maximo': round(self.maximo, 3),
+            'cubetas': [[limite, cantidad] for limite, cantidad in zip(self.limites + ('+Inf',), self.cubetas)],
+        }
+
+
+class Histogramas:
+    """Histogramas por (métrica, etiqueta), seguros entre hilos"""
+
+    def __init__(self, limites=None):
+        # limites: {métrica: tupla de límites}; por defecto LIMITES_MS
+        self.limites = limites or {}
+        self._datos = {}
+        self._candado = threading.Lock()
+
+    def observar(self, metrica, etiqueta, valor):
+        with self._candado:
+            histograma = self._datos.get((metrica, etiqueta))
+            if histograma is None:
+                histograma = Histograma(self.limites.get(metrica, LIMITES_MS))
+                self._datos[(metrica, etiqueta)] = histograma
+            histograma.observar(valor)
+
+    def resumen(self):
+        """{etiqueta: {métrica: resumen}}"""
+        with self._candado:
+            resultado = {}
+            for (metrica, etiqueta), histograma in sorted(self._datos.items()):
+                resultado.setdefault(etiqueta, {})[metrica] = histograma.resumen()
+            return resultado
+
+
+# --- Exposición en formato de texto de Prometheus ---
+
+# Límites para duraciones en segundos (convención de Prometheus)
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Límites para tamaños en bytes (exportaciones, respaldos)
+LIMITES_BYTES = (1024, 10240, 102400, 1048576, 10485760, 104857600, 1073741824)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if isinstance(valor, float):
+        if valor != valor:
+            return 'NaN'
+        if valor in (float('inf'), float('-inf')):
+            return '+Inf' if valor > 0 else '-Inf'
+        return repr(round(valor, 6))
+    return str(valor)
+
+
+def _lineas_histograma(nombre, nombres, valores, histograma, escala=1.0):
+    """Cubetas acumuladas, _sum y _count de un Histograma (escala convierte unidades)"""
+    lineas = []
+    acumulado = 0
+    for limite, cantidad in zip(histograma.limites + (None,), histograma.cubetas):
+        acumulado += cantidad
+        le = '+Inf' if limite is None else _numero(limite * escala if escala != 1.0 else limite)
+        etiquetas = _etiquetas(nombres, valores, 'le="%s"' % le)
+        lineas.append(f'{nombre}_bucket{etiquetas} {acumulado}')
+    lineas.append(f'{nombre}_sum{_etiquetas(nombres, valores)} {_numero(histograma.suma * escala)}')
+    lineas.append(f'{nombre}_count{_etiquetas(nombres, valores)} {histograma.cuenta}')
+    return lineas
+
+
+class Contador:
+    """Contador monotónico con etiquetas"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._candado = threading.Lock()
+
+    def incrementar(self, *valores, cantidad=1):
+        with self._candado:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def valor(self, *valores):
+        with self._candado:
+            return self._valores.get(valores, 0)
+
+    def exponer(self):
+        with self._candado:
+            datos = sorted(self._valores.items())
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(valor)}' for valores, valor in datos]
+
+
+class HistogramaEtiquetado:
+    """Un Histograma por combinación de etiquetas"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.limites = tuple(limites)
+        self._datos = {}
+        self._candado = threading.Lock()
+
+    def observar(self, valor, *valores):
+        with self._candado:
+            histograma = self._datos.get(valores)
+            if histograma is None:
+                histograma = Histograma(self.limites)
+                self._datos[valores] = histograma
+            histograma.observar(valor)
+
+    def exponer(self):
+        lineas = []
+        with self._candado:
+            for valores, histograma in sorted(self._datos.items()):
+                lineas.extend(_lineas_histograma(self.nombre, self.etiquetas, valores, histograma))
+        return lineas
+
+
+class Medidor:
+    """Valor leído al exponer: funcion() regresa un número o [(valores_etiquetas, número)]"""
+
+    def __init__(self, nombre, ayuda, funcion, etiquetas=(), tipo='gauge'):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+        self.etiquetas = tuple(etiquetas)
+        self.tipo = tipo
+
+    def exponer(self):
+        resultado = self.funcion()
+        if resultado is None:
+            return []
+        if isinstance(resultado, (int, float)):
+            return [f'{self.nombre} {_numero(resultado)}']
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, valores)} {_numero(valor)}' for valores, valor in resultado]
+
+
+def exponer_histogramas(histogramas, prefijo, etiqueta, ayudas=None, escalas=None):
+    """
+    Familias Prometheus a partir de un Histogramas ({métrica, etiqueta}).
+    ayudas: {métrica: texto}; escalas: {métrica: (sufijo, factor)} para
+    convertir unidades, p. ej. {'espera_cola_ms': ('espera_cola_segundos', 0.001)}.
+    """
+    ayudas = ayudas or {}
+    escalas = escalas or {}
+    with histogramas._candado:
+        datos = sorted(histogramas._datos.items())
+    familias = {}
+    for (metrica, valor_etiqueta), histograma in datos:
+        familias.setdefault(metrica, []).append((valor_etiqueta, histograma))
+
+    lineas = []
+    for metrica, series in familias.items():
+        sufijo, factor = escalas.get(metrica, (metrica, 1.0))
+        nombre = f'{prefijo}_{sufijo}'
+        lineas.append(f'# HELP {nombre} {ayudas.get(metrica, metrica)}')
+        lineas.append(f'# TYPE {nombre} histogram')
+        for valor_etiqueta, histograma in series:
+            lineas.extend(_lineas_histograma(nombre, (etiqueta,), (valor_etiqueta,), histograma, factor))
+    return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas que se exponen juntas en /metrics"""
+
+    def __init__(self):
+        self._metricas = []
+        self._colectores = []
+
+    def _agregar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+        return self._agregar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), limites=LIMITES_SEGUNDOS):
+        return self._agregar(HistogramaEtiquetado(nombre, ayuda, etiquetas, limites))
+
+    def medidor(self, nombre, ayuda, funcion, etiquetas=(), tipo='gauge'):
+        return self._agregar(Medidor(nombre, ayuda, funcion, etiquetas, tipo))
+
+    def colector(self, funcion):
+        """funcion() regresa líneas ya formateadas (con sus # HELP / # TYPE)"""
+        self._colectores.append(funcion)
+        return funcion
+
+    def exposicion(self):
+        """Texto en formato de exposición de Prometheus 0.0.4"""
+        lineas = []
+        for metrica in self._metricas:
+            try:
+                muestras = metrica.exponer()
+            except Exception as e:
+                lineas.append(f'# {metrica.nombre}: error al leer ({_escapar(e)})')
+                continue
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            lineas.extend(muestras)
+        for colector in self._colectores:
+            try:
+                lineas.extend(colector())
+            except Exception as e:
+                lineas.append(f'# colector con error: {_escapar(e)}')
+        return '\n'.join(lineas) + '\n'
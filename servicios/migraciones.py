@@ -0,0 +1,525 @@
+"""
+Migraciones versionadas del esquema de la base de datos.
+
+Cada migración tiene un número de versión, un nombre y una función
+idempotente. Las aplicadas se registran en la tabla schema_version y la
+versión actual se guarda también en PRAGMA user_version, de modo que al
+iniciar la aplicación basta una lectura para saber que no hay pendientes.
+
+Las reescrituras de tablas grandes se hacen en lotes cortos (cada uno en
+su propia transacción) para no bloquear las escrituras durante toda la
+copia. Reemplaza a los scripts migrar_maquinas.py, migrar_proveedores.py,
+agregar_stock_minimo.py y migrar_produccion_completa.py.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import time
+
+from servicios import bitacora
+from servicios import cambios_stock
+from servicios import versiones
+
+TAMANO_LOTE = 2000
+
+
+# ---------------------------------------------------------------------------
+# Utilidades
+# ---------------------------------------------------------------------------
+
+def _columnas(conn, tabla):
+    return {fila[1]: fila for fila in conn.execute(f'PRAGMA table_info({tabla})')}
+
+
+def _existe_tabla(conn, tabla):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+    ).fetchone() is not None
+
+
+def _agregar_columna(conn, tabla, columna, definicion):
+    """Agregar una columna si no existe; regresa True si se agregó"""
+    if columna in _columnas(conn, tabla):
+        return False
+    conn.execute(f'ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}')
+    return True
+
+
+def actualizar_en_lotes(conn, tabla, sql, tamano_lote=TAMANO_LOTE):
+    """
+    Ejecutar una sentencia por rangos de rowid, una transacción por lote.
+
+    La sentencia recibe los parámetros (desde, hasta) y debe limitarse a
+    las filas con rowid en ese rango. Regresa el número de lotes.
+    """
+    conn.commit()
+    desde = 0
+    lotes = 0
+    while True:
+        hasta = conn.execute(f'''
+            SELECT MAX(rowid) FROM (
+                SELECT rowid FROM {tabla} WHERE rowid > ? ORDER BY rowid LIMIT ?
+            )
+        ''', (desde, tamano_lote)).fetchone()[0]
+        if hasta is None:
+            return lotes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(sql, (desde, hasta))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        desde = hasta
+        lotes += 1
+
+
+def reconstruir_tabla(conn, tabla, sql_crear, tamano_lote=TAMANO_LOTE):
+    """
+    Reescribir una tabla con un nuevo CREATE TABLE sin bloquearla mientras se copia.
+
+    Se crea <tabla>__nueva, unos triggers replican en ella las escrituras
+    que lleguen durante la copia, los datos se copian por lotes de rowid y
+    al final, en una transacción corta, se intercambian las tablas y se
+    recrean los índices. Las columnas que no existan en la tabla nueva se
+    descartan; la tabla debe tener clave primaria entera.
+    """
+    nueva = f'{tabla}__nueva'
+    conn.commit()
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        conn.execute(f'DROP TABLE IF EXISTS {nueva}')
+        conn.execute(sql_crear.replace(f'CREATE TABLE {tabla}', f'CREATE TABLE {nueva}', 1))
+        columnas = [c for c in _columnas(conn, nueva) if c in _columnas(conn, tabla)]
+        indices = [fila[0] for fila in conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (tabla,))]
+
+        lista = ', '.join(columnas)
+        valores = ', '.join(f'NEW.{c}' for c in columnas)
+        conn.execute(f'''
+            CREATE TRIGGER {nueva}_ins AFTER INSERT ON {tabla} BEGIN
+                INSERT OR REPLACE INTO {nueva} (rowid, {lista}) VALUES (NEW.rowid, {valores});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER {nueva}_upd AFTER UPDATE ON {tabla} BEGIN
+                DELETE FROM {nueva} WHERE rowid = OLD.rowid;
+                INSERT OR REPLACE INTO {nueva} (rowid, {lista}) VALUES (NEW.rowid, {valores});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER {nueva}_del AFTER DELETE ON {tabla} BEGIN
+                DELETE FROM {nueva} WHERE rowid = OLD.rowid;
+            END
+        ''')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    # Las filas que ya copió un trigger tienen prioridad sobre la copia por lotes
+    actualizar_en_lotes(conn, tabla, f'''
+        INSERT OR IGNORE INTO {nueva} (rowid, {lista})
+        SELECT rowid, {lista} FROM {tabla} WHERE rowid > ? AND rowid <= ?
+    ''', tamano_lote)
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        for sufijo in ('ins', 'upd', 'del'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {nueva}_{sufijo}')
+        conn.execute(f'DROP TABLE {tabla}')
+        conn.execute(f'ALTER TABLE {nueva} RENAME TO {tabla}')
+        for sql in indices:
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Migraciones
+# ---------------------------------------------------------------------------
+
+def _m001_esquema_base(conn):
+    """Tablas base del inventario, catálogos y administración"""
+    conn.executescript('''
+        CREATE TABLE IF NOT EXISTS categorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            descripcion TEXT,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS subcategorias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            categoria_id INTEGER,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+        );
+        CREATE TABLE IF NOT EXISTS marcas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS maquinas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            descripcion TEXT,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS ubicaciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codigo TEXT UNIQUE NOT NULL,
+            nombre TEXT NOT NULL,
+            descripcion TEXT,
+            empresa TEXT DEFAULT 'PPG',
+            area TEXT DEFAULT 'Oficinas',
+            nivel TEXT DEFAULT 'Planta Alta',
+            seccion TEXT DEFAULT 'Anaquel Refacciones Maq Cepillo',
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS productos (
+            id INTEGER PRIMARY KEY,
+            descripcion TEXT NOT NULL,
+            codigo TEXT UNIQUE,
+            categoria_id INTEGER,
+            subcategoria_id INTEGER,
+            marca_id INTEGER,
+            notas TEXT,
+            cantidad_requerida INTEGER DEFAULT 1,
+            maquina_id INTEGER,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (categoria_id) REFERENCES categorias (id),
+            FOREIGN KEY (subcategoria_id) REFERENCES subcategorias (id),
+            FOREIGN KEY (marca_id) REFERENCES marcas (id),
+            FOREIGN KEY (maquina_id) REFERENCES maquinas (id)
+        );
+        CREATE TABLE IF NOT EXISTS inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            ubicacion_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (producto_id) REFERENCES productos (id),
+            FOREIGN KEY (ubicacion_id) REFERENCES ubicaciones (id),
+            UNIQUE(producto_id, ubicacion_id)
+        );
+        CREATE TABLE IF NOT EXISTS producto_maquinas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            maquina_id INTEGER NOT NULL,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (producto_id) REFERENCES productos(id) ON DELETE CASCADE,
+            FOREIGN KEY (maquina_id) REFERENCES maquinas(id) ON DELETE CASCADE,
+            UNIQUE(producto_id, maquina_id)
+        );
+        CREATE TABLE IF NOT EXISTS proveedores (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT UNIQUE NOT NULL,
+            contacto TEXT,
+            telefono TEXT,
+            email TEXT,
+            pagina_web TEXT,
+            direccion TEXT,
+            notas TEXT,
+            fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS admin_users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP
+        );
+        CREATE TABLE IF NOT EXISTS admin_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_user_id INTEGER,
+            session_token TEXT UNIQUE NOT NULL,
+            expires_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (admin_user_id) REFERENCES admin_users (id)
+        );
+        CREATE TABLE IF NOT EXISTS operation_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_user_id INTEGER,
+            operation_type TEXT NOT NULL,
+            producto_id INTEGER,
+            ubicacion_id INTEGER,
+            old_quantity INTEGER,
+            new_quantity INTEGER,
+            description TEXT,
+            ip_address TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (admin_user_id) REFERENCES admin_users (id),
+            FOREIGN KEY (producto_id) REFERENCES productos (id),
+            FOREIGN KEY (ubicacion_id) REFERENCES ubicaciones (id)
+        );
+    ''')
+
+
+def _m002_columnas_faltantes(conn):
+    """Columnas agregadas después de la importación inicial (antes migrar_produccion_completa.py)"""
+    # ALTER TABLE no acepta defaults no constantes; las fechas se corrigen en la 006
+    for columna, definicion in (
+        ('categoria_id', 'INTEGER REFERENCES categorias(id)'),
+        ('subcategoria_id', 'INTEGER REFERENCES subcategorias(id)'),
+        ('cantidad_requerida', 'INTEGER DEFAULT 1'),
+        ('maquina_id', 'INTEGER REFERENCES maquinas(id)'),
+        ('fecha_creacion', 'DATETIME'),
+        ('fecha_actualizacion', 'DATETIME'),
+    ):
+        _agregar_columna(conn, 'productos', columna, definicion)
+    for tabla in ('categorias', 'subcategorias', 'maquinas', 'ubicaciones'):
+        _agregar_columna(conn, tabla, 'fecha_creacion', 'DATETIME')
+    _agregar_columna(conn, 'ubicaciones', 'fecha_actualizacion', 'DATETIME')
+    conn.commit()
+
+
+def _m003_proveedores(conn):
+    """Proveedor por producto (antes migrar_proveedores.py)"""
+    _agregar_columna(conn, 'productos', 'proveedor_id', 'INTEGER REFERENCES proveedores(id)')
+    conn.commit()
+
+
+def _m004_stock_minimo(conn):
+    """Stock mínimo por producto con valor inicial según categoría (antes agregar_stock_minimo.py)"""
+    if not _agregar_columna(conn, 'productos', 'stock_minimo', 'INTEGER DEFAULT 5'):
+        return
+    conn.commit()
+    actualizar_en_lotes(conn, 'productos', '''
+        UPDATE productos
+        SET stock_minimo = CASE
+            WHEN categoria_id IN (
+                SELECT id FROM categorias WHERE nombre LIKE '%Crítico%' OR nombre LIKE '%Esencial%'
+            ) THEN 10
+            WHEN categoria_id IN (
+                SELECT id FROM categorias WHERE nombre LIKE '%Repuesto%' OR nombre LIKE '%Refacción%'
+            ) THEN 5
+            ELSE 3
+        END
+        WHERE rowid > ? AND rowid <= ?
+    ''')
+
+
+def _m005_maquinas_muchos_a_muchos(conn):
+    """Copiar productos.maquina_id a producto_maquinas (antes migrar_maquinas.py)"""
+    actualizar_en_lotes(conn, 'productos', '''
+        INSERT OR IGNORE INTO producto_maquinas (producto_id, maquina_id)
+        SELECT id, maquina_id FROM productos
+        WHERE maquina_id IS NOT NULL AND rowid > ? AND rowid <= ?
+    ''')
+
+
+def _m006_fechas_por_defecto(conn):
+    """Reconstruir las tablas cuyas columnas de fecha se agregaron sin valor por defecto"""
+    tablas = {
+        'categorias': '''
+            CREATE TABLE categorias (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE NOT NULL,
+                descripcion TEXT,
+                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP
+            )''',
+        'subcategorias': '''
+            CREATE TABLE subcategorias (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT NOT NULL,
+                categoria_id INTEGER,
+                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (categoria_id) REFERENCES categorias (id)
+            )''',
+        'maquinas': '''
+            CREATE TABLE maquinas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                nombre TEXT UNIQUE NOT NULL,
+                descripcion TEXT,
+                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP
+            )''',
+        'ubicaciones': '''
+            CREATE TABLE ubicaciones (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                codigo TEXT UNIQUE NOT NULL,
+                nombre TEXT NOT NULL,
+                descripcion TEXT,
+                empresa TEXT DEFAULT 'PPG',
+                area TEXT DEFAULT 'Oficinas',
+                nivel TEXT DEFAULT 'Planta Alta',
+                seccion TEXT DEFAULT 'Anaquel Refacciones Maq Cepillo',
+                fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+                fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+            )''',
+    }
+    for tabla, sql_crear in tablas.items():
+        if _columnas(conn, tabla)['fecha_creacion'][4] is None:
+            reconstruir_tabla(conn, tabla, sql_crear)
+
+
+def _m007_indices(conn):
+    """Índices de optimización"""
+    conn.executescript('''
+        CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos(categoria_id);
+        CREATE INDEX IF NOT EXISTS idx_productos_subcategoria ON productos(subcategoria_id);
+        CREATE INDEX IF NOT EXISTS idx_productos_proveedor ON productos(proveedor_id);
+        CREATE INDEX IF NOT EXISTS idx_productos_descripcion ON productos(descripcion);
+        CREATE INDEX IF NOT EXISTS idx_productos_stock_minimo ON productos(stock_minimo);
+        CREATE INDEX IF NOT EXISTS idx_inventario_producto ON inventario(producto_id);
+        CREATE INDEX IF NOT EXISTS idx_inventario_ubicacion ON inventario(ubicacion_id);
+        CREATE INDEX IF NOT EXISTS idx_ubicaciones_codigo ON ubicaciones(codigo);
+        CREATE INDEX IF NOT EXISTS idx_categorias_nombre ON categorias(nombre);
+        CREATE INDEX IF NOT EXISTS idx_subcategorias_categoria ON subcategorias(categoria_id);
+        CREATE INDEX IF NOT EXISTS idx_maquinas_nombre ON maquinas(nombre);
+        CREATE INDEX IF NOT EXISTS idx_proveedores_nombre ON proveedores(nombre);
+        CREATE INDEX IF NOT EXISTS idx_producto_maquinas_producto ON producto_maquinas(producto_id);
+        CREATE INDEX IF NOT EXISTS idx_producto_maquinas_maquina ON producto_maquinas(maquina_id);
+        CREATE INDEX IF NOT EXISTS idx_operation_logs_timestamp ON operation_logs(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_operation_logs_admin ON operation_logs(admin_user_id);
+    ''')
+
+
+def _m008_administrador_inicial(conn):
+    """Usuario administrador por defecto (admin/admin123) si no hay ninguno"""
+    conn.execute('''
+        INSERT INTO admin_users (username, password_hash)
+        SELECT 'admin', ? WHERE NOT EXISTS (SELECT 1 FROM admin_users)
+    ''', (hashlib.sha256('admin123'.encode()).hexdigest(),))
+    conn.commit()
+
+
+def _m009_bitacora_compacta(conn):
+    """
+    operation_logs compacta: ts entero, tipos e IPs en diccionarios y la
+    descripción separada en params (ver servicios/bitacora.py)
+    """
+    if 'ts' in _columnas(conn, 'operation_logs'):
+        bitacora.crear_tablas(conn)
+        return
+    bitacora.convertir_tabla(conn, lote=TAMANO_LOTE)
+
+
+def _m010_bitacora_visor(conn):
+    """
+    Índices (filtro, ts) para el visor paginado de logs y búsqueda de texto
+    sobre las descripciones (se llena con los registros existentes)
+    """
+    conn.execute('DROP INDEX IF EXISTS idx_operation_logs_admin')
+    bitacora.crear_indices(conn)
+    conn.commit()
+    bitacora.reindexar_busqueda(conn, lote=TAMANO_LOTE)
+
+
+def _m011_imagen_producto(conn):
+    """productos.imagen: clave (hash) de las variantes generadas por servicios/imagenes.py"""
+    _agregar_columna(conn, 'productos', 'imagen', 'TEXT')
+
+
+def _m012_cambios_stock(conn):
+    """cambios_stock y triggers sobre inventario para los eventos en vivo (servicios/cambios_stock.py)"""
+    cambios_stock.crear_tablas(conn)
+
+
+def _m013_versiones_tablas(conn):
+    """versiones_tablas y triggers de versión por tabla para los ETag (servicios/versiones.py)"""
+    versiones.crear_tablas(conn)
+
+
+# Agregar nuevas migraciones al final; nunca renumerar ni modificar las aplicadas
+MIGRACIONES = [
+    (1, 'esquema_base', _m001_esquema_base),
+    (2, 'columnas_faltantes', _m002_columnas_faltantes),
+    (3, 'proveedores', _m003_proveedores),
+    (4, 'stock_minimo', _m004_stock_minimo),
+    (5, 'maquinas_muchos_a_muchos', _m005_maquinas_muchos_a_muchos),
+    (6, 'fechas_por_defecto', _m006_fechas_por_defecto),
+    (7, 'indices', _m007_indices),
+    (8, 'administrador_inicial', _m008_administrador_inicial),
+    (9, 'bitacora_compacta', _m009_bitacora_compacta),
+    (10, 'bitacora_visor', _m010_bitacora_visor),
+    (11, 'imagen_producto', _m011_imagen_producto),
+    (12, 'cambios_stock', _m012_cambios_stock),
+    (13, 'versiones_tablas', _m013_versiones_tablas),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+# ---------------------------------------------------------------------------
+# Ejecución
+# ---------------------------------------------------------------------------
+
+def version_esquema(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migraciones_aplicadas(conn):
+    """Historial de migraciones registradas en schema_version"""
+    if not _existe_tabla(conn, 'schema_version'):
+        return []
+    return conn.execute('''
+        SELECT version, nombre, aplicada_en, duracion_ms FROM schema_version ORDER BY version
+    ''').fetchall()
+
+
+def aplicar_migraciones(conn, hasta=None):
+    """
+    Aplicar las migraciones pendientes en orden.
+
+    Regresa una lista de (version, nombre, segundos) con las aplicadas.
+    Si la base ya está al día solo se lee PRAGMA user_version.
+    """
+    objetivo = VERSION_ACTUAL if hasta is None else hasta
+    if version_esquema(conn) >= objetivo:
+        return []
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            aplicada_en TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duracion_ms REAL
+        )
+    ''')
+    conn.commit()
+
+    aplicadas = []
+    for version, nombre, migracion in MIGRACIONES:
+        if version > objetivo:
+            break
+        # Otro proceso pudo aplicarla mientras tanto
+        if version <= version_esquema(conn):
+            continue
+
+        inicio = time.perf_counter()
+        try:
+            migracion(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logging.error(f"Error en la migración {version:03d}_{nombre}")
+            raise
+        segundos = time.perf_counter() - inicio
+
+        conn.execute('''
+            INSERT OR REPLACE INTO schema_version (version, nombre, duracion_ms) VALUES (?, ?, ?)
+        ''', (version, nombre, round(segundos * 1000, 2)))
+        conn.execute(f'PRAGMA user_version = {int(version)}')
+        conn.commit()
+
+        logging.info(f"Migración {version:03d}_{nombre} aplicada en {segundos * 1000:.1f} ms")
+        aplicadas.append((version, nombre, segundos))
+    return aplicadas
+
+
+def migrar_base_datos(database, hasta=None):
+    """Abrir la base de datos y aplicar las migraciones pendientes"""
+    conn = sqlite3.connect(database, timeout=20.0)
+    try:
+        conn.execute('PRAGMA busy_timeout=20000')
+        return aplicar_migraciones(conn, hasta)
+    finally:
+        conn.close()
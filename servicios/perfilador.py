@@ -0,0 +1,293 @@
+"""
+Perfilado de peticiones bajo demanda.
+
+Dos modos:
+- 'cprofile': cProfile sobre el hilo de la petición; se guarda el .prof
+  (abrible con pstats, snakeviz, etc.) y se muestra el reporte de pstats.
+- 'muestreo': un hilo toma la pila del hilo de la petición cada pocos
+  milisegundos y se guardan las pilas colapsadas ("a;b;c 12"), el formato
+  de flamegraph.pl y speedscope. El costo es mucho menor que cProfile.
+
+Solo puede haber un cProfile activo por proceso (desde Python 3.12 usa
+sys.monitoring y un segundo enable() lanza ValueError): si otra petición
+ya lo tiene, la nueva se perfila por muestreo.
+
+Además de pedirlo explícitamente, se pueden activar reglas "uno de cada N"
+por endpoint durante una ventana de tiempo (siempre en modo muestreo).
+Cada perfil queda en el directorio como <id>.json (metadatos) más su
+archivo .prof o .collapsed; se conservan los últimos max_perfiles.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+MODOS = ('cprofile', 'muestreo')
+INTERVALO_MUESTREO = 0.005  # Segundos entre muestras de la pila
+MAX_PERFILES = 100
+MAX_PROFUNDIDAD = 128
+
+_cprofile_activo = threading.Lock()  # Un solo cProfile a la vez en todo el proceso
+
+
+def _marco(frame):
+    codigo = frame.f_code
+    return f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})'
+
+
+class MuestreadorPila:
+    """Toma muestras de la pila de un hilo desde otro hilo"""
+
+    def __init__(self, hilo_id, intervalo=INTERVALO_MUESTREO):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._ciclo, name='muestreador-pila', daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            if frame is None:
+                continue
+            marcos = []
+            while frame is not None and len(marcos) < MAX_PROFUNDIDAD:
+                marcos.append(_marco(frame))
+                frame = frame.f_back
+            self.pilas[';'.join(reversed(marcos))] += 1
+            self.muestras += 1
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+
+    def colapsado(self):
+        return ''.join(f'{pila} {cantidad}\n' for pila, cantidad in self.pilas.most_common())
+
+
+class PerfilEnCurso:
+    """Perfil de una petición entre iniciar() y guardar()"""
+
+    def __init__(self, modo, motivo):
+        self.modo = modo
+        self.motivo = motivo
+        self.inicio = time.perf_counter()
+        self._cprofile = None
+        self._muestreador = None
+        if modo == 'cprofile' and _cprofile_activo.acquire(blocking=False):
+            try:
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+            except ValueError:
+                # Otra herramienta (un depurador, coverage) ya ocupa el perfilado
+                self._cprofile = None
+                _cprofile_activo.release()
+        if self._cprofile is None:
+            self.modo = 'muestreo'
+            self._muestreador = MuestreadorPila(threading.get_ident()).iniciar()
+
+    def detener(self):
+        self.duracion = time.perf_counter() - self.inicio
+        if self._cprofile:
+            self._cprofile.disable()
+            _cprofile_activo.release()
+        else:
+            self._muestreador.detener()
+
+
+class ReglaMuestreo:
+    """Perfilar una de cada N peticiones a un endpoint hasta 'hasta' (epoch)"""
+
+    def __init__(self, endpoint, cada_n, hasta):
+        self.endpoint = endpoint
+        self.cada_n = max(1, int(cada_n))
+        self.hasta = hasta
+        self.vistas = 0
+        self.perfiladas = 0
+
+    def vigente(self, ahora=None):
+        return (ahora or time.time()) < self.hasta
+
+    def resumen(self):
+        return {
+            'endpoint': self.endpoint,
+            'cada_n': self.cada_n,
+            'hasta': datetime.fromtimestamp(self.hasta).strftime('%Y-%m-%d %H:%M:%S'),
+            'vistas': self.vistas,
+            'perfiladas': self.perfiladas,
+        }
+
+
+class Perfilador:
+    """Inicia, guarda y lista perfiles de peticiones"""
+
+    def __init__(self, directorio, max_perfiles=MAX_PERFILES):
+        self.directorio = directorio
+        self.max_perfiles = max_perfiles
+        self._reglas = {}  # endpoint -> ReglaMuestreo
+        self._candado = threading.Lock()
+        os.makedirs(directorio, exist_ok=True)
+
+    # --- Reglas uno de cada N ---
+
+    def agregar_regla(self, endpoint, cada_n, minutos):
+        regla = ReglaMuestreo(endpoint, cada_n, time.time() + minutos * 60)
+        with self._candado:
+            self._reglas[endpoint] = regla
+        return regla
+
+    def quitar_regla(self, endpoint):
+        with self._candado:
+            return self._reglas.pop(endpoint, None) is not None
+
+    def reglas(self):
+        ahora = time.time()
+        with self._candado:
+            for endpoint in [e for e, regla in self._reglas.items() if not regla.vigente(ahora)]:
+                del self._reglas[endpoint]
+            return [regla.resumen() for regla in self._reglas.values()]
+
+    def toca_muestreo(self, endpoint):
+        """¿Esta petición entra en la regla de su endpoint? (una de cada N)"""
+        if not self._reglas:
+            return False
+        with self._candado:
+            regla = self._reglas.get(endpoint)
+            if regla is None:
+                return False
+            if not regla.vigente():
+                del self._reglas[endpoint]
+                return False
+            regla.vistas += 1
+            if regla.vistas % regla.cada_n:
+                return False
+            regla.perfiladas += 1
+            return True
+
+    # --- Perfiles ---
+
+    def iniciar(self, modo='cprofile', motivo='manual'):
+        return PerfilEnCurso(modo if modo in MODOS else 'cprofile', motivo)
+
+    def guardar(self, perfil, datos):
+        """Detener el perfil y guardarlo; datos: endpoint, ruta, método, estado..."""
+        perfil.detener()
+        perfil_id = datetime.now().strftime('%Y%m%d%H%M%S%f') + '-' + uuid.uuid4().hex[:6]
+        meta = dict(datos)
+        meta.update({
+            'id': perfil_id,
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'modo': perfil.modo,
+            'motivo': perfil.motivo,
+            'duracion_ms': round(perfil.duracion * 1000, 2),
+        })
+        try:
+            if perfil.modo == 'cprofile':
+                perfil._cprofile.dump_stats(self._ruta(perfil_id, '.prof'))
+                meta['funciones'] = len(pstats.Stats(perfil._cprofile).stats)
+            else:
+                with open(self._ruta(perfil_id, '.collapsed'), 'w', encoding='utf-8') as archivo:
+                    archivo.write(perfil._muestreador.colapsado())
+                meta['muestras'] = perfil._muestreador.muestras
+            with open(self._ruta(perfil_id, '.json'), 'w', encoding='utf-8') as archivo:
+                json.dump(meta, archivo, ensure_ascii=False)
+        except OSError as e:
+            logging.error(f"Error guardando perfil: {e}")
+            return None
+        self._podar()
+        return perfil_id
+
+    def _ruta(self, perfil_id, extension):
+        return os.path.join(self.directorio, perfil_id + extension)
+
+    def _valido(self, perfil_id):
+        return perfil_id and all(c.isalnum() or c == '-' for c in perfil_id)
+
+    def _podar(self):
+        """Conservar solo los últimos max_perfiles"""
+        ids = sorted(nombre[:-5] for nombre in os.listdir(self.directorio) if nombre.endswith('.json'))
+        for perfil_id in ids[:-self.max_perfiles] if len(ids) > self.max_perfiles else []:
+            self.eliminar(perfil_id)
+
+    def listar(self):
+        """Metadatos de los perfiles, el más reciente primero"""
+        perfiles = []
+        for nombre in sorted(os.listdir(self.directorio), reverse=True):
+            if not nombre.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directorio, nombre), encoding='utf-8') as archivo:
+                    perfiles.append(json.load(archivo))
+            except (OSError, ValueError):
+                continue
+        return perfiles
+
+    def obtener(self, perfil_id):
+        if not self._valido(perfil_id):
+            return None
+        try:
+            with open(self._ruta(perfil_id, '.json'), encoding='utf-8') as archivo:
+                return json.load(archivo)
+        except (OSError, ValueError):
+            return None
+
+    def archivo(self, meta):
+        """Ruta del .prof o .collapsed de un perfil"""
+        return self._ruta(meta['id'], '.prof' if meta['modo'] == 'cprofile' else '.collapsed')
+
+    def reporte(self, meta, orden='cumulative', limite=60):
+        """Texto de pstats (cprofile) o las pilas colapsadas más frecuentes (muestreo)"""
+        ruta = self.archivo(meta)
+        if meta['modo'] == 'cprofile':
+            salida = io.StringIO()
+            estadisticas = pstats.Stats(ruta, stream=salida)
+            estadisticas.strip_dirs().sort_stats(orden if orden in ('cumulative', 'tottime', 'calls') else 'cumulative')
+            estadisticas.print_stats(limite)
+            return salida.getvalue()
+        with open(ruta, encoding='utf-8') as archivo:
+            return ''.join(archivo.readlines()[:limite])
+
+    def resumen_muestreo(self, meta, limite=40):
+        """Funciones con más muestras propias (en la cima de la pila) e inclusivas"""
+        propias = Counter()
+        inclusivas = Counter()
+        total = 0
+        with open(self.archivo(meta), encoding='utf-8') as archivo:
+            for linea in archivo:
+                pila, _, cantidad = linea.rstrip('\n').rpartition(' ')
+                if not pila:
+                    continue
+                cantidad = int(cantidad)
+                marcos = pila.split(';')
+                total += cantidad
+                propias[marcos[-1]] += cantidad
+                for marco in set(marcos):
+                    inclusivas[marco] += cantidad
+
+        def tabla(contador):
+            return [(marco, cantidad, round(cantidad * 100.0 / total, 1)) for marco, cantidad in contador.most_common(limite)]
+
+        return {'total': total, 'propias': tabla(propias) if total else [], 'inclusivas': tabla(inclusivas) if total else []}
+
+    def eliminar(self, perfil_id):
+        if not self._valido(perfil_id):
+            return
+        for extension in ('.json', '.prof', '.collapsed'):
+            try:
+                os.remove(self._ruta(perfil_id, extension))
+            except FileNotFoundError:
+                pass
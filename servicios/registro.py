@@ -0,0 +1,211 @@
+"""
+Logging sin bloqueo: el hilo de la petición solo encola el registro
+(QueueHandler) y un hilo aparte (QueueListener) lo escribe como una línea
+JSON, rota por tamaño o por tiempo y comprime los respaldos con gzip.
+
+Si la cola se llena (disco muy lento) los registros se descartan y se
+cuentan en vez de frenar la petición.
+"""
+
+import atexit
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+COLA_MAXIMA = 10000
+
+# Atributos propios de LogRecord; el resto son campos extra (extra={...})
+_ATRIBUTOS_BASE = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos extra anidados"""
+
+    def format(self, record):
+        datos = {
+            'fecha': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_BASE and not clave.startswith('_'):
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos['excepcion'] = record.exc_text
+        if record.stack_info:
+            datos['pila'] = record.stack_info
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def _comprimir(origen, destino):
+    with open(origen, 'rb') as entrada, gzip.open(destino, 'wb') as salida:
+        shutil.copyfileobj(entrada, salida)
+    os.remove(origen)
+
+
+class ArchivoRotativo(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler que además rota cada 'rotar_cada' segundos y puede comprimir"""
+
+    def __init__(self, ruta, max_bytes=0, respaldos=10, rotar_cada=0, comprimir=False):
+        super().__init__(ruta, maxBytes=max_bytes, backupCount=respaldos, encoding='utf-8', delay=True)
+        self.rotar_cada = rotar_cada
+        self._proxima = self._calcular_proxima()
+        if comprimir:
+            self.namer = lambda nombre: nombre + '.gz'
+            self.rotator = _comprimir
+
+    def _calcular_proxima(self):
+        if not self.rotar_cada:
+            return None
+        # Si el archivo ya existía, la ventana empieza con él
+        inicio = os.path.getmtime(self.baseFilename) if os.path.exists(self.baseFilename) else time.time()
+        return inicio + self.rotar_cada
+
+    def shouldRollover(self, record):
+        if self._proxima is not None and time.time() >= self._proxima and os.path.exists(self.baseFilename):
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rotar_cada:
+            self._proxima = time.time() + self.rotar_cada
+
+
+class ManejadorCola(logging.handlers.QueueHandler):
+    """QueueHandler que nunca bloquea y agrega el contexto de la petición"""
+
+    def __init__(self, cola, contexto=None):
+        super().__init__(cola)
+        self.contexto = contexto
+        self.descartados = 0
+
+    def prepare(self, record):
+        # Resolver mensaje y excepción aquí (el traceback no se puede pasar al otro hilo)
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if self.contexto:
+            try:
+                for clave, valor in (self.contexto() or {}).items():
+                    if not hasattr(record, clave):
+                        setattr(record, clave, valor)
+            except Exception:
+                pass
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+class RegistroNoBloqueante:
+    """Cola acotada (lado de la petición) más el hilo que escribe los registros"""
+
+    def __init__(self, cola_maxima=COLA_MAXIMA, contexto=None):
+        self.cola = queue.Queue(cola_maxima)
+        self.manejador = ManejadorCola(self.cola, contexto)
+        self._oyente = None
+        self._candado = threading.Lock()
+
+    def archivo(self, ruta, max_bytes=0, respaldos=10, rotar_cada=0, comprimir=False, nivel=logging.INFO):
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        manejador = ArchivoRotativo(ruta, max_bytes, respaldos, rotar_cada, comprimir)
+        manejador.setFormatter(FormatoJSON())
+        manejador.setLevel(nivel)
+        return manejador
+
+    def iniciar(self, manejadores):
+        """manejadores: handlers que corren en el hilo del oyente"""
+        with self._candado:
+            if self._oyente is not None:
+                return self
+            self._oyente = logging.handlers.QueueListener(self.cola, *manejadores, respect_handler_level=True)
+            self._oyente.start()
+            atexit.register(self.detener)
+        return self
+
+    def detener(self):
+        """Vaciar la cola y cerrar los archivos"""
+        with self._candado:
+            oyente, self._oyente = self._oyente, None
+        if oyente is not None:
+            oyente.stop()
+            for manejador in oyente.handlers:
+                manejador.close()
+
+    def pendientes(self):
+        return self.cola.qsize()
+
+
+class FiltroLogger(logging.Filter):
+    """Dejar pasar solo (o todo menos) los registros de ciertos loggers"""
+
+    def __init__(self, nombres, excluir=False):
+        super().__init__()
+        self.nombres = tuple(nombres)
+        self.excluir = excluir
+
+    def filter(self, record):
+        coincide = any(record.name == nombre or record.name.startswith(nombre + '.') for nombre in self.nombres)
+        return not coincide if self.excluir else coincide
+
+
+LOGGER_TRAZAS = 'inventario.trazas'
+
+_registro = None
+
+
+def configurar_logging(directorio, nivel=logging.INFO, max_bytes=50 * 1024 * 1024, respaldos=10,
+                       rotar_cada_horas=24, comprimir=True, cola_maxima=COLA_MAXIMA, contexto=None, consola=True):
+    """
+    Instalar el pipeline en el logger raíz (una sola vez por proceso).
+    Escribe admin_operations.log (todo menos las trazas) y trazas.log
+    (logger inventario.trazas), ambos en JSON; la consola sigue en texto.
+    """
+    global _registro
+    if _registro is not None:
+        return _registro
+
+    registro = RegistroNoBloqueante(cola_maxima, contexto)
+    rotar_cada = int(rotar_cada_horas * 3600)
+
+    principal = registro.archivo(os.path.join(directorio, 'admin_operations.log'),
+                                 max_bytes, respaldos, rotar_cada, comprimir, nivel)
+    principal.addFilter(FiltroLogger([LOGGER_TRAZAS], excluir=True))
+    trazas = registro.archivo(os.path.join(directorio, 'trazas.log'),
+                              max_bytes, respaldos, rotar_cada, comprimir, nivel)
+    trazas.addFilter(FiltroLogger([LOGGER_TRAZAS]))
+    manejadores = [principal, trazas]
+
+    if consola:
+        salida = logging.StreamHandler()
+        salida.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        salida.addFilter(FiltroLogger([LOGGER_TRAZAS], excluir=True))
+        manejadores.append(salida)
+
+    raiz = logging.getLogger()
+    for manejador in list(raiz.handlers):
+        raiz.removeHandler(manejador)
+    raiz.addHandler(registro.manejador)
+    raiz.setLevel(nivel)
+
+    _registro = registro.iniciar(manejadores)
+    return _registro
@@ -0,0 +1,69 @@
+"""
+Tablas en formato columnar para las páginas con tabla virtual.
+
+En lugar de una lista de objetos (que repite el nombre de cada campo en
+cada fila) se manda una lista de valores por columna. Las columnas con
+pocos valores distintos (categoría, marca, máquina, ubicación) van
+codificadas con diccionario: la columna guarda el índice y el nombre se
+manda una sola vez en `diccionarios`. Una columna con diccionario puede
+tener listas por fila (p. ej. las ubicaciones de un producto); entonces
+cada elemento de la lista se codifica.
+
+    {'total': 2,
+     'columnas': {'id': [1, 2], 'categoria': [0, null]},
+     'diccionarios': {'categoria': ['Rodamientos']}}
+"""
+
+
+def codificar(filas, columnas, diccionarios=()):
+    """Convertir filas (sqlite3.Row o dict) al formato columnar"""
+    valores = {columna: [] for columna in columnas}
+    indices = {columna: {} for columna in diccionarios}
+    total = 0
+    for fila in filas:
+        total += 1
+        for columna in columnas:
+            valor = fila[columna]
+            if columna in indices:
+                valor = _indice(indices[columna], valor)
+            valores[columna].append(valor)
+    return {
+        'total': total,
+        'columnas': valores,
+        'diccionarios': {columna: list(nombres) for columna, nombres in indices.items()},
+    }
+
+
+def _indice(nombres, valor):
+    if valor is None:
+        return None
+    if isinstance(valor, (list, tuple)):
+        return [_indice(nombres, elemento) for elemento in valor]
+    return nombres.setdefault(valor, len(nombres))
+
+
+def decodificar(tabla):
+    """Regresar las filas como dicts (lo mismo que hace el front-end)"""
+    columnas = tabla['columnas']
+    diccionarios = tabla['diccionarios']
+
+    def valor(columna, i):
+        dato = columnas[columna][i]
+        if columna not in diccionarios or dato is None:
+            return dato
+        if isinstance(dato, list):
+            return [diccionarios[columna][indice] for indice in dato]
+        return diccionarios[columna][dato]
+
+    return [{columna: valor(columna, i) for columna in columnas} for i in range(tabla['total'])]
+
+
+def separar_detalle(detalle):
+    """'A1:3, B2:5' (GROUP_CONCAT de ubicaciones) → (['A1', 'B2'], [3, 5])"""
+    codigos, cantidades = [], []
+    for parte in (detalle or '').split(', '):
+        codigo, separador, cantidad = parte.rpartition(':')
+        if separador:
+            codigos.append(codigo)
+            cantidades.append(int(cantidad))
+    return codigos, cantidades
@@ -0,0 +1,74 @@
+"""
+Versiones de datos por tabla para GET condicionales (ETag / 304).
+
+Triggers sobre cada tabla de TABLAS suben su número en versiones_tablas
+con cualquier INSERT, UPDATE o DELETE, venga de la ruta que venga (o de
+otro proceso). Una página que solo depende de ciertas tablas arma su
+ETag con la ruta, los parámetros y las versiones de esas tablas: si el
+navegador manda el mismo ETag se responde 304 sin correr el SQL de la
+vista. La fila 'base' guarda un número al azar de la base de datos, así
+una base restaurada de otra instalación no coincide con ETags viejos.
+
+Las migraciones que reescriben una tabla (crear nueva, copiar, renombrar)
+pierden sus triggers: deben volver a llamar crear_tablas().
+"""
+
+import hashlib
+import os
+
+TABLAS = (
+    'productos', 'inventario', 'ubicaciones', 'categorias', 'subcategorias',
+    'marcas', 'maquinas', 'producto_maquinas', 'proveedores',
+)
+
+EVENTOS = {'ins': 'INSERT', 'upd': 'UPDATE', 'del': 'DELETE'}
+
+
+def crear_tablas(conn):
+    """Tabla versiones_tablas y los triggers de las tablas que existan"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS versiones_tablas (
+            tabla TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("INSERT OR IGNORE INTO versiones_tablas (tabla, version) VALUES ('base', abs(random()))")
+    existentes = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for tabla in TABLAS:
+        if tabla not in existentes:
+            continue
+        conn.execute('INSERT OR IGNORE INTO versiones_tablas (tabla) VALUES (?)', (tabla,))
+        for sufijo, evento in EVENTOS.items():
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS versiones_{tabla}_{sufijo} AFTER {evento} ON {tabla} BEGIN
+                    UPDATE versiones_tablas SET version = version + 1 WHERE tabla = '{tabla}';
+                END
+            ''')
+
+
+def leer(conn, tablas=None):
+    """{tabla: version} de todas o de `tablas` (siempre incluye 'base')"""
+    filas = conn.execute('SELECT tabla, version FROM versiones_tablas').fetchall()
+    versiones = {tabla: version for tabla, version in filas}
+    if tablas is None:
+        return versiones
+    return {tabla: versiones.get(tabla, 0) for tabla in ('base', *tablas)}
+
+
+def etiqueta(*partes):
+    """ETag corto y estable para una combinación de valores"""
+    return hashlib.sha1(repr(partes).encode('utf-8')).hexdigest()[:20]
+
+
+def huella_archivos(rutas):
+    """Huella de fecha y tamaño de archivos y directorios (código y plantillas del despliegue)"""
+    datos = []
+    for ruta in rutas:
+        archivos = [ruta]
+        if os.path.isdir(ruta):
+            archivos = sorted(os.path.join(raiz, nombre)
+                              for raiz, _, nombres in os.walk(ruta) for nombre in nombres)
+        for archivo in archivos:
+            estado = os.stat(archivo)
+            datos.append((archivo, estado.st_mtime_ns, estado.st_size))
+    return etiqueta(*datos)
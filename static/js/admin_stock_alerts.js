@@ -0,0 +1,100 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Edición inline de stock mínimo
+    document.querySelectorAll('.edit-stock-minimo').forEach(button => {
+        button.addEventListener('click', function() {
+            const productoId = this.dataset.productoId;
+            const stockMinimo = this.dataset.stockMinimo;
+            const span = document.querySelector(`[data-producto-id="${productoId}"]`);
+
+            const input = document.createElement('input');
+            input.type = 'number';
+            input.min = '0';
+            input.value = stockMinimo;
+            input.className = 'form-control form-control-sm';
+            input.style.width = '80px';
+            input.style.display = 'inline-block';
+
+            const saveBtn = document.createElement('button');
+            saveBtn.innerHTML = '<i class="fas fa-check"></i>';
+            saveBtn.className = 'btn btn-sm btn-success ms-1';
+
+            const cancelBtn = document.createElement('button');
+            cancelBtn.innerHTML = '<i class="fas fa-times"></i>';
+            cancelBtn.className = 'btn btn-sm btn-secondary ms-1';
+
+            const originalContent = span.innerHTML;
+            span.innerHTML = '';
+            span.appendChild(input);
+            span.appendChild(saveBtn);
+            span.appendChild(cancelBtn);
+
+            input.focus();
+            input.select();
+
+            const restore = () => {
+                span.innerHTML = originalContent;
+            };
+
+            const save = () => {
+                const nuevoStock = parseInt(input.value);
+                if (isNaN(nuevoStock) || nuevoStock < 0) {
+                    alert('Valor inválido');
+                    return;
+                }
+
+                fetch(`/api/productos/${productoId}/stock-minimo`, {
+                    method: 'PUT',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({stock_minimo: nuevoStock})
+                })
+                .then(response => response.json())
+                .then(data => {
+                    if (data.success) {
+                        span.innerHTML = nuevoStock;
+                        span.dataset.stockMinimo = nuevoStock;
+                        button.dataset.stockMinimo = nuevoStock;
+
+                        // Mostrar mensaje de éxito
+                        const alert = document.createElement('div');
+                        alert.className = 'alert alert-success alert-dismissible fade show position-fixed';
+                        alert.style.top = '20px';
+                        alert.style.right = '20px';
+                        alert.style.zIndex = '9999';
+                        alert.innerHTML = `
+                            <i class="fas fa-check me-2"></i>Stock mínimo actualizado
+                            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+                        `;
+                        document.body.appendChild(alert);
+
+                        setTimeout(() => {
+                            if (alert.parentNode) {
+                                alert.parentNode.removeChild(alert);
+                            }
+                        }, 3000);
+                    } else {
+                        alert('Error: ' + data.error);
+                        restore();
+                    }
+                })
+                .catch(error => {
+                    console.error('Error:', error);
+                    alert('Error de conexión');
+                    restore();
+                });
+            };
+
+            saveBtn.addEventListener('click', save);
+            cancelBtn.addEventListener('click', restore);
+
+            input.addEventListener('keypress', function(e) {
+                if (e.key === 'Enter') {
+                    save();
+                } else if (e.key === 'Escape') {
+                    restore();
+                }
+            });
+        });
+    });
+});
@@ -0,0 +1,35 @@
+function handleImageError(img) {
+    img.src = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iNTAiIGhlaWdodD0iNTAiIHZpZXdCb3g9IjAgMCA1MCA1MCIgZmlsbD0ibm9uZSIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj4KPHJlY3Qgd2lkdGg9IjUwIiBoZWlnaHQ9IjUwIiBmaWxsPSIjRjNGNEY2Ii8+CjxwYXRoIGQ9Ik0xNSAxNUgzNVYzNUgxNVYxNVoiIGZpbGw9IiNEMUQ1REIiLz4KPHBhdGggZD0iTTIwIDIwSDMwVjMwSDIwVjIwWiIgZmlsbD0iIzlDQTNBRiIvPgo8L3N2Zz4K';
+    img.alt = 'Sin imagen';
+}
+
+// Limpiar filtros
+function limpiarFiltros() {
+    const form = document.getElementById('filtrosForm');
+    if (form) {
+        // Limpiar todos los campos del formulario
+        const inputs = form.querySelectorAll('input, select');
+        inputs.forEach(input => {
+            if (input.type === 'text' || input.type === 'search') {
+                input.value = '';
+            } else if (input.tagName === 'SELECT') {
+                input.selectedIndex = 0; // Seleccionar primera opción (vacía)
+            }
+        });
+
+        // Enviar formulario inmediatamente
+        form.submit();
+    }
+}
+
+// Control del modal de restauración
+document.addEventListener('DOMContentLoaded', function() {
+    const confirmarCheck = document.getElementById('confirmar_restauracion');
+    const btnRestaurar = document.getElementById('btn_restaurar');
+
+    if (confirmarCheck && btnRestaurar) {
+        confirmarCheck.addEventListener('change', function() {
+            btnRestaurar.disabled = !this.checked;
+        });
+    }
+});
@@ -0,0 +1,96 @@
+function verDetallesCategoria(id, nombre) {
+    document.getElementById('detallesCategoriaContent').innerHTML = `
+        <div class="text-center">
+            <div class="spinner-border" role="status">
+                <span class="visually-hidden">Cargando...</span>
+            </div>
+        </div>
+    `;
+
+    fetch(`/api/categoria/${id}`)
+        .then(response => response.json())
+        .then(data => {
+            let subcategoriasHtml = '';
+            if (data.subcategorias && data.subcategorias.length > 0) {
+                subcategoriasHtml = data.subcategorias.map(sc => 
+                    `<li class="list-group-item d-flex justify-content-between align-items-center">
+                        ${sc.nombre}
+                        <span class="badge bg-primary rounded-pill">${sc.productos_count} productos</span>
+                    </li>`
+                ).join('');
+            } else {
+                subcategoriasHtml = '<li class="list-group-item text-muted">No hay subcategorías</li>';
+            }
+
+            document.getElementById('detallesCategoriaContent').innerHTML = `
+                <div class="row">
+                    <div class="col-md-6">
+                        <h6><i class="fas fa-info-circle me-2"></i>Información General</h6>
+                        <ul class="list-group list-group-flush">
+                            <li class="list-group-item"><strong>ID:</strong> ${data.id}</li>
+                            <li class="list-group-item"><strong>Nombre:</strong> ${data.nombre}</li>
+                            <li class="list-group-item"><strong>Subcategorías:</strong> ${data.subcategorias_count}</li>
+                            <li class="list-group-item"><strong>Productos:</strong> ${data.productos_count}</li>
+                            <li class="list-group-item"><strong>Creada:</strong> ${data.fecha_creacion || 'No disponible'}</li>
+                        </ul>
+                    </div>
+                    <div class="col-md-6">
+                        <h6><i class="fas fa-folder-open me-2"></i>Subcategorías</h6>
+                        <ul class="list-group">
+                            ${subcategoriasHtml}
+                        </ul>
+                    </div>
+                </div>
+            `;
+        })
+        .catch(error => {
+            document.getElementById('detallesCategoriaContent').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error al cargar los detalles: ${error.message}
+                </div>
+            `;
+        });
+
+    new bootstrap.Modal(document.getElementById('detallesCategoriaModal')).show();
+}
+
+function verDetallesSubcategoria(id, nombre, categoriaNombre) {
+    document.getElementById('detallesSubcategoriaContent').innerHTML = `
+        <div class="alert alert-info">
+            <h6><i class="fas fa-info-circle me-2"></i>Información de Subcategoría</h6>
+            <ul class="list-unstyled mb-0">
+                <li><strong>ID:</strong> ${id}</li>
+                <li><strong>Nombre:</strong> ${nombre}</li>
+                <li><strong>Categoría:</strong> ${categoriaNombre}</li>
+            </ul>
+        </div>
+    `;
+
+    new bootstrap.Modal(document.getElementById('detallesSubcategoriaModal')).show();
+}
+
+function confirmarEliminarCategoria(id, nombre) {
+    if (confirm(`¿Estás seguro de que deseas eliminar la categoría "${nombre}"?\n\nEsta acción no se puede deshacer.`)) {
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = `/categoria/eliminar/${id}`;
+        document.body.appendChild(form);
+        form.submit();
+    }
+}
+
+function confirmarEliminarSubcategoria(id, nombre) {
+    if (confirm(`¿Estás seguro de que deseas eliminar la subcategoría "${nombre}"?\n\nEsta acción no se puede deshacer.`)) {
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = `/subcategoria/eliminar/${id}`;
+        document.body.appendChild(form);
+        form.submit();
+    }
+}
+
+function exportarCategorias() {
+    const params = new URLSearchParams(window.location.search);
+    window.location.href = '/exportar/categorias?' + params.toString();
+}
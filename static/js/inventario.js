@@ -0,0 +1,610 @@
+// Tabla de inventario: una sola carga columnar para la tabla y las listas de salida y cambio
+const MAXIMO_COINCIDENCIAS = 50;
+let tablaInventario = null;
+let vistaInventario = null;
+
+function claseStock(stock, requerido) {
+    if (stock >= requerido) {
+        return ['text-success', 'bg-success', 'Stock OK'];
+    }
+    return stock > 0 ? ['text-warning', 'bg-warning', 'Stock Bajo'] : ['text-danger', 'bg-danger', 'Sin Stock'];
+}
+
+function dibujarFilaInventario(i) {
+    const fila = tablaInventario.fila(i);
+    const [claseTexto, claseBadge, estado] = claseStock(fila.stock_total, fila.cantidad_requerida);
+    const admin = vistaInventario.contenedor.dataset.admin;
+    const ubicaciones = fila.ubicaciones.slice(0, 3).map((codigo, j) =>
+        `<span class="badge bg-info me-1">${escaparHtml(codigo)}: ${fila.cantidades[j]}</span>`).join('');
+    const mas = fila.ubicaciones.length > 3 ? `<span class="text-muted">+${fila.ubicaciones.length - 3} más</span>` : '';
+    return `
+        <tr data-indice="${i}"${admin ? ' class="admin-row" style="cursor: pointer;"' : ''}>
+            <td>
+                <strong class="texto-recortado">${escaparHtml(fila.descripcion)}</strong>
+                ${fila.notas ? `<small class="text-muted texto-recortado">${escaparHtml(fila.notas)}</small>` : ''}
+            </td>
+            <td>${fila.codigo ? `<span class="badge bg-secondary">${escaparHtml(fila.codigo)}</span>` : '<span class="text-muted">-</span>'}</td>
+            <td>
+                ${escaparHtml(fila.categoria || '-')}
+                ${fila.subcategoria ? `<br><small class="text-muted">${escaparHtml(fila.subcategoria)}</small>` : ''}
+            </td>
+            <td><span class="fs-4 fw-bold ${claseTexto}">${fila.stock_total}</span></td>
+            <td>${fila.cantidad_requerida}</td>
+            <td><span class="badge ${claseBadge}">${estado}</span></td>
+            <td>${fila.ubicaciones.length ? `<small class="text-muted">${ubicaciones}${mas}</small>` : '<span class="text-muted">Sin ubicación</span>'}</td>
+            <td>
+                <button type="button" class="btn btn-sm btn-success" data-accion="agregar" title="Agregar a ubicación">
+                    <i class="fas fa-plus"></i>
+                </button>
+            </td>
+        </tr>`;
+}
+
+function cargarInventario() {
+    const contenedor = document.getElementById('tabla_inventario');
+    vistaInventario = new TablaVirtual(contenedor, 8, dibujarFilaInventario);
+
+    contenedor.querySelector('tbody').addEventListener('click', event => {
+        const tr = event.target.closest('tr[data-indice]');
+        if (!tr) {
+            return;
+        }
+        const fila = tablaInventario.fila(Number(tr.dataset.indice));
+        if (event.target.closest('[data-accion="agregar"]')) {
+            event.stopPropagation();
+            agregarStockProducto(fila.id, fila.descripcion);
+        } else if (contenedor.dataset.admin) {
+            editarStockRapido(fila.id, fila.descripcion);
+        }
+    });
+
+    document.querySelectorAll('form[data-movimiento]').forEach(form =>
+        form.addEventListener('submit', enviarMovimiento));
+
+    recargarInventario();
+}
+
+function recargarInventario() {
+    const contenedor = vistaInventario.contenedor;
+    cargarTablaColumnar('/api/inventario/tabla' + window.location.search)
+        .then(tabla => {
+            tablaInventario = tabla;
+            mostrarInventario();
+            escucharCambios(tabla.ultimo_cambio);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            contenedor.querySelector('tbody').innerHTML =
+                '<tr><td colspan="8" class="text-center text-danger py-4">Error al cargar el inventario</td></tr>';
+        });
+}
+
+function mostrarInventario() {
+    const total = tablaInventario.total;
+    document.getElementById('total_productos').textContent = total;
+    vistaInventario.contenedor.classList.toggle('d-none', total === 0);
+    document.getElementById('inventario_vacio').classList.toggle('d-none', total > 0);
+    vistaInventario.mostrar(total);
+}
+
+// Entrada, salida y cambio de ubicación sin recargar la página: el servidor
+// regresa solo el stock nuevo del producto y se actualiza su fila
+function enviarMovimiento(event) {
+    event.preventDefault();
+    const form = event.target;
+    const boton = form.querySelector('button[type="submit"]');
+    boton.disabled = true;
+
+    fetch(form.action, {method: 'POST', body: new FormData(form), headers: {'Accept': 'application/json'}})
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                mostrarMensaje('danger', data.error);
+                boton.disabled = false;
+                return;
+            }
+            bootstrap.Modal.getOrCreateInstance(form.closest('.modal')).hide();
+            limpiarMovimiento(form);
+            aplicarStockProducto(data.producto);
+            mostrarMensaje('success', data.message);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            mostrarMensaje('danger', 'Error de conexión; revisa el inventario antes de repetir el movimiento');
+            boton.disabled = false;
+        });
+}
+
+function limpiarMovimiento(form) {
+    form.reset();
+    form.querySelectorAll('[id^="producto_seleccionado_"]').forEach(div => div.style.display = 'none');
+    form.querySelectorAll('.form-text span').forEach(span => span.textContent = '0');
+    const boton = form.querySelector('button[type="submit"]');
+    // Salida y cambio se habilitan al elegir producto y ubicación; entrada siempre
+    boton.disabled = boton.id.startsWith('btn_confirmar_');
+}
+
+function aplicarStockProducto(producto) {
+    if (!tablaInventario) {
+        return;
+    }
+    const i = tablaInventario.columnas.id.indexOf(producto.id);
+    if (i === -1) {
+        // No estaba en la tabla (no tenía stock o no pasa los filtros): se vuelve a pedir
+        if (producto.stock_total > 0) {
+            recargarInventario();
+        }
+        return;
+    }
+    if (producto.stock_total === 0) {
+        tablaInventario.quitar(i);
+    } else {
+        tablaInventario.columnas.stock_total[i] = producto.stock_total;
+        tablaInventario.asignar('ubicaciones', i, producto.ubicaciones.map(u => u.codigo));
+        tablaInventario.columnas.cantidades[i] = producto.ubicaciones.map(u => u.cantidad);
+    }
+    mostrarInventario();
+}
+
+// Cambios de otras personas en vivo (Server-Sent Events); el navegador reconecta solo
+// y con Last-Event-ID recibe lo que pasó mientras estuvo desconectado
+let eventosInventario = null;
+let recargaPendiente = null;
+
+function escucharCambios(desde) {
+    if (eventosInventario || !window.EventSource) {
+        return;
+    }
+    eventosInventario = new EventSource(`/api/inventario/eventos?desde=${desde}`);
+    eventosInventario.addEventListener('stock', event => {
+        const cambio = JSON.parse(event.data);
+        if (cambio.id > tablaInventario.ultimo_cambio) {
+            aplicarCambioUbicacion(cambio);
+        }
+    });
+    eventosInventario.addEventListener('recargar', programarRecarga);
+}
+
+function programarRecarga() {
+    clearTimeout(recargaPendiente);
+    recargaPendiente = setTimeout(recargarInventario, 500);
+}
+
+function aplicarCambioUbicacion(cambio) {
+    const i = tablaInventario.columnas.id.indexOf(cambio.producto_id);
+    if (i === -1) {
+        if (cambio.stock_total > 0) {
+            programarRecarga();
+        }
+        return;
+    }
+    if (cambio.stock_total === 0) {
+        tablaInventario.quitar(i);
+    } else {
+        const fila = tablaInventario.fila(i);
+        const j = fila.ubicaciones.indexOf(cambio.codigo);
+        if (j === -1 && cambio.cantidad > 0) {
+            fila.ubicaciones.push(cambio.codigo);
+            fila.cantidades.push(cambio.cantidad);
+        } else if (j !== -1 && cambio.cantidad > 0) {
+            fila.cantidades[j] = cambio.cantidad;
+        } else if (j !== -1) {
+            fila.ubicaciones.splice(j, 1);
+            fila.cantidades.splice(j, 1);
+        }
+        tablaInventario.asignar('ubicaciones', i, fila.ubicaciones);
+        tablaInventario.columnas.cantidades[i] = fila.cantidades;
+        tablaInventario.columnas.stock_total[i] = cambio.stock_total;
+    }
+    mostrarInventario();
+}
+
+function mostrarMensaje(tipo, texto) {
+    const mensaje = document.createElement('div');
+    mensaje.className = `alert alert-${tipo} alert-dismissible fade show`;
+    mensaje.setAttribute('role', 'alert');
+    mensaje.textContent = texto;
+    const cerrar = document.createElement('button');
+    cerrar.type = 'button';
+    cerrar.className = 'btn-close';
+    cerrar.dataset.bsDismiss = 'alert';
+    mensaje.appendChild(cerrar);
+    const encabezado = document.querySelector('h2').closest('.d-flex');
+    encabezado.parentNode.insertBefore(mensaje, encabezado);
+}
+
+// Lista de productos con stock que coinciden con lo escrito (salida y cambio de ubicación)
+function mostrarCoincidencias(idBusqueda, idLista, claseBadge, alSeleccionar) {
+    const busqueda = document.getElementById(idBusqueda).value.toLowerCase();
+    const listaProductos = document.getElementById(idLista);
+    
+    if (busqueda.length === 0 || !tablaInventario) {
+        listaProductos.style.display = 'none';
+        return;
+    }
+    
+    const descripciones = tablaInventario.columnas.descripcion;
+    const codigos = tablaInventario.columnas.codigo;
+    const items = [];
+    for (let i = 0; i < tablaInventario.total && items.length < MAXIMO_COINCIDENCIAS; i++) {
+        if (descripciones[i].toLowerCase().includes(busqueda) || (codigos[i] || '').toLowerCase().includes(busqueda)) {
+            const fila = tablaInventario.fila(i);
+            const item = document.createElement('div');
+            item.className = 'producto-item p-2 border-bottom';
+            item.innerHTML = `<strong>${escaparHtml(fila.descripcion)}</strong>
+                <span class="badge ${claseBadge} ms-2">Stock: ${fila.stock_total}</span>
+                ${fila.codigo ? `<br><small class="text-muted">Código: ${escaparHtml(fila.codigo)}</small>` : ''}`;
+            item.addEventListener('click', () => alSeleccionar(fila));
+            items.push(item);
+        }
+    }
+    listaProductos.replaceChildren(...items);
+    listaProductos.style.display = items.length ? 'block' : 'none';
+}
+
+document.addEventListener('DOMContentLoaded', cargarInventario);
+
+function agregarStockProducto(productoId, productoNombre) {
+    // Pre-seleccionar el producto en el modal de entrada
+    document.getElementById('producto_id_entrada').value = productoId;
+    document.getElementById('buscar_producto_entrada').value = productoNombre;
+    document.getElementById('nombre_producto_entrada').textContent = productoNombre;
+    document.getElementById('producto_seleccionado_entrada').style.display = 'block';
+    document.getElementById('lista_productos_entrada').style.display = 'none';
+    
+    // Mostrar el modal
+    new bootstrap.Modal(document.getElementById('entradaMaterialModal')).show();
+}
+
+// Búsqueda de productos en entrada de material: se consulta al servidor mientras se escribe
+let busquedaEntradaPendiente = null;
+let busquedaEntradaEnCurso = null;
+
+function filtrarProductosEntrada() {
+    const busqueda = document.getElementById('buscar_producto_entrada').value.trim();
+    const listaProductos = document.getElementById('lista_productos_entrada');
+    
+    clearTimeout(busquedaEntradaPendiente);
+    if (busquedaEntradaEnCurso) {
+        busquedaEntradaEnCurso.abort();
+        busquedaEntradaEnCurso = null;
+    }
+    if (busqueda.length === 0) {
+        listaProductos.style.display = 'none';
+        return;
+    }
+    
+    busquedaEntradaPendiente = setTimeout(() => {
+        const controlador = new AbortController();
+        busquedaEntradaEnCurso = controlador;
+        fetch(`/api/productos/buscar?q=${encodeURIComponent(busqueda)}`, {signal: controlador.signal})
+            .then(response => response.json())
+            .then(data => {
+                busquedaEntradaEnCurso = null;
+                mostrarProductosEntrada(data.productos || []);
+            })
+            .catch(error => {
+                if (error.name !== 'AbortError') {
+                    console.error('Error:', error);
+                }
+            });
+    }, 150);
+}
+
+function mostrarProductosEntrada(productos) {
+    const listaProductos = document.getElementById('lista_productos_entrada');
+    listaProductos.replaceChildren(...productos.map(producto => {
+        const item = document.createElement('div');
+        item.className = 'producto-item p-2 border-bottom';
+        item.dataset.id = producto.id;
+        const nombre = document.createElement('strong');
+        nombre.textContent = producto.descripcion;
+        item.appendChild(nombre);
+        if (producto.codigo) {
+            const codigo = document.createElement('small');
+            codigo.className = 'text-muted';
+            codigo.textContent = `Código: ${producto.codigo}`;
+            item.append(document.createElement('br'), codigo);
+        }
+        item.addEventListener('click', () =>
+            seleccionarProductoEntrada(producto.id, producto.descripcion, producto.codigo || ''));
+        return item;
+    }));
+    listaProductos.style.display = productos.length ? 'block' : 'none';
+}
+
+// Función para seleccionar producto en entrada de material
+function seleccionarProductoEntrada(id, nombre, codigo) {
+    document.getElementById('producto_id_entrada').value = id;
+    document.getElementById('buscar_producto_entrada').value = nombre;
+    document.getElementById('nombre_producto_entrada').textContent = nombre + (codigo ? ` (${codigo})` : '');
+    document.getElementById('producto_seleccionado_entrada').style.display = 'block';
+    document.getElementById('lista_productos_entrada').style.display = 'none';
+}
+
+// Función para filtrar productos en salida de material (solo con stock)
+function filtrarProductosSalida() {
+    mostrarCoincidencias('buscar_producto_salida', 'lista_productos_salida', 'bg-success',
+        fila => seleccionarProductoSalida(fila.id, fila.descripcion, fila.codigo || '', fila.stock_total));
+}
+
+// Función para seleccionar producto en salida de material
+function seleccionarProductoSalida(id, nombre, codigo, stock) {
+    document.getElementById('producto_id_salida').value = id;
+    document.getElementById('buscar_producto_salida').value = nombre;
+    document.getElementById('nombre_producto_salida').textContent = nombre + (codigo ? ` (${codigo})` : '');
+    document.getElementById('stock_producto_salida').textContent = `Stock: ${stock}`;
+    document.getElementById('producto_seleccionado_salida').style.display = 'block';
+    document.getElementById('lista_productos_salida').style.display = 'none';
+    
+    // Cargar ubicaciones con stock para este producto
+    cargarUbicacionesConStock();
+}
+
+// Variables globales para el control de stock
+let ubicacionesConStock = {};
+
+function cargarUbicacionesConStock() {
+    const productoId = document.getElementById('producto_id_salida').value;
+    const ubicacionSelect = document.getElementById('salida_ubicacion_id');
+    const btnConfirmar = document.getElementById('btn_confirmar_salida');
+    
+    // Limpiar ubicaciones
+    ubicacionSelect.innerHTML = '<option value="">Cargando ubicaciones...</option>';
+    btnConfirmar.disabled = true;
+    
+    if (productoId) {
+        fetch(`/api/producto/${productoId}/ubicaciones-stock`)
+            .then(response => response.json())
+            .then(data => {
+                ubicacionSelect.innerHTML = '<option value="">Seleccionar ubicación...</option>';
+                ubicacionesConStock = {};
+                
+                if (data.ubicaciones && data.ubicaciones.length > 0) {
+                    data.ubicaciones.forEach(ubicacion => {
+                        const option = document.createElement('option');
+                        option.value = ubicacion.ubicacion_id;
+                        option.textContent = `${ubicacion.codigo} - Stock: ${ubicacion.cantidad}`;
+                        ubicacionSelect.appendChild(option);
+                        
+                        // Guardar info de stock para validación
+                        ubicacionesConStock[ubicacion.ubicacion_id] = ubicacion.cantidad;
+                    });
+                } else {
+                    ubicacionSelect.innerHTML = '<option value="">No hay stock disponible</option>';
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                ubicacionSelect.innerHTML = '<option value="">Error al cargar ubicaciones</option>';
+            });
+    } else {
+        ubicacionSelect.innerHTML = '<option value="">Primero selecciona un producto</option>';
+    }
+}
+
+function mostrarStockDisponible() {
+    const ubicacionId = document.getElementById('salida_ubicacion_id').value;
+    const cantidadInput = document.getElementById('salida_cantidad');
+    const maxCantidadSpan = document.getElementById('max_cantidad');
+    const stockInfo = document.getElementById('stock_disponible_info');
+    const btnConfirmar = document.getElementById('btn_confirmar_salida');
+    
+    if (ubicacionId && ubicacionesConStock[ubicacionId]) {
+        const stockDisponible = ubicacionesConStock[ubicacionId];
+        maxCantidadSpan.textContent = stockDisponible;
+        cantidadInput.max = stockDisponible;
+        cantidadInput.value = '';
+        stockInfo.textContent = `Stock disponible en esta ubicación: ${stockDisponible}`;
+        stockInfo.className = 'form-text text-info';
+        btnConfirmar.disabled = false;
+        
+        // Validar cantidad en tiempo real
+        cantidadInput.oninput = function() {
+            const cantidad = parseInt(this.value);
+            if (cantidad > stockDisponible) {
+                this.value = stockDisponible;
+                stockInfo.textContent = `Cantidad ajustada al máximo disponible: ${stockDisponible}`;
+                stockInfo.className = 'form-text text-warning';
+            } else if (cantidad > 0) {
+                stockInfo.textContent = `Stock disponible en esta ubicación: ${stockDisponible}`;
+                stockInfo.className = 'form-text text-info';
+            }
+        };
+    } else {
+        maxCantidadSpan.textContent = '0';
+        cantidadInput.max = 0;
+        cantidadInput.value = '';
+        stockInfo.textContent = '';
+        btnConfirmar.disabled = true;
+    }
+}
+
+function sugerirUbicacionesSalida() {
+    const productoId = document.getElementById('producto_id_salida').value;
+    const cantidad = parseInt(document.getElementById('cantidad_sugerencia_salida').value);
+    const sugerenciaDiv = document.getElementById('sugerencia_salida');
+    
+    if (!productoId || !(cantidad > 0)) {
+        sugerenciaDiv.textContent = 'Selecciona un producto e indica la cantidad requerida';
+        sugerenciaDiv.className = 'form-text text-warning';
+        return;
+    }
+    
+    fetch(`/api/producto/${productoId}/sugerir-salida?cantidad=${cantidad}`)
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                sugerenciaDiv.textContent = data.error;
+                sugerenciaDiv.className = 'form-text text-danger';
+                return;
+            }
+            
+            const detalle = data.lineas.map(linea => `${linea.codigo}: ${linea.cantidad}`).join(', ');
+            let mensaje = `Retirar de ${detalle}`;
+            if (!data.completa) {
+                mensaje += ` (faltan ${data.faltante})`;
+            }
+            sugerenciaDiv.textContent = mensaje;
+            sugerenciaDiv.className = data.completa ? 'form-text text-success' : 'form-text text-warning';
+            
+            // Pre-seleccionar la primera ubicación sugerida
+            if (data.lineas.length > 0) {
+                document.getElementById('salida_ubicacion_id').value = data.lineas[0].ubicacion_id;
+                mostrarStockDisponible();
+                document.getElementById('salida_cantidad').value = data.lineas[0].cantidad;
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            sugerenciaDiv.textContent = 'Error al obtener sugerencia';
+            sugerenciaDiv.className = 'form-text text-danger';
+        });
+}
+
+// Enfocar en la barra de búsqueda al cargar la página
+document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('search').focus();
+    
+    // Event listeners para limpiar selección cuando se empieza a escribir de nuevo
+    document.getElementById('buscar_producto_entrada').addEventListener('input', function() {
+        if (this.value === '') {
+            document.getElementById('producto_seleccionado_entrada').style.display = 'none';
+            document.getElementById('producto_id_entrada').value = '';
+        }
+    });
+    
+    document.getElementById('buscar_producto_salida').addEventListener('input', function() {
+        if (this.value === '') {
+            document.getElementById('producto_seleccionado_salida').style.display = 'none';
+            document.getElementById('producto_id_salida').value = '';
+            document.getElementById('salida_ubicacion_id').innerHTML = '<option value="">Primero selecciona un producto</option>';
+            document.getElementById('btn_confirmar_salida').disabled = true;
+        }
+    });
+});
+
+function limpiarFiltros() {
+    // Limpiar campos específicos del inventario
+    document.getElementById('search').value = '';
+    document.getElementById('categoria').value = '';
+    
+    // Enviar formulario inmediatamente
+    document.getElementById('filtrosForm').submit();
+}
+
+function exportarInventario() {
+    // Obtener parámetros actuales de la URL
+    const urlParams = new URLSearchParams(window.location.search);
+    
+    // Construir URL de exportación con los mismos filtros
+    const exportUrl = '/exportar/inventario?' + urlParams.toString();
+    
+    // Descargar archivo
+    window.location.href = exportUrl;
+}
+
+// Funciones para cambio de ubicación
+let ubicacionesConStockCambio = {};
+
+function filtrarProductosCambio() {
+    mostrarCoincidencias('buscar_producto_cambio', 'lista_productos_cambio', 'bg-info',
+        fila => seleccionarProductoCambio(fila.id, fila.descripcion, fila.codigo || ''));
+}
+
+function seleccionarProductoCambio(id, nombre, codigo) {
+    document.getElementById('producto_id_cambio').value = id;
+    document.getElementById('buscar_producto_cambio').value = nombre;
+    document.getElementById('nombre_producto_cambio').textContent = nombre + (codigo ? ` (${codigo})` : '');
+    document.getElementById('producto_seleccionado_cambio').style.display = 'block';
+    document.getElementById('lista_productos_cambio').style.display = 'none';
+    
+    // Cargar ubicaciones con stock para este producto
+    cargarUbicacionesOrigenCambio();
+}
+
+function cargarUbicacionesOrigenCambio() {
+    const productoId = document.getElementById('producto_id_cambio').value;
+    const ubicacionSelect = document.getElementById('ubicacion_origen_id');
+    
+    // Limpiar ubicaciones
+    ubicacionSelect.innerHTML = '<option value="">Cargando ubicaciones...</option>';
+    
+    if (productoId) {
+        fetch(`/api/producto/${productoId}/ubicaciones-stock`)
+            .then(response => response.json())
+            .then(data => {
+                ubicacionSelect.innerHTML = '<option value="">Seleccionar ubicación origen...</option>';
+                ubicacionesConStockCambio = {};
+                
+                if (data.ubicaciones && data.ubicaciones.length > 0) {
+                    data.ubicaciones.forEach(ubicacion => {
+                        const option = document.createElement('option');
+                        option.value = ubicacion.ubicacion_id;
+                        option.textContent = `${ubicacion.codigo} - Stock: ${ubicacion.cantidad}`;
+                        ubicacionSelect.appendChild(option);
+                        
+                        // Guardar info de stock para validación
+                        ubicacionesConStockCambio[ubicacion.ubicacion_id] = ubicacion.cantidad;
+                    });
+                } else {
+                    ubicacionSelect.innerHTML = '<option value="">No hay stock disponible</option>';
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                ubicacionSelect.innerHTML = '<option value="">Error al cargar ubicaciones</option>';
+            });
+    } else {
+        ubicacionSelect.innerHTML = '<option value="">Primero selecciona un producto</option>';
+    }
+}
+
+function actualizarStockOrigen() {
+    const ubicacionId = document.getElementById('ubicacion_origen_id').value;
+    const cantidadInput = document.getElementById('cantidad_mover');
+    const stockDisponibleSpan = document.getElementById('stock_disponible_origen');
+    const stockInfo = document.getElementById('stock_origen_info');
+    const btnConfirmar = document.getElementById('btn_confirmar_cambio');
+    
+    if (ubicacionId && ubicacionesConStockCambio[ubicacionId]) {
+        const stockDisponible = ubicacionesConStockCambio[ubicacionId];
+        stockDisponibleSpan.textContent = stockDisponible;
+        cantidadInput.max = stockDisponible;
+        cantidadInput.value = '';
+        stockInfo.textContent = `Stock disponible en esta ubicación: ${stockDisponible}`;
+        stockInfo.className = 'form-text text-info';
+        btnConfirmar.disabled = false;
+        
+        // Validar cantidad en tiempo real
+        cantidadInput.oninput = function() {
+            const cantidad = parseInt(this.value);
+            if (cantidad > stockDisponible) {
+                this.value = stockDisponible;
+                stockInfo.textContent = `Cantidad ajustada al máximo disponible: ${stockDisponible}`;
+                stockInfo.className = 'form-text text-warning';
+            } else if (cantidad > 0) {
+                stockInfo.textContent = `Stock disponible en esta ubicación: ${stockDisponible}`;
+                stockInfo.className = 'form-text text-info';
+            }
+        };
+    } else {
+        stockDisponibleSpan.textContent = '0';
+        cantidadInput.max = 0;
+        cantidadInput.value = '';
+        stockInfo.textContent = '';
+        btnConfirmar.disabled = true;
+    }
+}
+
+// Event listener para limpiar selección cuando se empieza a escribir de nuevo
+document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('buscar_producto_cambio').addEventListener('input', function() {
+        if (this.value === '') {
+            document.getElementById('producto_seleccionado_cambio').style.display = 'none';
+            document.getElementById('producto_id_cambio').value = '';
+            document.getElementById('ubicacion_origen_id').innerHTML = '<option value="">Primero selecciona un producto</option>';
+            document.getElementById('btn_confirmar_cambio').disabled = true;
+        }
+    });
+});
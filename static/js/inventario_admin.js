@@ -0,0 +1,157 @@
+// Funciones de administrador para edición rápida
+let cambiosStock = {};
+
+function editarStockRapido(productoId, productoNombre) {
+    // Cargar información del producto y sus ubicaciones
+    fetch(`/api/producto/${productoId}/ubicaciones-stock`)
+        .then(response => response.json())
+        .then(data => {
+            // Mostrar información del producto
+            document.getElementById('producto-info').innerHTML = `
+                <div class="card">
+                    <div class="card-body">
+                        <h6><i class="fas fa-box me-2"></i>${productoNombre}</h6>
+                        <small class="text-muted">ID: ${productoId}</small>
+                    </div>
+                </div>
+            `;
+            
+            // Mostrar ubicaciones con stock
+            let ubicacionesHtml = '';
+            if (data.ubicaciones && data.ubicaciones.length > 0) {
+                ubicacionesHtml = `
+                    <h6><i class="fas fa-map-marker-alt me-2"></i>Ubicaciones con Stock</h6>
+                    <div class="table-responsive">
+                        <table class="table table-sm">
+                            <thead>
+                                <tr>
+                                    <th>Ubicación</th>
+                                    <th>Stock Actual</th>
+                                    <th>Nuevo Stock</th>
+                                    <th>Acción</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                `;
+                
+                data.ubicaciones.forEach(ubicacion => {
+                    ubicacionesHtml += `
+                        <tr>
+                            <td><span class="badge bg-info">${ubicacion.codigo}</span></td>
+                            <td><strong>${ubicacion.cantidad}</strong></td>
+                            <td>
+                                <input type="number" class="form-control form-control-sm" 
+                                       id="stock_${ubicacion.ubicacion_id}" 
+                                       value="${ubicacion.cantidad}" 
+                                       min="0"
+                                       onchange="registrarCambio(${productoId}, ${ubicacion.ubicacion_id}, ${ubicacion.cantidad}, this.value)">
+                            </td>
+                            <td>
+                                <button type="button" class="btn btn-sm btn-danger" 
+                                        onclick="eliminarUbicacion(${productoId}, ${ubicacion.ubicacion_id}, '${ubicacion.codigo}')">
+                                    <i class="fas fa-trash"></i>
+                                </button>
+                            </td>
+                        </tr>
+                    `;
+                });
+                
+                ubicacionesHtml += `
+                            </tbody>
+                        </table>
+                    </div>
+                `;
+            } else {
+                ubicacionesHtml = `
+                    <div class="alert alert-info">
+                        <i class="fas fa-info-circle me-2"></i>
+                        Este producto no tiene stock en ninguna ubicación
+                    </div>
+                `;
+            }
+            
+            document.getElementById('ubicaciones-stock').innerHTML = ubicacionesHtml;
+            
+            // Limpiar cambios pendientes
+            cambiosStock = {};
+            
+            // Mostrar modal
+            new bootstrap.Modal(document.getElementById('editarStockModal')).show();
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al cargar información del producto');
+        });
+}
+
+function registrarCambio(productoId, ubicacionId, stockActual, nuevoStock) {
+    const key = `${productoId}_${ubicacionId}`;
+    if (parseInt(nuevoStock) !== parseInt(stockActual)) {
+        cambiosStock[key] = {
+            producto_id: productoId,
+            ubicacion_id: ubicacionId,
+            stock_actual: parseInt(stockActual),
+            nuevo_stock: parseInt(nuevoStock)
+        };
+    } else {
+        delete cambiosStock[key];
+    }
+    
+    // Habilitar/deshabilitar botón de guardar
+    const btnGuardar = document.getElementById('guardarCambiosStock');
+    btnGuardar.disabled = Object.keys(cambiosStock).length === 0;
+}
+
+function eliminarUbicacion(productoId, ubicacionId, codigoUbicacion) {
+    if (confirm(`¿Estás seguro de eliminar todo el stock de la ubicación ${codigoUbicacion}?`)) {
+        const key = `${productoId}_${ubicacionId}`;
+        cambiosStock[key] = {
+            producto_id: productoId,
+            ubicacion_id: ubicacionId,
+            stock_actual: parseInt(document.getElementById(`stock_${ubicacionId}`).getAttribute('data-original') || 0),
+            nuevo_stock: 0
+        };
+        
+        document.getElementById(`stock_${ubicacionId}`).value = 0;
+        document.getElementById('guardarCambiosStock').disabled = false;
+    }
+}
+
+// Event listener para guardar cambios
+document.addEventListener('DOMContentLoaded', function() {
+    const btnGuardar = document.getElementById('guardarCambiosStock');
+    if (btnGuardar) {
+        btnGuardar.addEventListener('click', function() {
+            if (Object.keys(cambiosStock).length === 0) {
+                alert('No hay cambios para guardar');
+                return;
+            }
+            
+            if (!confirm(`¿Confirmar ${Object.keys(cambiosStock).length} cambio(s) de stock?`)) {
+                return;
+            }
+            
+            // Enviar cambios al servidor
+            fetch('/admin/actualizar-stock-rapido', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({cambios: cambiosStock})
+            })
+            .then(response => response.json())
+            .then(data => {
+                if (data.success) {
+                    alert(`✅ ${data.cambios_aplicados} cambio(s) aplicado(s) correctamente`);
+                    location.reload(); // Recargar página para ver cambios
+                } else {
+                    alert(`❌ Error: ${data.error}`);
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                alert('Error al guardar cambios');
+            });
+        });
+    }
+});
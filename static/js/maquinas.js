@@ -0,0 +1,75 @@
+function verDetallesMaquina(id, nombre) {
+    document.getElementById('detallesMaquinaContent').innerHTML = `
+        <div class="text-center">
+            <div class="spinner-border" role="status">
+                <span class="visually-hidden">Cargando...</span>
+            </div>
+        </div>
+    `;
+
+    fetch(`/api/maquina/${id}`)
+        .then(response => response.json())
+        .then(data => {
+            let productosHtml = '';
+            if (data.productos && data.productos.length > 0) {
+                productosHtml = data.productos.map(prod => 
+                    `<li class="list-group-item d-flex justify-content-between align-items-center">
+                        <div>
+                            <strong>${prod.descripcion}</strong>
+                            ${prod.codigo ? `<br><small class="text-muted">Código: ${prod.codigo}</small>` : ''}
+                        </div>
+                        <span class="badge bg-info rounded-pill">ID: ${prod.id}</span>
+                    </li>`
+                ).join('');
+            } else {
+                productosHtml = '<li class="list-group-item text-muted">No hay productos asignados</li>';
+            }
+
+            document.getElementById('detallesMaquinaContent').innerHTML = `
+                <div class="row">
+                    <div class="col-md-6">
+                        <h6><i class="fas fa-info-circle me-2"></i>Información General</h6>
+                        <ul class="list-group list-group-flush">
+                            <li class="list-group-item"><strong>ID:</strong> ${data.id}</li>
+                            <li class="list-group-item"><strong>Nombre:</strong> ${data.nombre}</li>
+                            <li class="list-group-item"><strong>Productos:</strong> ${data.productos_count}</li>
+                            <li class="list-group-item"><strong>Creada:</strong> ${data.fecha_creacion || 'No disponible'}</li>
+                        </ul>
+                    </div>
+                    <div class="col-md-6">
+                        <h6><i class="fas fa-boxes me-2"></i>Productos que Usa</h6>
+                        <div style="max-height: 300px; overflow-y: auto;">
+                            <ul class="list-group">
+                                ${productosHtml}
+                            </ul>
+                        </div>
+                    </div>
+                </div>
+            `;
+        })
+        .catch(error => {
+            document.getElementById('detallesMaquinaContent').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error al cargar los detalles: ${error.message}
+                </div>
+            `;
+        });
+
+    new bootstrap.Modal(document.getElementById('detallesMaquinaModal')).show();
+}
+
+function confirmarEliminarMaquina(id, nombre) {
+    if (confirm(`¿Estás seguro de que deseas eliminar la máquina "${nombre}"?\n\nEsta acción no se puede deshacer.`)) {
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = `/maquina/eliminar/${id}`;
+        document.body.appendChild(form);
+        form.submit();
+    }
+}
+
+function exportarMaquinas() {
+    const params = new URLSearchParams(window.location.search);
+    window.location.href = '/exportar/maquinas?' + params.toString();
+}
@@ -0,0 +1,213 @@
+// Tabla de productos: carga columnar y solo las filas visibles en el DOM
+let tablaProductos = null;
+
+function badgeStock(fila) {
+    if (fila.stock_total >= fila.cantidad_requerida) {
+        return `<span class="badge bg-success">${fila.stock_total}</span>`;
+    }
+    return fila.stock_total > 0 ? `<span class="badge bg-warning">${fila.stock_total}</span>` : '<span class="badge bg-danger">0</span>';
+}
+
+function badgeStockMinimo(fila) {
+    if (!fila.stock_minimo) {
+        return '<span class="text-muted">-</span>';
+    }
+    if (fila.stock_total <= fila.stock_minimo) {
+        return `<span class="badge bg-danger" title="Stock por debajo del mínimo">${fila.stock_minimo}</span>`;
+    }
+    return `<span class="badge bg-secondary">${fila.stock_minimo}</span>`;
+}
+
+function dibujarFilaProducto(i) {
+    const fila = tablaProductos.fila(i);
+    const miniatura = fila.miniatura
+        ? `<img src="${escaparHtml(fila.miniatura)}" width="48" height="48" loading="lazy" decoding="async" class="rounded" style="object-fit: contain;" alt="">`
+        : '<i class="fas fa-image fa-lg text-muted opacity-50"></i>';
+    return `
+        <tr>
+            <td class="text-center">${miniatura}</td>
+            <td>
+                <strong class="texto-recortado">${escaparHtml(fila.descripcion)}</strong>
+                ${fila.notas ? `<small class="text-muted texto-recortado">${escaparHtml(fila.notas)}</small>` : ''}
+            </td>
+            <td>${fila.codigo ? `<span class="badge bg-secondary">${escaparHtml(fila.codigo)}</span>` : '<span class="text-muted">-</span>'}</td>
+            <td>
+                ${escaparHtml(fila.categoria || '-')}
+                ${fila.subcategoria ? `<br><small class="text-muted">${escaparHtml(fila.subcategoria)}</small>` : ''}
+            </td>
+            <td>${escaparHtml(fila.marca || '-')}</td>
+            <td>${badgeStock(fila)}</td>
+            <td class="text-center">${badgeStockMinimo(fila)}</td>
+            <td>${fila.cantidad_requerida}</td>
+            <td>${escaparHtml(fila.maquina || '-')}</td>
+            <td>
+                <div class="btn-group" role="group">
+                    <a href="/producto/editar/${fila.id}" class="btn btn-sm btn-outline-primary" title="Editar producto">
+                        <i class="fas fa-edit"></i>
+                    </a>
+                    <button type="button" class="btn btn-sm btn-outline-info" onclick="verDetalles(${fila.id})" title="Ver detalles">
+                        <i class="fas fa-eye"></i>
+                    </button>
+                </div>
+            </td>
+        </tr>`;
+}
+
+function cargarProductos() {
+    const contenedor = document.getElementById('tabla_productos');
+    const vista = new TablaVirtual(contenedor, 10, dibujarFilaProducto);
+
+    cargarTablaColumnar('/api/productos/tabla' + window.location.search)
+        .then(tabla => {
+            tablaProductos = tabla;
+            document.getElementById('total_productos').textContent = tabla.total;
+            contenedor.classList.toggle('d-none', tabla.total === 0);
+            document.getElementById('productos_vacio').classList.toggle('d-none', tabla.total > 0);
+            vista.mostrar(tabla.total);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            contenedor.querySelector('tbody').innerHTML =
+                '<tr><td colspan="10" class="text-center text-danger py-4">Error al cargar los productos</td></tr>';
+        });
+}
+
+document.addEventListener('DOMContentLoaded', cargarProductos);
+
+function verDetalles(productoId) {
+    // Cargar detalles del producto vía AJAX
+    fetch(`/api/producto/${productoId}`)
+        .then(response => response.json())
+        .then(data => {
+            // Crear tabla de ubicaciones
+            let ubicacionesHtml = '';
+            if (data.ubicaciones && data.ubicaciones.length > 0) {
+                ubicacionesHtml = `
+                    <h6 class="mt-4 mb-3">
+                        <i class="fas fa-map-marker-alt me-2"></i>
+                        Ubicaciones con Stock
+                    </h6>
+                    <div class="table-responsive">
+                        <table class="table table-sm table-striped">
+                            <thead>
+                                <tr>
+                                    <th>Ubicación</th>
+                                    <th>Cantidad</th>
+                                    <th>Última Actualización</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                `;
+
+                data.ubicaciones.forEach(ubicacion => {
+                    const fecha = new Date(ubicacion.fecha_actualizacion).toLocaleDateString('es-ES');
+                    ubicacionesHtml += `
+                        <tr>
+                            <td><span class="badge bg-info">${ubicacion.codigo}</span></td>
+                            <td><strong>${ubicacion.cantidad}</strong></td>
+                            <td><small class="text-muted">${fecha}</small></td>
+                        </tr>
+                    `;
+                });
+
+                ubicacionesHtml += `
+                            </tbody>
+                        </table>
+                    </div>
+                `;
+            } else {
+                ubicacionesHtml = `
+                    <h6 class="mt-4 mb-3">
+                        <i class="fas fa-map-marker-alt me-2"></i>
+                        Ubicaciones con Stock
+                    </h6>
+                    <div class="alert alert-warning">
+                        <i class="fas fa-exclamation-triangle me-2"></i>
+                        Este producto no tiene stock en ninguna ubicación
+                    </div>
+                `;
+            }
+
+            // Estado del stock
+            let estadoStock = '';
+            if (data.stock_total >= data.cantidad_requerida) {
+                estadoStock = '<span class="badge bg-success">Stock Suficiente</span>';
+            } else if (data.stock_total > 0) {
+                estadoStock = '<span class="badge bg-warning">Stock Bajo</span>';
+            } else {
+                estadoStock = '<span class="badge bg-danger">Sin Stock</span>';
+            }
+
+            document.getElementById('detallesContent').innerHTML = `
+                <div class="row">
+                    <div class="col-md-4">
+                        <a href="${data.imagen_completa_url}" target="_blank">
+                            <img src="${data.imagen_url}" 
+                                 class="img-fluid rounded" 
+                                 onerror="handleImageError(this)"
+                                 alt="Producto ${data.id}">
+                        </a>
+                    </div>
+                    <div class="col-md-8">
+                        <h5>${data.descripcion}</h5>
+                        <table class="table table-sm">
+                            <tr><td><strong>ID:</strong></td><td>${data.id}</td></tr>
+                            <tr><td><strong>Código:</strong></td><td>${data.codigo || 'Sin código'}</td></tr>
+                            <tr><td><strong>Categoría:</strong></td><td>${data.categoria || 'Sin categoría'}</td></tr>
+                            <tr><td><strong>Subcategoría:</strong></td><td>${data.subcategoria || 'Sin subcategoría'}</td></tr>
+                            <tr><td><strong>Marca:</strong></td><td>${data.marca || 'Sin marca'}</td></tr>
+                            <tr><td><strong>Máquina:</strong></td><td>${data.maquina || 'N/A'}</td></tr>
+                            <tr><td><strong>Proveedor:</strong></td><td>${data.proveedor ? `
+                                <div>
+                                    <strong>${data.proveedor}</strong>
+                                    ${data.proveedor_contacto ? `<br><small class="text-muted">Contacto: ${data.proveedor_contacto}</small>` : ''}
+                                    ${data.proveedor_telefono ? `<br><small class="text-muted"><i class="fas fa-phone"></i> ${data.proveedor_telefono}</small>` : ''}
+                                    ${data.proveedor_email ? `<br><small class="text-muted"><i class="fas fa-envelope"></i> ${data.proveedor_email}</small>` : ''}
+                                    ${data.proveedor_web ? `<br><small class="text-muted"><i class="fas fa-globe"></i> <a href="${data.proveedor_web}" target="_blank">${data.proveedor_web}</a></small>` : ''}
+                                </div>
+                            ` : 'Sin proveedor'}</td></tr>
+                            <tr><td><strong>Stock Total:</strong></td><td><span class="fs-5 fw-bold">${data.stock_total}</span> ${estadoStock}</td></tr>
+                            <tr><td><strong>Cantidad Requerida:</strong></td><td>${data.cantidad_requerida}</td></tr>
+                            <tr><td><strong>Notas:</strong></td><td>${data.notas || 'Sin notas'}</td></tr>
+                        </table>
+                    </div>
+                </div>
+                ${ubicacionesHtml}
+            `;
+
+            // Configurar botón de editar
+            document.getElementById('editarDesdeModal').onclick = function() {
+                window.location.href = `/producto/editar/${data.id}`;
+            };
+
+            new bootstrap.Modal(document.getElementById('detallesModal')).show();
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al cargar los detalles del producto');
+        });
+}
+
+function exportarDatos() {
+    // Obtener parámetros actuales de la URL
+    const urlParams = new URLSearchParams(window.location.search);
+
+    // Construir URL de exportación con los mismos filtros
+    const exportUrl = '/exportar/productos?' + urlParams.toString();
+
+    // Descargar archivo
+    window.location.href = exportUrl;
+}
+
+function limpiarFiltros() {
+    // Limpiar todos los campos específicos de productos
+    document.getElementById('search').value = '';
+    document.getElementById('codigo').value = '';
+    document.getElementById('categoria').value = '';
+    document.getElementById('marca').value = '';
+    document.getElementById('maquina').value = '';
+    document.getElementById('stock').value = '';
+
+    // Enviar formulario inmediatamente
+    document.getElementById('filtrosForm').submit();
+}
@@ -0,0 +1,13 @@
+// Validación del formulario
+document.addEventListener('DOMContentLoaded', function() {
+    const form = document.querySelector('form');
+    const nombreInput = document.getElementById('nombre');
+
+    form.addEventListener('submit', function(e) {
+        if (!nombreInput.value.trim()) {
+            e.preventDefault();
+            alert('El nombre del proveedor es requerido');
+            nombreInput.focus();
+        }
+    });
+});
@@ -0,0 +1,92 @@
+function verDetallesProveedor(id, nombre) {
+    document.getElementById('detallesProveedorContent').innerHTML = `
+        <div class="text-center">
+            <div class="spinner-border" role="status">
+                <span class="visually-hidden">Cargando...</span>
+            </div>
+        </div>
+    `;
+
+    fetch(`/api/proveedor/${id}`)
+        .then(response => response.json())
+        .then(data => {
+            let productosHtml = '';
+            if (data.productos && data.productos.length > 0) {
+                productosHtml = data.productos.map(prod => 
+                    `<li class="list-group-item d-flex justify-content-between align-items-center">
+                        <div>
+                            <strong>${prod.descripcion}</strong>
+                            ${prod.codigo ? `<br><small class="text-muted">Código: ${prod.codigo}</small>` : ''}
+                        </div>
+                        <span class="badge bg-info rounded-pill">ID: ${prod.id}</span>
+                    </li>`
+                ).join('');
+            } else {
+                productosHtml = '<li class="list-group-item text-muted">No hay productos asignados</li>';
+            }
+
+            document.getElementById('detallesProveedorContent').innerHTML = `
+                <div class="row">
+                    <div class="col-md-6">
+                        <h6><i class="fas fa-info-circle me-2"></i>Información General</h6>
+                        <ul class="list-group list-group-flush">
+                            <li class="list-group-item"><strong>ID:</strong> ${data.id}</li>
+                            <li class="list-group-item"><strong>Nombre:</strong> ${data.nombre}</li>
+                            <li class="list-group-item"><strong>Contacto:</strong> ${data.contacto || 'No especificado'}</li>
+                            <li class="list-group-item"><strong>Teléfono:</strong> 
+                                ${data.telefono ? `<a href="tel:${data.telefono}">${data.telefono}</a>` : 'No especificado'}
+                            </li>
+                            <li class="list-group-item"><strong>Email:</strong> 
+                                ${data.email ? `<a href="mailto:${data.email}">${data.email}</a>` : 'No especificado'}
+                            </li>
+                            <li class="list-group-item"><strong>Página Web:</strong> 
+                                ${data.pagina_web ? `<a href="${data.pagina_web}" target="_blank">${data.pagina_web}</a>` : 'No especificado'}
+                            </li>
+                            <li class="list-group-item"><strong>Dirección:</strong> ${data.direccion || 'No especificada'}</li>
+                            <li class="list-group-item"><strong>Productos:</strong> ${data.productos_count}</li>
+                            <li class="list-group-item"><strong>Creado:</strong> ${data.fecha_creacion || 'No disponible'}</li>
+                        </ul>
+                        ${data.notas ? `
+                        <div class="mt-3">
+                            <h6><i class="fas fa-sticky-note me-2"></i>Notas</h6>
+                            <div class="alert alert-light">${data.notas}</div>
+                        </div>
+                        ` : ''}
+                    </div>
+                    <div class="col-md-6">
+                        <h6><i class="fas fa-boxes me-2"></i>Productos Suministrados</h6>
+                        <div style="max-height: 400px; overflow-y: auto;">
+                            <ul class="list-group">
+                                ${productosHtml}
+                            </ul>
+                        </div>
+                    </div>
+                </div>
+            `;
+        })
+        .catch(error => {
+            document.getElementById('detallesProveedorContent').innerHTML = `
+                <div class="alert alert-danger">
+                    <i class="fas fa-exclamation-triangle me-2"></i>
+                    Error al cargar los detalles: ${error.message}
+                </div>
+            `;
+        });
+
+    new bootstrap.Modal(document.getElementById('detallesProveedorModal')).show();
+}
+
+function confirmarEliminarProveedor(id, nombre) {
+    if (confirm(`¿Estás seguro de que deseas eliminar el proveedor "${nombre}"?\n\nEsta acción no se puede deshacer.`)) {
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = `/proveedor/eliminar/${id}`;
+        document.body.appendChild(form);
+        form.submit();
+    }
+}
+
+function exportarProveedores() {
+    const params = new URLSearchParams(window.location.search);
+    window.location.href = '/exportar/proveedores?' + params.toString();
+}
@@ -0,0 +1,136 @@
+// Tablas virtuales: los datos llegan en formato columnar (servicios/tabla_columnar.py)
+// y solo se dibujan en el DOM las filas visibles dentro del contenedor con scroll.
+
+function escaparHtml(texto) {
+    return String(texto ?? '').replace(/[&<>"']/g, c => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[c]);
+}
+
+// Acceso por fila a una tabla columnar; las columnas con diccionario regresan el nombre
+class TablaColumnar {
+    constructor(datos) {
+        this.total = datos.total;
+        this.columnas = datos.columnas;
+        this.diccionarios = datos.diccionarios || {};
+        this.ultimo_cambio = datos.ultimo_cambio || 0;
+    }
+
+    valor(columna, i) {
+        const dato = this.columnas[columna][i];
+        const diccionario = this.diccionarios[columna];
+        if (!diccionario || dato === null) {
+            return dato;
+        }
+        return Array.isArray(dato) ? dato.map(indice => diccionario[indice]) : diccionario[dato];
+    }
+
+    // Cambiar un valor; en columnas con diccionario los nombres nuevos se agregan al diccionario
+    asignar(columna, i, valor) {
+        const diccionario = this.diccionarios[columna];
+        const indice = nombre => {
+            let posicion = diccionario.indexOf(nombre);
+            if (posicion === -1) {
+                posicion = diccionario.push(nombre) - 1;
+            }
+            return posicion;
+        };
+        if (diccionario && valor !== null) {
+            valor = Array.isArray(valor) ? valor.map(indice) : indice(valor);
+        }
+        this.columnas[columna][i] = valor;
+    }
+
+    quitar(i) {
+        for (const columna in this.columnas) {
+            this.columnas[columna].splice(i, 1);
+        }
+        this.total -= 1;
+    }
+
+    fila(i) {
+        const fila = {};
+        for (const columna in this.columnas) {
+            fila[columna] = this.valor(columna, i);
+        }
+        return fila;
+    }
+}
+
+function cargarTablaColumnar(url) {
+    return fetch(url)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(datos => new TablaColumnar(datos));
+}
+
+// Dibuja en el <tbody> del contenedor solo las filas visibles más un margen;
+// dos filas espaciadoras mantienen el alto total para que el scroll sea el real.
+class TablaVirtual {
+    constructor(contenedor, columnas, dibujarFila) {
+        this.contenedor = contenedor;
+        this.tbody = contenedor.querySelector('tbody');
+        this.columnas = columnas;
+        this.dibujarFila = dibujarFila;
+        this.total = 0;
+        this.altoFila = 0;
+        this.margen = 10;
+        this.rango = null;
+        this.pendiente = false;
+        contenedor.addEventListener('scroll', () => this.programar(), {passive: true});
+        window.addEventListener('resize', () => this.programar());
+    }
+
+    mostrar(total) {
+        this.total = total;
+        this.rango = null;
+        this.dibujar();
+    }
+
+    programar() {
+        if (this.pendiente) {
+            return;
+        }
+        this.pendiente = true;
+        requestAnimationFrame(() => {
+            this.pendiente = false;
+            this.dibujar();
+        });
+    }
+
+    espaciador(alto) {
+        return alto > 0 ? `<tr class="espaciador" style="height: ${alto}px"><td colspan="${this.columnas}"></td></tr>` : '';
+    }
+
+    dibujar() {
+        const alto = this.altoFila || 60;
+        const visibles = Math.ceil(this.contenedor.clientHeight / alto) + 1;
+        const primera = Math.max(0, Math.floor(this.contenedor.scrollTop / alto) - this.margen);
+        const ultima = Math.min(this.total, primera + visibles + 2 * this.margen);
+        if (this.rango && this.rango[0] === primera && this.rango[1] === ultima) {
+            return;
+        }
+        this.rango = [primera, ultima];
+
+        const filas = [];
+        for (let i = primera; i < ultima; i++) {
+            filas.push(this.dibujarFila(i));
+        }
+        this.tbody.innerHTML = this.espaciador(primera * alto) + filas.join('') +
+            this.espaciador((this.total - ultima) * alto);
+
+        // El alto real de una fila se mide una vez con la primera que se dibuja
+        if (!this.altoFila && ultima > primera) {
+            const fila = this.tbody.querySelector('tr:not(.espaciador)');
+            if (fila && fila.offsetHeight) {
+                this.altoFila = fila.offsetHeight;
+                this.rango = null;
+                this.dibujar();
+            }
+        }
+    }
+}
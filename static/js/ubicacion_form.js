@@ -0,0 +1,4 @@
+// Enfocar en el campo código al cargar
+document.addEventListener('DOMContentLoaded', function() {
+    document.getElementById('codigo').focus();
+});
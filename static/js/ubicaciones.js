@@ -0,0 +1,107 @@
+function verDetallesUbicacion(ubicacionId) {
+    // Cargar detalles de la ubicación vía AJAX
+    fetch(`/api/ubicacion/${ubicacionId}`)
+        .then(response => response.json())
+        .then(data => {
+            let productosHtml = '';
+            if (data.productos && data.productos.length > 0) {
+                productosHtml = `
+                    <h6 class="mt-4 mb-3">
+                        <i class="fas fa-boxes me-2"></i>
+                        Productos en esta Ubicación
+                    </h6>
+                    <div class="table-responsive">
+                        <table class="table table-sm table-striped">
+                            <thead>
+                                <tr>
+                                    <th>Producto</th>
+                                    <th>Código</th>
+                                    <th>Cantidad</th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                `;
+
+                data.productos.forEach(producto => {
+                    const codigoDisplay = producto.codigo ? producto.codigo : 'Sin código';
+                    productosHtml += `
+                        <tr>
+                            <td><strong>${producto.descripcion}</strong></td>
+                            <td>${producto.codigo ? producto.codigo : '<span class="text-muted">Sin código</span>'}</td>
+                            <td><span class="badge bg-success">${producto.cantidad}</span></td>
+                        </tr>
+                    `;
+                });
+
+                productosHtml += `
+                            </tbody>
+                        </table>
+                    </div>
+                `;
+            } else {
+                productosHtml = `
+                    <h6 class="mt-4 mb-3">
+                        <i class="fas fa-boxes me-2"></i>
+                        Productos en esta Ubicación
+                    </h6>
+                    <div class="alert alert-info">
+                        <i class="fas fa-info-circle me-2"></i>
+                        Esta ubicación no tiene productos almacenados
+                    </div>
+                `;
+            }
+
+            document.getElementById('detallesUbicacionContent').innerHTML = `
+                <div class="row">
+                    <div class="col-md-12">
+                        <table class="table table-sm">
+                            <tr><td><strong>Código:</strong></td><td><span class="badge bg-info">${data.codigo}</span></td></tr>
+                            <tr><td><strong>Nombre:</strong></td><td>${data.nombre || data.codigo}</td></tr>
+                            <tr><td><strong>Total de Productos:</strong></td><td><span class="badge bg-success">${data.productos_count}</span></td></tr>
+                            <tr><td><strong>Stock Total:</strong></td><td><span class="fs-5 fw-bold">${data.stock_total}</span></td></tr>
+                            <tr><td><strong>Fecha de Creación:</strong></td><td>${data.fecha_creacion || 'N/A'}</td></tr>
+                        </table>
+                    </div>
+                </div>
+                ${productosHtml}
+            `;
+
+            // Configurar botón de editar
+            document.getElementById('editarUbicacionDesdeModal').onclick = function() {
+                window.location.href = `/ubicacion/editar/${data.id}`;
+            };
+
+            new bootstrap.Modal(document.getElementById('detallesUbicacionModal')).show();
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('Error al cargar los detalles de la ubicación');
+        });
+}
+
+function eliminarUbicacion(ubicacionId, codigo) {
+    if (confirm(`¿Estás seguro de eliminar la ubicación "${codigo}"?\n\nEsta acción no se puede deshacer.`)) {
+        // Crear formulario para enviar DELETE
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = `/ubicacion/eliminar/${ubicacionId}`;
+        document.body.appendChild(form);
+        form.submit();
+    }
+}
+
+function exportarUbicaciones() {
+    // Obtener parámetros actuales de la URL
+    const urlParams = new URLSearchParams(window.location.search);
+
+    // Construir URL de exportación con los mismos filtros
+    const exportUrl = '/exportar/ubicaciones?' + urlParams.toString();
+
+    // Descargar archivo
+    window.location.href = exportUrl;
+}
+
+function limpiarFiltros() {
+    document.getElementById('search').value = '';
+    document.getElementById('filtrosForm').submit();
+}
@@ -3,11 +3,15 @@
 Script de diagnóstico para identificar la causa de la lentitud en actualizaciones de stock
 """
 
+import sys
 import sqlite3
 import time
 import os
 import psutil
 import logging
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import bitacora
 
 def check_database_health():
     """Verificar salud de la base de datos"""
@@ -70,12 +74,7 @@ def check_database_health():
         
         # Test 3: Inserción en logs
         start_time = time.time()
-        conn.execute('''
-            INSERT INTO operation_logs (admin_user_id, operation_type, description, ip_address)
-            VALUES (1, 'TEST', 'Performance test', '127.0.0.1')
-        ''')
-        log_id = conn.lastrowid
-        conn.execute('DELETE FROM operation_logs WHERE id = ?', (log_id,))
+        bitacora.registrar(conn, 1, '127.0.0.1', 'TEST', texto='Performance test')
         conn.rollback()
         end_time = time.time()
         print(f"Log insertion: {(end_time-start_time)*1000:.2f}ms")
@@ -129,7 +128,7 @@ def check_log_files():
     print("\n📝 LOG FILES")
     print("=" * 50)
     
-    log_files = ['admin_operations.log']
+    log_files = ['logs/admin_operations.log', 'logs/trazas.log']
     
     for log_file in log_files:
         if os.path.exists(log_file):
@@ -180,8 +179,7 @@ def simulate_problematic_operation():
             # Actualizar
             conn.execute('UPDATE inventario SET cantidad = ? WHERE producto_id = ? AND ubicacion_id = ?', (10+i, 1, 1))
             # Log individual (simulado)
-            conn.execute('INSERT INTO operation_logs (admin_user_id, operation_type, description, ip_address) VALUES (1, ?, ?, ?)', 
-                        ('TEST', f'Test operation {i}', '127.0.0.1'))
+            bitacora.registrar(conn, 1, '127.0.0.1', 'TEST', texto=f'Test operation {i}')
         
         conn.rollback()  # No guardar cambios
         end_time = time.time()
@@ -201,9 +199,8 @@ def simulate_problematic_operation():
         conn.executemany('UPDATE inventario SET cantidad = ? WHERE producto_id = ? AND ubicacion_id = ?', updates)
         
         # Logs en lote
-        log_entries = [(1, 'TEST_BATCH', f'Batch test {i}', '127.0.0.1') for i in range(5)]
-        conn.executemany('INSERT INTO operation_logs (admin_user_id, operation_type, description, ip_address) VALUES (?, ?, ?, ?)', 
-                        log_entries)
+        log_entries = [('TEST_BATCH', None, None, None, None, {'texto': f'Batch test {i}'}) for i in range(5)]
+        bitacora.registrar_varios(conn, 1, '127.0.0.1', log_entries)
         
         conn.rollback()  # No guardar cambios
         end_time = time.time()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el almacenamiento por capas de operation_logs (archivos mensuales)
+"""
+
+import sys
+import os
+import sqlite3
+import shutil
+import tempfile
+import calendar
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import bitacora
+from servicios.archivo_logs import ArchivoLogs
+from servicios.escritor import conexion_lectura
+
+def epoch(texto):
+    return calendar.timegm(datetime.fromisoformat(texto).timetuple())
+
+def crear_base(directorio):
+    """Base con operation_logs: 3 meses viejos y algunos registros recientes"""
+    ruta = os.path.join(directorio, 'inventario.db')
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.executescript('''
+        CREATE TABLE admin_users (id INTEGER PRIMARY KEY, username TEXT);
+        INSERT INTO admin_users VALUES (1, 'admin');
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, descripcion TEXT, codigo TEXT);
+        CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY, codigo TEXT);
+    ''')
+    bitacora.crear_tablas(conn)
+    for mes in ('2024-01', '2024-02', '2024-03'):
+        for dia in range(1, 29):
+            for hora in range(10):
+                bitacora.registrar_varios(conn, 1, '10.0.0.1', [('STOCK_EDIT', None, None, None, None, {'texto': f'Edición {mes}-{dia:02d} {hora}'})],
+                                          ts=epoch(f'{mes}-{dia:02d} {hora:02d}:00:00'))
+    bitacora.registrar(conn, 1, '10.0.0.2', 'STOCK_ALERT', productos=3)
+    conn.execute("UPDATE operation_logs SET ts = ? WHERE id = (SELECT MAX(id) FROM operation_logs)",
+                 (epoch('2024-02-10 12:00:00'),))
+    for i in range(50):
+        bitacora.registrar(conn, 1, '10.0.0.1', 'STOCK_EDIT', texto=f'Reciente {i}')
+    conn.commit()
+    conn.close()
+    return ruta
+
+def archivar_todo(archivo, conn):
+    corte = archivo.corte()
+    while archivo.archivar_lote(conn, corte) == archivo.lote:
+        pass
+
+def conexion_escritor(ruta):
+    """Conexión en autocommit como la del escritor"""
+    conn = sqlite3.connect(ruta, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def test_archivar_por_lotes():
+    """Los registros viejos pasan a su archivo mensual y la base principal se compacta"""
+    print("🧪 Probando archivado por lotes...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = crear_base(directorio)
+        archivo = ArchivoLogs(os.path.join(directorio, 'archivo'), dias_calientes=30, lote=300,
+                              diccionarios=('tipos_operacion', 'direcciones_ip'))
+        corte = archivo.corte()
+        conn = conexion_escritor(ruta)
+
+        lotes = []
+        while True:
+            movidos = archivo.archivar_lote(conn, corte)
+            lotes.append(movidos)
+            if movidos < archivo.lote:
+                break
+        assert sum(lotes) == 3 * 280 + 1 and len(lotes) == 3, lotes
+        assert [mes for mes, _ in archivo.meses()] == ['2024-03', '2024-02', '2024-01']
+        assert conn.execute('SELECT COUNT(*) FROM operation_logs').fetchone()[0] == 50
+
+        # Cada archivo lleva su copia de los diccionarios
+        mensual = sqlite3.connect(archivo.ruta_mes('2024-02'))
+        assert mensual.execute('SELECT COUNT(*) FROM tipos_operacion').fetchone()[0] == 2
+        assert mensual.execute('SELECT COUNT(*) FROM direcciones_ip').fetchone()[0] == 2
+        mensual.close()
+
+        # Volver a correr no duplica nada
+        assert archivo.archivar_lote(conn, corte) == 0
+
+        resultado = archivo.compactar(conn)
+        assert resultado['vacuum'] and conn.execute('PRAGMA freelist_count').fetchone()[0] == 0
+        conn.close()
+        print(f"   ✅ {sum(lotes)} registros en {len(lotes)} lotes")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_consulta_entre_capas():
+    """Las consultas siguen en orden a través de la base y los archivos"""
+    print("🧪 Probando consultas entre capas...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = crear_base(directorio)
+        archivo = ArchivoLogs(os.path.join(directorio, 'archivo'), dias_calientes=30, lote=10000)
+        conn = conexion_escritor(ruta)
+        archivar_todo(archivo, conn)
+        conn.close()
+
+        lectura = conexion_lectura(ruta)
+        sql = bitacora.SELECT + ' ORDER BY ol.ts DESC, ol.id DESC LIMIT ?'
+        filas = bitacora.leer(archivo.consultar(lectura, sql, limite=400))
+        assert len(filas) == 400
+        assert [fila['description'] for fila in filas[:50]] == [f'Reciente {i}' for i in range(49, -1, -1)]
+        marcas = [fila['ts'] for fila in filas[50:]]
+        assert marcas == sorted(marcas, reverse=True) and marcas[0] == epoch('2024-03-28 09:00:00')
+        assert marcas[-1] < epoch('2024-03-01') and filas[0]['username'] == 'admin'
+        assert filas[0]['ip_address'] == '10.0.0.1'
+
+        # Solo un mes: se salta la base principal (sin filas en el rango) y los demás archivos
+        filas = archivo.consultar(lectura, '''
+            SELECT * FROM {logs} WHERE ts >= ? AND ts < ? ORDER BY ts DESC LIMIT ?
+        ''', [epoch('2024-01-01'), epoch('2024-02-01')], limite=1000, desde='2024-01-01', hasta='2024-01-31')
+        assert len(filas) == 280 and all(epoch('2024-01-01') <= fila['ts'] < epoch('2024-02-01') for fila in filas)
+
+        alerta = bitacora.leer(archivo.consultar(lectura, bitacora.SELECT + f' WHERE {bitacora.POR_TIPO} ORDER BY ol.ts DESC LIMIT ?',
+                                                 ['STOCK_ALERT'], limite=1))
+        assert alerta[0]['ts'] == epoch('2024-02-10 12:00:00')
+        assert alerta[0]['description'] == 'Alerta de stock bajo enviada - 3 productos afectados'
+
+        estado = archivo.estado(lectura)
+        assert estado['filas_calientes'] == 50
+        assert [(a['mes'], a['filas']) for a in estado['archivos']] == [('2024-03', 280), ('2024-02', 281), ('2024-01', 280)]
+        assert lectura.execute('SELECT COUNT(*) FROM pragma_database_list').fetchone()[0] == 1
+        lectura.close()
+        print("   ✅ Orden y filtros correctos entre capas")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_corte():
+    """El corte es la fecha (UTC, en epoch) menos los días calientes"""
+    print("🧪 Probando corte...")
+
+    archivo = ArchivoLogs(tempfile.mkdtemp(), dias_calientes=90)
+    try:
+        assert archivo.corte(datetime(2025, 4, 1, 8, 30)) == epoch('2025-01-01 08:30:00')
+        print("   ✅ Corte correcto")
+    finally:
+        shutil.rmtree(archivo.directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE ARCHIVO DE LOGS")
+    print("=" * 50)
+
+    test_archivar_por_lotes()
+    test_consulta_entre_capas()
+    test_corte()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el motor de asignación de ubicaciones en salidas de material
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.asignacion_stock import IndiceStock, asignar, asignar_salida
+
+def crear_base_prueba():
+    """Crear una base de datos temporal con stock en varias ubicaciones"""
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(ruta)
+    conn.executescript('''
+        CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY, codigo TEXT UNIQUE NOT NULL, nombre TEXT);
+        CREATE TABLE inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            ubicacion_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(producto_id, ubicacion_id)
+        );
+        INSERT INTO ubicaciones (id, codigo, nombre) VALUES (1, 'A1', 'A1'), (2, 'A2', 'A2'), (3, 'B1', 'B1'), (4, 'B2', 'B2');
+        INSERT INTO inventario (producto_id, ubicacion_id, cantidad, fecha_actualizacion) VALUES
+            (10, 1, 2, '2024-03-01 10:00:00'),
+            (10, 2, 10, '2024-01-01 10:00:00'),
+            (10, 3, 5, '2024-02-01 10:00:00'),
+            (10, 4, 7, '2024-04-01 10:00:00'),
+            (20, 1, 3, '2024-01-01 10:00:00');
+    ''')
+    conn.commit()
+    conn.close()
+    return ruta
+
+def test_estrategias():
+    """Verificar el orden de retiro de cada estrategia"""
+    print("🧪 Probando estrategias de asignación...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceStock(ruta)
+        ubicaciones = indice.ubicaciones(10)
+
+        # Una sola ubicación alcanza: usar la más pequeña que cubra la cantidad
+        resultado = asignar(ubicaciones, 6, 'menos_ubicaciones')
+        assert [l['codigo'] for l in resultado['lineas']] == ['B2']
+
+        # Ninguna alcanza sola: tomar primero las más grandes
+        resultado = asignar(ubicaciones, 16, 'menos_ubicaciones')
+        assert [l['codigo'] for l in resultado['lineas']] == ['A2', 'B2']
+        assert resultado['completa']
+
+        resultado = asignar(ubicaciones, 6, 'vaciar_remanentes')
+        assert [(l['codigo'], l['cantidad']) for l in resultado['lineas']] == [('A1', 2), ('B1', 4)]
+
+        resultado = asignar(ubicaciones, 12, 'mas_antiguo')
+        assert [(l['codigo'], l['cantidad']) for l in resultado['lineas']] == [('A2', 10), ('B1', 2)]
+
+        # Stock insuficiente
+        resultado = asignar(ubicaciones, 30, 'menos_ubicaciones')
+        assert not resultado['completa']
+        assert resultado['faltante'] == 6
+
+        print("   ✅ Estrategias correctas")
+    finally:
+        os.remove(ruta)
+
+def test_salida_multiple():
+    """Verificar que las líneas repetidas no reservan dos veces el mismo stock"""
+    print("🧪 Probando salida con varias líneas...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceStock(ruta)
+        resultado = asignar_salida(indice, [
+            {'producto_id': 10, 'cantidad': 10},
+            {'producto_id': 10, 'cantidad': 10},
+            {'producto_id': 20, 'cantidad': 3},
+        ])
+
+        primera, segunda, tercera = resultado['productos']
+        assert [l['codigo'] for l in primera['lineas']] == ['A2']
+        assert 'A2' not in [l['codigo'] for l in segunda['lineas']]
+        assert segunda['cantidad_asignada'] == 10
+        assert tercera['completa']
+        assert resultado['completa']
+
+        print(f"   ✅ Ubicaciones visitadas: {resultado['ubicaciones_visitadas']}")
+    finally:
+        os.remove(ruta)
+
+def test_invalidacion_indice():
+    """Verificar que el índice se recarga tras invalidar un producto"""
+    print("🧪 Probando invalidación del índice...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceStock(ruta)
+        assert len(indice.ubicaciones(20)) == 1
+
+        conn = sqlite3.connect(ruta)
+        conn.execute('UPDATE inventario SET cantidad = 0 WHERE producto_id = 20')
+        conn.commit()
+        conn.close()
+
+        # Sin invalidar, el índice conserva el dato en memoria
+        assert len(indice.ubicaciones(20)) == 1
+
+        indice.invalidar(20)
+        assert indice.ubicaciones(20) == []
+
+        print("   ✅ Invalidación correcta")
+    finally:
+        os.remove(ruta)
+
+def test_invalidacion_durante_lectura():
+    """Una invalidación que llega mientras se relee el producto no se pierde"""
+    print("🧪 Probando invalidación durante la lectura...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceStock(ruta)
+        assert len(indice.ubicaciones(20)) == 1
+        consultar = indice._consultar
+        lecturas = []
+
+        def consultar_con_escritura(conn, producto_id=None):
+            filas = consultar(conn, producto_id)
+            if not lecturas:
+                # Otra petición confirma una salida e invalida después de que esta lectura vio los datos
+                otra = sqlite3.connect(ruta)
+                otra.execute('UPDATE inventario SET cantidad = 0 WHERE producto_id = 20')
+                otra.commit()
+                otra.close()
+                indice.invalidar(20)
+            lecturas.append(producto_id)
+            return filas
+
+        indice._consultar = consultar_con_escritura
+        indice.invalidar(20)
+        assert indice.ubicaciones(20) == []
+        assert lecturas == [20, 20]  # La primera lectura quedó vieja y se repitió
+
+        # Lo mismo con la recarga completa
+        lecturas.clear()
+        indice._consultar = consultar_con_escritura
+        conn = sqlite3.connect(ruta)
+        conn.execute('UPDATE inventario SET cantidad = 4 WHERE producto_id = 20')
+        conn.commit()
+        conn.close()
+        indice.invalidar()
+        assert indice.ubicaciones(20) == []
+        print("   ✅ Ninguna invalidación perdida")
+    finally:
+        os.remove(ruta)
+
+def test_recarga_unica():
+    """Al vencer el TTL, las peticiones simultáneas comparten una sola recarga"""
+    print("🧪 Probando recarga única con TTL vencido...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceStock(ruta)
+        consultar = indice._consultar
+        recargas = []
+
+        def consultar_lento(conn, producto_id=None):
+            if producto_id is None:
+                recargas.append(1)
+                time.sleep(0.2)
+            return consultar(conn, producto_id)
+
+        indice._consultar = consultar_lento
+        resultados = []
+        hilos = [threading.Thread(target=lambda: resultados.append(indice.ubicaciones(10))) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        assert len(resultados) == 8
+        assert all(len(r) == 4 for r in resultados)
+        assert len(recargas) == 1, f"{len(recargas)} recargas para 8 peticiones"
+
+        # Un error en la recarga llega a todas las peticiones que esperaban
+        def consultar_roto(conn, producto_id=None):
+            time.sleep(0.2)
+            raise sqlite3.OperationalError('disk I/O error')
+
+        indice._consultar = consultar_roto
+        indice.invalidar()
+        errores = []
+
+        def pedir():
+            try:
+                indice.ubicaciones(10)
+            except sqlite3.OperationalError:
+                errores.append(1)
+
+        hilos = [threading.Thread(target=pedir) for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert len(errores) == 4
+
+        # Y no deja la recarga bloqueada
+        indice._consultar = consultar
+        assert len(indice.ubicaciones(10)) == 4
+        print("   ✅ Una sola recarga para 8 peticiones")
+    finally:
+        os.remove(ruta)
+
+def test_rendimiento_indice():
+    """Medir el tiempo de sugerencia con el índice cargado"""
+    print("🧪 Midiendo rendimiento de sugerencias...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceStock(ruta)
+        indice.cargar()
+
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            asignar_salida(indice, [{'producto_id': 10, 'cantidad': 15}, {'producto_id': 20, 'cantidad': 1}])
+        tiempo = (time.perf_counter() - inicio) * 1000
+
+        print(f"   ⚡ 1000 sugerencias en {tiempo:.1f}ms")
+        assert tiempo < 1000
+    finally:
+        os.remove(ruta)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE ASIGNACIÓN DE UBICACIONES")
+    print("=" * 50)
+
+    test_estrategias()
+    test_salida_multiple()
+    test_invalidacion_indice()
+    test_invalidacion_durante_lectura()
+    test_recarga_unica()
+    test_rendimiento_indice()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Pruebas para los paquetes de CSS y JS: minificación sin tocar cadenas,
+nombres por contenido, fuentes referidas desde el CSS y respaldo sin
+construir
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import assets
+
+PAQUETES = {
+    'app.css': ['vendor/bootstrap/bootstrap.min.css', 'vendor/fontawesome/css/all.min.css', 'css/app.css'],
+    'app.js': ['vendor/bootstrap/bootstrap.bundle.min.js', 'js/base.js'],
+}
+
+ARCHIVOS = {
+    'vendor/bootstrap/bootstrap.min.css': '/*! Bootstrap v5.1.3 */.btn{color:red}\n/*# sourceMappingURL=bootstrap.min.css.map */',
+    'vendor/fontawesome/css/all.min.css': ('/*! Font Awesome 6.0.0 */@font-face{font-family:"FA";'
+                                           'src:url(../webfonts/fa-solid-900.woff2) format("woff2"),'
+                                           'url("../webfonts/fa-solid-900.ttf?v=6") format("truetype")}'
+                                           '.x{background:url(data:image/svg+xml;base64,AAA=)}'),
+    'vendor/fontawesome/webfonts/fa-solid-900.woff2': 'woff2',
+    'vendor/fontawesome/webfonts/fa-solid-900.ttf': 'ttf',
+    'vendor/bootstrap/bootstrap.bundle.min.js': '/*! Bootstrap */!function(){var a=1}();\n//# sourceMappingURL=bootstrap.bundle.min.js.map',
+    'css/app.css': '/* Estilos */\n.navbar-brand {\n    font-weight: bold;\n}\n',
+    'js/base.js': '// Funciones comunes\nfunction hola() {\n    return "hola // mundo";\n}\n',
+}
+
+def crear_static(directorio, archivos=ARCHIVOS):
+    for ruta, contenido in archivos.items():
+        destino = os.path.join(directorio, ruta)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+
+def leer(directorio, ruta):
+    with open(os.path.join(directorio, ruta), encoding='utf-8') as archivo:
+        return archivo.read()
+
+def test_minificar_css():
+    """Comentarios y espacios fuera; cadenas, licencias y selectores intactos"""
+    print("🧪 Probando minificación de CSS...")
+
+    css = '''
+        /*! Licencia */
+        /* comentario */
+        .a > .b , .c { color : red ; margin: 0 auto; }
+        @media (max-width: 600px) { a :hover { content : "x  /* y */ ; z" ; } }
+    '''
+    assert assets.minificar_css(css) == (
+        '/*! Licencia */.a>.b,.c{color:red;margin:0 auto}'
+        '@media (max-width: 600px){a :hover{content:"x  /* y */ ; z"}}')
+    print("   ✅ CSS minificado sin cambiar su significado")
+
+def test_minificar_js():
+    """Sin comentarios ni sangrías; cadenas, plantillas y regex intactas"""
+    print("🧪 Probando minificación de JS...")
+
+    js = '''/*! Licencia */
+// comentario de línea
+function f(a) {
+    /* bloque
+       de varias líneas */
+    const url = "http://x/y"; // fin de línea
+    const r = /\\/\\/[a/b]/g;
+    const t = `
+        <div>  // no es comentario
+        </div>`;
+    return a / 2 / 3;
+}
+'''
+    esperado = '''/*! Licencia */
+function f(a) {
+const url = "http://x/y";
+const r = /\\/\\/[a/b]/g;
+const t = `
+        <div>  // no es comentario
+        </div>`;
+return a / 2 / 3;
+}'''
+    assert assets.minificar_js(js) == esperado, assets.minificar_js(js)
+    print("   ✅ JS minificado sin tocar cadenas ni expresiones regulares")
+
+def test_construir():
+    """Nombres por contenido, fuentes copiadas con hash y limpieza de construcciones viejas"""
+    print("🧪 Probando construcción de paquetes...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        crear_static(directorio)
+        primera = assets.construir(directorio, PAQUETES)
+        css_nombre, _ = primera['app.css']
+        assert assets.NOMBRE_EMPAQUETADO.match(f'dist/{css_nombre}') and css_nombre.startswith('app.')
+        css = leer(directorio, f'dist/{css_nombre}')
+        assert 'sourceMappingURL' not in css and '/*! Bootstrap v5.1.3 */' in css
+        assert '.navbar-brand{font-weight:bold}' in css and 'Estilos' not in css
+        woff2 = f"fa-solid-900.{assets.clave(b'woff2')}.woff2"
+        ttf = f"fa-solid-900.{assets.clave(b'ttf')}.ttf"
+        assert f'url({woff2})' in css and f'url({ttf})' in css and 'url(data:image/svg+xml' in css
+        assert leer(directorio, f'dist/{woff2}') == 'woff2'
+        js = leer(directorio, f"dist/{primera['app.js'][0]}")
+        assert 'sourceMappingURL' not in js and '"hola // mundo"' in js and 'Funciones comunes' not in js
+        assert assets.cargar_manifiesto(directorio) == {paquete: nombre for paquete, (nombre, _) in primera.items()}
+
+        # Lo mismo da los mismos nombres
+        assert assets.construir(directorio, PAQUETES) == primera
+
+        # Un cambio da otro nombre; se conserva la construcción anterior y se borra la previa a ella
+        crear_static(directorio, {'css/app.css': '.navbar-brand { font-weight: 600; }'})
+        segunda = assets.construir(directorio, PAQUETES)
+        assert segunda['app.css'][0] != css_nombre and segunda['app.js'] == primera['app.js']
+        assert os.path.exists(os.path.join(directorio, 'dist', css_nombre))
+        crear_static(directorio, {'css/app.css': '.navbar-brand { font-weight: 700; }'})
+        assets.construir(directorio, PAQUETES)
+        assert not os.path.exists(os.path.join(directorio, 'dist', css_nombre))
+        assert os.path.exists(os.path.join(directorio, 'dist', segunda['app.css'][0]))
+        with open(os.path.join(directorio, 'dist', assets.MANIFIESTO)) as archivo:
+            assert woff2 in json.load(archivo)['archivos']
+
+        # Una referencia rota detiene la construcción
+        crear_static(directorio, {'css/app.css': '.x { background: url(../img/falta.png); }'})
+        try:
+            assets.construir(directorio, PAQUETES)
+        except FileNotFoundError as e:
+            assert 'falta.png' in str(e)
+        else:
+            raise AssertionError('Debió fallar por la imagen inexistente')
+        print("   ✅ Paquetes, fuentes y manifiesto")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_rutas_sin_construir():
+    """Sin manifiesto se cargan las fuentes sueltas y el CDN de lo que falte en vendor/"""
+    print("🧪 Probando respaldo sin construir...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        crear_static(directorio, {'css/app.css': '', 'vendor/bootstrap/bootstrap.min.css': ''})
+        manifiesto = assets.cargar_manifiesto(directorio)
+        assert manifiesto == {}
+        assert assets.rutas('app.css', manifiesto, directorio) == [
+            'vendor/bootstrap/bootstrap.min.css', assets.VENDOR['vendor/fontawesome/css/all.min.css'], 'css/app.css']
+        assert 'vendor/fontawesome/css/all.min.css' in assets.faltantes_vendor(directorio)
+        assert 'vendor/bootstrap/bootstrap.min.css' not in assets.faltantes_vendor(directorio)
+        assert assets.rutas('app.css', {'app.css': 'app.0123456789ab.css'}, directorio) == ['dist/app.0123456789ab.css']
+        print("   ✅ Fuentes sueltas y CDN como respaldo")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE ASSETS DEL FRONT-END")
+    print("=" * 50)
+
+    test_minificar_css()
+    test_minificar_js()
+    test_construir()
+    test_rutas_sin_construir()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
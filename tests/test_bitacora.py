@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la bitácora compacta de operaciones (operation_logs)
+"""
+
+import sys
+import os
+import random
+import sqlite3
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import bitacora
+from servicios import migraciones
+from servicios.archivo_logs import ArchivoLogs
+from migrations.importar_datos import init_db
+
+ESQUEMA_BASE = '''
+    CREATE TABLE productos (id INTEGER PRIMARY KEY, descripcion TEXT, codigo TEXT);
+    CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY, codigo TEXT);
+    CREATE TABLE admin_users (id INTEGER PRIMARY KEY, username TEXT);
+'''
+
+TABLA_LEGADA = '''
+    CREATE TABLE operation_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        admin_user_id INTEGER,
+        operation_type TEXT NOT NULL,
+        producto_id INTEGER,
+        ubicacion_id INTEGER,
+        old_quantity INTEGER,
+        new_quantity INTEGER,
+        description TEXT,
+        ip_address TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_operation_logs_timestamp ON operation_logs(timestamp);
+    CREATE INDEX idx_operation_logs_admin ON operation_logs(admin_user_id);
+'''
+
+def crear_base_legada(ruta, registros):
+    """Base con operation_logs en el formato anterior (descripción en texto)"""
+    conn = sqlite3.connect(ruta)
+    conn.executescript(ESQUEMA_BASE + TABLA_LEGADA)
+    conn.executemany('INSERT INTO productos (id, descripcion) VALUES (?, ?)',
+                     [(i, f'Rodamiento rígido de bolas {i} 6204-2RS') for i in range(1, 501)])
+    conn.executemany('INSERT INTO ubicaciones VALUES (?, ?)', [(i, f'B{i}') for i in range(1, 101)])
+    conn.execute("INSERT INTO admin_users VALUES (1, 'admin')")
+
+    azar = random.Random(7)
+    filas = []
+    for i in range(registros):
+        producto, ubicacion = azar.randint(1, 500), azar.randint(1, 100)
+        anterior, nueva = azar.randint(0, 50), azar.randint(0, 50)
+        if nueva == 0:
+            descripcion = f'Eliminado stock de Rodamiento rígido de bolas {producto} 6204-2RS en B{ubicacion}'
+        else:
+            descripcion = f'Actualizado stock de Rodamiento rígido de bolas {producto} 6204-2RS en B{ubicacion}: {anterior} → {nueva}'
+        marca = f'2025-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:{i % 60:02d}:00'
+        filas.append((1, 'STOCK_EDIT', producto, ubicacion, anterior, nueva, descripcion, '192.168.1.25', marca))
+    conn.executemany('''
+        INSERT INTO operation_logs (admin_user_id, operation_type, producto_id, ubicacion_id,
+                                    old_quantity, new_quantity, description, ip_address, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', filas)
+    conn.commit()
+    return conn
+
+def tamano_tabla(conn, nombre):
+    """Bytes de una tabla o índice (dbstat si está disponible)"""
+    try:
+        return conn.execute('SELECT SUM(pgsize) FROM dbstat WHERE name = ?', (nombre,)).fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return None
+
+def test_registrar_y_describir():
+    """Los registros nuevos guardan params y se describen igual que antes"""
+    print("🧪 Probando registro y descripción...")
+
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(ESQUEMA_BASE)
+    conn.execute("INSERT INTO productos (id, descripcion) VALUES (1, 'Correa A-42')")
+    conn.execute("INSERT INTO ubicaciones VALUES (1, 'A1')")
+    conn.execute("INSERT INTO admin_users VALUES (1, 'admin')")
+    bitacora.crear_tablas(conn)
+
+    bitacora.registrar(conn, 1, '10.0.0.5', 'LOCATION_CHANGE', producto_id=1, ubicacion_id=1,
+                       old_quantity=10, new_quantity=4, cantidad=6, destino='B2')
+    bitacora.registrar(conn, 1, '10.0.0.5', 'STOCK_EDIT', 1, 1, 4, 0)
+    bitacora.registrar(conn, 1, None, 'SUPPLIER_CREATE', nombre='SKF')
+    bitacora.registrar(conn, 1, '10.0.0.5', 'NUEVO_TIPO', lote=3)
+
+    assert conn.execute('SELECT COUNT(*) FROM tipos_operacion').fetchone()[0] == 4
+    assert conn.execute('SELECT COUNT(*) FROM direcciones_ip').fetchone()[0] == 1
+    assert conn.execute('SELECT params FROM operation_logs WHERE id = 1').fetchone()[0] == '{"cantidad":6,"destino":"B2"}'
+    assert conn.execute('SELECT params FROM operation_logs WHERE id = 2').fetchone()[0] is None
+
+    filas = bitacora.leer(conn.execute(bitacora.SELECT.format(logs='operation_logs') + ' ORDER BY ol.id').fetchall())
+    assert [fila['description'] for fila in filas] == [
+        'Cambio de ubicación: Correa A-42 - 6 unidades de A1 a B2',
+        'Eliminado stock de Correa A-42 en A1',
+        'Nuevo proveedor creado: SKF',
+        'lote: 3',
+    ]
+    assert filas[0]['operation_type'] == 'LOCATION_CHANGE' and filas[0]['ip_address'] == '10.0.0.5'
+    assert filas[2]['ip_address'] is None and filas[0]['username'] == 'admin'
+
+    # La descripción usa el nombre actual; si el producto ya no existe, su id
+    conn.execute("UPDATE productos SET descripcion = 'Correa A-43' WHERE id = 1")
+    assert bitacora.describir_ids(conn, 'STOCK_EDIT', None, 1, 1, 2, 5) == 'Actualizado stock de Correa A-43 en A1: 2 → 5'
+    conn.execute('DELETE FROM productos')
+    filas = bitacora.leer(conn.execute(bitacora.SELECT.format(logs='operation_logs') + ' WHERE ol.id = 2').fetchall())
+    assert filas[0]['description'] == 'Eliminado stock de #1 en A1'
+    conn.close()
+    print("   ✅ Descripciones armadas al leer")
+
+def test_convertir_legado():
+    """Las descripciones antiguas se separan en params sin perder nada"""
+    print("🧪 Probando conversión de descripciones antiguas...")
+
+    casos = [
+        # (tipo, descripcion, producto, ubicacion, old, new, old/new esperados, params esperados)
+        ('STOCK_EDIT', 'Actualizado stock de Correa en A1: 3 → 5', 'Correa', 'A1', 3, 5, (3, 5), None),
+        ('STOCK_EDIT', 'Eliminado stock de Correa en A1', 'Correa', 'A1', 3, 0, (3, 0), None),
+        # El producto cambió de nombre: se conserva el nombre histórico
+        ('STOCK_EDIT', 'Actualizado stock de Correa vieja en A1: 3 → 5', 'Correa', 'A1', 3, 5, (3, 5), '{"producto":"Correa vieja"}'),
+        # Stock mínimo: old/new pasan a las columnas
+        ('STOCK_MINIMO_UPDATE', 'Stock mínimo actualizado: Correa - 2 → 8', 'Correa', None, None, None, (2, 8), None),
+        ('LOCATION_CHANGE', 'Cambio de ubicación: Correa - 4 unidades de A1 a B2', 'Correa', 'A1', 10, 6, (10, 6),
+         '{"cantidad":4,"destino":"B2"}'),
+        ('CYCLE_COUNT_IMPORT', 'Conteo cíclico importado desde c.csv: 12 cambios en 0.5s', None, None, None, None, (None, None),
+         '{"archivo":"c.csv","cambios":12,"segundos":0.5}'),
+        ('LOCATION_EDIT', 'Ubicación editada: 007 - Rack', None, 'X', None, None, (None, None), '{"codigo":"007","nombre":"Rack"}'),
+        # Tipos desconocidos o textos que no siguen la plantilla quedan tal cual
+        ('OTRO', 'Algo pasó', None, None, None, None, (None, None), '{"texto":"Algo pasó"}'),
+        ('EMAIL_TEST', 'Correo enviado', None, None, None, None, (None, None), '{"texto":"Correo enviado"}'),
+    ]
+    for tipo, descripcion, producto, ubicacion, old, new, cantidades, params in casos:
+        nuevo_old, nuevo_new, nuevos_params = bitacora.convertir_legado(tipo, descripcion, producto, ubicacion, old, new)
+        assert (nuevo_old, nuevo_new) == cantidades, (tipo, nuevo_old, nuevo_new)
+        assert nuevos_params == params, (tipo, nuevos_params)
+        assert bitacora.describir(tipo, nuevos_params, producto, ubicacion, nuevo_old, nuevo_new) == descripcion
+    print(f"   ✅ {len(casos)} casos convertidos sin pérdida")
+
+def test_migracion_reduce_tamano():
+    """La migración 009 convierte los registros y la base queda varias veces más chica"""
+    print("🧪 Probando migración de una bitácora grande...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'inventario.db')
+        conn = crear_base_legada(ruta, 20000)
+        originales = conn.execute('SELECT id, description FROM operation_logs ORDER BY id').fetchall()
+        tabla_antes = tamano_tabla(conn, 'operation_logs')
+        indice_antes = tamano_tabla(conn, 'idx_operation_logs_timestamp')
+        conn.execute('VACUUM')
+        bytes_antes = os.path.getsize(ruta)
+
+        bitacora.convertir_tabla(conn, lote=3000)
+        conn.execute('VACUUM')
+        bytes_despues = os.path.getsize(ruta)
+
+        conn.row_factory = sqlite3.Row
+        filas = bitacora.leer(conn.execute(bitacora.SELECT.format(logs='operation_logs') + ' ORDER BY ol.id').fetchall())
+        assert [(fila['id'], fila['description']) for fila in filas] == [tuple(fila) for fila in originales]
+        assert filas[0]['fecha'].year == 2025 and filas[0]['ip_address'] == '192.168.1.25'
+        assert conn.execute("SELECT COUNT(*) FROM operation_logs WHERE params IS NOT NULL").fetchone()[0] == 0
+
+        # Los ids nuevos siguen después de los convertidos (la búsqueda la agrega la migración 010)
+        bitacora.crear_busqueda(conn)
+        bitacora.registrar(conn, 1, '192.168.1.25', 'STOCK_EDIT', 1, 1, 1, 2)
+        assert conn.execute('SELECT MAX(id) FROM operation_logs').fetchone()[0] == 20001
+
+        indices = {fila[1] for fila in conn.execute('PRAGMA index_list(operation_logs)')}
+        assert {'idx_operation_logs_ts', 'idx_operation_logs_tipo_ts', 'idx_operation_logs_admin_ts'} <= indices
+
+        print(f"   📦 Archivo: {bytes_antes / 1024:.0f} KB → {bytes_despues / 1024:.0f} KB")
+        if tabla_antes is not None:
+            print(f"   📦 Tabla: {tabla_antes / 1024:.0f} KB → {tamano_tabla(conn, 'operation_logs') / 1024:.0f} KB, "
+                  f"índice de tiempo: {indice_antes / 1024:.0f} KB → {tamano_tabla(conn, 'idx_operation_logs_ts') / 1024:.0f} KB")
+        if tabla_antes is not None:
+            assert tamano_tabla(conn, 'operation_logs') * 4 < tabla_antes
+        # El archivo incluye los índices (filtro, ts) del visor de logs, que antes no existían
+        assert bytes_despues * 1.75 < bytes_antes
+        conn.close()
+        print("   ✅ Migración sin pérdida y varias veces más chica")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_migracion_y_archivos_mensuales():
+    """Las migraciones 009/010 y los archivos mensuales viejos quedan en el formato compacto"""
+    print("🧪 Probando migración con archivos mensuales existentes...")
+
+    directorio = tempfile.mkdtemp()
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        init_db().close()
+    finally:
+        os.chdir(anterior)
+    try:
+        ruta = os.path.join(directorio, 'inventario.db')
+        migraciones.migrar_base_datos(ruta, hasta=8)
+        conn = sqlite3.connect(ruta)
+        conn.execute("INSERT INTO productos (id, descripcion) VALUES (1, 'Correa A-42')")
+        conn.execute("INSERT INTO ubicaciones (id, codigo, nombre) VALUES (1, 'A1', 'A1')")
+        conn.execute('''
+            INSERT INTO operation_logs (admin_user_id, operation_type, producto_id, ubicacion_id,
+                                        old_quantity, new_quantity, description, ip_address)
+            VALUES (1, 'STOCK_EDIT', 1, 1, 2, 7, 'Actualizado stock de Correa A-42 en A1: 2 → 7', '10.1.1.2')
+        ''')
+        conn.commit()
+        conn.close()
+
+        # Un archivo mensual creado con el formato anterior
+        archivo = ArchivoLogs(os.path.join(directorio, 'archivo'))
+        viejo = sqlite3.connect(archivo.ruta_mes('2024-05'))
+        viejo.executescript(TABLA_LEGADA)
+        viejo.execute('''
+            INSERT INTO operation_logs (id, admin_user_id, operation_type, description, ip_address, timestamp)
+            VALUES (3, 1, 'BACKUP_DOWNLOAD', 'Backup descargado: respaldo.db', '10.1.1.1', '2024-05-03 10:00:00')
+        ''')
+        viejo.commit()
+        viejo.close()
+
+        migraciones.migrar_base_datos(ruta)
+        assert bitacora.convertir_archivos(ruta, archivo) == 1
+        assert bitacora.convertir_archivos(ruta, archivo) == 0
+
+        conn = sqlite3.connect(ruta)
+        conn.row_factory = sqlite3.Row
+        fila = bitacora.leer(conn.execute(bitacora.SELECT.format(logs='operation_logs')).fetchall())[0]
+        assert fila['description'] == 'Actualizado stock de Correa A-42 en A1: 2 → 7'
+        assert fila['username'] == 'admin' and fila['params'] is None
+
+        conn.execute('ATTACH DATABASE ? AS archivo', (archivo.ruta_mes('2024-05'),))
+        fila = bitacora.leer(conn.execute(bitacora.SELECT.format(logs='archivo.operation_logs')).fetchall())[0]
+        assert fila['description'] == 'Backup descargado: respaldo.db' and fila['ip_address'] == '10.1.1.1'
+        assert fila['fecha'].year == 2024
+        assert conn.execute('SELECT COUNT(*) FROM archivo.direcciones_ip').fetchone()[0] == 2
+
+        # Migración 010: índices del visor y búsqueda, también en el archivo
+        indices = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_operation_logs_admin' not in indices and 'idx_operation_logs_producto_ts' in indices
+        assert conn.execute("SELECT 1 FROM archivo.sqlite_master WHERE name = 'idx_operation_logs_admin_ts'").fetchone()
+        for esquema, palabra, id_ in (('main', 'correa', 1), ('archivo', 'respaldo', 3)):
+            sql, params = bitacora.consulta(busqueda=palabra)
+            filas = conn.execute(sql.format(logs=f'{esquema}.operation_logs', esquema=esquema), (*params, 10)).fetchall()
+            assert [fila['id'] for fila in filas] == [id_], esquema
+        conn.close()
+        print("   ✅ Base y archivos convertidos")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE BITÁCORA COMPACTA")
+    print("=" * 50)
+
+    test_registrar_y_describir()
+    test_convertir_legado()
+    test_migracion_reduce_tamano()
+    test_migracion_y_archivos_mensuales()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la búsqueda de productos mientras se escribe: normalización,
+prefijos por palabra, orden de resultados y actualización incremental
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.busqueda_productos import IndiceProductos, claves, normalizar
+
+def crear_base_prueba(productos=()):
+    """Crear una base de datos temporal con algunos productos"""
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(ruta)
+    conn.execute('''
+        CREATE TABLE productos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descripcion TEXT NOT NULL,
+            codigo TEXT,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany('INSERT INTO productos (descripcion, codigo) VALUES (?, ?)', productos or [
+        ('Rodamiento rígido de bolas 6204', 'ROD-6204'),
+        ('Rodamiento cónico', 'ROD-30205'),
+        ('Banda dentada HTD', 'BD-620'),
+        ('Válvula solenoide 24V', '620'),
+        ('Tornillo allen M6', None),
+    ])
+    conn.commit()
+    conn.close()
+    return ruta
+
+def ids(resultados):
+    return [producto['id'] for producto in resultados]
+
+def test_normalizar():
+    """Sin acentos, minúsculas y separadores como espacios"""
+    print("🧪 Probando normalización...")
+
+    assert normalizar('Válvula  Solenoide-24V') == 'valvula solenoide 24v'
+    assert normalizar(None) == ''
+    assert claves('Rodamiento cónico', 'ROD-30205') == ['30205', 'conico', 'rod', 'rod30205', 'rodamiento']
+    print("   ✅ Normalización y claves")
+
+def test_busqueda():
+    """Cada palabra escrita es un prefijo; primero el código exacto"""
+    print("🧪 Probando búsqueda por prefijos...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceProductos(ruta)
+        assert ids(indice.buscar('rod')) == [2, 1]             # mismo rango: por descripción
+        assert ids(indice.buscar('rodamiento CONI')) == [2]
+        assert ids(indice.buscar('conico rod')) == [2]       # el orden de las palabras no importa
+        assert ids(indice.buscar('valvula')) == [4]          # sin acento encuentra con acento
+        assert ids(indice.buscar('rod6204')) == [1]          # código sin guion
+        assert ids(indice.buscar('620')) == [4, 3, 1]        # exacto, prefijo de código, descripción
+        assert ids(indice.buscar('m6')) == [5]
+        assert indice.buscar('') == [] and indice.buscar('  -- ') == [] and indice.buscar('zzz') == []
+        assert len(indice.buscar('r', limite=1)) == 1
+        assert indice.buscar('banda')[0] == {'id': 3, 'descripcion': 'Banda dentada HTD', 'codigo': 'BD-620'}
+        print("   ✅ Prefijos, acentos y orden de resultados")
+    finally:
+        os.unlink(ruta)
+
+def test_actualizacion():
+    """Invalidar un producto lo relee solo a él; cambios de otros se ven al vencer el ttl"""
+    print("🧪 Probando actualización incremental...")
+
+    ruta = crear_base_prueba()
+    try:
+        indice = IndiceProductos(ruta, ttl_segundos=3600)
+        assert ids(indice.buscar('banda')) == [3]
+
+        conn = sqlite3.connect(ruta)
+        conn.execute("UPDATE productos SET descripcion = 'Correa dentada HTD' WHERE id = 3")
+        conn.execute("INSERT INTO productos (descripcion, codigo) VALUES ('Banda plana', 'BP-1')")
+        conn.commit()
+
+        # Sin invalidar, el índice sigue igual hasta el ttl
+        assert ids(indice.buscar('banda')) == [3]
+
+        indice.invalidar(3)
+        indice.invalidar(6)
+        assert ids(indice.buscar('banda')) == [6]
+        assert ids(indice.buscar('correa')) == [3]
+        assert len(indice._entradas) == sum(len(datos[2]) for datos in indice._productos.values())
+
+        # Un cambio de otro proceso (firma distinta) reconstruye al vencer el ttl
+        conn.execute("INSERT INTO productos (descripcion, codigo) VALUES ('Banda en V', 'BV-2')")
+        conn.commit()
+        conn.close()
+        indice.ttl_segundos = 0
+        time.sleep(0.01)
+        assert ids(indice.buscar('banda')) == [7, 6]
+
+        indice.invalidar()
+        assert ids(indice.buscar('banda')) == [7, 6]
+        print("   ✅ Invalidación por producto y recarga por firma")
+    finally:
+        os.unlink(ruta)
+
+def test_rendimiento():
+    """Con 50 mil productos una búsqueda tarda pocos milisegundos"""
+    print("🧪 Probando rendimiento...")
+
+    ruta = crear_base_prueba([(f'Producto {i} pieza {i % 97}', f'COD-{i:06d}') for i in range(50000)])
+    try:
+        indice = IndiceProductos(ruta)
+        inicio = time.perf_counter()
+        indice.cargar()
+        carga = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        for texto in ('cod 01', 'pieza 5', 'producto 4999', 'cod000123'):
+            assert indice.buscar(texto)
+        busqueda = (time.perf_counter() - inicio) / 4
+        assert busqueda < 0.2
+        print(f"   ✅ Carga {carga * 1000:.0f} ms, búsqueda {busqueda * 1000:.1f} ms")
+    finally:
+        os.unlink(ruta)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE BÚSQUEDA DE PRODUCTOS")
+    print("=" * 50)
+
+    test_normalizar()
+    test_busqueda()
+    test_actualizacion()
+    test_rendimiento()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
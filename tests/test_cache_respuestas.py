@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la caché de respuestas: un solo cálculo para peticiones
+simultáneas, valores anteriores mientras se recalcula, memoria acotada
+y contadores de aciertos
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.cache_respuestas import CacheRespuestas
+
+class Consulta:
+    """calcular() lento que cuenta cuántas veces corrió"""
+
+    def __init__(self, valor=b'tabla', demora=0.2):
+        self.valor = valor
+        self.demora = demora
+        self.llamadas = 0
+
+    def __call__(self):
+        self.llamadas += 1
+        time.sleep(self.demora)
+        return self.valor
+
+def test_calculo_unico():
+    """Veinte peticiones a la vez con la misma versión corren una sola consulta"""
+    print("🧪 Probando cálculo único...")
+
+    cache = CacheRespuestas()
+    consulta = Consulta()
+    resultados = []
+
+    def pedir():
+        resultados.append(cache.obtener(('inventario', ''), 1, consulta))
+
+    hilos = [threading.Thread(target=pedir) for _ in range(20)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert consulta.llamadas == 1
+    assert resultados == [b'tabla'] * 20
+    assert dict(cache.resumen()) == {('inventario', 'fallo'): 1, ('inventario', 'espera'): 19}
+    assert cache.obtener(('inventario', ''), 1, consulta) == b'tabla' and consulta.llamadas == 1
+    print("   ✅ Una consulta compartida entre 20 peticiones")
+
+def test_obsoleto_mientras_recalcula():
+    """Con versión nueva se regresa lo anterior al momento y se recalcula una vez en segundo plano"""
+    print("🧪 Probando stale-while-revalidate...")
+
+    cache = CacheRespuestas(ventana_obsoleta=60)
+    cache.obtener(('alertas',), 1, Consulta(b'v1', demora=0))
+
+    nueva = Consulta(b'v2', demora=0.2)
+    inicio = time.perf_counter()
+    assert cache.obtener(('alertas',), 2, nueva) == b'v1'
+    assert cache.obtener(('alertas',), 2, nueva) == b'v1'
+    assert time.perf_counter() - inicio < 0.1
+    time.sleep(0.4)
+    assert cache.obtener(('alertas',), 2, nueva) == b'v2'
+    assert nueva.llamadas == 1
+
+    # Demasiado viejo para servirlo: se espera al cálculo
+    cache.ventana_obsoleta = 0
+    time.sleep(0.01)
+    assert cache.obtener(('alertas',), 3, Consulta(b'v3', demora=0)) == b'v3'
+    resumen = dict(cache.resumen())
+    assert resumen[('alertas', 'obsoleto')] == 2 and resumen[('alertas', 'fallo')] == 2
+    print("   ✅ Valor anterior sin esperar y un solo recálculo")
+
+def test_version_nueva_con_calculo_en_curso():
+    """Mientras sigue el cálculo de una versión anterior, la nueva también se calcula una sola vez"""
+    print("🧪 Probando cálculo único tras invalidar...")
+
+    cache = CacheRespuestas(ventana_obsoleta=0)
+    vieja = Consulta(b'v1', demora=0.5)
+    hilo_viejo = threading.Thread(target=cache.obtener, args=(('inventario',), 1, vieja))
+    hilo_viejo.start()
+    time.sleep(0.1)
+
+    nueva = Consulta(b'v2', demora=0.2)
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(cache.obtener(('inventario',), 2, nueva)))
+             for _ in range(10)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos + [hilo_viejo]:
+        hilo.join()
+
+    assert nueva.llamadas == 1 and resultados == [b'v2'] * 10
+    # El cálculo viejo terminó después pero no reemplaza al nuevo
+    assert cache.obtener(('inventario',), 2, Consulta(b'?', demora=0)) == b'v2'
+    print("   ✅ Una consulta por versión aunque se traslapen")
+
+def test_errores():
+    """Un error llega a quien esperaba y no deja la clave bloqueada"""
+    print("🧪 Probando errores en el cálculo...")
+
+    cache = CacheRespuestas()
+
+    def fallar():
+        raise RuntimeError('base ocupada')
+
+    try:
+        cache.obtener(('inventario',), 1, fallar)
+        assert False, 'Debió propagar el error'
+    except RuntimeError:
+        pass
+    assert cache.obtener(('inventario',), 1, Consulta(demora=0)) == b'tabla'
+    print("   ✅ Error propagado y clave libre")
+
+def test_memoria_acotada():
+    """Al pasar de max_bytes salen las entradas usadas hace más tiempo"""
+    print("🧪 Probando límite de memoria...")
+
+    cache = CacheRespuestas(max_bytes=250)
+    for filtro in ('a', 'b', 'c'):
+        cache.obtener(('inventario', filtro), 1, Consulta(b'x' * 100, demora=0))
+    assert cache.entradas() == 2 and cache.bytes == 200 and cache.desalojos == 1
+    assert cache.obtener(('inventario', 'c'), 1, Consulta(b'?', demora=0)) == b'x' * 100
+
+    # Lo que no cabe no se guarda
+    cache.obtener(('inventario', 'grande'), 1, Consulta(b'x' * 300, demora=0))
+    assert cache.bytes <= 250
+
+    cache.invalidar('inventario')
+    assert cache.entradas() == 0 and cache.bytes == 0
+    print("   ✅ Memoria acotada e invalidación por grupo")
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE CACHÉ DE RESPUESTAS")
+    print("=" * 50)
+
+    test_calculo_unico()
+    test_obsoleto_mientras_recalcula()
+    test_version_nueva_con_calculo_en_curso()
+    test_errores()
+    test_memoria_acotada()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
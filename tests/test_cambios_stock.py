@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas para los cambios de stock en vivo: triggers sobre inventario,
+reparto a varias suscripciones, puesta al día con Last-Event-ID y
+recarga cuando el cliente se atrasa
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import cambios_stock
+from servicios.cambios_stock import DifusorCambios, RECARGAR, formato_sse, leer, ultimo_cambio
+
+def crear_base_prueba():
+    """Crear una base de datos temporal con inventario, ubicaciones y cambios_stock"""
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY, codigo TEXT)')
+    conn.execute('''
+        CREATE TABLE inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            ubicacion_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany('INSERT INTO ubicaciones (id, codigo) VALUES (?, ?)', [(1, 'A1'), (2, 'B2')])
+    cambios_stock.crear_tablas(conn)
+    conn.commit()
+    conn.close()
+    return ruta
+
+def conectar(ruta):
+    conn = sqlite3.connect(ruta)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def resumen(eventos):
+    return [(e['producto_id'], e['codigo'], e['cantidad'], e['stock_total']) for e in eventos]
+
+def test_triggers():
+    """Altas, cambios y bajas en inventario quedan en cambios_stock"""
+    print("🧪 Probando triggers de inventario...")
+
+    ruta = crear_base_prueba()
+    try:
+        conn = conectar(ruta)
+        conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (7, 1, 5)')
+        conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (7, 2, 3)')
+        conn.execute('UPDATE inventario SET cantidad = 4 WHERE producto_id = 7 AND ubicacion_id = 1')
+        conn.execute('UPDATE inventario SET fecha_actualizacion = CURRENT_TIMESTAMP')  # sin cambio de stock
+        conn.execute('UPDATE inventario SET ubicacion_id = 1 WHERE producto_id = 7 AND ubicacion_id = 2')
+        conn.execute('DELETE FROM inventario WHERE cantidad = 4')
+        conn.commit()
+
+        eventos = leer(conn, 0, ultimo_cambio(conn))
+        assert [e['id'] for e in eventos] == [1, 2, 3, 4, 5, 6]
+        assert [(e['producto_id'], e['codigo'], e['cantidad']) for e in eventos] == [
+            (7, 'A1', 5), (7, 'B2', 3), (7, 'A1', 4),
+            (7, 'B2', 0), (7, 'A1', 3),               # mover de ubicación: la vieja queda en 0
+            (7, 'A1', 0),
+        ]
+        assert all(e['stock_total'] == 3 for e in eventos)  # total actual, no el del momento
+        assert leer(conn, 4, 5)[0]['id'] == 5
+        conn.close()
+        print("   ✅ Cambios confirmados de cualquier UPDATE/INSERT/DELETE")
+    finally:
+        os.unlink(ruta)
+
+def test_formato_sse():
+    """Eventos de stock con id; recargar sin id"""
+    print("🧪 Probando formato text/event-stream...")
+
+    texto = formato_sse({'tipo': 'stock', 'id': 9, 'producto_id': 7, 'cantidad': 2})
+    assert texto == 'id: 9\nevent: stock\ndata: {"id":9,"producto_id":7,"cantidad":2}\n\n'
+    assert formato_sse(RECARGAR) == 'event: recargar\ndata: {}\n\n'
+    print("   ✅ Formato de eventos")
+
+def test_difusor():
+    """Una lectura por ciclo se reparte a todas las suscripciones"""
+    print("🧪 Probando difusor de cambios...")
+
+    ruta = crear_base_prueba()
+    difusor = DifusorCambios(ruta, intervalo=30)
+    try:
+        conn = conectar(ruta)
+        conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (1, 1, 10)')
+        conn.commit()
+
+        primera = difusor.suscribir()
+        segunda = difusor.suscribir()
+        assert primera.esperar(0.2) == [] and difusor.suscritos() == 2
+
+        conn.execute('UPDATE inventario SET cantidad = 8 WHERE producto_id = 1')
+        conn.commit()
+        lecturas = difusor.lecturas
+        difusor.avisar()  # Sin aviso habría que esperar el intervalo de 30 s
+        assert resumen(primera.esperar(5)) == [(1, 'A1', 8, 8)]
+        assert resumen(segunda.esperar(5)) == [(1, 'A1', 8, 8)]
+        assert difusor.lecturas == lecturas + 1
+
+        # Un cliente que reconecta con Last-Event-ID recibe lo que se perdió
+        tercera = difusor.suscribir(desde=1)
+        assert [e['id'] for e in tercera.esperar(5)] == [2]
+
+        # Si lo perdido ya se podó o es demasiado, mejor recargar la tabla
+        assert difusor.suscribir(desde=500).esperar(5) == [RECARGAR]
+
+        # Base restaurada: el último id baja y todos recargan
+        conn.execute('DELETE FROM cambios_stock')
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'cambios_stock'")
+        conn.commit()
+        difusor.avisar()
+        assert primera.esperar(5) == [RECARGAR]
+        conn.close()
+
+        for suscripcion in list(difusor._suscripciones):
+            difusor.cancelar(suscripcion)
+        assert difusor.suscritos() == 0
+        print("   ✅ Reparto, puesta al día y recarga")
+    finally:
+        difusor.avisar()
+        os.unlink(ruta)
+
+def test_cliente_atrasado():
+    """Un cliente que no lee a tiempo recibe recargar en lugar de una cola infinita"""
+    print("🧪 Probando cliente atrasado...")
+
+    suscripcion = cambios_stock.Suscripcion()
+    for i in range(cambios_stock.COLA_SUSCRIPCION + 5):
+        suscripcion.entregar([{'tipo': 'stock', 'id': i}])
+    assert suscripcion.esperar(0) == [RECARGAR]
+    assert suscripcion.esperar(0) == []
+    print("   ✅ Cola acotada por cliente")
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE CAMBIOS DE STOCK EN VIVO")
+    print("=" * 50)
+
+    test_triggers()
+    test_formato_sse()
+    test_difusor()
+    test_cliente_atrasado()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la carga masiva del catálogo
+"""
+
+import sys
+import os
+import io
+import sqlite3
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import carga_masiva
+from migrations.importar_datos import init_db
+
+ENCABEZADO_PRODUCTOS = 'Descripcion,ID,Codigo,Categoria,SubCategoria,Marca,Notas Adicionales,Cantidad Requerida por Maquina,Maquina\n'
+
+def crear_base_prueba():
+    """Crear una base de datos temporal con el esquema de importación"""
+    directorio = tempfile.mkdtemp()
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        conn = init_db()
+    finally:
+        os.chdir(anterior)
+    conn.execute('ALTER TABLE productos ADD COLUMN stock_minimo INTEGER DEFAULT 5')
+    conn.execute('CREATE INDEX idx_productos_descripcion ON productos(descripcion)')
+    conn.execute('CREATE INDEX idx_inventario_producto ON inventario(producto_id)')
+    conn.commit()
+    return conn, os.path.join(directorio, 'inventario.db')
+
+def test_carga_productos():
+    """Verificar la resolución de catálogos y las actualizaciones"""
+    print("🧪 Probando carga de productos...")
+
+    conn, ruta = crear_base_prueba()
+    try:
+        archivo = io.StringIO(
+            ENCABEZADO_PRODUCTOS +
+            'Cilindro A,1,C-1,Neumatica,Cilindros,Festo,,2,Cepillo\n'
+            'Cilindro B,2,C-2,Neumatica,Cilindros,Festo,,,Cepillo\n'
+            'Valvula,3,C-1,Neumatica,Valvulas,SMC,,1,\n'   # código duplicado
+            'Sin ID,,C-9,Neumatica,,,,1,\n'
+        )
+        resultado = carga_masiva.cargar_productos(conn, carga_masiva.leer_csv(archivo))
+        print(f"   📊 {resultado.resumen()}")
+
+        assert resultado.insertados == 2
+        assert resultado.total_errores == 2
+        assert conn.execute('SELECT COUNT(*) FROM categorias').fetchone()[0] == 1
+        assert conn.execute('SELECT COUNT(*) FROM subcategorias').fetchone()[0] == 2
+        assert conn.execute('SELECT COUNT(*) FROM producto_maquinas').fetchone()[0] == 2
+
+        # Recargar no duplica subcategorías y conserva campos fuera del CSV
+        conn.execute('UPDATE productos SET stock_minimo = 9 WHERE id = 1')
+        conn.commit()
+        archivo = io.StringIO(ENCABEZADO_PRODUCTOS + 'Cilindro A2,1,C-1,Neumatica,Cilindros,Festo,,3,Cepillo\n')
+        resultado = carga_masiva.cargar_productos(conn, carga_masiva.leer_csv(archivo))
+
+        assert resultado.actualizados == 1
+        producto = conn.execute('SELECT descripcion, cantidad_requerida, stock_minimo FROM productos WHERE id = 1').fetchone()
+        assert tuple(producto) == ('Cilindro A2', 3, 9)
+        assert conn.execute('SELECT COUNT(*) FROM subcategorias').fetchone()[0] == 2
+
+        print("   ✅ Productos cargados correctamente")
+    finally:
+        conn.close()
+        shutil.rmtree(os.path.dirname(ruta))
+
+def test_carga_inventario():
+    """Verificar la carga de inventario y la creación de ubicaciones"""
+    print("🧪 Probando carga de inventario...")
+
+    conn, ruta = crear_base_prueba()
+    try:
+        carga_masiva.cargar_productos(conn, carga_masiva.leer_csv(io.StringIO(
+            ENCABEZADO_PRODUCTOS + 'Cilindro A,1,C-1,,,,,1,\nValvula,2,C-2,,,,,1,\n')))
+
+        archivo = io.StringIO(
+            'ProductoID,Producto,Cantidad,UbicacionPrincipal,UbicacionesAdicionales,Empresa,Area,Nivel,Seccion\n'
+            '1,Cilindro A,5,A1,,PPG,Oficinas,Planta Alta,Anaquel\n'
+            ',valvula,varios,A2,,,,,\n'
+            ',No existe,1,A2,,,,,\n'
+        )
+        resultado = carga_masiva.cargar_inventario(conn, carga_masiva.leer_csv(archivo))
+        print(f"   📊 {resultado.resumen()}")
+
+        assert resultado.insertados == 2
+        assert resultado.total_errores == 1
+        stock = dict(conn.execute('SELECT producto_id, cantidad FROM inventario').fetchall())
+        assert stock == {1: 5, 2: 1}
+        assert conn.execute('SELECT COUNT(*) FROM ubicaciones').fetchone()[0] == 2
+
+        print("   ✅ Inventario cargado correctamente")
+    finally:
+        conn.close()
+        shutil.rmtree(os.path.dirname(ruta))
+
+def test_rendimiento_catalogo_grande():
+    """Medir la carga de 100,000 productos con índices diferidos"""
+    print("🧪 Midiendo carga de 100,000 productos...")
+
+    conn, ruta = crear_base_prueba()
+    try:
+        archivo = io.StringIO()
+        archivo.write(ENCABEZADO_PRODUCTOS)
+        for i in range(1, 100001):
+            archivo.write(f'Producto {i},{i},COD-{i},Categoria {i % 40},Sub {i % 7},Marca {i % 25},,1,Maquina {i % 5}\n')
+        archivo.seek(0)
+
+        inicio = time.perf_counter()
+        resultado = carga_masiva.cargar_productos(conn, carga_masiva.leer_csv(archivo))
+        tiempo = time.perf_counter() - inicio
+        print(f"   ⚡ {resultado.resumen()} (total {tiempo:.2f}s)")
+
+        assert resultado.insertados == 100000
+        assert tiempo < 60
+
+        # Los índices diferidos deben existir de nuevo
+        indices = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_productos_descripcion' in indices
+        assert 'idx_inventario_producto' in indices
+    finally:
+        conn.close()
+        shutil.rmtree(os.path.dirname(ruta))
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE CARGA MASIVA")
+    print("=" * 50)
+
+    test_carga_productos()
+    test_carga_inventario()
+    test_rendimiento_catalogo_grande()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
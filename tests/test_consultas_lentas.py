@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el registro de consultas lentas (huellas, parámetros y planes)
+"""
+
+import sys
+import os
+import sqlite3
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.consultas_lentas import RegistroConsultasLentas, huella, forma_parametros
+from servicios import instrumentacion
+from servicios.escritor import conexion_lectura
+
+def crear_base(directorio):
+    """Base con productos e índice por código"""
+    ruta = os.path.join(directorio, 'inventario.db')
+    conn = sqlite3.connect(ruta)
+    conn.executescript('''
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, codigo TEXT, descripcion TEXT);
+        CREATE INDEX idx_productos_codigo ON productos(codigo);
+    ''')
+    conn.executemany('INSERT INTO productos (codigo, descripcion) VALUES (?, ?)',
+                     [(f'C{i}', f'Producto {i}') for i in range(20000)])
+    conn.commit()
+    conn.close()
+    return ruta
+
+def test_huellas():
+    """Sentencias que solo cambian en valores comparten huella"""
+    print("🧪 Probando normalización de huellas...")
+
+    a = huella("SELECT * FROM productos WHERE descripcion LIKE '%tornillo%' AND id IN (?, ?, ?) LIMIT 50")
+    b = huella("select *  from productos\n WHERE descripcion LIKE 'it''s' AND id IN (?) LIMIT 10")
+    assert a == b == 'select * from productos where descripcion like ? and id in (...) limit ?', a
+    assert huella('INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)') == 'insert into t (a, b) values (?, ?)'
+    # Los números dentro de identificadores no se tocan
+    assert huella('SELECT col1 FROM tabla2 WHERE x = 3.5') == 'select col1 from tabla2 where x = ?'
+
+    assert forma_parametros((1, 'a', None)) == '(int, str, null)'
+    assert forma_parametros({'id': 3}) == '{id: int}'
+    assert forma_parametros([(1, 'a')] * 250) == '250 x (int, str)'
+    assert forma_parametros(None) == ''
+    print("   ✅ Huellas y parámetros normalizados")
+
+def test_registro_y_plan():
+    """Registrar sentencias lentas de una medición con su plan"""
+    print("🧪 Probando registro con EXPLAIN QUERY PLAN...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = crear_base(directorio)
+        registro = RegistroConsultasLentas(os.path.join(directorio, 'lentas.db'),
+                                           lambda: conexion_lectura(ruta), umbral_ms=0)
+
+        token = instrumentacion.iniciar()
+        try:
+            conn = conexion_lectura(ruta)
+            for codigo in ('C1', 'C2', 'C3'):
+                conn.execute('SELECT * FROM productos WHERE codigo = ?', (codigo,)).fetchall()
+            conn.execute("SELECT COUNT(*) FROM productos WHERE descripcion LIKE '%9%'").fetchone()
+            conn.close()
+            guardadas = registro.revisar(instrumentacion.actual().sentencias, 'productos')
+        finally:
+            instrumentacion.terminar(token)
+
+        assert guardadas >= 4
+        assert registro.vaciar()
+        top = {h['huella']: h for h in registro.top(orden='veces')}
+        por_codigo = top['select * from productos where codigo = ?']
+        assert por_codigo['veces'] == 3
+        assert por_codigo['parametros'] == '(str)'
+        assert por_codigo['filas_promedio'] == 1
+        assert 'idx_productos_codigo' in por_codigo['plan']
+        assert por_codigo['endpoints'] == 'productos'
+        assert 'SCAN productos' in top['select count(*) from productos where descripcion like ?']['plan']
+        print(f"   📋 {por_codigo['plan']}")
+        print("   ✅ Huellas agregadas con plan")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_umbral_y_rotacion():
+    """Solo se guardan las sentencias sobre el umbral y el registro rota"""
+    print("🧪 Probando umbral y rotación...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = crear_base(directorio)
+        registro = RegistroConsultasLentas(os.path.join(directorio, 'lentas.db'),
+                                           lambda: conexion_lectura(ruta), umbral_ms=50, max_registros=30)
+
+        rapida = ['SELECT 1', 0.001, (), 1]
+        assert registro.revisar([rapida]) == 0
+
+        for i in range(150):
+            registro.revisar([[f'SELECT * FROM productos WHERE id = {i}', 0.06, (), 1]])
+        assert registro.vaciar()
+
+        conn = sqlite3.connect(registro.ruta)
+        total = conn.execute('SELECT COUNT(*) FROM consultas_lentas').fetchone()[0]
+        conn.close()
+        assert total <= 30 + 100, total
+        assert registro.top()[0]['veces'] == total
+        print(f"   ✅ {total} registros tras rotar")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_sin_bloquear():
+    """revisar() solo encola: el plan y el INSERT no se le suman a la petición"""
+    print("🧪 Probando registro en segundo plano...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = crear_base(directorio)
+
+        def conectar_lento():
+            time.sleep(0.2)  # EXPLAIN con la base ocupada
+            return conexion_lectura(ruta)
+
+        registro = RegistroConsultasLentas(os.path.join(directorio, 'lentas.db'), conectar_lento,
+                                           umbral_ms=0, cola_maxima=2)
+        inicio = time.perf_counter()
+        assert registro.revisar([['SELECT * FROM productos WHERE codigo = ?', 0.3, ('C1',), 1]], 'productos') == 1
+        encolado = time.perf_counter() - inicio
+        assert encolado < 0.1
+
+        # Con la cola llena se descarta y se cuenta
+        for i in range(5):
+            registro.revisar([[f'SELECT {i}', 0.3, (), 1]])
+        assert registro.descartadas >= 2
+        assert registro.vaciar()
+        assert sum(h['veces'] for h in registro.top()) == 6 - registro.descartadas
+        print(f"   ✅ Encolado en {encolado * 1000:.1f} ms, {registro.descartadas} descartadas")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DEL REGISTRO DE CONSULTAS LENTAS")
+    print("=" * 50)
+
+    test_huellas()
+    test_registro_y_plan()
+    test_umbral_y_rotacion()
+    test_sin_bloquear()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
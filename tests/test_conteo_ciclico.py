@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la importación de conteos cíclicos desde CSV
+"""
+
+import sys
+import os
+import io
+import sqlite3
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import bitacora
+from servicios import conteo_ciclico
+
+def crear_base_prueba(productos=5, ubicaciones=3):
+    """Crear una base de datos temporal con productos, ubicaciones e inventario"""
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(ruta)
+    conn.row_factory = sqlite3.Row
+    conn.executescript('''
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, descripcion TEXT NOT NULL, codigo TEXT UNIQUE);
+        CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY AUTOINCREMENT, codigo TEXT UNIQUE NOT NULL, nombre TEXT NOT NULL);
+        CREATE TABLE inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            ubicacion_id INTEGER NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(producto_id, ubicacion_id)
+        );
+    ''')
+    bitacora.crear_tablas(conn)
+    conn.executemany('INSERT INTO productos (id, descripcion, codigo) VALUES (?, ?, ?)',
+                     [(i, f'Producto {i}', f'P{i:05d}') for i in range(1, productos + 1)])
+    conn.executemany('INSERT INTO ubicaciones (codigo, nombre) VALUES (?, ?)',
+                     [(f'U{i}', f'U{i}') for i in range(1, ubicaciones + 1)])
+    conn.commit()
+    return conn, ruta
+
+def test_diferencias_y_aplicacion():
+    """Verificar la vista previa y la aplicación de un conteo pequeño"""
+    print("🧪 Probando diferencias de conteo...")
+
+    conn, ruta = crear_base_prueba()
+    try:
+        conn.executemany('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)',
+                         [(1, 1, 10), (2, 1, 4), (3, 2, 7)])
+        conn.commit()
+
+        archivo = io.StringIO(
+            'codigo;ubicacion;cantidad\n'
+            'P00001;U1;8\n'      # disminuye
+            '3;U2;7\n'           # sin cambio (por ID)
+            'p00004;u2;5\n'      # nuevo (minúsculas)
+            'P00004;U2;1\n'      # repetido: se suma
+            'NOEXISTE;U1;1\n'    # error de producto
+            'P00005;U9;1\n'      # error de ubicación
+            'P00005;U1;abc\n'    # error de cantidad
+        )
+        lineas, errores, total_errores = conteo_ciclico.cargar_conteo(conn, archivo)
+        assert lineas == 7
+        assert total_errores == 3
+
+        conteo_ciclico.calcular_diferencias(conn, poner_en_cero_faltantes=True)
+        resumen, filas = conteo_ciclico.resumen_diferencias(conn)
+
+        # P00001 8, P00004 6 nuevo, P00002 en U1 no contado -> 0
+        assert resumen['cambios'] == 3
+        assert resumen['nuevos'] == 1
+        assert resumen['en_cero'] == 1
+        print(f"   📊 Resumen: {resumen}")
+
+        # Todos los lotes en la transacción de quien llama: un rollback deshace el conteo completo
+        aplicados, _ = conteo_ciclico.aplicar_diferencias(conn, 1, '127.0.0.1', tamano_lote=2)
+        assert aplicados == 3
+        conn.rollback()
+        assert conn.execute('SELECT cantidad FROM inventario WHERE producto_id = 1').fetchone()[0] == 10
+
+        conteo_ciclico.calcular_diferencias(conn, poner_en_cero_faltantes=True)
+        aplicados, _ = conteo_ciclico.aplicar_diferencias(conn, 1, '127.0.0.1', tamano_lote=2)
+        conn.commit()
+
+        stock = {(r['producto_id'], r['ubicacion_id']): r['cantidad']
+                 for r in conn.execute('SELECT * FROM inventario')}
+        assert stock == {(1, 1): 8, (3, 2): 7, (4, 2): 6}
+
+        logs = conn.execute('''
+            SELECT COUNT(*) FROM operation_logs ol WHERE ol.tipo_id = (SELECT id FROM tipos_operacion WHERE nombre = 'CYCLE_COUNT')
+        ''').fetchone()[0]
+        assert logs == 3
+
+        print("   ✅ Conteo aplicado correctamente")
+    finally:
+        conn.close()
+        os.remove(ruta)
+
+def test_sin_poner_en_cero():
+    """Verificar que sin la opción no se tocan los productos no contados"""
+    print("🧪 Probando conteo parcial...")
+
+    conn, ruta = crear_base_prueba()
+    try:
+        conn.executemany('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)',
+                         [(1, 1, 10), (2, 1, 4)])
+        conn.commit()
+
+        conteo_ciclico.cargar_conteo(conn, io.StringIO('P00001,U1,10\n'))
+        conteo_ciclico.calcular_diferencias(conn, poner_en_cero_faltantes=False)
+        resumen, _ = conteo_ciclico.resumen_diferencias(conn)
+        assert resumen['cambios'] == 0
+
+        print("   ✅ Conteo parcial correcto")
+    finally:
+        conn.close()
+        os.remove(ruta)
+
+def test_huella_diferencias():
+    """La huella cambia si cambia el stock contado, no si cambia otra ubicación"""
+    print("🧪 Probando huella de la vista previa...")
+
+    conn, ruta = crear_base_prueba()
+    try:
+        conn.executemany('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)',
+                         [(1, 1, 10), (2, 3, 4)])
+        conn.commit()
+        conteo_ciclico.cargar_conteo(conn, io.StringIO('P00001,U1,8\n'))
+        conteo_ciclico.calcular_diferencias(conn)
+        revisada = conteo_ciclico.huella_diferencias(conn)
+
+        conn.execute('UPDATE inventario SET cantidad = 5 WHERE producto_id = 2')  # Otra ubicación
+        conteo_ciclico.calcular_diferencias(conn)
+        assert conteo_ciclico.huella_diferencias(conn) == revisada
+
+        conn.execute('UPDATE inventario SET cantidad = 9 WHERE producto_id = 1')  # Salida después de la vista previa
+        conteo_ciclico.calcular_diferencias(conn)
+        assert conteo_ciclico.huella_diferencias(conn) != revisada
+        print("   ✅ Solo cambia con el stock contado")
+    finally:
+        conn.close()
+        os.remove(ruta)
+
+def test_rendimiento_conteo_grande():
+    """Medir la importación de un conteo de 50,000 líneas"""
+    print("🧪 Midiendo conteo de 50,000 líneas...")
+
+    conn, ruta = crear_base_prueba(productos=10000, ubicaciones=5)
+    try:
+        archivo = io.StringIO()
+        archivo.write('codigo,ubicacion,cantidad\n')
+        for i in range(50000):
+            archivo.write(f'P{(i % 10000) + 1:05d},U{(i // 10000) + 1},{i % 7}\n')
+        archivo.seek(0)
+
+        inicio = time.perf_counter()
+        lineas, _, total_errores = conteo_ciclico.cargar_conteo(conn, archivo)
+        conteo_ciclico.calcular_diferencias(conn)
+        resumen, _ = conteo_ciclico.resumen_diferencias(conn)
+        aplicados, _ = conteo_ciclico.aplicar_diferencias(conn, 1, '127.0.0.1')
+        conn.commit()
+        tiempo = time.perf_counter() - inicio
+
+        print(f"   ⚡ {lineas} líneas, {aplicados} cambios en {tiempo:.2f}s")
+        assert lineas == 50000 and total_errores == 0
+        assert aplicados == resumen['cambios']
+        assert tiempo < 30
+    finally:
+        conn.close()
+        os.remove(ruta)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE CONTEO CÍCLICO")
+    print("=" * 50)
+
+    test_diferencias_y_aplicacion()
+    test_sin_poner_en_cero()
+    test_huella_diferencias()
+    test_rendimiento_conteo_grande()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
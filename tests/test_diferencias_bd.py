@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la comparación de bases de datos por hashes de rangos
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import shutil
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import diferencias_bd
+
+def crear_bases(filas=20000):
+    """Crear una base y una copia idéntica en un directorio temporal"""
+    directorio = tempfile.mkdtemp()
+    ruta_a = os.path.join(directorio, 'a.db')
+    ruta_b = os.path.join(directorio, 'b.db')
+
+    conn = sqlite3.connect(ruta_a)
+    conn.executescript('''
+        CREATE TABLE productos (id INTEGER PRIMARY KEY, descripcion TEXT NOT NULL, stock_minimo INTEGER);
+        CREATE TABLE inventario (id INTEGER PRIMARY KEY AUTOINCREMENT, producto_id INTEGER, cantidad INTEGER);
+    ''')
+    # Huecos en los IDs para probar rangos vacíos
+    conn.executemany('INSERT INTO productos VALUES (?, ?, ?)',
+                     [(i * 3, f'Producto {i}', i % 10) for i in range(1, filas + 1)])
+    conn.executemany('INSERT INTO inventario (producto_id, cantidad) VALUES (?, ?)',
+                     [(i * 3, i % 50) for i in range(1, filas + 1)])
+    conn.commit()
+    conn.close()
+    shutil.copy2(ruta_a, ruta_b)
+    return directorio, ruta_a, ruta_b
+
+def test_bases_identicas():
+    """Una copia exacta no debe reportar diferencias"""
+    print("🧪 Probando bases idénticas...")
+
+    directorio, ruta_a, ruta_b = crear_bases()
+    try:
+        reporte = diferencias_bd.comparar(ruta_a, ruta_b, procesos=1)
+        assert reporte['iguales']
+        assert reporte['tablas']['productos']['filas_a'] == 20000
+        assert reporte['tablas']['productos']['hash_a'] == reporte['tablas']['productos']['hash_b']
+        json.dumps(reporte)
+        print("   ✅ Sin diferencias")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_filas_exactas():
+    """Encontrar exactamente las filas agregadas, borradas y modificadas"""
+    print("🧪 Probando detección de filas distintas...")
+
+    directorio, ruta_a, ruta_b = crear_bases()
+    try:
+        conn = sqlite3.connect(ruta_b)
+        conn.execute("UPDATE productos SET descripcion = 'Cambiado' WHERE id IN (3, 45000)")
+        conn.execute('UPDATE productos SET stock_minimo = NULL WHERE id = 30000')
+        conn.execute('DELETE FROM productos WHERE id = 12')
+        conn.execute("INSERT INTO productos VALUES (10000000, 'Nuevo', 1)")
+        conn.execute('ALTER TABLE inventario ADD COLUMN notas TEXT')
+        conn.execute('CREATE TABLE extra (id INTEGER PRIMARY KEY)')
+        conn.commit()
+        conn.close()
+
+        reporte = diferencias_bd.comparar(ruta_a, ruta_b, procesos=2)
+        productos = reporte['tablas']['productos']
+        print(f"   📊 productos: {productos['bloques_distintos']} bloques distintos")
+
+        assert not reporte['iguales']
+        assert productos['distintas'] == [3, 30000, 45000]
+        assert productos['solo_en_a'] == [12]
+        assert productos['solo_en_b'] == [10000000]
+        assert reporte['tablas']['inventario']['columnas_solo_b'] == ['notas']
+        assert reporte['tablas']['inventario']['total_distintas'] == 0
+        assert reporte['tablas_solo_b'] == ['extra']
+        print("   ✅ Diferencias detectadas correctamente")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_rendimiento():
+    """Medir la comparación de tablas con 500,000 filas"""
+    print("🧪 Midiendo comparación de 500,000 filas por tabla...")
+
+    directorio, ruta_a, ruta_b = crear_bases(filas=500000)
+    try:
+        conn = sqlite3.connect(ruta_b)
+        conn.execute('UPDATE inventario SET cantidad = cantidad + 1 WHERE id = 250000')
+        conn.commit()
+        conn.close()
+
+        inicio = time.perf_counter()
+        reporte = diferencias_bd.comparar(ruta_a, ruta_b)
+        tiempo = time.perf_counter() - inicio
+        print(f"   ⚡ {tiempo:.2f}s")
+
+        assert reporte['tablas']['inventario']['distintas'] == [250000]
+        assert reporte['tablas']['productos']['iguales']
+        assert tiempo < 60
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE COMPARACIÓN DE BASES DE DATOS")
+    print("=" * 50)
+
+    test_bases_identicas()
+    test_filas_exactas()
+    test_rendimiento()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el escritor único de la base de datos y las conexiones de solo lectura
+"""
+
+import sys
+import os
+import sqlite3
+import shutil
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.escritor import EscritorSerializado, EscrituraOcupada, conexion_lectura
+from servicios.metricas import Histograma
+
+def crear_base():
+    """Crear una base en modo WAL con una tabla de inventario"""
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, 'inventario.db')
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE inventario (id INTEGER PRIMARY KEY, producto_id INTEGER UNIQUE, cantidad INTEGER)')
+    conn.execute('INSERT INTO inventario (producto_id, cantidad) VALUES (1, 0)')
+    conn.commit()
+    conn.close()
+    return directorio, ruta
+
+def test_commits_agrupados():
+    """Muchas escrituras concurrentes se confirman en menos transacciones"""
+    print("🧪 Probando agrupación de commits...")
+
+    directorio, ruta = crear_base()
+    try:
+        confirmados = []
+        escritor = EscritorSerializado(ruta, al_confirmar=lambda: confirmados.append(1))
+        hilos_totales, por_hilo = 16, 50
+
+        def sumar():
+            for _ in range(por_hilo):
+                escritor.ejecutar(lambda conn: conn.execute(
+                    'UPDATE inventario SET cantidad = cantidad + 1 WHERE producto_id = 1'))
+
+        inicio = time.perf_counter()
+        hilos = [threading.Thread(target=sumar) for _ in range(hilos_totales)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        tiempo = time.perf_counter() - inicio
+
+        conn = conexion_lectura(ruta)
+        cantidad = conn.execute('SELECT cantidad FROM inventario WHERE producto_id = 1').fetchone()['cantidad']
+        conn.close()
+
+        print(f"   📊 {escritor.tareas} tareas en {escritor.lotes} commits ({tiempo:.2f}s)")
+        assert cantidad == hilos_totales * por_hilo
+        assert escritor.tareas == hilos_totales * por_hilo
+        assert escritor.lotes < escritor.tareas
+        assert len(confirmados) == escritor.lotes  # Un aviso por commit, no por tarea
+        print("   ✅ Ninguna escritura perdida")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_error_aislado():
+    """Un error solo deshace la tarea que falló, no el resto del lote"""
+    print("🧪 Probando aislamiento de errores por tarea...")
+
+    directorio, ruta = crear_base()
+    try:
+        escritor = EscritorSerializado(ruta)
+
+        def insertar(conn, producto_id):
+            conn.execute('INSERT INTO inventario (producto_id, cantidad) VALUES (?, 1)', (producto_id,))
+            return producto_id
+
+        def duplicada(conn):
+            conn.execute('INSERT INTO inventario (producto_id, cantidad) VALUES (50, 1)')
+            conn.execute('INSERT INTO inventario (producto_id, cantidad) VALUES (1, 1)')
+
+        assert escritor.ejecutar(insertar, 2) == 2
+        try:
+            escritor.ejecutar(duplicada)
+            assert False, 'Se esperaba IntegrityError'
+        except sqlite3.IntegrityError:
+            pass
+        assert escritor.ejecutar(insertar, 3) == 3
+
+        conn = conexion_lectura(ruta)
+        productos = [fila['producto_id'] for fila in conn.execute('SELECT producto_id FROM inventario ORDER BY producto_id')]
+        conn.close()
+        assert productos == [1, 2, 3], productos
+        print("   ✅ La tarea fallida se deshizo completa")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_tarea_exclusiva():
+    """Las tareas exclusivas manejan sus propias transacciones"""
+    print("🧪 Probando tareas exclusivas...")
+
+    directorio, ruta = crear_base()
+    try:
+        escritor = EscritorSerializado(ruta)
+
+        def carga(conn):
+            for inicio in range(10, 40, 10):
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany('INSERT INTO inventario (producto_id, cantidad) VALUES (?, 0)',
+                                 [(i,) for i in range(inicio, inicio + 10)])
+                conn.execute('COMMIT')
+            return 30
+
+        assert escritor.ejecutar(carga, exclusiva=True) == 30
+        conn = conexion_lectura(ruta)
+        assert conn.execute('SELECT COUNT(*) FROM inventario').fetchone()[0] == 31
+        conn.close()
+        print("   ✅ Carga exclusiva confirmada")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_presupuesto_de_espera():
+    """Con el candado tomado por otro proceso la escritura se rechaza al agotar su presupuesto"""
+    print("🧪 Probando presupuesto de espera del candado...")
+
+    directorio, ruta = crear_base()
+    try:
+        rechazos = []
+        escritor = EscritorSerializado(ruta, presupuesto_espera=0.3, presupuestos={'lenta': 3.0},
+                                       obtener_etiqueta=lambda: etiqueta_actual[0],
+                                       al_rechazar=rechazos.append, reintentar_en=4)
+        etiqueta_actual = ['rapida']
+        sumar = lambda conn: conn.execute('UPDATE inventario SET cantidad = cantidad + 1')
+
+        bloqueo = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        bloqueo.execute('BEGIN IMMEDIATE')
+        inicio = time.perf_counter()
+        try:
+            escritor.ejecutar(sumar)
+            assert False, 'Se esperaba EscrituraOcupada'
+        except EscrituraOcupada as e:
+            assert e.reintentar_en == 4
+            assert e.etiqueta == 'rapida'
+        tiempo = time.perf_counter() - inicio
+        print(f"   ⏱️  Rechazada en {tiempo:.2f}s")
+        assert 0.25 < tiempo < 1.5
+        assert len(rechazos) == 1
+
+        # Una ruta con más presupuesto espera y reintenta hasta que se libera el candado
+        etiqueta_actual[0] = 'lenta'
+        threading.Timer(0.5, lambda: bloqueo.execute('ROLLBACK')).start()
+        escritor.ejecutar(sumar)
+        bloqueo.close()
+
+        estadisticas = escritor.estadisticas()
+        assert estadisticas['rechazadas'] == {'rapida': 1}
+        espera = estadisticas['rutas']['lenta']['espera_candado_ms']
+        assert espera['cuenta'] == 1 and espera['maximo'] >= 400
+        assert estadisticas['rutas']['lenta']['sentencias']['maximo'] == 1
+        print("   ✅ Rechazo acotado y reintento exitoso")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_tarea_en_curso():
+    """Una tarea que ya empezó no retiene a quien llama más allá de dos presupuestos"""
+    print("🧪 Probando tarea lenta que ya tiene el candado...")
+
+    directorio, ruta = crear_base()
+    try:
+        escritor = EscritorSerializado(ruta, presupuesto_espera=0.2)
+
+        def lenta(conn):
+            conn.execute('UPDATE inventario SET cantidad = 7')
+            time.sleep(0.8)
+
+        inicio = time.perf_counter()
+        try:
+            escritor.ejecutar(lenta)
+            assert False, 'Se esperaba EscrituraOcupada'
+        except EscrituraOcupada as e:
+            assert e.en_curso and 'sigue en curso' in str(e)
+        assert time.perf_counter() - inicio < 0.7
+
+        # La tarea termina en segundo plano y el escritor sigue atendiendo
+        time.sleep(0.6)
+        escritor.ejecutar(lambda conn: None)
+        conn = conexion_lectura(ruta)
+        assert conn.execute('SELECT cantidad FROM inventario').fetchone()[0] == 7
+        conn.close()
+        print("   ✅ Espera acotada y la tarea termina sola")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_sobrevive_error_de_conexion():
+    """Si falla el ROLLBACK de una tarea exclusiva el hilo escritor sigue vivo y reconecta"""
+    print("🧪 Probando error de la conexión del escritor...")
+
+    directorio, ruta = crear_base()
+    try:
+        escritor = EscritorSerializado(ruta)
+
+        def romper(conn):
+            conn.execute('BEGIN IMMEDIATE')
+            conn.close()  # El ROLLBACK del escritor falla con la conexión cerrada
+            raise ValueError('fallo de la tarea')
+
+        try:
+            escritor.ejecutar(romper, exclusiva=True)
+            assert False, 'Se esperaba un error'
+        except sqlite3.ProgrammingError:
+            pass
+        assert escritor.ejecutar(lambda conn: conn.execute('UPDATE inventario SET cantidad = 3').rowcount) == 1
+        assert escritor._hilo.is_alive()
+        print("   ✅ Tarea con error y escritor reconectado")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_histograma():
+    """Percentiles aproximados por cubeta"""
+    print("🧪 Probando histogramas...")
+
+    histograma = Histograma((1, 10, 100))
+    for valor in [0.5] * 90 + [50] * 9 + [500]:
+        histograma.observar(valor)
+    assert histograma.percentil(50) == 1
+    assert histograma.percentil(95) == 100
+    assert histograma.percentil(100) == 500
+    assert histograma.resumen()['cubetas'] == [[1, 90], [10, 0], [100, 9], ['+Inf', 1]]
+    print("   ✅ Percentiles correctos")
+
+def test_lectura_no_escribe():
+    """Las conexiones de lectura rechazan escrituras"""
+    print("🧪 Probando conexiones de solo lectura...")
+
+    directorio, ruta = crear_base()
+    try:
+        conn = conexion_lectura(ruta)
+        try:
+            conn.execute('DELETE FROM inventario')
+            assert False, 'Se esperaba error de solo lectura'
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.close()
+
+        # Con temporales=True se pueden crear tablas TEMP
+        conn = conexion_lectura(ruta, temporales=True)
+        conn.execute('CREATE TEMP TABLE conteo (producto_id INTEGER)')
+        conn.execute('INSERT INTO conteo VALUES (1)')
+        conn.close()
+        print("   ✅ Solo lectura verificada")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DEL ESCRITOR DE BASE DE DATOS")
+    print("=" * 50)
+
+    test_commits_agrupados()
+    test_error_aislado()
+    test_tarea_exclusiva()
+    test_presupuesto_de_espera()
+    test_tarea_en_curso()
+    test_sobrevive_error_de_conexion()
+    test_histograma()
+    test_lectura_no_escribe()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Pruebas para las imágenes de productos: validación, variantes reducidas y
+nombres por contenido
+"""
+
+import sys
+import os
+import io
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from servicios.imagenes import AlmacenImagenes, ImagenInvalida, NOMBRE_VARIANTE
+
+VARIANTES = {'lista': (96, 96), 'modal': (400, 400)}
+EXTENSIONES = {'jpg', 'jpeg', 'png', 'gif'}
+
+def imagen(ancho, alto, formato='JPEG', modo='RGB', color=(200, 30, 30), orientacion=None):
+    datos = io.BytesIO()
+    original = Image.new(modo, (ancho, alto), color)
+    if orientacion:
+        exif = Image.Exif()
+        exif[0x0112] = orientacion
+        original.save(datos, formato, exif=exif)
+    else:
+        original.save(datos, formato)
+    return datos.getvalue()
+
+def test_variantes():
+    """Tres variantes JPEG acotadas a su tamaño, con el hash en el nombre"""
+    print("🧪 Probando variantes reducidas...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        almacen = AlmacenImagenes(directorio, (800, 800), VARIANTES, EXTENSIONES)
+        resultado = almacen.guardar(imagen(4000, 3000), 'foto.JPG')
+        assert (resultado['ancho'], resultado['alto']) == (4000, 3000)
+        tamanos = {}
+        for variante, nombre in resultado['nombres'].items():
+            assert NOMBRE_VARIANTE.match(nombre) and nombre.startswith(resultado['clave'])
+            with Image.open(os.path.join(directorio, nombre)) as guardada:
+                assert guardada.format == 'JPEG'
+                tamanos[variante] = guardada.size
+        assert tamanos == {'completa': (800, 600), 'modal': (400, 300), 'lista': (96, 72)}
+
+        # Una imagen chica no se agranda
+        chica = almacen.guardar(imagen(50, 40), 'chica.jpg')
+        with Image.open(os.path.join(directorio, chica['nombres']['completa'])) as guardada:
+            assert guardada.size == (50, 40)
+        print("   ✅ completa 800x600, modal 400x300, lista 96x72")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_orientacion_y_transparencia():
+    """Se respeta la orientación EXIF y la transparencia queda sobre blanco"""
+    print("🧪 Probando orientación EXIF y transparencia...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        almacen = AlmacenImagenes(directorio, (800, 800), VARIANTES, EXTENSIONES)
+        girada = almacen.guardar(imagen(1200, 600, orientacion=6), 'girada.jpg')
+        assert (girada['ancho'], girada['alto']) == (600, 1200)
+        with Image.open(os.path.join(directorio, girada['nombres']['modal'])) as guardada:
+            assert guardada.size == (200, 400)
+
+        png = almacen.guardar(imagen(100, 100, 'PNG', 'RGBA', (0, 0, 0, 0)), 'transparente.png')
+        with Image.open(os.path.join(directorio, png['nombres']['lista'])) as guardada:
+            assert min(guardada.convert('RGB').getpixel((50, 50))) > 245
+        print("   ✅ Girada según EXIF y fondo blanco")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_validacion():
+    """Se rechazan extensiones, formatos y tamaños no permitidos"""
+    print("🧪 Probando validación...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        almacen = AlmacenImagenes(directorio, (800, 800), VARIANTES, EXTENSIONES, maximo_pixeles=1_000_000)
+        casos = [
+            (imagen(10, 10), 'foto.exe', 'Extensión'),
+            (b'no es una imagen', 'foto.jpg', 'no es una imagen'),
+            (imagen(10, 10, 'BMP'), 'foto.jpg', 'Formato'),
+            (imagen(2000, 1000), 'foto.jpg', 'demasiado grande'),
+        ]
+        for datos, nombre, mensaje in casos:
+            try:
+                almacen.guardar(datos, nombre)
+            except ImagenInvalida as e:
+                assert mensaje in str(e), (nombre, str(e))
+            else:
+                raise AssertionError(f'{nombre} debió rechazarse')
+        assert os.listdir(directorio) == []
+        print("   ✅ Extensión, contenido, formato y pixeles validados")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_misma_foto_una_vez():
+    """La misma foto da la misma clave y no se vuelve a generar; eliminar borra sus variantes"""
+    print("🧪 Probando deduplicación por contenido...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        almacen = AlmacenImagenes(directorio, (800, 800), VARIANTES, EXTENSIONES)
+        datos = imagen(1000, 1000)
+        primera = almacen.guardar(datos, 'a.jpg')
+        ruta = os.path.join(directorio, primera['nombres']['lista'])
+        modificado = os.path.getmtime(ruta)
+        os.utime(ruta, (modificado - 100, modificado - 100))
+        segunda = almacen.guardar(datos, 'b.jpeg')
+        assert segunda['clave'] == primera['clave']
+        assert os.path.getmtime(ruta) == modificado - 100
+        assert len(os.listdir(directorio)) == 3
+
+        otra = almacen.guardar(imagen(1000, 1000, color=(0, 0, 255)), 'c.jpg')
+        assert otra['clave'] != primera['clave'] and len(os.listdir(directorio)) == 6
+        almacen.eliminar(primera['clave'])
+        assert sorted(os.listdir(directorio)) == sorted(otra['nombres'].values())
+        print("   ✅ Una sola copia por contenido")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE IMÁGENES DE PRODUCTOS")
+    print("=" * 50)
+
+    test_variantes()
+    test_orientacion_y_transparencia()
+    test_validacion()
+    test_misma_foto_una_vez()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la importación masiva de imágenes: mapeo desde el CSV,
+procesamiento en paralelo, duplicados por contenido y reanudación con el
+manifiesto
+"""
+
+import sys
+import os
+import io
+import csv
+import shutil
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from servicios import carga_masiva
+from servicios.imagenes import AlmacenImagenes
+from servicios.importacion_imagenes import importar, leer_manifiesto, leer_mapeo, nombre_archivo
+
+VARIANTES = {'lista': (96, 96), 'modal': (400, 400)}
+EXTENSIONES = {'jpg', 'jpeg', 'png', 'gif'}
+# Mismo desorden que data/Productos.csv: la ruta en la columna sin nombre
+ENCABEZADO = ['Descripcion', 'ID', 'Codigo', 'Notas Adicionales', '', 'Imagen']
+
+def imagen(color, ancho=1200, alto=900, formato='JPEG'):
+    datos = io.BytesIO()
+    Image.new('RGB', (ancho, alto), color).save(datos, formato)
+    return datos.getvalue()
+
+def preparar(directorio):
+    """Fotos de origen, CSV y base con 6 productos"""
+    origen = os.path.join(directorio, 'media')
+    os.makedirs(os.path.join(origen, 'sub'))
+    archivos = {
+        'image1.jpg': imagen((255, 0, 0)),
+        'IMAGE2.JPG': imagen((0, 255, 0)),
+        'image3.jpg': imagen((255, 0, 0)),  # igual a image1
+        os.path.join('sub', 'image4.png'): imagen((0, 0, 255), formato='PNG'),
+        'image5.jpg': b'no es una imagen',
+    }
+    for nombre, datos in archivos.items():
+        with open(os.path.join(origen, nombre), 'wb') as archivo:
+            archivo.write(datos)
+
+    filas = [
+        ('Rodamiento', '1', 'R1', '', 'c:/Users/plasticosplasa/Pictures/media/image1.jpg', ''),
+        ('Banda', '2', 'B2', '', 'C:\\Users\\plasa\\media\\image2.jpg', ''),
+        ('Sello', '3', 'S3', '', 'c:/Users/plasticosplasa/Pictures/media/image3.jpg', ''),
+        ('Perno', '4', 'P4', '', 'media/image4.png', ''),
+        ('Tuerca', '5', 'T5', '', 'c:/media/image5.jpg', ''),
+        ('Polea', '6', 'P6', '', 'c:/media/image9.jpg', ''),
+        ('Resorte', '', 'X', '', 'c:/media/image1.jpg', ''),
+    ]
+    ruta_csv = os.path.join(directorio, 'Productos.csv')
+    with open(ruta_csv, 'w', encoding='utf-8', newline='') as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(ENCABEZADO)
+        escritor.writerows(filas)
+
+    conn = sqlite3.connect(os.path.join(directorio, 'inventario.db'))
+    conn.execute('CREATE TABLE productos (id INTEGER PRIMARY KEY, imagen TEXT, fecha_actualizacion TIMESTAMP)')
+    conn.executemany('INSERT INTO productos (id) VALUES (?)', [(i,) for i in range(1, 7)])
+    conn.commit()
+    return origen, ruta_csv, conn
+
+def leer_filas(ruta_csv):
+    with open(ruta_csv, 'r', encoding='utf-8-sig', newline='') as archivo:
+        return carga_masiva.leer_csv(archivo)
+
+def imagenes(conn):
+    return dict(conn.execute('SELECT id, imagen FROM productos'))
+
+def test_mapeo():
+    """La ruta Windows o POSIX se reduce al nombre, en la columna que esté"""
+    print("🧪 Probando mapeo desde el CSV...")
+
+    assert nombre_archivo('c:/Users/x/media/image1.jpg') == 'image1.jpg'
+    assert nombre_archivo('C:\\Users\\x\\Image2.JPG ') == 'Image2.JPG'
+    directorio = tempfile.mkdtemp()
+    try:
+        _, ruta_csv, conn = preparar(directorio)
+        conn.close()
+        mapeo = leer_mapeo(leer_filas(ruta_csv), EXTENSIONES)
+        assert mapeo == {'image1.jpg': [1], 'image2.jpg': [2], 'image3.jpg': [3], 'image4.png': [4],
+                         'image5.jpg': [5], 'image9.jpg': [6]}
+
+        # El CSV real: todas las rutas en la columna sin nombre
+        with open(os.path.join('data', 'Productos.csv'), 'r', encoding='utf-8-sig', newline='') as archivo:
+            reales = leer_mapeo(carga_masiva.leer_csv(archivo), EXTENSIONES)
+        assert len(reales) > 50 and all(nombre.startswith('image') for nombre in reales)
+        print(f"   ✅ {len(reales)} imágenes mapeadas en data/Productos.csv")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_importacion_y_reanudacion():
+    """Importa en paralelo, deduplica por contenido y al repetir solo procesa lo que cambió"""
+    print("🧪 Probando importación en paralelo y reanudación...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        origen, ruta_csv, conn = preparar(directorio)
+        destino = os.path.join(directorio, 'imagenes')
+        manifiesto = os.path.join(directorio, 'manifiesto.json')
+        almacen = AlmacenImagenes(destino, (800, 800), VARIANTES, EXTENSIONES)
+        avance = []
+
+        resultado = importar(conn, origen, leer_filas(ruta_csv), almacen, manifiesto, procesos=2,
+                             al_avanzar=lambda hechas, total: avance.append((hechas, total)))
+        assert (resultado.procesadas, resultado.duplicadas, resultado.omitidas) == (4, 1, 0)
+        assert resultado.faltantes == ['image9.jpg']
+        assert [nombre for nombre, _ in resultado.errores] == ['image5.jpg']
+        assert avance[-1] == (5, 5) and resultado.productos == 4
+
+        asignadas = imagenes(conn)
+        assert asignadas[1] == asignadas[3] and len({asignadas[1], asignadas[2], asignadas[4]}) == 3
+        assert asignadas[5] is None and asignadas[6] is None
+        assert len(os.listdir(destino)) == 9  # 3 contenidos distintos x 3 variantes
+        entradas = leer_manifiesto(manifiesto)
+        assert entradas['image2.jpg']['productos'] == [2] and 'error' in entradas['image5.jpg']
+
+        # Otra corrida: nada cambió, solo se reintenta el que falló
+        resultado = importar(conn, origen, leer_filas(ruta_csv), almacen, manifiesto, procesos=2)
+        assert (resultado.procesadas, resultado.omitidas, len(resultado.errores)) == (0, 4, 1)
+        assert resultado.productos == 0
+
+        # Se reemplaza una foto y se borran variantes de otra: solo esas se procesan
+        with open(os.path.join(origen, 'IMAGE2.JPG'), 'wb') as archivo:
+            archivo.write(imagen((10, 10, 10), 640, 480))
+        os.remove(os.path.join(destino, almacen.nombre(asignadas[4], 'lista')))
+        resultado = importar(conn, origen, leer_filas(ruta_csv), almacen, manifiesto, procesos=2)
+        assert (resultado.procesadas, resultado.omitidas) == (2, 2)
+        assert resultado.productos == 0 and imagenes(conn)[2] == asignadas[2]  # sin --reemplazar
+        assert almacen.existe(asignadas[4])
+
+        resultado = importar(conn, origen, leer_filas(ruta_csv), almacen, manifiesto, reemplazar=True)
+        assert resultado.productos == 1 and imagenes(conn)[2] == leer_manifiesto(manifiesto)['image2.jpg']['clave']
+        conn.close()
+        print("   ✅ Duplicados, faltantes, errores y reanudación")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE IMPORTACIÓN DE IMÁGENES")
+    print("=" * 50)
+
+    test_mapeo()
+    test_importacion_y_reanudacion()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Pruebas para la medición de SQL por petición (Server-Timing y trazas)
+"""
+
+import sys
+import os
+import sqlite3
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import instrumentacion
+from servicios.instrumentacion import ConexionMedida
+from servicios.escritor import EscritorSerializado, conexion_lectura
+
+def crear_base():
+    """Crear una base temporal con algunos productos"""
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, 'inventario.db')
+    conn = sqlite3.connect(ruta)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE productos (id INTEGER PRIMARY KEY, descripcion TEXT)')
+    conn.executemany('INSERT INTO productos (descripcion) VALUES (?)', [(f'Producto {i}',) for i in range(5000)])
+    conn.commit()
+    conn.close()
+    return directorio, ruta
+
+def test_conteo_y_mas_lenta():
+    """Contar sentencias y sumar el tiempo de leer las filas"""
+    print("🧪 Probando conteo de consultas...")
+
+    directorio, ruta = crear_base()
+    try:
+        token = instrumentacion.iniciar()
+        try:
+            conn = sqlite3.connect(ruta, factory=ConexionMedida)
+            conn.execute('SELECT 1').fetchone()
+            filas = conn.execute('SELECT a.id FROM productos a, productos b WHERE b.id < 50 ORDER BY a.descripcion').fetchall()
+            conteo = sum(1 for _ in conn.execute('SELECT id FROM productos'))
+            conn.close()
+
+            medicion = instrumentacion.actual()
+            assert len(filas) == 245000 and conteo == 5000
+            assert medicion.consultas == 3
+            assert 'productos a, productos b' in medicion.mas_lenta()[0]
+            assert medicion.tiempo_sql >= medicion.mas_lenta()[1] > 0
+
+            header = medicion.server_timing(detalle=True)
+            print(f"   📊 {header}")
+            assert header.startswith('sql;dur=') and 'desc="3 consultas"' in header
+            assert 'sql-lenta;dur=' in header and 'total;dur=' in header
+            assert 'productos' not in medicion.server_timing()  # Sin detalle no va el SQL
+            assert len(medicion.traza()['sentencias']) == 3
+        finally:
+            instrumentacion.terminar(token)
+
+        # Los PRAGMA al abrir una conexión de lectura no cuentan
+        token = instrumentacion.iniciar()
+        try:
+            conn = conexion_lectura(ruta)
+            conn.execute('SELECT COUNT(*) FROM productos').fetchone()
+            conn.close()
+            medicion = instrumentacion.actual()
+            assert medicion.consultas == 1 and medicion.sentencias[0][0].startswith('SELECT'), medicion.sentencias
+        finally:
+            instrumentacion.terminar(token)
+
+        # Sin medición activa la conexión funciona igual
+        assert instrumentacion.actual() is None
+        conn = conexion_lectura(ruta)
+        assert conn.execute('SELECT COUNT(*) FROM productos').fetchone()[0] == 5000
+        conn.close()
+        print("   ✅ Consultas medidas")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_escritor_atribuye_a_la_peticion():
+    """Las sentencias ejecutadas por el escritor cuentan para la petición que las envió"""
+    print("🧪 Probando medición a través del escritor...")
+
+    directorio, ruta = crear_base()
+    try:
+        escritor = EscritorSerializado(ruta)
+        token = instrumentacion.iniciar()
+        try:
+            escritor.ejecutar(lambda conn: conn.execute("UPDATE productos SET descripcion = 'x' WHERE id = 1"))
+            medicion = instrumentacion.actual()
+            assert medicion.consultas == 1, medicion.sentencias
+            assert medicion.sentencias[0][0].startswith('UPDATE productos')
+        finally:
+            instrumentacion.terminar(token)
+        print("   ✅ Sentencias del escritor atribuidas")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_descripcion_segura():
+    """La sentencia más lenta no debe romper el header"""
+    print("🧪 Probando descripción del header...")
+
+    token = instrumentacion.iniciar()
+    try:
+        medicion = instrumentacion.actual()
+        entrada = medicion.nueva_sentencia('SELECT "descripción"\n  FROM productos WHERE x = \'ñ\' ' + 'AND 1 ' * 50)
+        medicion.sumar(entrada, 0.002)
+        header = medicion.server_timing(detalle=True)
+        header.encode('latin-1')
+        assert '\n' not in header and 'desc="SELECT \'descripci?n\' FROM' in header
+        print("   ✅ Header válido")
+    finally:
+        instrumentacion.terminar(token)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE INSTRUMENTACIÓN DE SQL")
+    print("=" * 50)
+
+    test_conteo_y_mas_lenta()
+    test_escritor_atribuye_a_la_peticion()
+    test_descripcion_segura()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -25,7 +25,7 @@ def test_database_migration():
         if table_exists:
             print("✅ Tabla producto_maquinas existe")
         else:
-            print("❌ Tabla producto_maquinas no existe - ejecutar migrar_maquinas.py")
+            print("❌ Tabla producto_maquinas no existe - ejecutar migrations/migrar.py")
             return False
         
         # Verificar que la tabla productos no tiene maquina_id
@@ -286,7 +286,7 @@ def main():
     
     if not test1_ok:
         print("\n❌ MIGRACIÓN REQUERIDA")
-        print("Ejecuta: python migrar_maquinas.py")
+        print("Ejecuta: python migrations/migrar.py")
         return
     
     # Test 2: Operaciones CRUD
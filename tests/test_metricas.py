@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Pruebas para las métricas en formato de exposición de Prometheus
+"""
+
+import sys
+import os
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.metricas import RegistroMetricas, Histogramas, exponer_histogramas
+
+def muestras(texto):
+    """{nombre{etiquetas}: valor} sin comentarios"""
+    resultado = {}
+    for linea in texto.splitlines():
+        if linea and not linea.startswith('#'):
+            nombre, valor = linea.rsplit(' ', 1)
+            resultado[nombre] = float(valor)
+    return resultado
+
+def test_contador_con_etiquetas():
+    """Los contadores suman por combinación de etiquetas, también entre hilos"""
+    print("🧪 Probando contadores...")
+
+    registro = RegistroMetricas()
+    contador = registro.contador('prueba_total', 'Peticiones de prueba', ('endpoint', 'estado'))
+
+    def sumar():
+        for _ in range(1000):
+            contador.incrementar('inventario', '200')
+
+    hilos = [threading.Thread(target=sumar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    contador.incrementar('buscar', '500', cantidad=3)
+    contador.incrementar('ruta "rara"\n', '200')
+
+    texto = registro.exposicion()
+    datos = muestras(texto)
+    assert '# TYPE prueba_total counter' in texto
+    assert datos['prueba_total{endpoint="inventario",estado="200"}'] == 4000
+    assert datos['prueba_total{endpoint="buscar",estado="500"}'] == 3
+    assert 'prueba_total{endpoint="ruta \\"rara\\"\\n",estado="200"} 1' in texto
+    print("   ✅ Conteos y escapes correctos")
+
+def test_histograma_acumulado():
+    """Las cubetas se exponen acumuladas y terminan en +Inf = _count"""
+    print("🧪 Probando histogramas...")
+
+    registro = RegistroMetricas()
+    histograma = registro.histograma('prueba_segundos', 'Duración', ('endpoint',), limites=(0.1, 1, 10))
+    for valor in (0.05, 0.1, 0.5, 2, 50):
+        histograma.observar(valor, 'x')
+
+    datos = muestras(registro.exposicion())
+    assert datos['prueba_segundos_bucket{endpoint="x",le="0.1"}'] == 2
+    assert datos['prueba_segundos_bucket{endpoint="x",le="1"}'] == 3
+    assert datos['prueba_segundos_bucket{endpoint="x",le="10"}'] == 4
+    assert datos['prueba_segundos_bucket{endpoint="x",le="+Inf"}'] == 5
+    assert datos['prueba_segundos_count{endpoint="x"}'] == 5
+    assert abs(datos['prueba_segundos_sum{endpoint="x"}'] - 52.65) < 1e-6
+    print("   ✅ Cubetas acumuladas correctas")
+
+def test_histogramas_en_milisegundos():
+    """Los histogramas del escritor (ms) se exponen en segundos"""
+    print("🧪 Probando conversión de unidades...")
+
+    histogramas = Histogramas()
+    histogramas.observar('retencion_ms', 'agregar_stock', 3)
+    histogramas.observar('retencion_ms', 'agregar_stock', 40)
+
+    texto = '\n'.join(exponer_histogramas(histogramas, 'escritor', 'endpoint',
+                                          escalas={'retencion_ms': ('retencion_segundos', 0.001)}))
+    datos = muestras(texto)
+    assert '# TYPE escritor_retencion_segundos histogram' in texto
+    assert datos['escritor_retencion_segundos_bucket{endpoint="agregar_stock",le="0.005"}'] == 1
+    assert datos['escritor_retencion_segundos_bucket{endpoint="agregar_stock",le="0.05"}'] == 2
+    assert abs(datos['escritor_retencion_segundos_sum{endpoint="agregar_stock"}'] - 0.043) < 1e-9
+    print("   ✅ Unidades convertidas")
+
+def test_medidores():
+    """Los medidores leen su valor al exponer y un error no rompe la salida"""
+    print("🧪 Probando medidores...")
+
+    registro = RegistroMetricas()
+    valores = {'cola': 2}
+    registro.medidor('prueba_cola', 'Tareas en cola', lambda: valores['cola'])
+    registro.medidor('prueba_roto', 'Siempre falla', lambda: 1 / 0)
+    registro.medidor('prueba_por_ruta', 'Por ruta', lambda: [(('a',), 1), (('b',), 2)], etiquetas=('ruta',))
+
+    valores['cola'] = 7
+    texto = registro.exposicion()
+    datos = muestras(texto)
+    assert datos['prueba_cola'] == 7
+    assert datos['prueba_por_ruta{ruta="b"}'] == 2
+    assert 'prueba_roto' in texto and 'error al leer' in texto
+    print("   ✅ Medidores correctos")
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE MÉTRICAS (PROMETHEUS)")
+    print("=" * 50)
+
+    test_contador_con_etiquetas()
+    test_histograma_acumulado()
+    test_histogramas_en_milisegundos()
+    test_medidores()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Pruebas para las migraciones versionadas del esquema
+"""
+
+import sys
+import os
+import sqlite3
+import shutil
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import migraciones
+from migrations.importar_datos import init_db
+
+def crear_base_legada():
+    """Crear una base con el esquema original de importar_datos.py"""
+    directorio = tempfile.mkdtemp()
+    anterior = os.getcwd()
+    os.chdir(directorio)
+    try:
+        conn = init_db()
+    finally:
+        os.chdir(anterior)
+    conn.execute("INSERT INTO maquinas (id, nombre) VALUES (1, 'Cepillo')")
+    conn.executemany('INSERT INTO productos (id, descripcion, maquina_id) VALUES (?, ?, ?)',
+                     [(i, f'Producto {i}', 1 if i % 2 else None) for i in range(1, 101)])
+    conn.execute("INSERT INTO ubicaciones (codigo, nombre) VALUES ('A1', 'A1')")
+    conn.commit()
+    return conn, directorio
+
+def test_migrar_base_legada():
+    """Verificar que una base antigua queda en la versión actual"""
+    print("🧪 Probando migración de una base antigua...")
+
+    conn, directorio = crear_base_legada()
+    try:
+        aplicadas = migraciones.aplicar_migraciones(conn)
+        assert [v for v, _, _ in aplicadas] == [v for v, _, _ in migraciones.MIGRACIONES]
+        assert migraciones.version_esquema(conn) == migraciones.VERSION_ACTUAL
+
+        columnas = [fila[1] for fila in conn.execute('PRAGMA table_info(productos)')]
+        assert 'stock_minimo' in columnas and 'proveedor_id' in columnas
+        assert conn.execute('SELECT COUNT(*) FROM producto_maquinas').fetchone()[0] == 50
+        assert conn.execute('SELECT COUNT(*) FROM admin_users').fetchone()[0] == 1
+
+        # Las ubicaciones nuevas ya reciben fecha de creación
+        conn.execute("INSERT INTO ubicaciones (codigo, nombre) VALUES ('A2', 'A2')")
+        assert conn.execute("SELECT fecha_creacion FROM ubicaciones WHERE codigo = 'A2'").fetchone()[0]
+        assert conn.execute('SELECT COUNT(*) FROM ubicaciones').fetchone()[0] == 2
+
+        historial = migraciones.migraciones_aplicadas(conn)
+        assert len(historial) == len(migraciones.MIGRACIONES)
+        for version, nombre, segundos in aplicadas:
+            print(f"   ⏱️  {version:03d}_{nombre}: {segundos * 1000:.1f} ms")
+
+        print("   ✅ Base antigua migrada correctamente")
+    finally:
+        conn.close()
+        shutil.rmtree(directorio)
+
+def test_idempotencia_y_costo_al_iniciar():
+    """Verificar que volver a migrar no hace nada y es prácticamente gratis"""
+    print("🧪 Probando arranque con el esquema al día...")
+
+    conn, directorio = crear_base_legada()
+    try:
+        migraciones.aplicar_migraciones(conn, hasta=4)
+        assert migraciones.version_esquema(conn) == 4
+
+        # Reaplicar una migración ya hecha no debe fallar
+        conn.execute('PRAGMA user_version = 2')
+        conn.commit()
+        migraciones.aplicar_migraciones(conn)
+        assert migraciones.version_esquema(conn) == migraciones.VERSION_ACTUAL
+
+        inicio = time.perf_counter()
+        for _ in range(100):
+            assert migraciones.aplicar_migraciones(conn) == []
+        promedio = (time.perf_counter() - inicio) / 100
+        print(f"   ⚡ Verificación al iniciar: {promedio * 1000:.3f} ms")
+        assert promedio < 0.01
+
+        print("   ✅ Migraciones idempotentes")
+    finally:
+        conn.close()
+        shutil.rmtree(directorio)
+
+def test_reconstruir_tabla_con_escrituras_concurrentes():
+    """Reescribir una tabla por lotes mientras otra conexión la modifica"""
+    print("🧪 Probando reescritura de tabla en línea...")
+
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, 'prueba.db')
+    conn = sqlite3.connect(ruta, timeout=20.0)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, nombre TEXT, obsoleta TEXT)')
+    conn.execute('CREATE INDEX idx_items_nombre ON items(nombre)')
+    conn.executemany('INSERT INTO items (id, nombre, obsoleta) VALUES (?, ?, ?)',
+                     [(i, f'item {i}', 'x') for i in range(1, 20001)])
+    conn.commit()
+
+    esperado = {i: f'item {i}' for i in range(1, 20001)}
+    detener = threading.Event()
+
+    def escribir():
+        otra = sqlite3.connect(ruta, timeout=20.0)
+        i = 0
+        while not detener.is_set():
+            i += 1
+            actualizar, borrar = (i * 37) % 20000 + 1, (i * 53) % 20000 + 1
+            otra.execute('UPDATE items SET nombre = ? WHERE id = ?', (f'cambiado {i}', actualizar))
+            otra.execute('DELETE FROM items WHERE id = ?', (borrar,))
+            nuevo = otra.execute('INSERT INTO items (nombre) VALUES (?)', (f'nuevo {i}',)).lastrowid
+            otra.commit()
+            if actualizar in esperado:
+                esperado[actualizar] = f'cambiado {i}'
+            esperado.pop(borrar, None)
+            esperado[nuevo] = f'nuevo {i}'
+        otra.close()
+
+    hilo = threading.Thread(target=escribir)
+    hilo.start()
+    try:
+        migraciones.reconstruir_tabla(conn, 'items', '''
+            CREATE TABLE items (id INTEGER PRIMARY KEY, nombre TEXT NOT NULL DEFAULT '')
+        ''', tamano_lote=500)
+    finally:
+        detener.set()
+        hilo.join()
+
+    try:
+        columnas = [fila[1] for fila in conn.execute('PRAGMA table_info(items)')]
+        assert columnas == ['id', 'nombre']
+        indices = {fila[0] for fila in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_items_nombre' in indices
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0] == 0
+        assert conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+        assert dict(conn.execute('SELECT id, nombre FROM items').fetchall()) == esperado
+        print(f"   📊 {len(esperado)} filas después de la reescritura")
+        print("   ✅ Tabla reescrita sin perder escrituras")
+    finally:
+        conn.close()
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE MIGRACIONES DE ESQUEMA")
+    print("=" * 50)
+
+    test_migrar_base_legada()
+    test_idempotencia_y_costo_al_iniciar()
+    test_reconstruir_tabla_con_escrituras_concurrentes()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el perfilado de peticiones (cProfile, muestreo de pila y reglas uno de cada N)
+"""
+
+import sys
+import os
+import time
+import shutil
+import tempfile
+import threading
+import pstats
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.perfilador import Perfilador
+
+def trabajo_lento():
+    """Algo de CPU para que aparezca en el perfil"""
+    total = 0
+    fin = time.perf_counter() + 0.15
+    while time.perf_counter() < fin:
+        total += sum(i * i for i in range(500))
+    return total
+
+def test_cprofile():
+    """El modo cprofile guarda un .prof que pstats puede leer"""
+    print("🧪 Probando modo cprofile...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        perfilador = Perfilador(directorio)
+        perfil = perfilador.iniciar('cprofile')
+        trabajo_lento()
+        perfil_id = perfilador.guardar(perfil, {'endpoint': 'prueba', 'ruta': '/prueba', 'metodo': 'GET', 'estado': 200})
+
+        meta = perfilador.obtener(perfil_id)
+        assert meta['modo'] == 'cprofile' and meta['duracion_ms'] >= 150
+        estadisticas = pstats.Stats(perfilador.archivo(meta))
+        assert any(funcion[2] == 'trabajo_lento' for funcion in estadisticas.stats)
+        assert 'trabajo_lento' in perfilador.reporte(meta, orden='tottime')
+        print("   ✅ .prof legible con pstats")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_muestreo():
+    """El modo muestreo guarda pilas colapsadas con la función caliente"""
+    print("🧪 Probando modo muestreo...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        perfilador = Perfilador(directorio)
+        perfil = perfilador.iniciar('muestreo')
+        trabajo_lento()
+        perfil_id = perfilador.guardar(perfil, {'endpoint': 'prueba', 'ruta': '/prueba', 'metodo': 'GET', 'estado': 200})
+
+        meta = perfilador.obtener(perfil_id)
+        assert meta['muestras'] > 5, meta
+        with open(perfilador.archivo(meta), encoding='utf-8') as archivo:
+            lineas = archivo.read().splitlines()
+        assert all(linea.rsplit(' ', 1)[1].isdigit() for linea in lineas)
+        resumen = perfilador.resumen_muestreo(meta)
+        inclusivas = {marco.split(' ')[0]: porcentaje for marco, _, porcentaje in resumen['inclusivas']}
+        assert inclusivas.get('trabajo_lento', 0) > 80, inclusivas
+        print(f"   ✅ {meta['muestras']} muestras, trabajo_lento en {inclusivas['trabajo_lento']}%")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_regla_uno_de_n():
+    """Una regla perfila una de cada N peticiones y expira"""
+    print("🧪 Probando reglas uno de cada N...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        perfilador = Perfilador(directorio)
+        perfilador.agregar_regla('productos', 4, minutos=5)
+        elegidas = [perfilador.toca_muestreo('productos') for _ in range(12)]
+        assert elegidas.count(True) == 3 and elegidas[3] and elegidas[7]
+        assert not perfilador.toca_muestreo('inventario')
+        assert perfilador.reglas()[0]['perfiladas'] == 3
+
+        perfilador.agregar_regla('inventario', 1, minutos=0)
+        assert not perfilador.toca_muestreo('inventario')
+        assert [regla['endpoint'] for regla in perfilador.reglas()] == ['productos']
+        print("   ✅ Muestreo y expiración correctos")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_cprofile_simultaneo():
+    """Con un cProfile activo, otra petición cae a muestreo en lugar de fallar"""
+    print("🧪 Probando cProfile simultáneo...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        perfilador = Perfilador(directorio)
+        primero = perfilador.iniciar('cprofile')
+        otros = []
+        hilo = threading.Thread(target=lambda: otros.append(perfilador.iniciar('cprofile')))
+        hilo.start()
+        hilo.join()
+        assert primero.modo == 'cprofile' and otros[0].modo == 'muestreo'
+
+        perfilador.guardar(otros[0], {'ruta': '/otro'})
+        perfilador.guardar(primero, {'ruta': '/primero'})
+        tercero = perfilador.iniciar('cprofile')
+        assert tercero.modo == 'cprofile'  # Se liberó al guardar
+        perfilador.guardar(tercero, {'ruta': '/tercero'})
+        print("   ✅ Un solo cProfile a la vez")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_poda_y_ids():
+    """Se conservan solo los últimos perfiles y se rechazan ids con rutas"""
+    print("🧪 Probando poda...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        perfilador = Perfilador(directorio, max_perfiles=3)
+        ids = []
+        for indice in range(5):
+            perfil = perfilador.iniciar('cprofile')
+            ids.append(perfilador.guardar(perfil, {'ruta': f'/p{indice}'}))
+        assert [meta['id'] for meta in perfilador.listar()] == ids[:1:-1]
+        assert perfilador.obtener(ids[0]) is None
+        assert perfilador.obtener('../inventario') is None
+        print("   ✅ Poda correcta")
+    finally:
+        shutil.rmtree(directorio)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DEL PERFILADOR")
+    print("=" * 50)
+
+    test_cprofile()
+    test_muestreo()
+    test_regla_uno_de_n()
+    test_cprofile_simultaneo()
+    test_poda_y_ids()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
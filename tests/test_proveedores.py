@@ -248,7 +248,7 @@ def main():
     
     if not os.path.exists('inventario.db'):
         print("❌ No se encontró inventario.db")
-        print("💡 Ejecuta primero el script de migración: python migrar_proveedores.py")
+        print("💡 Ejecuta primero el script de migración: python migrations/migrar.py")
         return
     
     # Ejecutar pruebas
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el logging sin bloqueo (cola, JSON por línea, rotación y compresión)
+"""
+
+import sys
+import os
+import gzip
+import json
+import time
+import queue
+import shutil
+import logging
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.registro import ArchivoRotativo, FormatoJSON, ManejadorCola, RegistroNoBloqueante, FiltroLogger
+
+def logger_aislado(nombre, manejador):
+    """Logger que no propaga al raíz (para no tocar el logging de otras pruebas)"""
+    logger = logging.getLogger(nombre)
+    logger.handlers = [manejador]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+def test_json_con_extras_y_excepcion():
+    """Cada registro es una línea JSON con los campos extra y el traceback"""
+    print("🧪 Probando formato JSON...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        registro = RegistroNoBloqueante(contexto=lambda: {'endpoint': 'inventario'})
+        archivo = registro.archivo(os.path.join(directorio, 'app.log'))
+        registro.iniciar([archivo])
+        logger = logger_aislado('prueba.json', registro.manejador)
+
+        logger.info('Stock agregado: %s unidades', 5, extra={'producto_id': 12})
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception('Fallo al calcular')
+        registro.detener()
+
+        with open(os.path.join(directorio, 'app.log'), encoding='utf-8') as entrada:
+            lineas = [json.loads(linea) for linea in entrada]
+        assert lineas[0]['mensaje'] == 'Stock agregado: 5 unidades'
+        assert lineas[0]['producto_id'] == 12 and lineas[0]['endpoint'] == 'inventario'
+        assert lineas[1]['nivel'] == 'ERROR' and 'ZeroDivisionError' in lineas[1]['excepcion']
+        print("   ✅ Líneas JSON correctas")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_rotacion_por_tamano_comprimida():
+    """Al pasar max_bytes se rota y el respaldo queda en .gz"""
+    print("🧪 Probando rotación por tamaño...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'app.log')
+        manejador = ArchivoRotativo(ruta, max_bytes=2000, respaldos=3, comprimir=True)
+        manejador.setFormatter(FormatoJSON())
+        logger = logger_aislado('prueba.tamano', manejador)
+        for indice in range(100):
+            logger.info(f'registro {indice:03d} ' + 'x' * 40)
+        manejador.close()
+
+        archivos = sorted(os.listdir(directorio))
+        assert archivos == ['app.log', 'app.log.1.gz', 'app.log.2.gz', 'app.log.3.gz'], archivos
+        assert os.path.getsize(ruta) <= 2000
+        with gzip.open(os.path.join(directorio, 'app.log.1.gz'), 'rt', encoding='utf-8') as entrada:
+            json.loads(entrada.readline())
+        print("   ✅ Respaldos comprimidos y limitados")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_rotacion_por_tiempo():
+    """Pasada la ventana se rota aunque el archivo sea chico"""
+    print("🧪 Probando rotación por tiempo...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'app.log')
+        manejador = ArchivoRotativo(ruta, rotar_cada=1)
+        manejador.setFormatter(FormatoJSON())
+        logger = logger_aislado('prueba.tiempo', manejador)
+        logger.info('antes')
+        manejador._proxima = time.time() - 1
+        logger.info('despues')
+        manejador.close()
+
+        assert sorted(os.listdir(directorio)) == ['app.log', 'app.log.1']
+        with open(ruta, encoding='utf-8') as entrada:
+            assert json.loads(entrada.readline())['mensaje'] == 'despues'
+        print("   ✅ Rotó por tiempo")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_cola_llena_no_bloquea():
+    """Con la cola llena se descarta y se cuenta, sin esperar"""
+    print("🧪 Probando cola llena...")
+
+    cola = queue.Queue(10)
+    manejador = ManejadorCola(cola)
+    logger = logger_aislado('prueba.cola', manejador)
+
+    inicio = time.perf_counter()
+    for indice in range(50):
+        logger.info('registro %d', indice)
+    segundos = time.perf_counter() - inicio
+
+    assert cola.qsize() == 10 and manejador.descartados == 40
+    assert segundos < 0.5
+    print(f"   ✅ 40 descartados en {segundos * 1000:.1f} ms")
+
+def test_filtro_trazas():
+    """Las trazas van a su propio archivo"""
+    print("🧪 Probando filtro de loggers...")
+
+    solo_trazas = FiltroLogger(['inventario.trazas'])
+    sin_trazas = FiltroLogger(['inventario.trazas'], excluir=True)
+    traza = logging.LogRecord('inventario.trazas', logging.INFO, '', 0, 'TRACE', (), None)
+    otro = logging.LogRecord('root', logging.INFO, '', 0, 'ADMIN_OP', (), None)
+    assert solo_trazas.filter(traza) and not solo_trazas.filter(otro)
+    assert sin_trazas.filter(otro) and not sin_trazas.filter(traza)
+    print("   ✅ Filtros correctos")
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE LOGGING SIN BLOQUEO")
+    print("=" * 50)
+
+    test_json_con_extras_y_excepcion()
+    test_rotacion_por_tamano_comprimida()
+    test_rotacion_por_tiempo()
+    test_cola_llena_no_bloquea()
+    test_filtro_trazas()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el formato columnar de las tablas virtuales: columnas por
+valor, diccionarios para nombres repetidos y tamaño frente a filas JSON
+"""
+
+import sys
+import os
+import json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios.tabla_columnar import codificar, decodificar, separar_detalle
+
+FILAS = [
+    {'id': 1, 'descripcion': 'Rodamiento', 'categoria': 'Rodamientos', 'ubicaciones': ['A1', 'B2'], 'cantidades': [3, 5]},
+    {'id': 2, 'descripcion': 'Banda', 'categoria': None, 'ubicaciones': [], 'cantidades': []},
+    {'id': 3, 'descripcion': 'Sello', 'categoria': 'Rodamientos', 'ubicaciones': ['B2'], 'cantidades': [1]},
+]
+COLUMNAS = ['id', 'descripcion', 'categoria', 'ubicaciones', 'cantidades']
+
+def test_codificar():
+    """Cada columna es una lista; las de diccionario guardan índices"""
+    print("🧪 Probando codificación columnar...")
+
+    tabla = codificar(FILAS, COLUMNAS, diccionarios=['categoria', 'ubicaciones'])
+    assert tabla == {
+        'total': 3,
+        'columnas': {
+            'id': [1, 2, 3],
+            'descripcion': ['Rodamiento', 'Banda', 'Sello'],
+            'categoria': [0, None, 0],
+            'ubicaciones': [[0, 1], [], [1]],
+            'cantidades': [[3, 5], [], [1]],
+        },
+        'diccionarios': {'categoria': ['Rodamientos'], 'ubicaciones': ['A1', 'B2']},
+    }
+    assert decodificar(tabla) == FILAS
+    assert codificar([], COLUMNAS) == {'total': 0, 'columnas': {columna: [] for columna in COLUMNAS},
+                                       'diccionarios': {}}
+    print("   ✅ Columnas, diccionarios y vuelta a filas")
+
+def test_separar_detalle():
+    """El GROUP_CONCAT de ubicaciones se separa en códigos y cantidades"""
+    print("🧪 Probando detalle de ubicaciones...")
+
+    assert separar_detalle('A1:3, B-2:5') == (['A1', 'B-2'], [3, 5])
+    assert separar_detalle('R:1:7') == (['R:1'], [7])
+    assert separar_detalle(None) == ([], [])
+    print("   ✅ Códigos y cantidades por ubicación")
+
+def test_tamano():
+    """Con nombres repetidos el formato columnar pesa mucho menos que una lista de objetos"""
+    print("🧪 Probando tamaño del payload...")
+
+    filas = [{'id': i, 'descripcion': f'Producto {i}', 'categoria': f'Categoría {i % 12}',
+              'marca': f'Marca {i % 30}', 'stock_total': i % 17} for i in range(5000)]
+    columnar = len(json.dumps(codificar(filas, list(filas[0]), diccionarios=['categoria', 'marca']),
+                              separators=(',', ':')))
+    objetos = len(json.dumps(filas, separators=(',', ':')))
+    assert columnar < objetos * 0.5
+    print(f"   ✅ {columnar / 1024:.0f} KB columnar contra {objetos / 1024:.0f} KB en objetos")
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE TABLAS COLUMNARES")
+    print("=" * 50)
+
+    test_codificar()
+    test_separar_detalle()
+    test_tamano()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Pruebas para las versiones de datos por tabla de los GET condicionales:
+triggers de versión, ETags estables y huella del despliegue
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import versiones
+
+def crear_base_prueba():
+    """Crear una base de datos temporal con algunas de las tablas versionadas"""
+    fd, ruta = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+
+    conn = sqlite3.connect(ruta)
+    conn.execute('CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY, codigo TEXT)')
+    conn.execute('CREATE TABLE inventario (id INTEGER PRIMARY KEY, producto_id INTEGER, ubicacion_id INTEGER, cantidad INTEGER)')
+    conn.execute('CREATE TABLE maquinas (id INTEGER PRIMARY KEY, nombre TEXT)')
+    versiones.crear_tablas(conn)
+    versiones.crear_tablas(conn)  # Idempotente
+    conn.commit()
+    return ruta, conn
+
+def test_triggers():
+    """Cada INSERT, UPDATE o DELETE sube la versión solo de su tabla"""
+    print("🧪 Probando triggers de versión...")
+
+    ruta, conn = crear_base_prueba()
+    try:
+        inicial = versiones.leer(conn)
+        assert set(inicial) == {'base', 'ubicaciones', 'inventario', 'maquinas'}  # Solo las que existen
+
+        conn.execute("INSERT INTO ubicaciones (codigo) VALUES ('A1')")
+        conn.execute('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (1, 1, 5)')
+        conn.execute('UPDATE inventario SET cantidad = 4')
+        conn.execute('DELETE FROM inventario')
+        conn.commit()
+
+        despues = versiones.leer(conn)
+        assert despues['ubicaciones'] == inicial['ubicaciones'] + 1
+        assert despues['inventario'] == inicial['inventario'] + 3
+        assert despues['maquinas'] == inicial['maquinas']
+        assert despues['base'] == inicial['base']
+
+        # Una sentencia sin filas afectadas no cambia la versión
+        conn.execute('UPDATE maquinas SET nombre = nombre')
+        assert versiones.leer(conn, ['maquinas', 'proveedores']) == {
+            'base': inicial['base'], 'maquinas': 0, 'proveedores': 0}
+        print("   ✅ Versiones por tabla")
+    finally:
+        conn.close()
+        os.unlink(ruta)
+
+def test_base_distinta():
+    """Dos bases distintas no comparten ETags aunque sus tablas tengan las mismas versiones"""
+    print("🧪 Probando número de base...")
+
+    ruta1, conn1 = crear_base_prueba()
+    ruta2, conn2 = crear_base_prueba()
+    try:
+        assert versiones.leer(conn1)['base'] != versiones.leer(conn2)['base']
+        print("   ✅ Cada base tiene su número")
+    finally:
+        conn1.close()
+        conn2.close()
+        os.unlink(ruta1)
+        os.unlink(ruta2)
+
+def test_etiqueta():
+    """El ETag solo depende de sus partes"""
+    print("🧪 Probando ETags...")
+
+    a = versiones.etiqueta('ubicaciones', [('search', 'A')], {'inventario': 3})
+    assert a == versiones.etiqueta('ubicaciones', [('search', 'A')], {'inventario': 3})
+    assert a != versiones.etiqueta('ubicaciones', [('search', 'A')], {'inventario': 4})
+    assert a != versiones.etiqueta('ubicaciones', [('search', 'B')], {'inventario': 3})
+    assert len(a) == 20
+
+    directorio = tempfile.mkdtemp()
+    try:
+        plantilla = os.path.join(directorio, 'base.html')
+        with open(plantilla, 'w') as f:
+            f.write('<html>')
+        huella = versiones.huella_archivos([directorio])
+        assert huella == versiones.huella_archivos([directorio])
+        with open(plantilla, 'a') as f:
+            f.write('<body>')
+        assert huella != versiones.huella_archivos([directorio])
+        os.unlink(plantilla)
+    finally:
+        os.rmdir(directorio)
+    print("   ✅ ETags estables y huella del despliegue")
+
+def test_costo_escritura():
+    """El trigger agrega poco a una carga grande"""
+    print("🧪 Probando costo de los triggers...")
+
+    ruta, conn = crear_base_prueba()
+    try:
+        filas = [(i, 1, i % 10) for i in range(20000)]
+        inicio = time.perf_counter()
+        conn.executemany('INSERT INTO inventario (producto_id, ubicacion_id, cantidad) VALUES (?, ?, ?)', filas)
+        conn.commit()
+        tiempo = time.perf_counter() - inicio
+        assert versiones.leer(conn)['inventario'] == 20000
+        assert tiempo < 5
+        print(f"   ✅ 20 000 filas en {tiempo * 1000:.0f} ms con triggers")
+    finally:
+        conn.close()
+        os.unlink(ruta)
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DE VERSIONES DE DATOS")
+    print("=" * 50)
+
+    test_triggers()
+    test_base_distinta()
+    test_etiqueta()
+    test_costo_escritura()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Pruebas para el visor de logs: filtros, paginación por cursor, búsqueda de
+texto y tiempo por página con una bitácora grande
+"""
+
+import sys
+import os
+import time
+import sqlite3
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servicios import bitacora
+from servicios.archivo_logs import ArchivoLogs
+
+# Registros de la prueba de rendimiento (VISOR_LOGS_REGISTROS para probar con más)
+REGISTROS = int(os.environ.get('VISOR_LOGS_REGISTROS', 1000000))
+MAXIMO_MS = 50
+INICIO = 1700000000
+TIPOS = ('STOCK_EDIT', 'CYCLE_COUNT', 'LOCATION_CHANGE', 'STOCK_MINIMO_UPDATE', 'STOCK_ALERT',
+         'BACKUP_DOWNLOAD', 'LOCATION_EDIT')
+
+ESQUEMA_BASE = '''
+    CREATE TABLE productos (id INTEGER PRIMARY KEY, codigo TEXT, descripcion TEXT);
+    CREATE TABLE ubicaciones (id INTEGER PRIMARY KEY, codigo TEXT);
+    CREATE TABLE admin_users (id INTEGER PRIMARY KEY, username TEXT);
+'''
+
+def crear_base(conn, registros, paso=30):
+    """Catálogo chico y `registros` sintéticos de TIPOS, uno cada `paso` segundos"""
+    conn.executescript(ESQUEMA_BASE)
+    conn.executemany('INSERT INTO productos VALUES (?, ?, ?)',
+                     [(i, f'P{i:04d}', f'Rodamiento rígido {i}') for i in range(1, 2001)])
+    conn.executemany('INSERT INTO ubicaciones VALUES (?, ?)', [(i, f'A-{i:03d}') for i in range(1, 301)])
+    conn.executemany('INSERT INTO admin_users VALUES (?, ?)', [(i, f'admin{i}') for i in range(1, 6)])
+    bitacora.crear_tablas(conn)
+    conn.executemany('INSERT INTO tipos_operacion (nombre) VALUES (?)', [(tipo,) for tipo in TIPOS])
+    # Cada 7 registros comparten segundo: el desempate por id también se prueba
+    conn.execute(f'''
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO operation_logs (id, ts, tipo_id, admin_user_id, producto_id, ubicacion_id,
+                                    old_quantity, new_quantity)
+        SELECT i, ? + (i / 7) * ?, 1 + (i * 3) % {len(TIPOS)}, 1 + i % 5, 1 + (i * 13) % 2000,
+               1 + (i * 17) % 300, i % 50, 1 + i % 40
+        FROM n WHERE i > 0
+    ''', (registros, INICIO, paso))
+    conn.commit()
+    bitacora.reindexar_busqueda(conn, lote=20000)
+
+def pagina(conn, limite=bitacora.POR_PAGINA, **filtros):
+    sql, params = bitacora.consulta(**filtros)
+    return conn.execute(sql.format(logs='main.operation_logs', esquema='main'), (*params, limite)).fetchall()
+
+def recorrer(conn, limite, **filtros):
+    """Ids de todas las páginas siguiendo el cursor"""
+    ids = []
+    antes = None
+    while True:
+        filas = pagina(conn, limite, antes=antes, **filtros)
+        ids.extend(fila['id'] for fila in filas)
+        if len(filas) < limite:
+            return ids
+        antes = (filas[-1]['ts'], filas[-1]['id'])
+
+def test_filtros_y_cursor():
+    """Recorrer página por página da lo mismo que filtrar todo de una vez"""
+    print("🧪 Probando filtros y paginación por cursor...")
+
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    crear_base(conn, 3000)
+    stock_edit = conn.execute("SELECT id FROM tipos_operacion WHERE nombre = 'STOCK_EDIT'").fetchone()[0]
+    todos = conn.execute('SELECT * FROM operation_logs ORDER BY ts DESC, id DESC').fetchall()
+    desde, hasta = INICIO + 3600, INICIO + 7200
+    descripciones = {fila['id']: fila['description'] for fila in bitacora.leer(conn.execute(
+        bitacora.SELECT.format(logs='operation_logs')).fetchall())}
+    # Un registro cuyo detalle menciona el producto, para combinar búsqueda y filtros
+    muestra = next(fila for fila in todos if fila['tipo_id'] == stock_edit)
+    producto, ubicacion, admin = muestra['producto_id'], muestra['ubicacion_id'], muestra['admin_user_id']
+
+    casos = [
+        ({}, lambda f: True),
+        ({'tipo_id': stock_edit}, lambda f: f['tipo_id'] == stock_edit),
+        ({'admin_user_id': 2}, lambda f: f['admin_user_id'] == 2),
+        ({'producto_id': producto, 'ubicacion_id': ubicacion},
+         lambda f: f['producto_id'] == producto and f['ubicacion_id'] == ubicacion),
+        ({'desde': desde, 'hasta': hasta}, lambda f: desde <= f['ts'] < hasta),
+        ({'busqueda': 'a-012'}, lambda f: 'A-012' in descripciones[f['id']]),
+        ({'busqueda': f'rigido {producto}', 'admin_user_id': admin},
+         lambda f: f['admin_user_id'] == admin and f'rígido {producto} ' in descripciones[f['id']]),
+        ({'busqueda': 'rodamiento', 'desde': desde, 'hasta': hasta},
+         lambda f: desde <= f['ts'] < hasta and 'Rodamiento' in descripciones[f['id']]),
+    ]
+    for filtros, condicion in casos:
+        esperado = [fila['id'] for fila in todos if condicion(fila)]
+        if 'busqueda' in filtros:
+            esperado.sort(reverse=True)
+        assert esperado, filtros
+        assert recorrer(conn, 37, **filtros) == esperado, filtros
+    assert recorrer(conn, 10, busqueda='inexistente') == []
+    conn.close()
+    print("   ✅ Filtros, búsqueda y cursor coinciden con el filtrado completo")
+
+def test_busqueda_en_archivos():
+    """La búsqueda sigue en los archivos mensuales y lo archivado sale del índice principal"""
+    print("🧪 Probando búsqueda a través de las capas...")
+
+    directorio = tempfile.mkdtemp()
+    try:
+        ruta = os.path.join(directorio, 'inventario.db')
+        conn = sqlite3.connect(ruta, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        crear_base(conn, 0)
+        ahora = int(time.time())
+        for dias in (400, 200, 1):
+            bitacora.registrar_varios(conn, 1, '10.0.0.1', [('LOCATION_CHANGE', 5, 9, None, None,
+                                                             {'cantidad': dias, 'destino': 'Z-9'})],
+                                      ts=ahora - dias * 86400)
+
+        archivo = ArchivoLogs(os.path.join(directorio, 'archivo'), diccionarios=('tipos_operacion', 'direcciones_ip'),
+                              al_archivar=bitacora.al_archivar)
+        assert archivo.archivar_lote(conn, archivo.corte()) == 2
+        assert len(archivo.meses()) == 2
+
+        # Antes de reindexar el índice principal tiene entradas de lo archivado; no se leen
+        lectura = sqlite3.connect(f'file:{ruta}?mode=ro', uri=True)
+        lectura.row_factory = sqlite3.Row
+        sql, params = bitacora.consulta(busqueda='Z-9', ubicacion_id=9)
+        filas = archivo.consultar(lectura, sql, params, limite=10)
+        assert [fila['ts'] for fila in filas] == [ahora - dias * 86400 for dias in (1, 200, 400)]
+        sql, params = bitacora.consulta(busqueda='Z-9', antes=(filas[0]['ts'], filas[0]['id']))
+        assert len(archivo.consultar(lectura, sql, params, limite=10)) == 2
+
+        assert bitacora.reindexar_busqueda(conn) == 1
+        assert conn.execute("SELECT COUNT(*) FROM operation_logs_fts WHERE operation_logs_fts MATCH 'z'").fetchone()[0] == 1
+        sql, params = bitacora.consulta(busqueda='Z-9')
+        assert len(archivo.consultar(lectura, sql, params, limite=10)) == 3
+        lectura.close()
+        conn.close()
+        print("   ✅ Búsqueda en base principal y archivos mensuales")
+    finally:
+        shutil.rmtree(directorio)
+
+def test_rendimiento_pagina():
+    """Con muchos registros cada página usa un índice sin ordenar y tarda menos de MAXIMO_MS"""
+    print(f"🧪 Probando tiempo por página con {REGISTROS:,} registros...")
+
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    inicio = time.perf_counter()
+    crear_base(conn, REGISTROS)
+    print(f"   Base creada en {time.perf_counter() - inicio:.1f} s")
+
+    mitad = (INICIO + REGISTROS // 14 * 30, REGISTROS // 2)
+    rango = {'desde': INICIO + REGISTROS // 7 * 10, 'hasta': INICIO + REGISTROS // 7 * 20}
+    casos = [
+        {}, {'tipo_id': 1}, {'admin_user_id': 3}, {'producto_id': 77}, {'ubicacion_id': 12}, rango,
+        {'tipo_id': 1, **rango}, {'busqueda': 'A-012'}, {'busqueda': 'rigido 77'},
+        {'busqueda': 'rodamiento', 'producto_id': 77}, {'busqueda': 'A-012', 'producto_id': 78},
+        {'busqueda': 'rodamiento', 'tipo_id': 1, **rango}, {'busqueda': 'inexistente'},
+    ]
+    for filtros in casos:
+        for antes in (None, mitad):
+            sql, params = bitacora.consulta(antes=antes, **filtros)
+            sql = sql.format(logs='main.operation_logs', esquema='main')
+            plan = ' | '.join(fila[3] for fila in conn.execute('EXPLAIN QUERY PLAN ' + sql, (*params, 101)))
+            assert 'TEMP B-TREE' not in plan, plan
+            assert 'SCAN ol' not in plan or 'USING INDEX' in plan, plan
+
+            tiempos = []
+            for _ in range(3):
+                t = time.perf_counter()
+                conn.execute(sql, (*params, 101)).fetchall()
+                tiempos.append((time.perf_counter() - t) * 1000)
+            print(f"   {min(tiempos):7.2f} ms  {filtros}{' (cursor)' if antes else ''}")
+            assert min(tiempos) < MAXIMO_MS, (filtros, tiempos)
+    conn.close()
+    print(f"   ✅ Todas las páginas en menos de {MAXIMO_MS} ms")
+
+def main():
+    """Ejecutar todas las pruebas"""
+    print("🚀 PRUEBAS DEL VISOR DE LOGS")
+    print("=" * 50)
+
+    test_filtros_y_cursor()
+    test_busqueda_en_archivos()
+    test_rendimiento_pagina()
+
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()